@@ -0,0 +1,32 @@
+-- "rl-serving" index profile: composite, covering and partial indexes for the
+-- RL agent query workload (src/storage/workload.py). Built after data load,
+-- on top of the single-column FK indexes in schema.sql.
+
+-- Open tasks assigned to a user ordered by due date (partial: incomplete tasks only)
+CREATE INDEX IF NOT EXISTS idx_rl_tasks_open_assignee_due ON tasks(assignee_id, due_date) WHERE completed = 0;
+
+-- Overdue / open tasks in a project ordered by due date
+CREATE INDEX IF NOT EXISTS idx_rl_tasks_open_project_due ON tasks(project_id, due_date) WHERE completed = 0;
+
+-- Open task counts per section of a project (covering)
+CREATE INDEX IF NOT EXISTS idx_rl_tasks_open_project_section ON tasks(project_id, section_id) WHERE completed = 0;
+
+-- Tasks in a section ordered by creation time
+CREATE INDEX IF NOT EXISTS idx_rl_tasks_section_created ON tasks(section_id, created_at);
+
+-- Latest comments on a task
+CREATE INDEX IF NOT EXISTS idx_rl_comments_task_created ON comments(task_id, created_at);
+
+-- Open subtasks assigned to a user ordered by due date
+CREATE INDEX IF NOT EXISTS idx_rl_subtasks_open_assignee_due ON subtasks(assignee_id, due_date) WHERE completed = 0;
+
+-- Teams of a user (covering)
+CREATE INDEX IF NOT EXISTS idx_rl_team_memberships_user_team ON team_memberships(user_id, team_id);
+
+-- Active projects of a team
+CREATE INDEX IF NOT EXISTS idx_rl_projects_team_active ON projects(team_id) WHERE is_archived = 0;
+
+-- Tasks carrying a tag (covering)
+CREATE INDEX IF NOT EXISTS idx_rl_task_tags_tag_task ON task_tags(tag_id, task_id);
+
+ANALYZE;
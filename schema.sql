@@ -167,6 +167,12 @@ CREATE TABLE attachments (
     FOREIGN KEY(uploaded_by) REFERENCES users(id) ON DELETE SET NULL
 );
 
+-- Generation bookkeeping: run config, completed stages and checkpoints (JSON values)
+CREATE TABLE generation_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
 -- Performance indexes
 CREATE INDEX idx_users_org ON users(organization_id);
 CREATE INDEX idx_users_role ON users(role);
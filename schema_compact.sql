@@ -0,0 +1,336 @@
+-- Compact storage variant of schema.sql.
+--
+-- Encoded base tables (c_*) store timestamps as INTEGER unix epoch
+-- microseconds, dates as INTEGER days since 1970-01-01, gids as 16-byte BLOBs
+-- and low-cardinality strings as codes into lk_* lookup tables. Views with the
+-- original table names present the TEXT shape of schema.sql, so existing
+-- queries (validate_db.py, RL envs) run unchanged; hot paths can query the
+-- c_* tables directly with integer predicates.
+--
+-- Microseconds keep the fractional seconds of datetime.isoformat() values
+-- (builds without a pinned base time), so timestamps round-trip exactly.
+-- Encoding and views use strftime()/date() with the 'unixepoch' modifier, not
+-- the unixepoch() function (SQLite >= 3.38), so any SQLite 3 will do.
+PRAGMA foreign_keys = ON;
+
+-- Enum lookup tables
+CREATE TABLE lk_role (code INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE lk_membership_role (code INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE lk_project_type (code INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE lk_section_name (code INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE lk_priority (code INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE lk_field_type (code INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+
+INSERT INTO lk_role (code, name) VALUES
+    (1, 'Engineer'), (2, 'Product'), (3, 'Designer'), (4, 'Marketing'), (5, 'Sales'), (6, 'Ops'), (7, 'HR');
+INSERT INTO lk_membership_role (code, name) VALUES (1, 'member'), (2, 'lead');
+INSERT INTO lk_project_type (code, name) VALUES (1, 'engineering'), (2, 'marketing'), (3, 'ops');
+INSERT INTO lk_section_name (code, name) VALUES
+    (1, 'Backlog'), (2, 'To Do'), (3, 'In Progress'), (4, 'Review'), (5, 'Done');
+INSERT INTO lk_priority (code, name) VALUES (1, 'low'), (2, 'medium'), (3, 'high'), (4, 'urgent');
+INSERT INTO lk_field_type (code, name) VALUES (1, 'enum'), (2, 'number'), (3, 'text');
+
+-- Organizations / Workspaces
+CREATE TABLE c_organizations (
+    id INTEGER PRIMARY KEY,
+    gid BLOB UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    domain TEXT,
+    created_at INTEGER
+);
+
+-- Teams
+CREATE TABLE c_teams (
+    id INTEGER PRIMARY KEY,
+    gid BLOB UNIQUE NOT NULL,
+    organization_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT,
+    created_at INTEGER,
+    FOREIGN KEY(organization_id) REFERENCES c_organizations(id) ON DELETE CASCADE
+);
+
+-- Users
+CREATE TABLE c_users (
+    id INTEGER PRIMARY KEY,
+    gid BLOB UNIQUE NOT NULL,
+    organization_id INTEGER NOT NULL,
+    full_name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    role_code INTEGER REFERENCES lk_role(code),
+    created_at INTEGER,
+    is_active INTEGER DEFAULT 1,
+    FOREIGN KEY(organization_id) REFERENCES c_organizations(id) ON DELETE CASCADE
+);
+
+-- Team memberships
+CREATE TABLE c_team_memberships (
+    id INTEGER PRIMARY KEY,
+    team_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    role_code INTEGER REFERENCES lk_membership_role(code),
+    joined_at INTEGER,
+    FOREIGN KEY(team_id) REFERENCES c_teams(id) ON DELETE CASCADE,
+    FOREIGN KEY(user_id) REFERENCES c_users(id) ON DELETE CASCADE
+);
+
+-- Projects
+CREATE TABLE c_projects (
+    id INTEGER PRIMARY KEY,
+    gid BLOB UNIQUE NOT NULL,
+    team_id INTEGER,
+    organization_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT,
+    created_at INTEGER,
+    is_archived INTEGER DEFAULT 0,
+    project_type_code INTEGER REFERENCES lk_project_type(code),
+    FOREIGN KEY(team_id) REFERENCES c_teams(id) ON DELETE SET NULL,
+    FOREIGN KEY(organization_id) REFERENCES c_organizations(id) ON DELETE CASCADE
+);
+
+-- Sections
+CREATE TABLE c_sections (
+    id INTEGER PRIMARY KEY,
+    gid BLOB UNIQUE NOT NULL,
+    project_id INTEGER NOT NULL,
+    name_code INTEGER NOT NULL REFERENCES lk_section_name(code),
+    position INTEGER,
+    FOREIGN KEY(project_id) REFERENCES c_projects(id) ON DELETE CASCADE
+);
+
+-- Tasks (due_date in days since epoch, timestamps in microseconds)
+CREATE TABLE c_tasks (
+    id INTEGER PRIMARY KEY,
+    gid BLOB UNIQUE NOT NULL,
+    project_id INTEGER,
+    section_id INTEGER,
+    name TEXT NOT NULL,
+    description TEXT,
+    assignee_id INTEGER,
+    created_at INTEGER,
+    due_date INTEGER,
+    completed INTEGER DEFAULT 0,
+    completed_at INTEGER,
+    priority_code INTEGER REFERENCES lk_priority(code),
+    effort INTEGER,
+    FOREIGN KEY(project_id) REFERENCES c_projects(id) ON DELETE SET NULL,
+    FOREIGN KEY(section_id) REFERENCES c_sections(id) ON DELETE SET NULL,
+    FOREIGN KEY(assignee_id) REFERENCES c_users(id) ON DELETE SET NULL
+);
+
+-- Subtasks
+CREATE TABLE c_subtasks (
+    id INTEGER PRIMARY KEY,
+    gid BLOB UNIQUE NOT NULL,
+    parent_task_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    assignee_id INTEGER,
+    created_at INTEGER,
+    due_date INTEGER,
+    completed INTEGER DEFAULT 0,
+    completed_at INTEGER,
+    FOREIGN KEY(parent_task_id) REFERENCES c_tasks(id) ON DELETE CASCADE,
+    FOREIGN KEY(assignee_id) REFERENCES c_users(id) ON DELETE SET NULL
+);
+
+-- Comments / Stories
+CREATE TABLE c_comments (
+    id INTEGER PRIMARY KEY,
+    gid BLOB UNIQUE NOT NULL,
+    task_id INTEGER NOT NULL,
+    author_id INTEGER,
+    text TEXT,
+    created_at INTEGER,
+    FOREIGN KEY(task_id) REFERENCES c_tasks(id) ON DELETE CASCADE,
+    FOREIGN KEY(author_id) REFERENCES c_users(id) ON DELETE SET NULL
+);
+
+-- Custom field definitions (project-scoped)
+CREATE TABLE c_custom_field_defs (
+    id INTEGER PRIMARY KEY,
+    gid BLOB UNIQUE NOT NULL,
+    project_id INTEGER,
+    name TEXT NOT NULL,
+    field_type_code INTEGER NOT NULL REFERENCES lk_field_type(code),
+    options TEXT,
+    FOREIGN KEY(project_id) REFERENCES c_projects(id) ON DELETE CASCADE
+);
+
+-- Custom field values (task-scoped); nothing to encode, so the original name is kept
+CREATE TABLE custom_field_values (
+    id INTEGER PRIMARY KEY,
+    custom_field_def_id INTEGER NOT NULL,
+    task_id INTEGER NOT NULL,
+    value TEXT,
+    FOREIGN KEY(custom_field_def_id) REFERENCES c_custom_field_defs(id) ON DELETE CASCADE,
+    FOREIGN KEY(task_id) REFERENCES c_tasks(id) ON DELETE CASCADE
+);
+
+-- Tags
+CREATE TABLE c_tags (
+    id INTEGER PRIMARY KEY,
+    gid BLOB UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    color TEXT
+);
+
+-- Task-Tag association
+CREATE TABLE task_tags (
+    id INTEGER PRIMARY KEY,
+    task_id INTEGER NOT NULL,
+    tag_id INTEGER NOT NULL,
+    FOREIGN KEY(task_id) REFERENCES c_tasks(id) ON DELETE CASCADE,
+    FOREIGN KEY(tag_id) REFERENCES c_tags(id) ON DELETE CASCADE
+);
+
+-- Attachments (record metadata only)
+CREATE TABLE c_attachments (
+    id INTEGER PRIMARY KEY,
+    gid BLOB UNIQUE NOT NULL,
+    task_id INTEGER NOT NULL,
+    filename TEXT,
+    url TEXT,
+    uploaded_by INTEGER,
+    created_at INTEGER,
+    FOREIGN KEY(task_id) REFERENCES c_tasks(id) ON DELETE CASCADE,
+    FOREIGN KEY(uploaded_by) REFERENCES c_users(id) ON DELETE SET NULL
+);
+
+-- Generation bookkeeping, copied verbatim
+CREATE TABLE generation_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+-- Performance indexes
+CREATE INDEX idx_users_org ON c_users(organization_id);
+CREATE INDEX idx_users_role ON c_users(role_code);
+CREATE INDEX idx_teams_org ON c_teams(organization_id);
+CREATE INDEX idx_team_memberships_team ON c_team_memberships(team_id);
+CREATE INDEX idx_team_memberships_user ON c_team_memberships(user_id);
+CREATE INDEX idx_projects_team ON c_projects(team_id);
+CREATE INDEX idx_projects_org ON c_projects(organization_id);
+CREATE INDEX idx_projects_type ON c_projects(project_type_code);
+CREATE INDEX idx_sections_project ON c_sections(project_id);
+CREATE INDEX idx_tasks_project ON c_tasks(project_id);
+CREATE INDEX idx_tasks_section ON c_tasks(section_id);
+CREATE INDEX idx_tasks_assignee ON c_tasks(assignee_id);
+CREATE INDEX idx_tasks_due_date ON c_tasks(due_date);
+CREATE INDEX idx_tasks_completed ON c_tasks(completed);
+CREATE INDEX idx_subtasks_parent ON c_subtasks(parent_task_id);
+CREATE INDEX idx_subtasks_assignee ON c_subtasks(assignee_id);
+CREATE INDEX idx_comments_task ON c_comments(task_id);
+CREATE INDEX idx_comments_author ON c_comments(author_id);
+CREATE INDEX idx_custom_field_defs_project ON c_custom_field_defs(project_id);
+CREATE INDEX idx_custom_field_values_task ON custom_field_values(task_id);
+CREATE INDEX idx_custom_field_values_def ON custom_field_values(custom_field_def_id);
+CREATE INDEX idx_task_tags_task ON task_tags(task_id);
+CREATE INDEX idx_task_tags_tag ON task_tags(tag_id);
+CREATE INDEX idx_attachments_task ON c_attachments(task_id);
+CREATE INDEX idx_attachments_uploader ON c_attachments(uploaded_by);
+
+-- Unique constraints for junction tables
+CREATE UNIQUE INDEX idx_task_tags_unique ON task_tags(task_id, tag_id);
+CREATE UNIQUE INDEX idx_team_memberships_unique ON c_team_memberships(team_id, user_id);
+
+-- Compatibility views: the TEXT shape of schema.sql, with a 6-digit fraction
+-- on timestamps that have one (as datetime.isoformat() writes them)
+CREATE VIEW organizations AS
+SELECT o.id,
+       lower(substr(hex(o.gid), 1, 8) || '-' || substr(hex(o.gid), 9, 4) || '-' || substr(hex(o.gid), 13, 4) || '-' || substr(hex(o.gid), 17, 4) || '-' || substr(hex(o.gid), 21)) AS gid,
+       o.name, o.domain,
+       strftime('%Y-%m-%dT%H:%M:%S', o.created_at / 1000000, 'unixepoch')
+           || CASE WHEN o.created_at % 1000000 THEN printf('.%06d', o.created_at % 1000000) ELSE '' END AS created_at
+FROM c_organizations o;
+
+CREATE VIEW teams AS
+SELECT t.id,
+       lower(substr(hex(t.gid), 1, 8) || '-' || substr(hex(t.gid), 9, 4) || '-' || substr(hex(t.gid), 13, 4) || '-' || substr(hex(t.gid), 17, 4) || '-' || substr(hex(t.gid), 21)) AS gid,
+       t.organization_id, t.name, t.description,
+       strftime('%Y-%m-%dT%H:%M:%S', t.created_at / 1000000, 'unixepoch')
+           || CASE WHEN t.created_at % 1000000 THEN printf('.%06d', t.created_at % 1000000) ELSE '' END AS created_at
+FROM c_teams t;
+
+CREATE VIEW users AS
+SELECT u.id,
+       lower(substr(hex(u.gid), 1, 8) || '-' || substr(hex(u.gid), 9, 4) || '-' || substr(hex(u.gid), 13, 4) || '-' || substr(hex(u.gid), 17, 4) || '-' || substr(hex(u.gid), 21)) AS gid,
+       u.organization_id, u.full_name, u.email, r.name AS role,
+       strftime('%Y-%m-%dT%H:%M:%S', u.created_at / 1000000, 'unixepoch')
+           || CASE WHEN u.created_at % 1000000 THEN printf('.%06d', u.created_at % 1000000) ELSE '' END AS created_at,
+       u.is_active
+FROM c_users u LEFT JOIN lk_role r ON r.code = u.role_code;
+
+CREATE VIEW team_memberships AS
+SELECT m.id, m.team_id, m.user_id, r.name AS role,
+       strftime('%Y-%m-%dT%H:%M:%S', m.joined_at / 1000000, 'unixepoch')
+           || CASE WHEN m.joined_at % 1000000 THEN printf('.%06d', m.joined_at % 1000000) ELSE '' END AS joined_at
+FROM c_team_memberships m LEFT JOIN lk_membership_role r ON r.code = m.role_code;
+
+CREATE VIEW projects AS
+SELECT p.id,
+       lower(substr(hex(p.gid), 1, 8) || '-' || substr(hex(p.gid), 9, 4) || '-' || substr(hex(p.gid), 13, 4) || '-' || substr(hex(p.gid), 17, 4) || '-' || substr(hex(p.gid), 21)) AS gid,
+       p.team_id, p.organization_id, p.name, p.description,
+       strftime('%Y-%m-%dT%H:%M:%S', p.created_at / 1000000, 'unixepoch')
+           || CASE WHEN p.created_at % 1000000 THEN printf('.%06d', p.created_at % 1000000) ELSE '' END AS created_at,
+       p.is_archived, pt.name AS project_type
+FROM c_projects p LEFT JOIN lk_project_type pt ON pt.code = p.project_type_code;
+
+CREATE VIEW sections AS
+SELECT s.id,
+       lower(substr(hex(s.gid), 1, 8) || '-' || substr(hex(s.gid), 9, 4) || '-' || substr(hex(s.gid), 13, 4) || '-' || substr(hex(s.gid), 17, 4) || '-' || substr(hex(s.gid), 21)) AS gid,
+       s.project_id, n.name, s.position
+FROM c_sections s JOIN lk_section_name n ON n.code = s.name_code;
+
+CREATE VIEW tasks AS
+SELECT t.id,
+       lower(substr(hex(t.gid), 1, 8) || '-' || substr(hex(t.gid), 9, 4) || '-' || substr(hex(t.gid), 13, 4) || '-' || substr(hex(t.gid), 17, 4) || '-' || substr(hex(t.gid), 21)) AS gid,
+       t.project_id, t.section_id, t.name, t.description, t.assignee_id,
+       strftime('%Y-%m-%dT%H:%M:%S', t.created_at / 1000000, 'unixepoch')
+           || CASE WHEN t.created_at % 1000000 THEN printf('.%06d', t.created_at % 1000000) ELSE '' END AS created_at,
+       date(t.due_date * 86400, 'unixepoch') AS due_date,
+       t.completed,
+       strftime('%Y-%m-%dT%H:%M:%S', t.completed_at / 1000000, 'unixepoch')
+           || CASE WHEN t.completed_at % 1000000 THEN printf('.%06d', t.completed_at % 1000000) ELSE '' END AS completed_at,
+       pr.name AS priority, t.effort
+FROM c_tasks t LEFT JOIN lk_priority pr ON pr.code = t.priority_code;
+
+CREATE VIEW subtasks AS
+SELECT s.id,
+       lower(substr(hex(s.gid), 1, 8) || '-' || substr(hex(s.gid), 9, 4) || '-' || substr(hex(s.gid), 13, 4) || '-' || substr(hex(s.gid), 17, 4) || '-' || substr(hex(s.gid), 21)) AS gid,
+       s.parent_task_id, s.name, s.assignee_id,
+       strftime('%Y-%m-%dT%H:%M:%S', s.created_at / 1000000, 'unixepoch')
+           || CASE WHEN s.created_at % 1000000 THEN printf('.%06d', s.created_at % 1000000) ELSE '' END AS created_at,
+       date(s.due_date * 86400, 'unixepoch') AS due_date,
+       s.completed,
+       strftime('%Y-%m-%dT%H:%M:%S', s.completed_at / 1000000, 'unixepoch')
+           || CASE WHEN s.completed_at % 1000000 THEN printf('.%06d', s.completed_at % 1000000) ELSE '' END AS completed_at
+FROM c_subtasks s;
+
+CREATE VIEW comments AS
+SELECT c.id,
+       lower(substr(hex(c.gid), 1, 8) || '-' || substr(hex(c.gid), 9, 4) || '-' || substr(hex(c.gid), 13, 4) || '-' || substr(hex(c.gid), 17, 4) || '-' || substr(hex(c.gid), 21)) AS gid,
+       c.task_id, c.author_id, c.text,
+       strftime('%Y-%m-%dT%H:%M:%S', c.created_at / 1000000, 'unixepoch')
+           || CASE WHEN c.created_at % 1000000 THEN printf('.%06d', c.created_at % 1000000) ELSE '' END AS created_at
+FROM c_comments c;
+
+CREATE VIEW custom_field_defs AS
+SELECT d.id,
+       lower(substr(hex(d.gid), 1, 8) || '-' || substr(hex(d.gid), 9, 4) || '-' || substr(hex(d.gid), 13, 4) || '-' || substr(hex(d.gid), 17, 4) || '-' || substr(hex(d.gid), 21)) AS gid,
+       d.project_id, d.name, ft.name AS field_type, d.options
+FROM c_custom_field_defs d JOIN lk_field_type ft ON ft.code = d.field_type_code;
+
+CREATE VIEW tags AS
+SELECT t.id,
+       lower(substr(hex(t.gid), 1, 8) || '-' || substr(hex(t.gid), 9, 4) || '-' || substr(hex(t.gid), 13, 4) || '-' || substr(hex(t.gid), 17, 4) || '-' || substr(hex(t.gid), 21)) AS gid,
+       t.name, t.color
+FROM c_tags t;
+
+CREATE VIEW attachments AS
+SELECT a.id,
+       lower(substr(hex(a.gid), 1, 8) || '-' || substr(hex(a.gid), 9, 4) || '-' || substr(hex(a.gid), 13, 4) || '-' || substr(hex(a.gid), 17, 4) || '-' || substr(hex(a.gid), 21)) AS gid,
+       a.task_id, a.filename, a.url, a.uploaded_by,
+       strftime('%Y-%m-%dT%H:%M:%S', a.created_at / 1000000, 'unixepoch')
+           || CASE WHEN a.created_at % 1000000 THEN printf('.%06d', a.created_at % 1000000) ELSE '' END AS created_at
+FROM c_attachments a;
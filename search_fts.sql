@@ -0,0 +1,60 @@
+-- Full-text search over tasks, subtasks and comments (src/access/search.py).
+-- External-content FTS5 tables: the text lives once, in the base tables.
+-- Built in bulk after data load; triggers keep the index in sync afterwards.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+    name, description, content='tasks', content_rowid='id',
+    tokenize='porter unicode61', prefix='2 3'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS subtasks_fts USING fts5(
+    name, content='subtasks', content_rowid='id',
+    tokenize='porter unicode61', prefix='2 3'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+    text, content='comments', content_rowid='id',
+    tokenize='porter unicode61', prefix='2 3'
+);
+
+-- Bulk build from the base tables, then merge segments into one b-tree
+INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild');
+INSERT INTO subtasks_fts(subtasks_fts) VALUES ('rebuild');
+INSERT INTO comments_fts(comments_fts) VALUES ('rebuild');
+INSERT INTO tasks_fts(tasks_fts) VALUES ('optimize');
+INSERT INTO subtasks_fts(subtasks_fts) VALUES ('optimize');
+INSERT INTO comments_fts(comments_fts) VALUES ('optimize');
+
+-- Sync triggers for later mutations
+CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_fts(tasks_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF name, description ON tasks BEGIN
+    INSERT INTO tasks_fts(tasks_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+    INSERT INTO tasks_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS subtasks_fts_ai AFTER INSERT ON subtasks BEGIN
+    INSERT INTO subtasks_fts(rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS subtasks_fts_ad AFTER DELETE ON subtasks BEGIN
+    INSERT INTO subtasks_fts(subtasks_fts, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+CREATE TRIGGER IF NOT EXISTS subtasks_fts_au AFTER UPDATE OF name ON subtasks BEGIN
+    INSERT INTO subtasks_fts(subtasks_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    INSERT INTO subtasks_fts(rowid, name) VALUES (new.id, new.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS comments_fts_ai AFTER INSERT ON comments BEGIN
+    INSERT INTO comments_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS comments_fts_ad AFTER DELETE ON comments BEGIN
+    INSERT INTO comments_fts(comments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS comments_fts_au AFTER UPDATE OF text ON comments BEGIN
+    INSERT INTO comments_fts(comments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO comments_fts(rowid, text) VALUES (new.id, new.text);
+END;
@@ -0,0 +1,8 @@
+# Read-side access to a generated DB: pooled read-only connections, typed queries, search, the Asana-shaped API
+# and routing over a partitioned layout.
+from .api import ApiError, AsanaAPI
+from .pool import ConnectionPool, connect_readonly
+from .queries import (Collaborator, Comment, Project, ProjectStats, SectionStats, SeedDB, Section, Task, Team,
+                      TeamStats, User, UserCollaboration, UserWorkload, Workspace)
+from .router import PartitionRouter
+from .search import SearchHit, build_search_index, search
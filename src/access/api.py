@@ -0,0 +1,422 @@
+"""Asana-shaped resource layer over a generated DB.
+
+Maps gid-addressed REST paths (``/api/1.0/tasks/{gid}``,
+``/projects/{gid}/tasks``, ...) to SQL, with cursor pagination and
+``opt_fields`` projection. Transport lives in ``server.py``; this module only
+turns (method, path, query, body) into (status, payload).
+"""
+import base64
+import binascii
+import json
+import sqlite3
+import uuid
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode
+
+from src.access.search import has_search_index, search
+
+API_PREFIX = "/api/1.0"
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 100
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Resource(NamedTuple):
+    table: str
+    resource_type: str
+    columns: Dict[str, str]                       # API field -> column
+    refs: Dict[str, Tuple[str, str]] = {}         # API field -> (FK column, target resource)
+    compact: Tuple[str, ...] = ("name",)
+    bools: Tuple[str, ...] = ()
+    json_fields: Tuple[str, ...] = ()
+
+
+RESOURCES = {
+    "workspaces": Resource("organizations", "workspace",
+                           {"name": "name", "domain": "domain", "created_at": "created_at"}),
+    "teams": Resource("teams", "team",
+                      {"name": "name", "description": "description", "created_at": "created_at"},
+                      refs={"organization": ("organization_id", "workspaces")}),
+    "users": Resource("users", "user",
+                      {"name": "full_name", "email": "email", "role": "role",
+                       "is_active": "is_active", "created_at": "created_at"},
+                      refs={"workspace": ("organization_id", "workspaces")}, bools=("is_active",)),
+    "projects": Resource("projects", "project",
+                         {"name": "name", "notes": "description", "created_at": "created_at",
+                          "archived": "is_archived", "project_type": "project_type"},
+                         refs={"team": ("team_id", "teams"), "workspace": ("organization_id", "workspaces")},
+                         bools=("archived",)),
+    "sections": Resource("sections", "section", {"name": "name", "position": "position"},
+                         refs={"project": ("project_id", "projects")}),
+    "tasks": Resource("tasks", "task",
+                      {"name": "name", "notes": "description", "created_at": "created_at",
+                       "due_on": "due_date", "completed": "completed", "completed_at": "completed_at",
+                       "priority": "priority", "effort": "effort"},
+                      refs={"assignee": ("assignee_id", "users"), "project": ("project_id", "projects"),
+                            "section": ("section_id", "sections")},
+                      bools=("completed",)),
+    "subtasks": Resource("subtasks", "task",
+                         {"name": "name", "created_at": "created_at", "due_on": "due_date",
+                          "completed": "completed", "completed_at": "completed_at"},
+                         refs={"assignee": ("assignee_id", "users"), "parent": ("parent_task_id", "tasks")},
+                         bools=("completed",)),
+    "stories": Resource("comments", "story", {"text": "text", "created_at": "created_at"},
+                        refs={"created_by": ("author_id", "users"), "target": ("task_id", "tasks")},
+                        compact=("text",)),
+    "tags": Resource("tags", "tag", {"name": "name", "color": "color"}),
+    "custom_fields": Resource("custom_field_defs", "custom_field",
+                              {"name": "name", "type": "field_type", "enum_options": "options"},
+                              refs={"project": ("project_id", "projects")}, json_fields=("enum_options",)),
+    "attachments": Resource("attachments", "attachment",
+                            {"name": "filename", "download_url": "url", "created_at": "created_at"},
+                            refs={"parent": ("task_id", "tasks"), "created_by": ("uploaded_by", "users")}),
+}
+
+# (parent resource, relation) -> (child resource, filter on the parent's id)
+COLLECTIONS = {
+    ("workspaces", "teams"): ("teams", "organization_id = ?"),
+    ("workspaces", "users"): ("users", "organization_id = ?"),
+    ("workspaces", "projects"): ("projects", "organization_id = ?"),
+    ("teams", "projects"): ("projects", "team_id = ?"),
+    ("teams", "users"): ("users", "id IN (SELECT user_id FROM team_memberships WHERE team_id = ?)"),
+    ("users", "teams"): ("teams", "id IN (SELECT team_id FROM team_memberships WHERE user_id = ?)"),
+    ("users", "tasks"): ("tasks", "assignee_id = ?"),
+    ("projects", "sections"): ("sections", "project_id = ?"),
+    ("projects", "tasks"): ("tasks", "project_id = ?"),
+    ("projects", "custom_fields"): ("custom_fields", "project_id = ?"),
+    ("sections", "tasks"): ("tasks", "section_id = ?"),
+    ("tasks", "subtasks"): ("subtasks", "parent_task_id = ?"),
+    ("tasks", "stories"): ("stories", "task_id = ?"),
+    ("tasks", "tags"): ("tags", "id IN (SELECT tag_id FROM task_tags WHERE task_id = ?)"),
+    ("tasks", "attachments"): ("attachments", "task_id = ?"),
+    ("tags", "tasks"): ("tasks", "id IN (SELECT task_id FROM task_tags WHERE tag_id = ?)"),
+}
+
+
+def _task_custom_fields(conn: sqlite3.Connection, ids: list) -> dict:
+    out = {i: [] for i in ids}
+    rows = conn.execute(
+        f"""SELECT v.task_id, d.gid, d.name, d.field_type, v.value
+            FROM custom_field_values v JOIN custom_field_defs d ON d.id = v.custom_field_def_id
+            WHERE v.task_id IN ({','.join('?' * len(ids))}) ORDER BY v.id""", ids)
+    for task_id, gid, name, field_type, value in rows:
+        out[task_id].append({"gid": gid, "resource_type": "custom_field", "name": name,
+                             "type": field_type, "display_value": value})
+    return out
+
+
+def _task_tags(conn: sqlite3.Connection, ids: list) -> dict:
+    out = {i: [] for i in ids}
+    rows = conn.execute(
+        f"""SELECT tt.task_id, t.gid, t.name FROM task_tags tt JOIN tags t ON t.id = tt.tag_id
+            WHERE tt.task_id IN ({','.join('?' * len(ids))}) ORDER BY tt.id""", ids)
+    for task_id, gid, name in rows:
+        out[task_id].append({"gid": gid, "resource_type": "tag", "name": name})
+    return out
+
+
+def _task_num_subtasks(conn: sqlite3.Connection, ids: list) -> dict:
+    out = dict.fromkeys(ids, 0)
+    rows = conn.execute(
+        f"""SELECT parent_task_id, COUNT(*) FROM subtasks
+            WHERE parent_task_id IN ({','.join('?' * len(ids))}) GROUP BY parent_task_id""", ids)
+    out.update(rows)
+    return out
+
+
+# Fields computed from other tables, batched per page
+EXTRAS = {
+    "tasks": {"custom_fields": _task_custom_fields, "tags": _task_tags, "num_subtasks": _task_num_subtasks},
+}
+
+
+def encode_offset(last_id: int) -> str:
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_offset(token: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        prefix, value = raw.split(":", 1)
+        if prefix != "id":
+            raise ValueError(prefix)
+        return int(value)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise ApiError(400, f"offset: invalid pagination token {token!r}")
+
+
+def parse_opt_fields(value: Optional[str]) -> Optional[dict]:
+    """``"name,assignee.email"`` -> ``{"name": set(), "assignee": {"email"}}``."""
+    if not value:
+        return None
+    fields = {}
+    for item in value.split(","):
+        head, _, sub = item.strip().partition(".")
+        if head:
+            fields.setdefault(head, set())
+            if sub:
+                fields[head].add(sub.partition(".")[0])
+    return fields
+
+
+def _now() -> str:
+    return datetime.utcnow().replace(microsecond=0).isoformat()
+
+
+class AsanaAPI:
+    """Request handling over one SQLite connection (owned by the caller)."""
+
+    def __init__(self, conn: sqlite3.Connection, writable: bool = True):
+        self.conn = conn
+        self.writable = writable
+        conn.row_factory = sqlite3.Row
+
+    # --- rendering -------------------------------------------------------
+    def _full_fields(self, name: str) -> dict:
+        res = RESOURCES[name]
+        return {f: set() for f in [*res.columns, *res.refs, *EXTRAS.get(name, {})]}
+
+    def _select(self, name: str, where: str, params: tuple, fields: dict, limit: Optional[int] = None) -> list:
+        """Rendered records as ``(row id, record)`` pairs, ordered by id."""
+        res = RESOURCES[name]
+        extras = EXTRAS.get(name, {})
+        columns = ["id", "gid"]
+        columns += [res.columns[f] for f in fields if f in res.columns]
+        columns += [res.refs[f][0] for f in fields if f in res.refs]
+        sql = f"SELECT {', '.join(dict.fromkeys(columns))} FROM {res.table} WHERE {where} ORDER BY id"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        rows = self.conn.execute(sql, params).fetchall()
+        if not rows:
+            return []
+
+        ref_values = {}
+        for field in fields:
+            if field in res.refs:
+                fk, target = res.refs[field]
+                ids = sorted({r[fk] for r in rows if r[fk] is not None})
+                ref_values[field] = self._by_id(target, ids, fields[field])
+        ids = [r["id"] for r in rows]
+        extra_values = {f: extras[f](self.conn, ids) for f in fields if f in extras}
+
+        records = []
+        for row in rows:
+            record = {"gid": row["gid"], "resource_type": res.resource_type}
+            for field in fields:
+                if field in res.columns:
+                    value = row[res.columns[field]]
+                    if field in res.bools and value is not None:
+                        value = bool(value)
+                    elif field in res.json_fields and value is not None:
+                        value = json.loads(value)
+                    record[field] = value
+                elif field in res.refs:
+                    record[field] = ref_values[field].get(row[res.refs[field][0]])
+                elif field in extras:
+                    record[field] = extra_values[field][row["id"]]
+            records.append((row["id"], record))
+        return records
+
+    def _by_id(self, name: str, ids: list, subfields: set) -> dict:
+        if not ids:
+            return {}
+        res = RESOURCES[name]
+        # References render compact unless sub-fields were requested; no deeper nesting
+        fields = {f: set() for f in (subfields or res.compact) if f in res.columns}
+        placeholders = ",".join("?" * len(ids))
+        return dict(self._select(name, f"id IN ({placeholders})", tuple(ids), fields))
+
+    def _id_for(self, name: str, gid: str) -> int:
+        row = self.conn.execute(f"SELECT id FROM {RESOURCES[name].table} WHERE gid = ?", (gid,)).fetchone()
+        if row is None:
+            raise ApiError(404, f"{RESOURCES[name].resource_type}: Unknown object: {gid}")
+        return row["id"]
+
+    # --- reads -----------------------------------------------------------
+    def get_one(self, name: str, gid: str, opt_fields: Optional[dict]) -> dict:
+        fields = opt_fields or self._full_fields(name)
+        records = self._select(name, "gid = ?", (gid,), fields)
+        if not records:
+            raise ApiError(404, f"{RESOURCES[name].resource_type}: Unknown object: {gid}")
+        return {"data": records[0][1]}
+
+    def get_list(self, name: str, where: str, params: tuple, query: dict, path: str) -> dict:
+        res = RESOURCES[name]
+        opt_fields = parse_opt_fields(query.get("opt_fields"))
+        fields = opt_fields or {f: set() for f in res.compact}
+        try:
+            limit = int(query.get("limit", DEFAULT_LIMIT))
+        except ValueError:
+            raise ApiError(400, "limit: Not a number")
+        if not 1 <= limit <= MAX_LIMIT:
+            raise ApiError(400, f"limit: must be between 1 and {MAX_LIMIT}")
+        if "offset" in query:
+            where += " AND id > ?"
+            params += (decode_offset(query["offset"]),)
+        if res.table in ("tasks", "subtasks") and query.get("completed_since") == "now":
+            where += " AND completed = 0"
+
+        # One extra row tells us whether there is a next page
+        records = self._select(name, where, params, fields, limit + 1)
+        next_page = None
+        if len(records) > limit:
+            records = records[:limit]
+            token = encode_offset(records[-1][0])
+            next_query = urlencode({**query, "offset": token})
+            next_page = {"offset": token, "path": f"{path}?{next_query}",
+                         "uri": f"{API_PREFIX}{path}?{next_query}"}
+        return {"data": [record for _, record in records], "next_page": next_page}
+
+    def search_tasks(self, query: dict) -> dict:
+        """Asana's ``/workspaces/{gid}/tasks/search`` over the FTS index."""
+        if not has_search_index(self.conn):
+            raise ApiError(400, "text: search index not built (python src/access/search.py build)")
+        text = query.get("text", "")
+        if not text.strip():
+            raise ApiError(400, "text: Missing input")
+        try:
+            limit = min(int(query.get("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+        except ValueError:
+            raise ApiError(400, "limit: Not a number")
+        hits = search(self.conn, text, kinds=("tasks",), limit=limit)
+        if not hits:
+            return {"data": []}
+        fields = parse_opt_fields(query.get("opt_fields")) or {"name": set()}
+        ids = [h.id for h in hits]
+        by_id = dict(self._select("tasks", f"id IN ({','.join('?' * len(ids))})", tuple(ids), fields))
+        return {"data": [by_id[i] for i in ids if i in by_id]}
+
+    # --- writes ----------------------------------------------------------
+    def _ref_id(self, name: str, gid: Optional[str]) -> Optional[int]:
+        if gid is None:
+            return None
+        try:
+            return self._id_for(name, gid)
+        except ApiError:
+            raise ApiError(400, f"{RESOURCES[name].resource_type}: Not a recognized ID: {gid}")
+
+    def _task_values(self, data: dict) -> dict:
+        values = {}
+        if "name" in data:
+            values["name"] = str(data["name"])
+        if "notes" in data:
+            values["description"] = data["notes"]
+        if "due_on" in data:
+            values["due_date"] = data["due_on"]
+        if "priority" in data:
+            values["priority"] = data["priority"]
+        if "effort" in data:
+            values["effort"] = data["effort"]
+        if "assignee" in data:
+            values["assignee_id"] = self._ref_id("users", data["assignee"])
+        if "section" in data:
+            values["section_id"] = self._ref_id("sections", data["section"])
+        projects = data.get("projects") or ([data["project"]] if data.get("project") else [])
+        if not isinstance(projects, list):
+            raise ApiError(400, "projects: Must be a list of project gids")
+        if projects:
+            values["project_id"] = self._ref_id("projects", projects[0])
+        if "completed" in data:
+            values["completed"] = int(bool(data["completed"]))
+            values["completed_at"] = _now() if data["completed"] else None
+        return values
+
+    def create_task(self, data: dict) -> dict:
+        if not data.get("name"):
+            raise ApiError(400, "name: Missing input")
+        values = self._task_values(data)
+        values.update(gid=str(uuid.uuid4()), created_at=_now())
+        values.setdefault("completed", 0)
+        with self.conn:
+            self.conn.execute(
+                f"INSERT INTO tasks ({', '.join(values)}) VALUES ({', '.join('?' * len(values))})",
+                tuple(values.values()))
+        return self.get_one("tasks", values["gid"], None)
+
+    def update_task(self, gid: str, data: dict) -> dict:
+        task_id = self._id_for("tasks", gid)
+        values = self._task_values(data)
+        if values:
+            with self.conn:
+                self.conn.execute(
+                    f"UPDATE tasks SET {', '.join(f'{c} = ?' for c in values)} WHERE id = ?",
+                    (*values.values(), task_id))
+        return self.get_one("tasks", gid, None)
+
+    def delete_task(self, gid: str) -> dict:
+        task_id = self._id_for("tasks", gid)
+        with self.conn:
+            self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        return {"data": {}}
+
+    def add_story(self, gid: str, data: dict) -> dict:
+        if not data.get("text"):
+            raise ApiError(400, "text: Missing input")
+        task_id = self._id_for("tasks", gid)
+        story_gid = str(uuid.uuid4())
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO comments (gid, task_id, author_id, text, created_at) VALUES (?, ?, ?, ?, ?)",
+                (story_gid, task_id, self._ref_id("users", data.get("created_by")), data["text"], _now()))
+        return self.get_one("stories", story_gid, None)
+
+    def set_tag(self, gid: str, data: dict, add: bool) -> dict:
+        task_id = self._id_for("tasks", gid)
+        tag_id = self._ref_id("tags", data.get("tag"))
+        if tag_id is None:
+            raise ApiError(400, "tag: Missing input")
+        with self.conn:
+            self.conn.execute("DELETE FROM task_tags WHERE task_id = ? AND tag_id = ?", (task_id, tag_id))
+            if add:
+                self.conn.execute("INSERT INTO task_tags (task_id, tag_id) VALUES (?, ?)", (task_id, tag_id))
+        return {"data": {}}
+
+    # --- routing ---------------------------------------------------------
+    def handle(self, method: str, path: str, query: dict, body: Optional[dict]) -> Tuple[int, dict]:
+        """Dispatch one request; returns (HTTP status, JSON payload)."""
+        if not path.startswith(API_PREFIX + "/"):
+            raise ApiError(404, f"No matching route for {path}")
+        rel = path[len(API_PREFIX):].rstrip("/")
+        parts = rel.strip("/").split("/")
+
+        if method == "GET":
+            if len(parts) == 1 and parts[0] in RESOURCES:
+                return 200, self.get_list(parts[0], "1 = 1", (), query, rel)
+            if len(parts) == 2 and parts[0] in RESOURCES:
+                return 200, self.get_one(parts[0], parts[1], parse_opt_fields(query.get("opt_fields")))
+            if len(parts) == 4 and parts[0] == "workspaces" and parts[2:] == ["tasks", "search"]:
+                self._id_for("workspaces", parts[1])
+                return 200, self.search_tasks(query)
+            if len(parts) == 3 and (parts[0], parts[2]) in COLLECTIONS:
+                child, where = COLLECTIONS[(parts[0], parts[2])]
+                parent_id = self._id_for(parts[0], parts[1])
+                return 200, self.get_list(child, where, (parent_id,), query, rel)
+            raise ApiError(404, f"No matching route for {method} {path}")
+
+        if not self.writable:
+            raise ApiError(403, "Server is read-only")
+        if body is not None and not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object")
+        data = (body or {}).get("data")
+        if not isinstance(data, dict):
+            data = {}
+        if method == "POST" and parts == ["tasks"]:
+            return 201, self.create_task(data)
+        if len(parts) >= 2 and parts[0] == "tasks":
+            gid = parts[1]
+            if method == "PUT" and len(parts) == 2:
+                return 200, self.update_task(gid, data)
+            if method == "DELETE" and len(parts) == 2:
+                return 200, self.delete_task(gid)
+            if method == "POST" and parts[2:] == ["stories"]:
+                return 201, self.add_story(gid, data)
+            if method == "POST" and parts[2:] in (["addTag"], ["removeTag"]):
+                return 200, self.set_tag(gid, data, add=parts[2] == "addTag")
+        raise ApiError(404, f"No matching route for {method} {path}")
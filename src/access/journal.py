@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""Append-only mutation journal with group commit, for RL episodes over a generated DB.
+
+Agents mutate a DB through typed operations (complete or reopen a task,
+reassign it, comment on it, move it to another section, tag or untag it).
+``MutationJournal.append`` checks an operation against the DB, so it never
+breaks the references ``validate_db.py`` checks, and queues it in memory.
+Queued operations are applied and written to the ``mutation_journal`` table
+in one transaction per group: when ``batch_size`` are pending or the oldest
+has waited ``max_delay`` seconds (checked on append), and on ``flush()``. One
+commit per group instead of per mutation is what lifts write throughput; a
+crash loses at most the uncommitted group, never half of one.
+
+The journal stores every operation with its resolved arguments (timestamps,
+comment gids), so ``replay`` rebuilds a mutated DB from its seed exactly, and
+``export_trajectory`` writes the operations as a compact NumPy file for
+offline RL. One journal writes to a DB at a time.
+
+Usage:
+    python src/access/journal.py bench output/asana_simulation.sqlite --ops 5000
+    python src/access/journal.py info episode.sqlite
+    python src/access/journal.py replay output/asana_simulation.sqlite episode.sqlite rebuilt.sqlite
+    python src/access/journal.py export episode.sqlite trajectory.npz
+"""
+import argparse
+import json
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.storage import summaries
+
+JOURNAL_DDL = """
+CREATE TABLE IF NOT EXISTS mutation_journal (
+    seq INTEGER PRIMARY KEY,
+    episode TEXT NOT NULL,
+    op TEXT NOT NULL,
+    args TEXT NOT NULL            -- JSON array of the operation's fields
+);
+CREATE INDEX IF NOT EXISTS idx_mutation_journal_episode ON mutation_journal(episode, seq);
+"""
+BATCH_SIZE = 256
+MAX_DELAY = 0.05  # seconds an operation may wait for its group
+# Groups with at least this many task updates refresh the summary tables once instead of per row
+DEFER_SUMMARIES_AT = 8
+# When the operations of random_operations() begin, the default build's base_time
+EPISODE_START = "2025-01-01T09:00:00"
+
+
+class MutationError(ValueError):
+    """An operation would break a reference or refers to something that does not exist."""
+
+
+def _now() -> str:
+    return datetime.utcnow().replace(microsecond=0).isoformat()
+
+
+# --- operations ----------------------------------------------------------
+# Every operation names its task and when it happened (``at``, defaulting to
+# the time it is appended). ``target`` and ``flag`` are the fields the
+# trajectory export stores as integer columns; ``updates_task`` marks the
+# operations that change columns the summary tables aggregate.
+
+class CompleteTask(NamedTuple):
+    task_id: int
+    completed: bool = True
+    at: Optional[str] = None
+
+    target = None
+    flag = "completed"
+    updates_task = True
+
+    def check(self, conn, task):
+        pass
+
+    def apply(self, conn):
+        conn.execute("UPDATE tasks SET completed = ?, completed_at = ? WHERE id = ?",
+                     (int(self.completed), self.at if self.completed else None, self.task_id))
+
+
+class ReassignTask(NamedTuple):
+    task_id: int
+    assignee_id: Optional[int]
+    at: Optional[str] = None
+
+    target = "assignee_id"
+    flag = None
+    updates_task = True
+
+    def check(self, conn, task):
+        _require(conn, "users", self.assignee_id, optional=True)
+
+    def apply(self, conn):
+        conn.execute("UPDATE tasks SET assignee_id = ? WHERE id = ?", (self.assignee_id, self.task_id))
+
+
+class AddComment(NamedTuple):
+    task_id: int
+    author_id: Optional[int]
+    text: str
+    at: Optional[str] = None
+    gid: Optional[str] = None
+
+    target = "author_id"
+    flag = None
+    updates_task = False
+
+    def check(self, conn, task):
+        if not self.text:
+            raise MutationError("Comment text is empty")
+        _require(conn, "users", self.author_id, optional=True)
+
+    def apply(self, conn):
+        conn.execute("INSERT INTO comments (gid, task_id, author_id, text, created_at) VALUES (?, ?, ?, ?, ?)",
+                     (self.gid, self.task_id, self.author_id, self.text, self.at))
+
+
+class MoveTask(NamedTuple):
+    task_id: int
+    section_id: int
+    at: Optional[str] = None
+
+    target = "section_id"
+    flag = None
+    updates_task = True
+
+    def check(self, conn, task):
+        row = conn.execute("SELECT project_id FROM sections WHERE id = ?", (self.section_id,)).fetchone()
+        if row is None:
+            raise MutationError(f"No section {self.section_id}")
+        if row[0] != task[0]:
+            raise MutationError(f"Section {self.section_id} is not in task {self.task_id}'s project")
+
+    def apply(self, conn):
+        conn.execute("UPDATE tasks SET section_id = ? WHERE id = ?", (self.section_id, self.task_id))
+
+
+class TagTask(NamedTuple):
+    task_id: int
+    tag_id: int
+    add: bool = True
+    at: Optional[str] = None
+
+    target = "tag_id"
+    flag = "add"
+    updates_task = False
+
+    def check(self, conn, task):
+        _require(conn, "tags", self.tag_id)
+
+    def apply(self, conn):
+        # Adding a tag twice keeps one row, like Asana's addTag
+        conn.execute("DELETE FROM task_tags WHERE task_id = ? AND tag_id = ?", (self.task_id, self.tag_id))
+        if self.add:
+            conn.execute("INSERT INTO task_tags (task_id, tag_id) VALUES (?, ?)", (self.task_id, self.tag_id))
+
+
+OPERATIONS = {op.__name__: op for op in (CompleteTask, ReassignTask, AddComment, MoveTask, TagTask)}
+
+
+def _require(conn: sqlite3.Connection, table: str, row_id, optional: bool = False):
+    if row_id is None and optional:
+        return
+    if conn.execute(f"SELECT 1 FROM {table} WHERE id = ?", (row_id,)).fetchone() is None:
+        raise MutationError(f"No {table} row {row_id}")
+
+
+def has_journal(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'mutation_journal'").fetchone() is not None
+
+
+def _resolve(op):
+    """``op`` with the values it leaves to append time filled in."""
+    if type(op).__name__ not in OPERATIONS:
+        raise TypeError(f"Not a journal operation: {op!r}")
+    if op.at is None:
+        op = op._replace(at=_now())
+    if isinstance(op, AddComment) and op.gid is None:
+        op = op._replace(gid=str(uuid.uuid4()))
+    return op
+
+
+def _timestamp(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    except (TypeError, ValueError):
+        raise MutationError(f"Not an ISO timestamp: {value!r}") from None
+
+
+def _check(conn: sqlite3.Connection, op):
+    task = conn.execute("SELECT project_id, created_at FROM tasks WHERE id = ?", (op.task_id,)).fetchone()
+    if task is None:
+        raise MutationError(f"No task {op.task_id}")
+    # Nothing happens to a task before it exists: completed_at and comment times stay after created_at
+    if task[1] is not None and _timestamp(op.at) < _timestamp(task[1]):
+        raise MutationError(f"Operation at {op.at} predates task {op.task_id} (created {task[1]})")
+    op.check(conn, task)
+
+
+class MutationJournal:
+    """Typed mutations of one DB, group-committed together with their journal rows."""
+
+    def __init__(self, conn: sqlite3.Connection, episode: str = "default", batch_size: int = BATCH_SIZE,
+                 max_delay: float = MAX_DELAY):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.conn = conn
+        self.episode = episode
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.executescript(JOURNAL_DDL)
+        self.last_seq = conn.execute("SELECT IFNULL(MAX(seq), 0) FROM mutation_journal").fetchone()[0]
+        self._pending = []
+        self._oldest = None
+        self.stats = {"ops": 0, "commits": 0, "commit_s": 0.0}
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def append(self, op) -> int:
+        """Check and queue ``op``; returns its sequence number. May commit the group."""
+        op = _resolve(op)
+        _check(self.conn, op)
+        self.last_seq += 1
+        self._pending.append((self.last_seq, self.episode, op))
+        if self._oldest is None:
+            self._oldest = time.perf_counter()
+        if len(self._pending) >= self.batch_size or time.perf_counter() - self._oldest >= self.max_delay:
+            self.flush()
+        return self.last_seq
+
+    def complete_task(self, task_id: int, completed: bool = True, at: str = None) -> int:
+        return self.append(CompleteTask(task_id, completed, at))
+
+    def reassign(self, task_id: int, assignee_id: Optional[int], at: str = None) -> int:
+        return self.append(ReassignTask(task_id, assignee_id, at))
+
+    def comment(self, task_id: int, author_id: Optional[int], text: str, at: str = None) -> int:
+        return self.append(AddComment(task_id, author_id, text, at))
+
+    def move(self, task_id: int, section_id: int, at: str = None) -> int:
+        return self.append(MoveTask(task_id, section_id, at))
+
+    def tag(self, task_id: int, tag_id: int, add: bool = True, at: str = None) -> int:
+        return self.append(TagTask(task_id, tag_id, add, at))
+
+    def flush(self) -> int:
+        """Apply and commit every pending operation as one transaction; returns how many.
+
+    A group that fails to apply is rolled back and dropped whole.
+    """
+        entries, self._pending, self._oldest = self._pending, [], None
+        if not entries:
+            return 0
+        started = time.perf_counter()
+        try:
+            _apply_entries(self.conn, entries)
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            self.last_seq = self.conn.execute("SELECT IFNULL(MAX(seq), 0) FROM mutation_journal").fetchone()[0]
+            raise
+        self.stats["ops"] += len(entries)
+        self.stats["commits"] += 1
+        self.stats["commit_s"] += time.perf_counter() - started
+        return len(entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        return False
+
+
+def _apply_entries(conn: sqlite3.Connection, entries: list):
+    task_ids = [op.task_id for _, _, op in entries if op.updates_task]
+    # Each task update fires the summary triggers, which re-aggregate its project,
+    # section, assignee and team; a large group drops them (inside its own
+    # transaction), applies, then recomputes each touched key once.
+    defer = len(task_ids) >= DEFER_SUMMARIES_AT and summaries.has_summaries(conn)
+    if defer:
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        keys = summaries.summary_keys(conn, task_ids)
+        summaries.drop_triggers(conn, commit=False)
+    for _, _, op in entries:
+        op.apply(conn)
+    if defer:
+        for name, ids in summaries.summary_keys(conn, task_ids).items():
+            keys[name] |= ids
+        summaries.refresh_summaries(conn, **keys, commit=False)
+        summaries.create_triggers(conn)
+    conn.executemany("INSERT INTO mutation_journal (seq, episode, op, args) VALUES (?, ?, ?, ?)",
+                     [(seq, episode, type(op).__name__, json.dumps(list(op))) for seq, episode, op in entries])
+
+
+def read_journal(conn: sqlite3.Connection, episode: str = None, upto: int = None) -> list:
+    """``(seq, episode, operation)`` in commit order, optionally one episode's and up to ``upto``."""
+    if not has_journal(conn):
+        return []
+    sql, params = "SELECT seq, episode, op, args FROM mutation_journal WHERE 1 = 1", []
+    if episode is not None:
+        sql += " AND episode = ?"
+        params.append(episode)
+    if upto is not None:
+        sql += " AND seq <= ?"
+        params.append(upto)
+    return [(seq, ep, OPERATIONS[op](*json.loads(args)))
+            for seq, ep, op, args in conn.execute(sql + " ORDER BY seq", params)]
+
+
+def replay(seed_db, journal_db, out_db, episode: str = None, upto: int = None, batch_size: int = 10_000) -> int:
+    """Rebuild ``out_db`` as ``seed_db`` plus ``journal_db``'s operations; returns how many were applied.
+
+    Operations are re-checked against the rebuilt state, so a journal replayed
+    onto the wrong seed fails instead of writing dangling references.
+    """
+    source = sqlite3.connect(str(journal_db))
+    entries = read_journal(source, episode, upto)
+    source.close()
+    Path(out_db).unlink(missing_ok=True)
+    src, dst = sqlite3.connect(str(seed_db)), sqlite3.connect(str(out_db))
+    src.backup(dst)
+    src.close()
+    dst.execute("PRAGMA foreign_keys = ON")
+    dst.executescript(JOURNAL_DDL)
+    # A seed that is itself a mutated DB already holds the start of the journal
+    applied = dst.execute("SELECT IFNULL(MAX(seq), 0) FROM mutation_journal").fetchone()[0]
+    entries = [entry for entry in entries if entry[0] > applied]
+    for start in range(0, len(entries), batch_size):
+        batch = entries[start:start + batch_size]
+        for _, _, op in batch:
+            _check(dst, op)
+        _apply_entries(dst, batch)
+        dst.commit()
+    dst.close()
+    return len(entries)
+
+
+def export_trajectory(conn: sqlite3.Connection, path, episode: str = None) -> int:
+    """Write the journal as integer columns plus comment text to a compressed ``.npz``.
+
+    Columns: ``seq``, ``episode`` (index into ``episodes``), ``op`` (index into
+    ``ops``), ``task_id``, ``target`` (assignee/author/section/tag id, -1 for
+    none), ``flag`` (completed/add as 0/1, -1 for none) and ``t`` (epoch
+    seconds). Comment text is UTF-8 in ``text_bytes``, entry i spanning
+    ``text_offsets[i]:text_offsets[i + 1]``, the CSR layout of src/utils/csr.py.
+    """
+    entries = read_journal(conn, episode)
+    ops = list(OPERATIONS)
+    episodes = list(dict.fromkeys(ep for _, ep, _ in entries))
+    episode_index = {ep: i for i, ep in enumerate(episodes)}
+
+    def field(op, name):
+        value = getattr(op, name) if name else None
+        return -1 if value is None else int(value)
+
+    texts = [op.text.encode() if isinstance(op, AddComment) else b"" for _, _, op in entries]
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum([len(t) for t in texts], out=offsets[1:])
+    np.savez_compressed(
+        path,
+        seq=np.array([seq for seq, _, _ in entries], dtype=np.int64),
+        episode=np.array([episode_index[ep] for _, ep, _ in entries], dtype=np.int32),
+        op=np.array([ops.index(type(op).__name__) for _, _, op in entries], dtype=np.int8),
+        task_id=np.array([op.task_id for _, _, op in entries], dtype=np.int64),
+        target=np.array([field(op, op.target) for _, _, op in entries], dtype=np.int64),
+        flag=np.array([field(op, op.flag) for _, _, op in entries], dtype=np.int8),
+        t=np.array([op.at for _, _, op in entries], dtype="datetime64[s]").astype(np.int64),
+        text_offsets=offsets,
+        text_bytes=np.frombuffer(b"".join(texts), dtype=np.uint8),
+        ops=np.array(ops),
+        episodes=np.array(episodes, dtype=str),
+    )
+    return len(entries)
+
+
+def load_trajectory(path) -> dict:
+    """The arrays of an exported trajectory, plus ``texts`` decoded per entry."""
+    with np.load(path) as data:
+        arrays = {name: data[name] for name in data.files}
+    raw, offsets = arrays["text_bytes"].tobytes(), arrays["text_offsets"]
+    arrays["texts"] = [raw[offsets[i]:offsets[i + 1]].decode() for i in range(len(offsets) - 1)]
+    return arrays
+
+
+# --- benchmark -----------------------------------------------------------
+
+def random_operations(conn: sqlite3.Connection, n: int, seed: int = 42) -> list:
+    """A reproducible mix of valid operations, the kind an agent issues."""
+    rng = random.Random(seed)
+    tasks = conn.execute("SELECT id, project_id, created_at FROM tasks WHERE project_id IS NOT NULL").fetchall()
+    users = [r[0] for r in conn.execute("SELECT id FROM users")]
+    tags = [r[0] for r in conn.execute("SELECT id FROM tags")]
+    sections = {}
+    for section_id, project_id in conn.execute("SELECT id, project_id FROM sections"):
+        sections.setdefault(project_id, []).append(section_id)
+    start = datetime.fromisoformat(EPISODE_START)
+    ops = []
+    for _ in range(n):
+        task_id, project_id, created_at = rng.choice(tasks)
+        # Some minutes after the episode starts, or after the task was created if that is later
+        after = max(start, _timestamp(created_at)) if created_at else start
+        at = (after + timedelta(minutes=rng.randint(1, 240))).isoformat()
+        kind = rng.random()
+        if kind < 0.3:
+            ops.append(CompleteTask(task_id, rng.random() < 0.8, at))
+        elif kind < 0.5:
+            ops.append(ReassignTask(task_id, rng.choice(users), at))
+        elif kind < 0.75:
+            ops.append(AddComment(task_id, rng.choice(users), "Looks good, moving this forward.", at,
+                                  str(uuid.UUID(int=rng.getrandbits(128), version=4))))
+        elif kind < 0.9 and project_id in sections:
+            ops.append(MoveTask(task_id, rng.choice(sections[project_id]), at))
+        else:
+            ops.append(TagTask(task_id, rng.choice(tags), rng.random() < 0.7, at))
+    return ops
+
+
+def benchmark(db_path, n_ops: int = 5000, batch_sizes: tuple = (1, 32, 256)) -> dict:
+    """Mutations per second on a scratch copy of ``db_path``, per group size (1 = autocommit each)."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for batch_size in batch_sizes:
+            copy = Path(tmp) / f"bench_{batch_size}.sqlite"
+            shutil.copy(db_path, copy)
+            conn = sqlite3.connect(str(copy))
+            ops = random_operations(conn, n_ops)
+            journal = MutationJournal(conn, episode="bench", batch_size=batch_size, max_delay=float("inf"))
+            started = time.perf_counter()
+            with journal:
+                for op in ops:
+                    journal.append(op)
+            seconds = time.perf_counter() - started
+            results[f"batch_{batch_size}"] = {
+                "ops": n_ops,
+                "commits": journal.stats["commits"],
+                "seconds": round(seconds, 3),
+                "ops_per_s": round(n_ops / seconds),
+            }
+            conn.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mutation journal: group-committed RL mutations of a DB.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench = sub.add_parser("bench", help="Mutation throughput per group size, on a scratch copy")
+    bench.add_argument("db")
+    bench.add_argument("--ops", type=int, default=5000)
+    bench.add_argument("--batch-sizes", default="1,32,256")
+    info = sub.add_parser("info", help="Operations per episode and type")
+    info.add_argument("db")
+    rep = sub.add_parser("replay", help="Rebuild a DB from its seed and a journal")
+    rep.add_argument("seed_db")
+    rep.add_argument("journal_db")
+    rep.add_argument("out_db")
+    rep.add_argument("--episode")
+    rep.add_argument("--upto", type=int, help="Last sequence number to apply")
+    exp = sub.add_parser("export", help="Write the journal as a compact .npz trajectory")
+    exp.add_argument("db")
+    exp.add_argument("out")
+    exp.add_argument("--episode")
+    args = parser.parse_args(argv)
+
+    db = args.seed_db if args.command == "replay" else args.db
+    if not Path(db).exists():
+        raise FileNotFoundError(f"DB not found at {db}")
+    if args.command == "bench":
+        sizes = tuple(int(s) for s in args.batch_sizes.split(","))
+        print(json.dumps(benchmark(args.db, args.ops, sizes), indent=2))
+    elif args.command == "info":
+        conn = sqlite3.connect(args.db)
+        if not has_journal(conn):
+            print("No mutation journal")
+            return
+        for episode, op, count, first, last in conn.execute(
+                "SELECT episode, op, COUNT(*), MIN(seq), MAX(seq) FROM mutation_journal "
+                "GROUP BY episode, op ORDER BY MIN(seq)"):
+            print(f"  {episode}: {op} x{count:,} (seq {first}-{last})")
+        conn.close()
+    elif args.command == "replay":
+        started = time.perf_counter()
+        n = replay(args.seed_db, args.journal_db, args.out_db, args.episode, args.upto)
+        print(f"✓ Replayed {n:,} operations into {args.out_db} in {time.perf_counter() - started:.2f}s")
+    else:
+        conn = sqlite3.connect(args.db)
+        n = export_trajectory(conn, args.out, args.episode)
+        conn.close()
+        print(f"✓ Exported {n:,} operations to {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
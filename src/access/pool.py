@@ -0,0 +1,126 @@
+"""Per-thread read-only connection pool for a generated seed DB.
+
+Every thread (and every process, after fork) gets its own connection opened
+with a ``mode=ro`` URI, so readers only ever take SHARED locks and never wait
+on each other. A thread's connection is closed when the thread exits.
+Connections are tracked per process: a forked child never closes the
+handles it inherited, since closing a file descriptor would also drop the
+child's own POSIX locks on that file. ``immutable=True`` additionally skips file locking and change
+detection; only use it on a DB that nothing is writing to. ``attach`` maps
+schema names to further DBs opened the same way on every connection, such as
+the core file of a partitioned layout (src/access/router.py).
+"""
+import itertools
+import os
+import sqlite3
+import threading
+import weakref
+from collections import Counter
+from pathlib import Path
+from urllib.parse import quote
+
+MMAP_SIZE = 1 << 30          # 1 GiB; mapped pages are shared by all connections via the OS
+CACHE_SIZE_KIB = 8 * 1024    # per connection, kept small since hundreds may be open
+STATEMENT_CACHE = 256        # prepared statements kept per connection
+
+
+def readonly_uri(db_path, immutable: bool = False) -> str:
+    uri = f"file:{quote(str(Path(db_path).resolve()))}?mode=ro"
+    return uri + "&immutable=1" if immutable else uri
+
+
+def connect_readonly(db_path, immutable: bool = False, mmap_size: int = MMAP_SIZE,
+                     cache_size_kib: int = CACHE_SIZE_KIB, cached_statements: int = STATEMENT_CACHE,
+                     attach: dict = None) -> sqlite3.Connection:
+    """Open one tuned read-only connection, with ``attach`` ({schema: path}) attached read-only."""
+    for path in (db_path, *(attach or {}).values()):
+        if not Path(path).exists():
+            raise FileNotFoundError(f"DB not found at {path}")
+    conn = sqlite3.connect(readonly_uri(db_path, immutable), uri=True,
+                           cached_statements=cached_statements, check_same_thread=False)
+    for schema, path in (attach or {}).items():
+        conn.execute("ATTACH DATABASE ? AS " + schema, (readonly_uri(path, immutable),))
+    conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    conn.execute(f"PRAGMA cache_size = {-int(cache_size_kib)}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA query_only = 1")
+    return conn
+
+
+class _Slot:
+    """One thread's connection, held in the pool's thread-local; freed when the thread exits."""
+    __slots__ = ("conn", "pid", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection, pid: int):
+        self.conn = conn
+        self.pid = pid
+
+
+def _release(lock: threading.Lock, connections: dict, pid: int, key: int):
+    # Finalizer of a freed slot. Holds no reference to the pool, so it never keeps one alive.
+    if pid != os.getpid():
+        return  # inherited over fork: leave it open (see the module docstring)
+    with lock:
+        conn = connections.get(pid, {}).pop(key, None)
+    if conn is not None:
+        conn.close()
+
+
+class ConnectionPool:
+    """Hands each thread its own read-only connection, opened on first use.
+
+    sqlite3's per-connection statement cache acts as the prepared-statement
+    cache: callers that reuse the same SQL text skip re-preparing it.
+    """
+
+    def __init__(self, db_path, immutable: bool = False, mmap_size: int = MMAP_SIZE,
+                 cache_size_kib: int = CACHE_SIZE_KIB, cached_statements: int = STATEMENT_CACHE,
+                 attach: dict = None):
+        self.db_path = Path(db_path)
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"DB not found at {self.db_path}")
+        self._options = dict(immutable=immutable, mmap_size=mmap_size, cache_size_kib=cache_size_kib,
+                             cached_statements=cached_statements, attach=attach)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}  # pid -> {slot key: connection}
+        self._keys = itertools.count()
+        self._opened = Counter()  # pid -> connections ever opened
+
+    def connection(self) -> sqlite3.Connection:
+        slot = getattr(self._local, "slot", None)
+        pid = os.getpid()
+        # A forked child must not reuse its parent's handle
+        if slot is None or slot.pid != pid:
+            slot = _Slot(connect_readonly(self.db_path, **self._options), pid)
+            with self._lock:
+                key = next(self._keys)
+                self._connections.setdefault(pid, {})[key] = slot.conn
+                self._opened[pid] += 1
+            weakref.finalize(slot, _release, self._lock, self._connections, pid, key)
+            self._local.slot = slot
+        return slot.conn
+
+    @property
+    def size(self) -> int:
+        """Connections open in this process."""
+        return len(self._connections.get(os.getpid(), ()))
+
+    @property
+    def opened(self) -> int:
+        """Connections this process has opened, including those of threads that have exited."""
+        return self._opened[os.getpid()]
+
+    def close(self):
+        """Close this process's connections; a forked child leaves its parent's alone."""
+        with self._lock:
+            connections = self._connections.pop(os.getpid(), {})
+        for conn in connections.values():
+            conn.close()
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
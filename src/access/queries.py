@@ -0,0 +1,349 @@
+"""Typed lookups and bulk accessors over a generated seed DB.
+
+Usage:
+    from src.access import SeedDB
+
+    db = SeedDB("output/asana_simulation.sqlite")
+    org = db.workspace()
+    for task in db.open_tasks_for_assignee(user_id=42):
+        print(task.name, task.due_date)
+    cols = db.column_arrays("tasks", ["project_id", "assignee_id", "completed"])
+    members = db.adjacency()["team_members"].neighbors(3)   # needs the CSR sidecar
+    for c in db.collaborators(user_id=42):                   # needs the collaboration graph
+        print(c.collaborator_id, c.weight)
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from src.access.pool import ConnectionPool
+from src.storage import collaboration
+from src.storage.adjacency import is_stale, load_adjacency
+from src.utils.csr import CSR
+
+
+class Workspace(NamedTuple):
+    id: int
+    gid: str
+    name: str
+    domain: Optional[str]
+    created_at: Optional[str]
+
+
+class Team(NamedTuple):
+    id: int
+    gid: str
+    organization_id: int
+    name: str
+    description: Optional[str]
+    created_at: Optional[str]
+
+
+class User(NamedTuple):
+    id: int
+    gid: str
+    organization_id: int
+    full_name: str
+    email: str
+    role: Optional[str]
+    created_at: Optional[str]
+    is_active: int
+
+
+class Project(NamedTuple):
+    id: int
+    gid: str
+    team_id: Optional[int]
+    organization_id: int
+    name: str
+    description: Optional[str]
+    created_at: Optional[str]
+    is_archived: int
+    project_type: Optional[str]
+
+
+class Section(NamedTuple):
+    id: int
+    gid: str
+    project_id: int
+    name: str
+    position: Optional[int]
+
+
+class Task(NamedTuple):
+    id: int
+    gid: str
+    project_id: Optional[int]
+    section_id: Optional[int]
+    name: str
+    description: Optional[str]
+    assignee_id: Optional[int]
+    created_at: Optional[str]
+    due_date: Optional[str]
+    completed: int
+    completed_at: Optional[str]
+    priority: Optional[str]
+    effort: Optional[int]
+
+
+class Comment(NamedTuple):
+    id: int
+    gid: str
+    task_id: int
+    author_id: Optional[int]
+    text: Optional[str]
+    created_at: Optional[str]
+
+
+class ProjectStats(NamedTuple):
+    project_id: int
+    task_count: int
+    completed_count: int
+    open_count: int
+    overdue_count: int
+    open_effort: int
+    completion_rate: float
+
+
+class SectionStats(NamedTuple):
+    section_id: int
+    project_id: int
+    task_count: int
+    open_count: int
+    overdue_count: int
+
+
+class UserWorkload(NamedTuple):
+    user_id: int
+    open_count: int
+    overdue_count: int
+    completed_count: int
+    open_effort: int
+
+
+class TeamStats(NamedTuple):
+    team_id: int
+    active_project_count: int
+    task_count: int
+    completed_count: int
+    open_count: int
+    completed_last_7d: int
+    completion_rate: float
+
+
+class UserCollaboration(NamedTuple):
+    user_id: int
+    collaborators: int
+    strength: float
+    projects: int
+    teams: int
+    open_work: int
+    cross_team_share: float
+    workload_centrality: float
+
+
+class Collaborator(NamedTuple):
+    user_id: int
+    rank: int
+    collaborator_id: int
+    weight: float
+    shared_projects: int
+    comments: int
+    delegations: int
+
+
+def _select(table: str, record, alias: str = "") -> str:
+    prefix = f"{alias}." if alias else ""
+    columns = ", ".join(prefix + field for field in record._fields)
+    return f"SELECT {columns} FROM {table} {alias}".rstrip()
+
+
+# Fixed SQL text, so every call hits the connection's prepared-statement cache
+_WORKSPACE = _select("organizations", Workspace) + " ORDER BY id LIMIT 1"
+_TEAM = _select("teams", Team) + " WHERE id = ?"
+_TEAMS = _select("teams", Team) + " ORDER BY id"
+_TEAMS_FOR_USER = (_select("teams", Team, "t")
+                   + " JOIN team_memberships tm ON tm.team_id = t.id WHERE tm.user_id = ? ORDER BY t.id")
+_TEAM_MEMBERS = (_select("users", User, "u")
+                 + " JOIN team_memberships tm ON tm.user_id = u.id WHERE tm.team_id = ? ORDER BY u.id")
+_USER = _select("users", User) + " WHERE id = ?"
+_USER_BY_EMAIL = _select("users", User) + " WHERE email = ?"
+_PROJECT = _select("projects", Project) + " WHERE id = ?"
+_PROJECTS_FOR_TEAM = _select("projects", Project) + " WHERE team_id = ? AND (? OR is_archived = 0) ORDER BY id"
+_SECTIONS_FOR_PROJECT = _select("sections", Section) + " WHERE project_id = ? ORDER BY position"
+_TASK = _select("tasks", Task) + " WHERE id = ?"
+_TASK_BY_GID = _select("tasks", Task) + " WHERE gid = ?"
+_TASKS_FOR_PROJECT = _select("tasks", Task) + " WHERE project_id = ? ORDER BY id"
+_OPEN_TASKS_FOR_PROJECT = _select("tasks", Task) + " WHERE project_id = ? AND completed = 0 ORDER BY due_date"
+_TASKS_FOR_SECTION = _select("tasks", Task) + " WHERE section_id = ? ORDER BY created_at DESC LIMIT ?"
+_OPEN_TASKS_FOR_ASSIGNEE = (_select("tasks", Task)
+                            + " WHERE assignee_id = ? AND completed = 0 ORDER BY due_date, id LIMIT ?")
+_COMMENTS_FOR_TASK = _select("comments", Comment) + " WHERE task_id = ? ORDER BY created_at DESC LIMIT ?"
+_PROJECT_STATS = _select("project_stats", ProjectStats) + " WHERE project_id = ?"
+_SECTION_STATS = _select("section_stats", SectionStats) + " WHERE project_id = ? ORDER BY section_id"
+_USER_WORKLOAD = _select("user_workload", UserWorkload) + " WHERE user_id = ?"
+_TEAM_STATS = _select("team_stats", TeamStats) + " WHERE team_id = ?"
+_USER_COLLABORATION = _select("user_collaboration", UserCollaboration) + " WHERE user_id = ?"
+_COLLABORATORS = _select("user_collaborators", Collaborator) + " WHERE user_id = ? ORDER BY rank LIMIT ?"
+
+# SQLite declared type -> (NumPy dtype, NULL fill)
+_ARRAY_TYPES = {"INTEGER": (np.int64, -1), "REAL": (np.float64, np.nan)}
+
+
+class SeedDB:
+    """Read-only, thread-safe access to a generated DB.
+
+    Each thread transparently uses its own pooled connection, so one instance
+    can be shared by any number of reader threads; processes should create
+    their own instance (or rely on the pool reopening after fork).
+    """
+
+    def __init__(self, db_path, immutable: bool = False, **pool_options):
+        self.pool = ConnectionPool(db_path, immutable=immutable, **pool_options)
+        self._adjacency = None
+        self._collaboration = None
+
+    def close(self):
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _one(self, sql: str, params: tuple, record):
+        row = self.pool.connection().execute(sql, params).fetchone()
+        return record._make(row) if row else None
+
+    def _many(self, sql: str, params: tuple, record) -> list:
+        return list(map(record._make, self.pool.connection().execute(sql, params)))
+
+    # --- Workspace / teams / users -------------------------------------
+    def workspace(self) -> Optional[Workspace]:
+        return self._one(_WORKSPACE, (), Workspace)
+
+    def team(self, team_id: int) -> Optional[Team]:
+        return self._one(_TEAM, (team_id,), Team)
+
+    def teams(self) -> List[Team]:
+        return self._many(_TEAMS, (), Team)
+
+    def teams_for_user(self, user_id: int) -> List[Team]:
+        return self._many(_TEAMS_FOR_USER, (user_id,), Team)
+
+    def team_members(self, team_id: int) -> List[User]:
+        return self._many(_TEAM_MEMBERS, (team_id,), User)
+
+    def user(self, user_id: int) -> Optional[User]:
+        return self._one(_USER, (user_id,), User)
+
+    def user_by_email(self, email: str) -> Optional[User]:
+        return self._one(_USER_BY_EMAIL, (email,), User)
+
+    # --- Projects / sections -------------------------------------------
+    def project(self, project_id: int) -> Optional[Project]:
+        return self._one(_PROJECT, (project_id,), Project)
+
+    def projects_for_team(self, team_id: int, include_archived: bool = False) -> List[Project]:
+        return self._many(_PROJECTS_FOR_TEAM, (team_id, int(include_archived)), Project)
+
+    def sections(self, project_id: int) -> List[Section]:
+        return self._many(_SECTIONS_FOR_PROJECT, (project_id,), Section)
+
+    # --- Tasks / comments ----------------------------------------------
+    def task(self, task_id: int) -> Optional[Task]:
+        return self._one(_TASK, (task_id,), Task)
+
+    def task_by_gid(self, gid: str) -> Optional[Task]:
+        return self._one(_TASK_BY_GID, (gid,), Task)
+
+    def tasks_for_project(self, project_id: int, open_only: bool = False) -> List[Task]:
+        sql = _OPEN_TASKS_FOR_PROJECT if open_only else _TASKS_FOR_PROJECT
+        return self._many(sql, (project_id,), Task)
+
+    def tasks_for_section(self, section_id: int, limit: int = 50) -> List[Task]:
+        return self._many(_TASKS_FOR_SECTION, (section_id, limit), Task)
+
+    def open_tasks_for_assignee(self, user_id: int, limit: int = 50) -> List[Task]:
+        return self._many(_OPEN_TASKS_FOR_ASSIGNEE, (user_id, limit), Task)
+
+    def comments_for_task(self, task_id: int, limit: int = 10) -> List[Comment]:
+        return self._many(_COMMENTS_FOR_TASK, (task_id, limit), Comment)
+
+    # --- Summary tables (src/storage/summaries.py) -----------------------
+    def project_stats(self, project_id: int) -> Optional[ProjectStats]:
+        return self._one(_PROJECT_STATS, (project_id,), ProjectStats)
+
+    def section_stats(self, project_id: int) -> List[SectionStats]:
+        return self._many(_SECTION_STATS, (project_id,), SectionStats)
+
+    def user_workload(self, user_id: int) -> Optional[UserWorkload]:
+        return self._one(_USER_WORKLOAD, (user_id,), UserWorkload)
+
+    def team_stats(self, team_id: int) -> Optional[TeamStats]:
+        return self._one(_TEAM_STATS, (team_id,), TeamStats)
+
+    # --- Collaboration graph (src/storage/collaboration.py) ----------------
+    def user_collaboration(self, user_id: int) -> Optional[UserCollaboration]:
+        return self._one(_USER_COLLABORATION, (user_id,), UserCollaboration)
+
+    def collaborators(self, user_id: int, limit: int = 10) -> List[Collaborator]:
+        return self._many(_COLLABORATORS, (user_id, limit), Collaborator)
+
+    def collaboration_features(self) -> Dict[str, np.ndarray]:
+        """Per-user feature arrays indexed by user id, loaded once per instance."""
+        if self._collaboration is None:
+            if collaboration.is_stale(self.pool.connection(), self.pool.db_path):
+                raise RuntimeError(f"Collaboration graph for {self.pool.db_path} is stale; rebuild it")
+            self._collaboration = collaboration.load_features(self.pool.db_path)
+        return self._collaboration
+
+    # --- Bulk accessors ------------------------------------------------
+    def fetch_tuples(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        """Run an arbitrary read query and return plain tuples."""
+        return self.pool.connection().execute(sql, tuple(params)).fetchall()
+
+    def iter_tuples(self, sql: str, params: Sequence = (), batch_size: int = 10_000) -> Iterable[List[tuple]]:
+        """Stream a large result set in batches of tuples."""
+        cur = self.pool.connection().execute(sql, tuple(params))
+        while True:
+            batch = cur.fetchmany(batch_size)
+            if not batch:
+                return
+            yield batch
+
+    def adjacency(self) -> Dict[str, CSR]:
+        """The memory-mapped CSR sidecar (src/storage/adjacency.py), loaded once per instance."""
+        if self._adjacency is None:
+            if is_stale(self.pool.connection(), self.pool.db_path):
+                raise RuntimeError(f"Adjacency sidecar for {self.pool.db_path} is stale; rebuild it")
+            self._adjacency = load_adjacency(self.pool.db_path)
+        return self._adjacency
+
+    def column_arrays(self, table: str, columns: Sequence[str], where: str = "",
+                      params: Sequence = ()) -> Dict[str, np.ndarray]:
+        """Load whole columns as NumPy arrays, ordered by ``id``.
+
+        INTEGER columns become int64 with NULL mapped to -1 (ids are positive),
+        REAL columns float64 with NaN, everything else an object array.
+        """
+        conn = self.pool.connection()
+        declared = {row[1]: (row[2] or "").upper() for row in conn.execute(f"PRAGMA table_info({table})")}
+        unknown = [c for c in columns if c not in declared]
+        if unknown:
+            raise ValueError(f"Unknown columns for {table}: {unknown}")
+        sql = f"SELECT {', '.join(columns)} FROM {table}"
+        if where:
+            sql += f" WHERE {where}"
+        rows = conn.execute(sql + " ORDER BY id", tuple(params)).fetchall()
+
+        arrays = {}
+        for i, col in enumerate(columns):
+            dtype, fill = _ARRAY_TYPES.get(declared[col], (object, None))
+            values = (fill if r[i] is None else r[i] for r in rows)
+            if dtype is object:
+                arrays[col] = np.array(list(values), dtype=object)
+            else:
+                arrays[col] = np.fromiter(values, dtype=dtype, count=len(rows))
+        return arrays
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Query router over a partitioned layout (src/storage/partitions.py).
+
+Each partition is opened with the core file ATTACHed as ``core``. Unqualified
+table names resolve in the partition first and then in core, so SQL and
+typed queries written for the single-file DB run unchanged on a partition.
+Team-, project- and task-scoped queries go to the one partition holding
+that id, found through the memory-mapped routes. User-scoped queries go to
+the partitions where the user has teams or assigned work. Anything else
+fans out over all partitions and concatenates the results.
+
+Reads use one SeedDB per partition, with per-thread read-only connections
+(src/access/pool.py). Writes go through ``writer()``: a read-write
+connection to one partition with core attached read-only, for example
+under a MutationJournal. Writers on different partitions never share a lock.
+
+Usage:
+    from src.access.router import PartitionRouter
+
+    router = PartitionRouter("output/asana_simulation.parts")
+    tasks = router.for_project(12).tasks_for_project(12)
+    open_tasks = router.fan_out("SELECT COUNT(*) FROM tasks WHERE completed = 0")
+    with MutationJournal(router.writer(team=3), episode="ep-3") as journal:
+        journal.complete_task(task_id)
+
+    python src/access/router.py info output/asana_simulation.parts
+    python src/access/router.py bench output/asana_simulation.sqlite --workers 4
+"""
+import argparse
+import json
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List
+from urllib.parse import quote
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.access.journal import random_operations
+from src.access.pool import readonly_uri
+from src.access.queries import SeedDB, Task
+from src.storage import summaries
+from src.storage.partitions import layout_path, load_layout, load_routes, split
+
+BUSY_TIMEOUT = 30.0  # seconds a writer waits for a lock before giving up
+
+
+class PartitionRouter:
+    """Sends each query to the partition that holds its team, project or task."""
+
+    def __init__(self, layout_dir, immutable: bool = False, **pool_options):
+        self.layout_dir = Path(layout_dir)
+        self.layout = load_layout(self.layout_dir)
+        self.routes = load_routes(self.layout_dir)
+        self.core_path = self.layout_dir / self.layout["core"]["file"]
+        self.paths = [self.layout_dir / part["file"] for part in self.layout["partitions"]]
+        self.core = SeedDB(self.core_path, immutable=immutable, **pool_options)
+        self.partitions = [SeedDB(path, immutable=immutable, attach={"core": self.core_path}, **pool_options)
+                           for path in self.paths]
+
+    def __len__(self) -> int:
+        return len(self.partitions)
+
+    def close(self):
+        self.core.close()
+        for db in self.partitions:
+            db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Routing -------------------------------------------------------
+    def partition_of(self, team: int = None, project: int = None, task: int = None) -> int:
+        keys = [(name, key) for name, key in (("team", team), ("project", project), ("task", task))
+                if key is not None]
+        if len(keys) != 1:
+            raise ValueError("Give exactly one of team, project or task")
+        name, key = keys[0]
+        route = self.routes[name]
+        index = int(route[key]) if 0 <= key < len(route) else -1
+        if index < 0:
+            raise KeyError(f"No {name} {key} in {self.layout_dir}")
+        return index
+
+    def partitions_for_user(self, user_id: int) -> List[int]:
+        """Partitions where the user is a team member or has assigned work."""
+        users = self.routes["user"]
+        return users.neighbors(user_id).tolist() if 0 <= user_id < len(users) else []
+
+    def db(self, team: int = None, project: int = None, task: int = None) -> SeedDB:
+        return self.partitions[self.partition_of(team, project, task)]
+
+    def for_team(self, team_id: int) -> SeedDB:
+        return self.db(team=team_id)
+
+    def for_project(self, project_id: int) -> SeedDB:
+        return self.db(project=project_id)
+
+    def for_task(self, task_id: int) -> SeedDB:
+        return self.db(task=task_id)
+
+    # --- Queries -------------------------------------------------------
+    def execute(self, sql: str, params=(), team: int = None, project: int = None, task: int = None) -> list:
+        """``sql`` on the one partition holding ``team``, ``project`` or ``task``."""
+        return self.db(team, project, task).fetch_tuples(sql, params)
+
+    def fan_out(self, sql: str, params=(), partitions=None) -> list:
+        """Rows of ``sql`` from every partition (or only ``partitions``), concatenated in partition order."""
+        rows = []
+        for index in range(len(self.partitions)) if partitions is None else partitions:
+            rows += self.partitions[index].fetch_tuples(sql, params)
+        return rows
+
+    def open_tasks_for_assignee(self, user_id: int, limit: int = 50) -> List[Task]:
+        """The user's open tasks from each of their partitions, merged by due date like the single-file query."""
+        tasks = [task for index in self.partitions_for_user(user_id)
+                 for task in self.partitions[index].open_tasks_for_assignee(user_id, limit)]
+        # SQLite sorts NULL due dates first; id breaks ties as in the SQL
+        return sorted(tasks, key=lambda t: (t.due_date is not None, t.due_date or "", t.id))[:limit]
+
+    def writer(self, team: int = None, project: int = None, task: int = None, partition: int = None,
+               busy_timeout: float = BUSY_TIMEOUT) -> sqlite3.Connection:
+        """Read-write connection to one partition, with core attached read-only as ``core``.
+
+        A MutationJournal numbers its entries per file, so keep one journal
+        per partition at a time.
+        """
+        index = partition if partition is not None else self.partition_of(team, project, task)
+        conn = sqlite3.connect(f"file:{quote(str(self.paths[index].resolve()))}", uri=True, timeout=busy_timeout)
+        conn.execute("ATTACH DATABASE ? AS core", (readonly_uri(self.core_path),))
+        return conn
+
+
+def _write_worker(target, ops: list, batch_size: int) -> dict:
+    """Apply ``ops`` in transactions of ``batch_size`` on ``target`` (path, core or None); runs in a process."""
+    path, core = target
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    if core:
+        conn.execute("ATTACH DATABASE ? AS core", (readonly_uri(core),))
+    started = time.time()
+    for start in range(0, len(ops), batch_size):
+        with conn:
+            for op in ops[start:start + batch_size]:
+                op.apply(conn)
+    finished = time.time()
+    conn.close()
+    return {"started": started, "finished": finished, "ops": len(ops)}
+
+
+def benchmark(db_path, workers: int = 4, n_ops: int = 2000, batch_size: int = 1) -> dict:
+    """Writers on distinct teams, all on one file vs each on its own partition (scratch copies)."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        single = Path(tmp) / "single.sqlite"
+        shutil.copy(db_path, single)
+        split(single, workers)
+        layout = layout_path(single)
+        with PartitionRouter(layout) as router:
+            workers = len(router)
+            # The same team-local journal operations in both runs; ids are shared by both layouts
+            ops = []
+            for index in range(workers):
+                conn = router.writer(partition=index)
+                ops.append(random_operations(conn, n_ops, seed=index))
+                conn.close()
+            paths = [str(p) for p in router.paths]
+            core = str(router.core_path)
+        # WAL and no summary triggers, the single file's best case (partitions carry neither)
+        conn = sqlite3.connect(str(single))
+        conn.execute("PRAGMA journal_mode = WAL")
+        summaries.drop_triggers(conn)
+        conn.close()
+
+        for mode, targets in (("single_file", [(str(single), None)] * workers),
+                              ("partitioned", [(path, core) for path in paths])):
+            with ProcessPoolExecutor(workers) as pool:
+                runs = list(pool.map(_write_worker, targets, ops, [batch_size] * workers))
+            wall = max(r["finished"] for r in runs) - min(r["started"] for r in runs)
+            total = sum(r["ops"] for r in runs)
+            results[mode] = {
+                "workers": workers,
+                "ops": total,
+                "seconds": round(wall, 3),
+                "ops_per_s": round(total / wall),
+            }
+    results["speedup"] = round(results["partitioned"]["ops_per_s"] / results["single_file"]["ops_per_s"], 2)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Route queries over a partitioned layout.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info", help="Show each partition's teams and a few routed counts")
+    info.add_argument("layout")
+    bench = sub.add_parser("bench", help="Concurrent writers: one file vs one partition each")
+    bench.add_argument("db", help="Single-file DB; it is copied and split in a scratch directory")
+    bench.add_argument("--workers", type=int, default=4)
+    bench.add_argument("--ops", type=int, default=2000, help="Operations per worker")
+    bench.add_argument("--batch-size", type=int, default=1, help="Operations per transaction")
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        if not Path(args.db).exists():
+            raise FileNotFoundError(f"DB not found at {args.db}")
+        print(json.dumps(benchmark(args.db, args.workers, args.ops, args.batch_size), indent=2))
+        return
+    with PartitionRouter(args.layout) as router:
+        counts = router.fan_out("SELECT COUNT(*), SUM(completed = 0) FROM tasks")
+        print(f"Layout {args.layout}: {len(router)} partitions, core {router.core_path.name}")
+        for part, (tasks, open_tasks) in zip(router.layout["partitions"], counts):
+            print(f"  {part['file']}: teams {part['teams'][0]}..{part['teams'][-1]} ({len(part['teams'])}), "
+                  f"{tasks:,} tasks, {open_tasks:,} open")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
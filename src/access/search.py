@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""FTS5 search over tasks, subtasks and comments.
+
+The index (search_fts.sql) is built in bulk after load and kept in sync by
+triggers. Free text is turned into an FTS5 query of quoted terms (stopwords
+dropped, last term prefix-matched) and ranked with BM25; all terms must match,
+falling back to any term when that finds nothing.
+
+Usage:
+    python src/access/search.py build output/asana_simulation.sqlite
+    python src/access/search.py search output/asana_simulation.sqlite "payment gateway memory leak"
+    python src/access/search.py bench output/asana_simulation.sqlite
+"""
+import argparse
+import random
+import re
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+SEARCH_SQL = BASE_DIR / "search_fts.sql"
+
+# kind -> (FTS table, base table, BM25 column weights)
+INDEXES = {
+    "tasks": ("tasks_fts", "tasks", (10.0, 1.0)),   # a hit in the name outranks one in the description
+    "subtasks": ("subtasks_fts", "subtasks", (1.0,)),
+    "comments": ("comments_fts", "comments", (1.0,)),
+}
+
+STOPWORDS = frozenset(
+    "a an and are as at be by find for from how in is it of on or that the this to was what where which "
+    "with about task tasks".split()
+)
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchHit(NamedTuple):
+    kind: str
+    id: int
+    gid: str
+    snippet: str
+    score: float
+
+
+def build_search_index(conn: sqlite3.Connection) -> float:
+    """Create and bulk-fill the FTS tables and sync triggers; returns seconds taken."""
+    kinds = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    missing = [base for _, base, _ in INDEXES.values() if base not in kinds]
+    if missing:
+        raise RuntimeError(f"FTS needs base tables (not views): {', '.join(missing)}")
+    started = time.perf_counter()
+    conn.executescript(SEARCH_SQL.read_text())
+    conn.commit()
+    return time.perf_counter() - started
+
+
+def has_search_index(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'tasks_fts'").fetchone() is not None
+
+
+def match_query(text: str, prefix: bool = True, match_all: bool = False) -> str:
+    """Free text -> FTS5 MATCH expression, or "" if nothing searchable is left."""
+    terms = [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS] or _TOKEN.findall(text.lower())
+    if not terms:
+        return ""
+    quoted = [f'"{t}"' for t in terms]
+    if prefix:
+        quoted[-1] += "*"
+    return (" AND " if match_all else " OR ").join(quoted)
+
+
+def _search_kind(conn: sqlite3.Connection, kind: str, query: str, limit: int) -> List[SearchHit]:
+    fts, base, weights = INDEXES[kind]
+    # Rank on the FTS table alone; snippets and gids only for the rows kept
+    top = conn.execute(
+        f"""SELECT rowid, bm25({fts}, {', '.join(map(str, weights))}) AS score
+            FROM {fts} WHERE {fts} MATCH ? ORDER BY score LIMIT ?""",
+        (query, limit)).fetchall()
+    if not top:
+        return []
+    scores = dict(top)
+    placeholders = ",".join("?" * len(top))
+    rows = conn.execute(
+        f"""SELECT f.rowid, b.gid, snippet({fts}, -1, '[', ']', '…', 12)
+            FROM {fts} f JOIN {base} b ON b.id = f.rowid
+            WHERE {fts} MATCH ? AND f.rowid IN ({placeholders})""",
+        (query, *scores))
+    return [SearchHit(kind, rowid, gid, snippet, scores[rowid]) for rowid, gid, snippet in rows]
+
+
+def search(conn: sqlite3.Connection, text: str, kinds: Sequence[str] = tuple(INDEXES), limit: int = 20,
+           prefix: bool = True, match_all: Optional[bool] = None) -> List[SearchHit]:
+    """Best ``limit`` hits across ``kinds``, ordered by BM25 (lower is better).
+
+    By default every term must match, falling back to any term when that
+    finds nothing; pass ``match_all`` to force one mode.
+    """
+    modes = [True, False] if match_all is None else [match_all]
+    for mode in modes:
+        query = match_query(text, prefix, mode)
+        if not query:
+            return []
+        hits = [hit for kind in kinds for hit in _search_kind(conn, kind, query, limit)]
+        if hits:
+            break
+    hits.sort(key=lambda h: h.score)
+    return hits[:limit]
+
+
+def _sample_terms(conn: sqlite3.Connection, count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    texts = [r[0] for r in conn.execute("SELECT text FROM comments ORDER BY random() LIMIT 2000") if r[0]]
+    words = sorted({w for t in texts for w in _TOKEN.findall(t.lower()) if len(w) > 4 and w not in STOPWORDS})
+    return [" ".join(rng.sample(words, 2)) for _ in range(count)] if words else []
+
+
+def benchmark(conn: sqlite3.Connection, queries: int = 50, seed: int = 42) -> dict:
+    """Median/p95 ms of FTS search vs the LIKE scans it replaces."""
+    terms = _sample_terms(conn, queries, seed)
+
+    def timed(fn):
+        samples = []
+        for term in terms:
+            t0 = time.perf_counter()
+            fn(term)
+            samples.append((time.perf_counter() - t0) * 1000)
+        samples.sort()
+        return {"p50_ms": round(statistics.median(samples), 3),
+                "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)], 3)}
+
+    def like(term):
+        # Every matching row is needed to pick the best ones, so LIKE scans whole tables
+        first, *rest = term.split()
+        pattern, other = f"%{first}%", f"%{rest[0] if rest else first}%"
+        conn.execute("SELECT id FROM comments WHERE text LIKE ? AND text LIKE ?", (pattern, other)).fetchall()
+        conn.execute("SELECT id FROM tasks WHERE (name || ' ' || IFNULL(description, '')) LIKE ? "
+                     "AND (name || ' ' || IFNULL(description, '')) LIKE ?", (pattern, other)).fetchall()
+        conn.execute("SELECT id FROM subtasks WHERE name LIKE ? AND name LIKE ?", (pattern, other)).fetchall()
+
+    counts = {kind: conn.execute(f"SELECT COUNT(*) FROM {base}").fetchone()[0]
+              for kind, (_, base, _) in INDEXES.items()}
+    return {
+        "rows": counts,
+        "queries": len(terms),
+        "like_scan": timed(like),
+        "fts": timed(lambda t: search(conn, t)),
+        "fts_any_term": timed(lambda t: search(conn, t, match_all=False)),
+        "fts_comments_only": timed(lambda t: search(conn, t, kinds=("comments",))),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FTS5 search over tasks, subtasks and comments.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Build the FTS index and sync triggers")
+    build.add_argument("db")
+    find = sub.add_parser("search", help="Run one search")
+    find.add_argument("db")
+    find.add_argument("text")
+    find.add_argument("--kinds", default=",".join(INDEXES))
+    find.add_argument("--limit", type=int, default=10)
+    find.add_argument("--any", action="store_true", help="Match any term instead of all (BM25-ranked)")
+    bench = sub.add_parser("bench", help="Compare FTS latency with LIKE scans")
+    bench.add_argument("db")
+    bench.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    if not Path(args.db).exists():
+        raise FileNotFoundError(f"DB not found at {args.db}")
+    conn = sqlite3.connect(args.db)
+    if args.command == "build":
+        seconds = build_search_index(conn)
+        print(f"✓ Search index built in {seconds:.2f}s")
+    elif not has_search_index(conn):
+        raise SystemExit(f"No search index in {args.db}; run `build` first")
+    elif args.command == "search":
+        for hit in search(conn, args.text, args.kinds.split(","), args.limit,
+                          match_all=False if args.any else None):
+            print(f"  {hit.score:8.2f}  {hit.kind:<9} {hit.gid}  {hit.snippet}")
+    else:
+        results = benchmark(conn, args.queries)
+        print("=" * 60)
+        print("SEARCH BENCHMARK")
+        print("=" * 60)
+        print("  Rows: " + ", ".join(f"{k} {v:,}" for k, v in results["rows"].items()))
+        for name in ("like_scan", "fts", "fts_any_term", "fts_comments_only"):
+            r = results[name]
+            print(f"  {name:<20} p50 {r['p50_ms']:>9.3f} ms   p95 {r['p95_ms']:>9.3f} ms")
+        print("=" * 60)
+    conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Local asyncio HTTP server exposing a generated DB through an Asana-shaped API.
+
+GET responses carry a weak ETag and are cached in memory until the next
+write; ``If-None-Match`` revalidation returns 304 without touching SQLite.
+The built-in load generator replays a mix of agent reads over keep-alive
+connections and reports requests/sec and latency percentiles.
+
+Usage:
+    python src/access/server.py serve output/asana_simulation.sqlite --port 8080
+    python src/access/server.py loadgen output/asana_simulation.sqlite --url http://127.0.0.1:8080 \\
+        --concurrency 64 --seconds 10
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.access.api import API_PREFIX, ApiError, AsanaAPI
+from src.access.pool import connect_readonly
+
+MAX_BODY = 1 << 20
+CACHE_ENTRIES = 4096
+
+
+class AsanaServer:
+    def __init__(self, db_path, read_only: bool = False, cache_entries: int = CACHE_ENTRIES):
+        if not Path(db_path).exists():
+            raise FileNotFoundError(f"DB not found at {db_path}")
+        if read_only:
+            conn = connect_readonly(db_path)
+        else:
+            conn = sqlite3.connect(str(db_path), check_same_thread=False)
+            conn.execute("PRAGMA foreign_keys = ON")
+        self.api = AsanaAPI(conn, writable=not read_only)
+        self.cache = OrderedDict()  # request target -> (etag, body)
+        self.cache_entries = cache_entries
+        self.generation = 0         # bumped on every write; part of every ETag
+        self.stats = {"requests": 0, "cache_hits": 0, "not_modified": 0, "writes": 0}
+
+    def _etag(self, body: bytes) -> str:
+        return f'W/"{self.generation}-{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+    def respond(self, method: str, target: str, headers: dict, raw_body: bytes):
+        """Returns (status, extra headers, body bytes)."""
+        self.stats["requests"] += 1
+        if method == "GET":
+            cached = self.cache.get(target)
+            if cached is not None:
+                self.cache.move_to_end(target)
+                self.stats["cache_hits"] += 1
+                etag, body = cached
+            else:
+                status, body = self._dispatch(method, target, None)
+                if status != 200:
+                    return status, {}, body
+                etag = self._etag(body)
+                self.cache[target] = (etag, body)
+                if len(self.cache) > self.cache_entries:
+                    self.cache.popitem(last=False)
+            if etag in headers.get("if-none-match", ""):
+                self.stats["not_modified"] += 1
+                return 304, {"ETag": etag}, b""
+            return 200, {"ETag": etag}, body
+
+        try:
+            payload = json.loads(raw_body) if raw_body else {}
+        except json.JSONDecodeError:
+            return 400, {}, _error_body("Request body is not valid JSON")
+        status, body = self._dispatch(method, target, payload)
+        if status < 400:
+            self.generation += 1
+            self.cache.clear()
+            self.stats["writes"] += 1
+        return status, {}, body
+
+    def _dispatch(self, method: str, target: str, payload):
+        parts = urlsplit(target)
+        query = dict(parse_qsl(parts.query))
+        try:
+            status, data = self.api.handle(method, parts.path, query, payload)
+        except ApiError as e:
+            return e.status, _error_body(e.message)
+        except sqlite3.IntegrityError as e:
+            return 400, _error_body(str(e))
+        except Exception as e:
+            # Answer instead of letting it escape handle_connection and drop the socket
+            return 500, _error_body(f"Internal error: {e}")
+        return status, json.dumps(data, separators=(",", ":")).encode()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    writer.write(_response(400, {}, _error_body("Malformed request line"), False))
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        key, value = line.split(":", 1)
+                        headers[key.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    writer.write(_response(400, {}, _error_body("Invalid Content-Length"), False))
+                    return
+                if length > MAX_BODY:
+                    writer.write(_response(413, {}, _error_body("Request body too large"), False))
+                    return
+                raw_body = await reader.readexactly(length) if length else b""
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version.upper() == "HTTP/1.1")
+
+                status, extra, body = self.respond(method.upper(), target, headers, raw_body)
+                writer.write(_response(status, extra, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        print(f"✓ Serving {API_PREFIX} on http://{host}:{port} "
+              f"({'read-only' if not self.api.writable else 'read-write'})")
+        async with server:
+            await server.serve_forever()
+
+
+def _error_body(message: str) -> bytes:
+    return json.dumps({"errors": [{"message": message}]}).encode()
+
+
+def _response(status: int, extra: dict, body: bytes, keep_alive: bool) -> bytes:
+    head = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    if body:
+        head.append("Content-Type: application/json; charset=utf-8")
+    head += [f"{k}: {v}" for k, v in extra.items()]
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+
+# --- load generator --------------------------------------------------------
+def sample_targets(db_path, count: int = 2000, seed: int = 42) -> list:
+    """A mix of read requests an agent issues, addressed by real gids."""
+    rng = random.Random(seed)
+    conn = connect_readonly(db_path)
+    gids = {table: [r[0] for r in conn.execute(f"SELECT gid FROM {table}")]
+            for table in ("tasks", "projects", "users", "sections")}
+    conn.close()
+    templates = [
+        (0.30, "/tasks/{tasks}"),
+        (0.15, "/tasks/{tasks}?opt_fields=name,assignee.email,due_on,completed,custom_fields,tags"),
+        (0.15, "/projects/{projects}/tasks?limit=50&opt_fields=name,due_on,completed,assignee"),
+        (0.15, "/users/{users}/tasks?completed_since=now&limit=50"),
+        (0.10, "/tasks/{tasks}/stories"),
+        (0.10, "/sections/{sections}/tasks?limit=20"),
+        (0.05, "/projects/{projects}"),
+    ]
+    weights = [w for w, _ in templates]
+    targets = []
+    for _ in range(count):
+        template = rng.choices(templates, weights)[0][1]
+        key = template.split("{", 1)[1].split("}", 1)[0]
+        targets.append(API_PREFIX + template.replace("{" + key + "}", rng.choice(gids[key])))
+    return targets
+
+
+async def _client(host: str, port: int, targets: list, deadline: float, revalidate: bool,
+                  latencies: list, statuses: dict, seed: int):
+    rng = random.Random(seed)
+    etags = {}
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            target = rng.choice(targets)
+            request = f"GET {target} HTTP/1.1\r\nHost: {host}\r\n"
+            if revalidate and target in etags:
+                request += f"If-None-Match: {etags[target]}\r\n"
+            started = time.perf_counter()
+            writer.write((request + "\r\n").encode("latin-1"))
+            head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+            headers = dict(line.split(": ", 1) for line in head[1:] if ": " in line)
+            await reader.readexactly(int(headers.get("Content-Length", 0)))
+            latencies.append(time.perf_counter() - started)
+            status = int(head[0].split(" ")[1])
+            statuses[status] = statuses.get(status, 0) + 1
+            if "ETag" in headers:
+                etags[target] = headers["ETag"]
+    finally:
+        writer.close()
+
+
+async def load_test(url: str, targets: list, concurrency: int, seconds: float, revalidate: bool) -> dict:
+    parts = urlsplit(url)
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _client(parts.hostname, parts.port or 80, targets, deadline, revalidate, latencies, statuses, i)
+        for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def pct(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 3) if latencies else None
+
+    return {"requests": len(latencies), "seconds": round(elapsed, 3),
+            "requests_per_s": round(len(latencies) / elapsed, 1),
+            "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99),
+            "statuses": {str(k): v for k, v in sorted(statuses.items())}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Asana-shaped API server over a generated DB.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="Serve the DB over HTTP")
+    serve.add_argument("db")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--read-only", action="store_true", help="Reject write endpoints")
+    load = sub.add_parser("loadgen", help="Measure requests/sec and latency against a running server")
+    load.add_argument("db", help="DB the server is serving (used to sample gids)")
+    load.add_argument("--url", default="http://127.0.0.1:8080")
+    load.add_argument("--concurrency", type=int, default=32)
+    load.add_argument("--seconds", type=float, default=10.0)
+    load.add_argument("--revalidate", action="store_true", help="Send If-None-Match for repeated requests")
+    load.add_argument("--json", help="Also write the results to this path")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        try:
+            asyncio.run(AsanaServer(args.db, read_only=args.read_only).serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    targets = sample_targets(args.db)
+    results = asyncio.run(load_test(args.url, targets, args.concurrency, args.seconds, args.revalidate))
+    print(f"✓ {results['requests']:,} requests in {results['seconds']}s "
+          f"({results['requests_per_s']:,.0f} req/s, {args.concurrency} connections)")
+    print(f"  latency p50 {results['p50_ms']} ms, p95 {results['p95_ms']} ms, p99 {results['p99_ms']} ms")
+    print(f"  statuses: {results['statuses']}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
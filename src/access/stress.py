@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Concurrent reader stress test for the access layer.
+
+Runs a mix of typed lookups from many threads (optionally in several
+processes) against one DB file and reports throughput and lock errors.
+
+Usage:
+    python src/access/stress.py output/asana_simulation.sqlite --threads 200 --processes 4 --seconds 10
+"""
+import argparse
+import random
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.access.queries import SeedDB
+
+
+def _reader(db: SeedDB, ids: dict, deadline: float, seed: int, counts: list, slot: int):
+    rng = random.Random(seed)
+    done = errors = 0
+    while time.perf_counter() < deadline:
+        try:
+            op = rng.random()
+            if op < 0.4:
+                db.open_tasks_for_assignee(rng.choice(ids["users"]))
+            elif op < 0.7:
+                db.task(rng.choice(ids["tasks"]))
+            elif op < 0.9:
+                db.comments_for_task(rng.choice(ids["tasks"]))
+            else:
+                db.projects_for_team(rng.choice(ids["teams"]))
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    counts[slot] = (done, errors)
+
+
+def run_process(db_path: str, threads: int, seconds: float, seed: int = 0) -> tuple:
+    """Returns (queries, lock errors, connections opened) for one process."""
+    with SeedDB(db_path) as db:
+        ids = {
+            "users": [r[0] for r in db.fetch_tuples("SELECT id FROM users")],
+            "tasks": [r[0] for r in db.fetch_tuples("SELECT id FROM tasks")],
+            "teams": [r[0] for r in db.fetch_tuples("SELECT id FROM teams")],
+        }
+        counts = [(0, 0)] * threads
+        deadline = time.perf_counter() + seconds
+        workers = [threading.Thread(target=_reader, args=(db, ids, deadline, seed * 10_000 + i, counts, i))
+                   for i in range(threads)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        return sum(c[0] for c in counts), sum(c[1] for c in counts), db.pool.opened
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent reader stress test.")
+    parser.add_argument("db")
+    parser.add_argument("--threads", type=int, default=100, help="Reader threads per process")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    if args.processes <= 1:
+        results = [run_process(args.db, args.threads, args.seconds)]
+    else:
+        with ProcessPoolExecutor(args.processes) as pool:
+            futures = [pool.submit(run_process, args.db, args.threads, args.seconds, p)
+                       for p in range(args.processes)]
+            results = [f.result() for f in futures]
+
+    queries = sum(r[0] for r in results)
+    errors = sum(r[1] for r in results)
+    connections = sum(r[2] for r in results)
+    print(f"✓ {args.processes} process(es) x {args.threads} threads, {connections} connections")
+    print(f"  {queries:,} queries in {args.seconds:.1f}s ({queries / args.seconds:,.0f}/s), {errors} lock errors")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
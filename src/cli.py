@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Single entry point for the generator and its tools.
+
+Each subcommand imports only the subsystem it runs, when it runs, so quick
+commands (validate, plan) start without loading Faker, NumPy or the
+generators. Options are the subsystem's own flags (``<command> --help``);
+most default to the env vars in .env.example, and .env is read when present.
+
+Usage:
+    python src/cli.py generate --users 2000 --seed 7 --output output/small.sqlite
+    python src/cli.py extend --resume
+    python src/cli.py extend --stages custom_field_defs
+    python src/cli.py validate output/asana_simulation.sqlite
+    python src/cli.py plan --users 20000 --search-index
+    python src/cli.py plan calibrate output/small.sqlite output/asana_simulation.sqlite
+    python src/cli.py export compact output/asana_simulation.sqlite output/asana_simulation.compact.sqlite
+    python src/cli.py export adjacency output/asana_simulation.sqlite
+    python src/cli.py export snapshot output/asana_simulation.sqlite output/2024-10-01.sqlite --as-of 2024-10-01
+    python src/cli.py export postgres output/asana_simulation.sqlite --dsn postgresql://localhost/asana --replace
+    python src/cli.py export collaboration output/asana_simulation.sqlite
+    python src/cli.py export partitions output/asana_simulation.sqlite --partitions 8
+    python src/cli.py validate output/asana_simulation.parts
+    python src/cli.py regenerate --project 12
+    python src/cli.py corpus corpus.json
+    python src/cli.py bench-imports
+"""
+import argparse
+import importlib
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+# export target -> (module, leading argv for its main)
+EXPORTS = {
+    "compact": ("src.storage.compact", ["convert"]),
+    "adjacency": ("src.storage.adjacency", ["build"]),
+    "snapshot": ("src.storage.temporal", ["snapshot"]),
+    "postgres": ("src.storage.postgres", ["export"]),
+    "collaboration": ("src.storage.collaboration", ["build"]),
+    "partitions": ("src.storage.partitions", ["split"]),
+}
+# command -> (module whose main(argv) runs it, help)
+COMMANDS = {
+    "generate": ("src.main", "Build a workspace DB"),
+    "extend": ("src.main", "Resume an interrupted build (--resume) or regenerate stages (--stages)"),
+    "validate": ("src.validate_db", "Check a generated DB or partitioned layout"),
+    "plan": ("src.plan", "Estimate rows, DB size and build time (or calibrate from a build)"),
+    "export": (None, "Write another format of a DB: " + ", ".join(EXPORTS)),
+    "regenerate": ("src.regenerate", "Regenerate a project, team or table in place"),
+    "corpus": ("src.corpus", "Build many workspaces from a corpus spec"),
+    "bench-imports": ("src.startup_bench", "Time each command's start-up"),
+}
+PLAN_COMMANDS = ("estimate", "calibrate")
+
+
+def load_env():
+    # python-dotenv is a noticeable share of a quick command's start-up; skip it without a .env
+    if (BASE_DIR / ".env").exists():
+        from dotenv import load_dotenv
+        load_dotenv(BASE_DIR / ".env")
+
+
+def run_module(module: str, argv: list, prog: str):
+    # Subsystem parsers name themselves after sys.argv[0]
+    sys.argv[0] = prog
+    return importlib.import_module(module).main(argv)
+
+
+def export(argv: list, prog: str):
+    parser = argparse.ArgumentParser(prog=prog, description="Write another format of a generated DB.")
+    parser.add_argument("target", choices=sorted(EXPORTS))
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments of the target (see <target> --help)")
+    args = parser.parse_args(argv)
+    module, leading = EXPORTS[args.target]
+    return run_module(module, leading + args.args, f"{prog} {args.target}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = argparse.ArgumentParser(
+        prog="cli.py", description="Asana simulation data generator and tools.",
+        epilog="Commands: " + "; ".join(f"{name}: {text}" for name, (_, text) in COMMANDS.items()))
+    parser.add_argument("command", choices=list(COMMANDS))
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments of the command (see <command> --help)")
+    if not argv or argv[0] in ("-h", "--help"):
+        parser.print_help()
+        return 0 if argv else 2
+    args = parser.parse_args(argv[:1])
+    rest = argv[1:]
+    prog = f"cli.py {args.command}"
+
+    load_env()
+    if args.command == "export":
+        return export(rest, prog)
+    if args.command == "extend" and not {"-h", "--help", "--resume"} & set(rest) \
+            and not any(a == "--stages" or a.startswith("--stages=") for a in rest):
+        parser.error("extend needs --resume or --stages")
+    if args.command == "plan" and not (rest and (rest[0] in PLAN_COMMANDS or rest[0] in ("-h", "--help"))):
+        # Estimating is the common case; its flags can follow `plan` directly
+        rest = ["estimate"] + rest
+    return run_module(COMMANDS[args.command][0], rest, prog)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""Build a corpus of varied workspaces in parallel, indexed by a manifest.
+
+A spec lists workspaces explicitly and/or as a grid (the cartesian product of
+the listed values), on top of shared defaults:
+
+    {
+      "output_dir": "output/corpus",
+      "defaults": {"number_of_users": 2000, "base_time": "2025-01-01T09:00:00"},
+      "grid": {"seed": [1, 2, 3], "number_of_users": [500, 5000]},
+      "entries": [
+        {"name": "eng-heavy", "seed": 7,
+         "project_type_weights": {"engineering": 0.9, "marketing": 0.05, "ops": 0.05}},
+        {"name": "global", "name_locales": {"en_US": 0.6, "de_DE": 0.2, "fr_FR": 0.2}}
+      ]
+    }
+
+Each workspace is built by its own worker process (generation stages run
+inline inside it). The generator modules and Faker's provider data are loaded
+once in the parent and shared copy-on-write with the forked workers, which
+are reused across entries. ``manifest.json`` records each DB's config, row
+counts, size and SHA-256; entries whose DB already exists with the same
+config are skipped.
+
+Usage:
+    python src/corpus.py corpus.json --workers 4
+    python src/corpus.py corpus.json --dry-run
+    python src/corpus.py corpus.json --verify
+"""
+import argparse
+import contextlib
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src import main as builder
+from src.plan import GENERATED_TABLES
+from src.utils.checkpoint import Checkpointer
+
+MANIFEST = "manifest.json"
+DEFAULT_BASE_TIME = "2025-01-01T09:00:00"
+# Settings that describe a workspace, and the build options a spec may set per entry
+WORKSPACE_KEYS = ("seed", "number_of_users", "base_time", "project_type_weights", "name_locales")
+OPTION_KEYS = ("summaries", "search_index", "index_profile")
+
+
+def config_hash(config: dict) -> str:
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+def expand_spec(spec: dict) -> list:
+    """Spec -> list of entries ``{"name", "config"}``, in a stable order."""
+    defaults = {"seed": builder.SEED, "number_of_users": builder.NUMBER_OF_USERS,
+                "base_time": DEFAULT_BASE_TIME, **spec.get("defaults", {})}
+    grid = spec.get("grid", {})
+    combos = [dict(zip(grid, values)) for values in itertools.product(*grid.values())] if grid else []
+    entries = []
+    for raw in combos + spec.get("entries", []):
+        raw = {**defaults, **raw}
+        unknown = set(raw) - set(WORKSPACE_KEYS) - set(OPTION_KEYS) - {"name"}
+        if unknown:
+            raise ValueError(f"Unknown corpus keys: {', '.join(sorted(unknown))}")
+        config = {k: raw[k] for k in WORKSPACE_KEYS + OPTION_KEYS if raw.get(k) is not None}
+        name = raw.get("name") or f"s{config['seed']}-u{config['number_of_users']}-{config_hash(config)[:8]}"
+        entries.append({"name": name, "config": config})
+    names = [e["name"] for e in entries]
+    duplicates = {n for n in names if names.count(n) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate corpus entry names: {', '.join(sorted(duplicates))}")
+    return entries
+
+
+def file_sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def describe_db(db_path) -> dict:
+    """Row counts, size and checksum of a finished DB."""
+    conn = sqlite3.connect(str(db_path))
+    rows = {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in GENERATED_TABLES}
+    conn.close()
+    return {"rows": rows, "bytes": Path(db_path).stat().st_size, "sha256": file_sha256(db_path)}
+
+
+def stored_config(db_path) -> dict:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return Checkpointer(conn).get("config") or {}
+    except sqlite3.DatabaseError:
+        return {}
+    finally:
+        conn.close()
+
+
+def load_manifest(output_dir: Path) -> dict:
+    path = output_dir / MANIFEST
+    return json.loads(path.read_text()) if path.exists() else {"entries": {}}
+
+
+def write_manifest(output_dir: Path, manifest: dict):
+    # Write-then-rename, so a crash never leaves a truncated manifest
+    path = output_dir / MANIFEST
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2) + "\n")
+    os.replace(tmp, path)
+
+
+def _warm():
+    """Load Faker's providers and the generator modules before the pool forks."""
+    from src.generators import projects, tasks, users
+    users.fake.name()
+    projects.fake.bs()
+    tasks.fake.paragraph()
+
+
+def build_entry(entry: dict, output_dir: str) -> dict:
+    """Worker: build one workspace to a temporary path, then move it into place."""
+    config = entry["config"]
+    db_path = Path(output_dir) / f"{entry['name']}.sqlite"
+    partial = db_path.with_name(f"{entry['name']}.partial.sqlite")
+    flags = ["--workers", "1", "--summaries" if config.get("summaries", True) else "--no-summaries"]
+    if config.get("search_index"):
+        flags.append("--search-index")
+    if config.get("index_profile"):
+        flags += ["--index-profile", config["index_profile"]]
+    started = time.perf_counter()
+    with open(db_path.with_suffix(".log"), "w") as log, contextlib.redirect_stdout(log), \
+            contextlib.redirect_stderr(log):
+        builder.build(builder.parse_args(flags), output_db=partial, number_of_users=config["number_of_users"],
+                      seed=config["seed"], base_time=config["base_time"],
+                      project_type_weights=config.get("project_type_weights"),
+                      name_locales=config.get("name_locales"))
+    os.replace(partial, db_path)
+    report = builder.report_path_for(partial)
+    if report.exists():
+        os.replace(report, builder.report_path_for(db_path))
+    return {"build_s": round(time.perf_counter() - started, 2), **describe_db(db_path)}
+
+
+def _record(entry: dict, db_path: Path, stats: dict) -> dict:
+    return {"db": db_path.name, "config": entry["config"], "config_hash": config_hash(entry["config"]),
+            "built_at": datetime.utcnow().isoformat(timespec="seconds"), **stats}
+
+
+def _is_built(entry: dict, db_path: Path, record: dict) -> bool:
+    if not db_path.exists():
+        return False
+    if record is not None:
+        return record["config_hash"] == config_hash(entry["config"])
+    # A DB without a manifest record (e.g. manifest lost) counts if it was built from this config
+    stored = stored_config(db_path)
+    return all(stored.get(k) == entry["config"].get(k) for k in WORKSPACE_KEYS)
+
+
+def run_corpus(spec: dict, workers: int, force: bool = False, dry_run: bool = False) -> int:
+    output_dir = Path(spec.get("output_dir", builder.BASE_DIR / "output" / "corpus"))
+    output_dir.mkdir(parents=True, exist_ok=True)
+    entries = expand_spec(spec)
+    manifest = load_manifest(output_dir)
+    records = manifest["entries"]
+
+    todo = []
+    for entry in entries:
+        db_path = output_dir / f"{entry['name']}.sqlite"
+        record = records.get(entry["name"])
+        if not force and _is_built(entry, db_path, record):
+            if record is None:
+                records[entry["name"]] = _record(entry, db_path, describe_db(db_path))
+            continue
+        todo.append(entry)
+    print(f"Corpus: {len(entries)} workspaces, {len(entries) - len(todo)} already built, "
+          f"{len(todo)} to build with {workers} workers -> {output_dir}")
+    if dry_run:
+        for entry in todo:
+            print(f"  {entry['name']}: {json.dumps(entry['config'], sort_keys=True)}")
+        return 0
+    write_manifest(output_dir, manifest)
+    if not todo:
+        return 0
+
+    _warm()
+    # fork shares the warm modules with every worker; spawn would re-import them per worker
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    failures = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {pool.submit(build_entry, entry, str(output_dir)): entry for entry in todo}
+        for done, fut in enumerate(as_completed(futures), 1):
+            entry = futures[fut]
+            db_path = output_dir / f"{entry['name']}.sqlite"
+            try:
+                stats = fut.result()
+            except Exception as e:  # keep building the rest; the entry stays unbuilt
+                failures += 1
+                print(f"  ✗ [{done}/{len(todo)}] {entry['name']}: {e} (see {db_path.with_suffix('.log')})")
+                continue
+            records[entry["name"]] = _record(entry, db_path, stats)
+            write_manifest(output_dir, manifest)
+            print(f"  ✓ [{done}/{len(todo)}] {entry['name']}: {sum(stats['rows'].values()):,} rows, "
+                  f"{stats['bytes'] / 1e6:.1f} MB in {stats['build_s']}s")
+    print(f"✓ Corpus built in {time.perf_counter() - started:.1f}s; manifest at {output_dir / MANIFEST}")
+    return 1 if failures else 0
+
+
+def verify_corpus(spec: dict) -> int:
+    """Re-hash every DB in the manifest; returns the number of mismatches."""
+    output_dir = Path(spec.get("output_dir", builder.BASE_DIR / "output" / "corpus"))
+    bad = 0
+    for name, record in load_manifest(output_dir)["entries"].items():
+        db_path = output_dir / record["db"]
+        ok = db_path.exists() and file_sha256(db_path) == record["sha256"]
+        bad += not ok
+        print(f"  {'✓' if ok else '✗'} {name}")
+    return bad
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build many workspaces in parallel from a corpus spec.")
+    parser.add_argument("spec", help="JSON corpus spec")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Workspaces built concurrently")
+    parser.add_argument("--force", action="store_true", help="Rebuild entries that already exist")
+    parser.add_argument("--dry-run", action="store_true", help="List what would be built")
+    parser.add_argument("--verify", action="store_true", help="Check manifest checksums instead of building")
+    args = parser.parse_args(argv)
+
+    spec = json.loads(Path(args.spec).read_text())
+    if args.verify:
+        return 1 if verify_corpus(spec) else 0
+    return run_corpus(spec, max(1, args.workers), force=args.force, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
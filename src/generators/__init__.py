@@ -1,3 +0,0 @@
-from . import users  
-from . import projects  
-from . import tasks  
@@ -3,100 +3,110 @@ import sqlite3
 import uuid
 import random
 import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.generators.params import FIELDS_PER_PROJECT, VALUE_RATE, VALUES_PER_TASK, field_templates
+from src.utils.dag import StageResult
+from src.utils.rng import seed_entity
+
+CUSTOM_FIELD_DEF_COLUMNS = ("id", "gid", "project_id", "name", "field_type", "options")
+CUSTOM_FIELD_VALUE_COLUMNS = ("custom_field_def_id", "task_id", "value")
 
 
 def _gid():
-    return str(uuid.uuid4())
-
-
-# Custom field templates by project type
-ENGINEERING_CUSTOM_FIELDS = [
-    ("Priority", "enum", ["Low", "Medium", "High", "Critical"]),
-    ("Story Points", "number", None),
-    ("Sprint", "text", None),
-    ("Component", "enum", ["Frontend", "Backend", "Database", "API", "DevOps"]),
-    ("Bug Severity", "enum", ["Minor", "Major", "Critical", "Blocker"]),
-]
-
-MARKETING_CUSTOM_FIELDS = [
-    ("Campaign Status", "enum", ["Planning", "In Progress", "Review", "Live", "Complete"]),
-    ("Target Audience", "text", None),
-    ("Budget", "number", None),
-    ("Channel", "enum", ["Email", "Social", "Web", "Events", "Paid Ads"]),
-]
-
-OPS_CUSTOM_FIELDS = [
-    ("Priority", "enum", ["Low", "Medium", "High", "Urgent"]),
-    ("Department", "enum", ["HR", "Finance", "IT", "Legal", "Operations"]),
-    ("Status", "enum", ["Not Started", "In Progress", "Blocked", "Complete"]),
-]
-
-
-def generate_custom_fields_for_projects(conn: sqlite3.Connection, projects_info: list):
-    # Generate custom field definitions and populate values for tasks.
-    cur = conn.cursor()
-    
-    print("  Generating custom fields...")
-    field_count = 0
-    value_count = 0
+    return str(uuid.UUID(int=random.getrandbits(128), version=4))
+
+
+def build_custom_field_defs(projects_info: list, seed: int):
+    # Generate project-scoped custom field definitions; they only need projects, not tasks.
+    print("  Generating custom field definitions...")
+    rows = []
+    field_defs = {}
     
     for proj in projects_info:
-        proj_id = proj["project_id"]
-        proj_type = proj.get("project_type", "engineering")
-        
-        # Select appropriate custom field templates
-        if proj_type == "engineering":
-            templates = ENGINEERING_CUSTOM_FIELDS
-        elif proj_type == "marketing":
-            templates = MARKETING_CUSTOM_FIELDS
-        else:
-            templates = OPS_CUSTOM_FIELDS
-        
-        # Create 2-4 custom fields per project
-        n_fields = random.randint(2, min(4, len(templates)))
-        selected_templates = random.sample(templates, n_fields)
-        
-        project_field_ids = []
-        
-        for field_name, field_type, options in selected_templates:
-            f_gid = _gid()
-            options_json = json.dumps(options) if options else None
+        project_rows = project_field_def_rows(seed, proj, len(rows) + 1)
+        rows.extend(project_rows)
+        field_defs[proj["project_id"]] = field_defs_from_rows(project_rows)
+    
+    print(f"  ✓ Created {len(rows)} custom field definitions")
+    return StageResult({"field_defs": field_defs},
+                       [("custom_field_defs", CUSTOM_FIELD_DEF_COLUMNS, rows)])
+
+
+def project_field_def_rows(seed: int, proj: dict, first_def_id: int) -> list:
+    # One project's definitions, drawn from its own stream.
+    proj_id = proj["project_id"]
+    seed_entity(seed, "custom_field_defs", proj_id)
+    proj_type = proj.get("project_type", "engineering")
+    
+    # Select appropriate custom field templates
+    templates = field_templates(proj_type)
+    
+    # Create 2-4 custom fields per project
+    lo, hi = FIELDS_PER_PROJECT
+    n_fields = random.randint(lo, min(hi, len(templates)))
+    selected_templates = random.sample(templates, n_fields)
+    
+    rows = []
+    for field_def_id, (field_name, field_type, options) in enumerate(selected_templates, first_def_id):
+        options_json = json.dumps(options) if options else None
+        rows.append((field_def_id, _gid(), proj_id, field_name, field_type, options_json))
+    return rows
+
+
+def field_defs_from_rows(rows: list) -> list:
+    return [(row[0], row[4], json.loads(row[5]) if row[5] else None) for row in rows]
+
+
+def build_custom_field_values(field_defs: dict, task_ids_by_project: dict, seed: int):
+    # Populate custom field values for the tasks of every project with definitions.
+    print("  Generating custom field values...")
+    rows = []
+    
+    for proj_id, project_field_ids in field_defs.items():
+        rows.extend(project_field_value_rows(seed, proj_id, project_field_ids,
+                                             task_ids_by_project.get(proj_id, [])))
+    
+    print(f"  ✓ Created {len(rows)} custom field values")
+    return StageResult({}, [("custom_field_values", CUSTOM_FIELD_VALUE_COLUMNS, rows)])
+
+
+def project_field_value_rows(seed: int, proj_id: int, project_field_ids: list, task_ids: list) -> list:
+    # Values for one project's tasks, drawn from the project's own stream.
+    seed_entity(seed, "custom_field_values", proj_id)
+    rows = []
+    
+    # Populate custom field values for 60-80% of tasks
+    for task_id in task_ids:
+        if random.random() < VALUE_RATE:
+            # Fill 1-3 fields per task
+            fields_to_fill = random.sample(project_field_ids, 
+                                         min(random.randint(*VALUES_PER_TASK), len(project_field_ids)))
             
-            cur.execute(
-                "INSERT INTO custom_field_defs (gid, project_id, name, field_type, options) VALUES (?, ?, ?, ?, ?)",
-                (f_gid, proj_id, field_name, field_type, options_json)
-            )
-            field_def_id = cur.lastrowid
-            project_field_ids.append((field_def_id, field_type, options))
-            field_count += 1
-        
-        # Get all tasks for this project
-        cur.execute("SELECT id FROM tasks WHERE project_id = ?", (proj_id,))
-        task_ids = [r[0] for r in cur.fetchall()]
-        
-        # Populate custom field values for 60-80% of tasks
-        for task_id in task_ids:
-            if random.random() < 0.7:  # 70% of tasks get custom field values
-                # Fill 1-3 fields per task
-                fields_to_fill = random.sample(project_field_ids, 
-                                             min(random.randint(1, 3), len(project_field_ids)))
+            for field_def_id, field_type, options in fields_to_fill:
+                # Generate appropriate value based on field type
+                if field_type == "enum" and options:
+                    value = random.choice(options)
+                elif field_type == "number":
+                    value = str(random.choice([1, 2, 3, 5, 8, 13]))
+                elif field_type == "text":
+                    value = f"Sprint {random.randint(1, 20)}" if "Sprint" in str(field_def_id) else "Notes"
+                else:
+                    value = "N/A"
                 
-                for field_def_id, field_type, options in fields_to_fill:
-                    # Generate appropriate value based on field type
-                    if field_type == "enum" and options:
-                        value = random.choice(options)
-                    elif field_type == "number":
-                        value = str(random.choice([1, 2, 3, 5, 8, 13]))
-                    elif field_type == "text":
-                        value = f"Sprint {random.randint(1, 20)}" if "Sprint" in str(field_def_id) else "Notes"
-                    else:
-                        value = "N/A"
-                    
-                    cur.execute(
-                        "INSERT INTO custom_field_values (custom_field_def_id, task_id, value) VALUES (?, ?, ?)",
-                        (field_def_id, task_id, value)
-                    )
-                    value_count += 1
-    
-    conn.commit()
-    print(f"  ✓ Created {field_count} custom field definitions and {value_count} values")
+                rows.append((field_def_id, task_id, value))
+    return rows
+
+
+def load_field_defs(conn: sqlite3.Connection, project_id: int = None) -> dict:
+    field_defs = {}
+    where, params = ("WHERE project_id = ?", (project_id,)) if project_id is not None else ("", ())
+    for def_id, project_id, field_type, options in conn.execute(
+        f"SELECT id, project_id, field_type, options FROM custom_field_defs {where} ORDER BY id", params
+    ):
+        field_defs.setdefault(project_id, []).append(
+            (def_id, field_type, json.loads(options) if options else None)
+        )
+    return field_defs
@@ -0,0 +1,67 @@
+# Volume parameters and vocabularies shared by the generators and the tools that reason about them.
+#
+# Kept free of heavy imports (Faker, NumPy) so the dry-run planner and the
+# validator can read them without loading the generators.
+
+# users: members per team
+TEAM_SIZE = (5, 20)
+
+# projects
+NUM_TEAMS = 200
+PROJECTS_PER_TEAM = (2, 8)
+PROJECT_TYPE_WEIGHTS = {"engineering": 0.6, "marketing": 0.25, "ops": 0.15}
+ARCHIVED_RATE = 0.025  # 2-3% of projects are archived (edge case)
+# Standard workflow sections created for every project
+SECTION_NAMES = ["Backlog", "To Do", "In Progress", "Review", "Done"]
+
+# tasks
+TASKS_PER_PROJECT = {"archived": (5, 15), "engineering": (30, 120), "marketing": (10, 40), "ops": (8, 30)}
+SUBTASK_RATE, SUBTASKS_PER_TASK = 0.25, (1, 5)
+COMMENT_RATE, COMMENTS_PER_TASK = 0.6, (1, 5)
+TAG_RATE, TAGS_PER_TASK = 0.5, (1, 2)
+ATTACHMENT_RATE = 0.05
+TAG_NAMES = ["bug", "feature", "urgent", "low-effort", "research", "customer"]
+
+
+def tasks_per_project(project_type: str, is_archived: int) -> tuple:
+    # Other project types are sized like ops
+    if is_archived:
+        return TASKS_PER_PROJECT["archived"]
+    return TASKS_PER_PROJECT.get(project_type, TASKS_PER_PROJECT["ops"])
+
+
+# custom fields: templates by project type
+ENGINEERING_CUSTOM_FIELDS = [
+    ("Priority", "enum", ["Low", "Medium", "High", "Critical"]),
+    ("Story Points", "number", None),
+    ("Sprint", "text", None),
+    ("Component", "enum", ["Frontend", "Backend", "Database", "API", "DevOps"]),
+    ("Bug Severity", "enum", ["Minor", "Major", "Critical", "Blocker"]),
+]
+
+MARKETING_CUSTOM_FIELDS = [
+    ("Campaign Status", "enum", ["Planning", "In Progress", "Review", "Live", "Complete"]),
+    ("Target Audience", "text", None),
+    ("Budget", "number", None),
+    ("Channel", "enum", ["Email", "Social", "Web", "Events", "Paid Ads"]),
+]
+
+OPS_CUSTOM_FIELDS = [
+    ("Priority", "enum", ["Low", "Medium", "High", "Urgent"]),
+    ("Department", "enum", ["HR", "Finance", "IT", "Legal", "Operations"]),
+    ("Status", "enum", ["Not Started", "In Progress", "Blocked", "Complete"]),
+]
+
+FIELD_TEMPLATES = {
+    "engineering": ENGINEERING_CUSTOM_FIELDS,
+    "marketing": MARKETING_CUSTOM_FIELDS,
+    "ops": OPS_CUSTOM_FIELDS,
+}
+FIELDS_PER_PROJECT = (2, 4)
+VALUE_RATE = 0.7          # share of tasks that get custom field values
+VALUES_PER_TASK = (1, 3)
+
+
+def field_templates(project_type: str) -> list:
+    # Other project types use the ops templates
+    return FIELD_TEMPLATES.get(project_type, OPS_CUSTOM_FIELDS)
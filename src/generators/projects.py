@@ -1,74 +1,125 @@
 # Generate teams and projects and sections.
 import sqlite3
 import uuid
-from faker import Faker
 import random
 from datetime import datetime, timedelta
+import sys
+from pathlib import Path
 
-fake = Faker()
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.generators.params import ARCHIVED_RATE, NUM_TEAMS, PROJECT_TYPE_WEIGHTS, PROJECTS_PER_TEAM, SECTION_NAMES
+from src.utils.dag import StageResult
+from src.utils.instrumentation import progress
+from src.utils.rng import fake, seed_entity
+from src.utils.sampling import alias_table
+
+TEAM_COLUMNS = ("id", "gid", "organization_id", "name", "description", "created_at")
+PROJECT_COLUMNS = ("id", "gid", "team_id", "organization_id", "name", "description",
+                   "created_at", "project_type", "is_archived")
+SECTION_COLUMNS = ("id", "gid", "project_id", "name", "position")
 
 
 def _gid():
-    return str(uuid.uuid4())
+    return str(uuid.UUID(int=random.getrandbits(128), version=4))
+
+
+def team_row(seed: int, organization_id: int, team_id: int, base_time: str) -> tuple:
+    seed_entity(seed, "teams", team_id)
+    team_name = f"{fake.bs().title()} Team"
+    desc = fake.sentence(nb_words=8)
+    return (team_id, _gid(), organization_id, team_name, desc, base_time)
+
+
+def team_project_rows(seed: int, organization_id: int, team_id: int, first_project_id: int,
+                      base_time: str, project_type_weights: dict = None) -> list:
+    """One team's projects, drawn from the team's projects stream."""
+    seed_entity(seed, "projects", team_id)
+    project_types = alias_table(project_type_weights or PROJECT_TYPE_WEIGHTS)
+    now = datetime.fromisoformat(base_time)
+    rows = []
+    n_projects = random.randint(*PROJECTS_PER_TEAM)
+    for p in range(n_projects):
+        project_id = first_project_id + p
+        project_type = project_types.draw()
+        project_name = _project_name_for_type(project_type)
+        project_desc = fake.paragraph(nb_sentences=2)
+        created = (now - timedelta(days=random.randint(0, 365))).isoformat()
+
+        is_archived = 1 if random.random() < ARCHIVED_RATE else 0
+
+        rows.append((project_id, _gid(), team_id, organization_id, project_name,
+                     project_desc, created, project_type, is_archived))
+    return rows
+
+
+def project_section_rows(seed: int, project_id: int) -> list:
+    # Section ids are fixed per project, so they never shift with other projects
+    seed_entity(seed, "sections", project_id)
+    first = (project_id - 1) * len(SECTION_NAMES) + 1
+    return [(first + idx, _gid(), project_id, name, idx) for idx, name in enumerate(SECTION_NAMES)]
+
 
+def project_info(row: tuple, section_ids: list) -> dict:
+    project_id, _, team_id, _, _, _, _, project_type, is_archived = row
+    return {
+        "project_id": project_id,
+        "team_id": team_id,
+        "project_type": project_type,
+        "is_archived": is_archived,
+        "section_ids": section_ids,
+    }
 
-def generate_teams_and_projects(conn: sqlite3.Connection, organization_id: int):
-    cur = conn.cursor()
+
+def build_teams_and_projects(organization: dict, base_time: str, seed: int, num_teams: int = NUM_TEAMS,
+                             project_type_weights: dict = None):
     # Create a distribution of team sizes and counts appropriate for a large org
-    num_teams = 200  # reasonable for large org
+    organization_id = organization["org_id"]
+    teams, projects, sections = [], [], []
     projects_info = []
     print(f"  Generating {num_teams} teams and projects...")
-    
+
     for t in range(num_teams):
-        t_gid = _gid()
-        team_name = f"{fake.bs().title()} Team"
-        desc = fake.sentence(nb_words=8)
-        created = datetime.utcnow().isoformat()
-        cur.execute(
-            "INSERT INTO teams (gid, organization_id, name, description, created_at) VALUES (?, ?, ?, ?, ?)",
-            (t_gid, organization_id, team_name, desc, created),
-        )
-        team_id = cur.lastrowid
-
-        # Projects per team: 2-8
-        n_projects = random.randint(2, 8)
-        for p in range(n_projects):
-            p_gid = _gid()
-            project_type = random.choices(["engineering", "marketing", "ops"], [0.6, 0.25, 0.15])[0]
-            project_name = _project_name_for_type(project_type)
-            project_desc = fake.paragraph(nb_sentences=2)
-            created = (datetime.utcnow() - timedelta(days=random.randint(0, 365))).isoformat()
-            
-            # 2-3% of projects are archived (edge case)
-            is_archived = 1 if random.random() < 0.025 else 0
-            
-            cur.execute(
-                "INSERT INTO projects (gid, team_id, organization_id, name, description, created_at, project_type, is_archived) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                (p_gid, team_id, organization_id, project_name, project_desc, created, project_type, is_archived),
-            )
-            project_id = cur.lastrowid
-
-            # Create standard sections
-            sections = ["Backlog", "To Do", "In Progress", "Review", "Done"]
-            for idx, s in enumerate(sections):
-                s_gid = _gid()
-                cur.execute(
-                    "INSERT INTO sections (gid, project_id, name, position) VALUES (?, ?, ?, ?)",
-                    (s_gid, project_id, s, idx),
-                )
-
-            projects_info.append({
-                "project_id": project_id,
-                "project_type": project_type,
-                "is_archived": is_archived
-            })
-        
-        if (t + 1) % 50 == 0:
-            print(f"    Created {t + 1}/{num_teams} teams")
-
-    conn.commit()
+        team_id = t + 1
+        teams.append(team_row(seed, organization_id, team_id, base_time))
+        for row in team_project_rows(seed, organization_id, team_id, len(projects) + 1, base_time,
+                                     project_type_weights):
+            projects.append(row)
+            project_sections = project_section_rows(seed, row[0])
+            sections.extend(project_sections)
+            projects_info.append(project_info(row, [s[0] for s in project_sections]))
+        progress("teams", t + 1, num_teams)
+
     print(f"  ✓ Created {num_teams} teams and {len(projects_info)} projects")
-    return projects_info
+    return StageResult(
+        {"team_ids": [row[0] for row in teams], "projects_info": projects_info},
+        [
+            ("teams", TEAM_COLUMNS, teams),
+            ("projects", PROJECT_COLUMNS, projects),
+            ("sections", SECTION_COLUMNS, sections),
+        ],
+    )
+
+
+def load_team_ids(conn: sqlite3.Connection) -> list:
+    return [r[0] for r in conn.execute("SELECT id FROM teams ORDER BY id")]
+
+
+def load_projects_info(conn: sqlite3.Connection) -> list:
+    section_ids = {}
+    for section_id, project_id in conn.execute("SELECT id, project_id FROM sections ORDER BY id"):
+        section_ids.setdefault(project_id, []).append(section_id)
+    return [
+        {
+            "project_id": project_id,
+            "team_id": team_id,
+            "project_type": project_type,
+            "is_archived": is_archived,
+            "section_ids": section_ids.get(project_id, []),
+        }
+        for project_id, team_id, project_type, is_archived in conn.execute(
+            "SELECT id, team_id, project_type, is_archived FROM projects ORDER BY id"
+        )
+    ]
 
 
 def _project_name_for_type(project_type: str) -> str:
@@ -1,176 +1,293 @@
 # Generate tasks, subtasks, comments, tags, custom fields, and attachments.
 import sqlite3
 import uuid
-from faker import Faker
 import random
-from datetime import datetime, timedelta
+from datetime import datetime
+import numpy as np
 import sys
 from pathlib import Path
 
 # Add utils to path
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.generators.params import (ATTACHMENT_RATE, COMMENT_RATE, COMMENTS_PER_TASK, SUBTASK_RATE, SUBTASKS_PER_TASK,
+                                   TAG_NAMES, TAG_RATE, TAGS_PER_TASK, tasks_per_project)
 from src.utils.date_utils import generate_due_date, generate_created_at, generate_completed_at
 from src.utils.task_naming import generate_task_name
+from src.utils.csr import CSR, IdSequence
+from src.utils.dag import StageResult
+from src.utils.instrumentation import progress
+from src.utils.llm_enhanced import llm_comment, llm_percentage, llm_task_description, llm_task_name, should_use_llm
+from src.utils.expand import (DAY, child_counts, child_times, completion_times, distinct_choices, iso_dates,
+                              iso_times, lorem_paragraphs, lorem_sentences, lorem_words, nullable, parent_index,
+                              pick, to_times, uuid4_strings)
+from src.utils.rng import entity_rng, fake, seed_entity
+from src.utils.sampling import AliasTable
 
-fake = Faker()
+TAG_COLUMNS = ("id", "gid", "name", "color")
+TASK_COLUMNS = ("id", "gid", "project_id", "section_id", "name", "description", "assignee_id",
+                "created_at", "due_date", "completed", "completed_at", "priority", "effort")
+SUBTASK_COLUMNS = ("gid", "parent_task_id", "name", "assignee_id", "created_at", "due_date",
+                   "completed", "completed_at")
+COMMENT_COLUMNS = ("gid", "task_id", "author_id", "text", "created_at")
+TASK_TAG_COLUMNS = ("task_id", "tag_id")
+ATTACHMENT_COLUMNS = ("gid", "task_id", "filename", "url", "uploaded_by", "created_at")
+PRIORITY_TABLE = AliasTable(["low", "medium", "high", "urgent"], [0.4, 0.4, 0.15, 0.05])
+
+# Tables generated per project by the tasks stage, in write order
+PROJECT_TABLES = {
+    "tasks": TASK_COLUMNS,
+    "subtasks": SUBTASK_COLUMNS,
+    "comments": COMMENT_COLUMNS,
+    "task_tags": TASK_TAG_COLUMNS,
+    "attachments": ATTACHMENT_COLUMNS,
+}
+
+TAG_COLORS = ["red", "green", "blue", "purple", "orange", "teal"]
 
 
 def _gid():
-    return str(uuid.uuid4())
+    return str(uuid.UUID(int=random.getrandbits(128), version=4))
+
+
+def build_tags(seed: int):
+    # Create a modest number of tags
+    rows = []
+    for i, name in enumerate(TAG_NAMES):
+        seed_entity(seed, "tags", i + 1)
+        rows.append((i + 1, _gid(), name, random.choice(TAG_COLORS)))
+    return StageResult({"tag_ids": [row[0] for row in rows]}, [("tags", TAG_COLUMNS, rows)])
 
 
-def generate_tasks_for_projects(conn: sqlite3.Connection, projects_info: list):
-    cur = conn.cursor()
+def iter_task_chunks(projects_info: list, users_by_role: CSR, team_user_map: CSR, tag_ids: list,
+                     base_time: str, seed: int, chunk_size: int = 50, resume: dict = None):
+    """Generate tasks and their children, yielding ``(marker, StageResult)`` every ``chunk_size`` projects.
 
+    ``marker`` records where the next chunk starts; passing it back as ``resume``
+    continues the same sequence (every project draws from its own streams).
+    """
     # Load some user ids to assign
-    cur.execute("SELECT id FROM users")
-    user_ids = [r[0] for r in cur.fetchall()]
+    user_ids = all_user_ids(users_by_role)
     if not user_ids:
         raise RuntimeError("No users found; generate users first.")
 
-    # Get team memberships for realistic assignment
-    cur.execute("""
-        SELECT tm.team_id, tm.user_id 
-        FROM team_memberships tm
-    """)
-    team_user_map = {}
-    for team_id, user_id in cur.fetchall():
-        team_user_map.setdefault(team_id, []).append(user_id)
+    base_dt = datetime.fromisoformat(base_time)
+    start = resume["next_project"] if resume else 0
+    next_task_id = resume["next_task_id"] if resume else 1
+    total = len(projects_info)
+    if start:
+        print(f"  Resuming tasks at project {start + 1}/{total}...")
+    else:
+        print(f"  Generating tasks for {total} projects...")
 
-    # Create a modest number of tags
-    colors = ["red", "green", "blue", "purple", "orange", "teal"]
-    tags = []
-    for name in ["bug", "feature", "urgent", "low-effort", "research", "customer"]:
-        t_gid = _gid()
-        color = random.choice(colors)
-        cur.execute("INSERT INTO tags (gid, name, color) VALUES (?, ?, ?)", (t_gid, name, color))
-        tags.append(cur.lastrowid)
+    for chunk_start in range(start, total, chunk_size):
+        chunk_end = min(chunk_start + chunk_size, total)
+        rows = {table: [] for table in PROJECT_TABLES}
+        for idx in range(chunk_start, chunk_end):
+            project_rows = build_project_rows(seed, projects_info[idx], user_ids, team_user_map, tag_ids,
+                                              base_dt, next_task_id)
+            for table, table_rows in project_rows.items():
+                rows[table].extend(table_rows)
+            next_task_id += len(project_rows["tasks"])
+            progress("projects", idx + 1, total)
+        marker = {"next_project": chunk_end, "next_task_id": next_task_id}
+        yield marker, StageResult({}, [(table, PROJECT_TABLES[table], rows[table]) for table in PROJECT_TABLES])
 
-    print(f"  Generating tasks for {len(projects_info)} projects...")
-    base_time = datetime.utcnow()
-    task_count = 0
-    
-    # For each project, create tasks: engineering projects more tasks
-    for idx, p in enumerate(projects_info):
-        p_id = p["project_id"]
-        p_type = p.get("project_type", "engineering")
-        is_archived = p.get("is_archived", 0)
-        
-        # Archived projects have fewer tasks
-        if is_archived:
-            n_tasks = random.randint(5, 15)
-        elif p_type == "engineering":
-            n_tasks = random.randint(30, 120)
-        elif p_type == "marketing":
-            n_tasks = random.randint(10, 40)
+    print(f"  ✓ Created {next_task_id - 1} tasks with subtasks, comments, and attachments")
+
+
+def all_user_ids(users_by_role: CSR) -> IdSequence:
+    return IdSequence(np.sort(users_by_role.values))
+
+
+def team_members_for(project: dict, team_user_map: CSR, user_ids: IdSequence) -> IdSequence:
+    # Assign from the project's team members
+    team_id = project.get("team_id")
+    members = team_user_map.ids(team_id) if team_id and team_id in team_user_map else None
+    return members or user_ids
+
+
+def build_project_rows(seed: int, project: dict, user_ids: IdSequence, team_user_map: CSR, tag_ids: list,
+                       base_time: datetime, first_task_id: int, tables=None) -> dict:
+    """One project's rows for ``tables`` (default: all of PROJECT_TABLES).
+
+    Tasks draw from the project's ``tasks`` stream and each child table from
+    its own stream, so changing one child generator leaves the others intact.
+    """
+    team_members = team_members_for(project, team_user_map, user_ids)
+    task_rows = project_task_rows(seed, project, team_members, first_task_id, base_time)
+    tasks = [(row[0], row[6], row[7], row[4]) for row in task_rows]  # id, assignee_id, created_at, name
+    rows = {}
+    for table in tables or PROJECT_TABLES:
+        if table == "tasks":
+            rows[table] = task_rows
         else:
-            n_tasks = random.randint(8, 30)
+            rows[table] = project_child_rows(table, seed, project["project_id"], tasks, team_members,
+                                             tag_ids, base_time)
+    return rows
 
-        # Get team_id for this project to assign from team members
-        cur.execute("SELECT team_id FROM projects WHERE id = ?", (p_id,))
-        result = cur.fetchone()
-        team_id = result[0] if result else None
-        team_members = team_user_map.get(team_id, user_ids) if team_id else user_ids
 
-        # fetch sections for project
-        cur.execute("SELECT id FROM sections WHERE project_id=?", (p_id,))
-        sections = [r[0] for r in cur.fetchall()]
-        
-        for _ in range(n_tasks):
-            t_gid = _gid()
+def project_task_rows(seed: int, p: dict, team_members: IdSequence, first_task_id: int, base_time: datetime) -> list:
+    # Create one project's tasks from the project's own stream.
+    seed_entity(seed, "tasks", p["project_id"])
+    p_id = p["project_id"]
+    p_type = p.get("project_type", "engineering")
+    is_archived = p.get("is_archived", 0)
+    
+    # Archived projects have fewer tasks
+    n_tasks = random.randint(*tasks_per_project(p_type, is_archived))
+
+    sections = p.get("section_ids", [])
+    rows = []
+    
+    for task_id in range(first_task_id, first_task_id + n_tasks):
+        t_gid = _gid()
+        # An LLM_PERCENTAGE share of tasks take their text from the LLM backend
+        if llm_percentage() and should_use_llm():
+            name = llm_task_name(p_type)
+            desc = _task_description(p_type, llm_name=name)
+        else:
             name = generate_task_name(p_type)
             desc = _task_description(p_type)
-            
-            # Assign to team member (15% unassigned)
-            assignee = random.choice(team_members) if random.random() > 0.15 else None
-            
-            # Use realistic created_at with weekday clustering
-            created_at = generate_created_at(base_time, days_ago_max=365)
-            created_dt = datetime.fromisoformat(created_at)
-            
-            # Generate due date with weekend avoidance and overdue possibility
-            allow_overdue = random.random() < 0.05  # 5% chance of overdue
-            due_date = generate_due_date(created_dt, p_type, allow_overdue=allow_overdue)
-
-            completed = 0
-            completed_at = None
-            # completion probability varies by project type
-            comp_prob = 0.6 if p_type == "engineering" else (0.5 if p_type == "marketing" else 0.45)
-            if random.random() < comp_prob:
-                completed = 1
-                completed_at = generate_completed_at(created_at, base_time.isoformat())
-
-            section_id = random.choice(sections) if sections else None
-            priority = random.choices(["low", "medium", "high", "urgent"], [0.4, 0.4, 0.15, 0.05])[0]
-            effort = random.choice([1, 2, 3, 5, 8])
-
-            cur.execute(
-                "INSERT INTO tasks (gid, project_id, section_id, name, description, assignee_id, created_at, due_date, completed, completed_at, priority, effort) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                (t_gid, p_id, section_id, name, desc, assignee, created_at, due_date, completed, completed_at, priority, effort),
-            )
-            task_id = cur.lastrowid
-            task_count += 1
-
-            # probabilistically add subtasks
-            if random.random() < 0.25:
-                n_sub = random.randint(1, 5)
-                for i in range(n_sub):
-                    s_gid = _gid()
-                    s_name = fake.sentence(nb_words=4)
-                    # Subtasks often assigned to same person as parent
-                    if assignee and random.random() < 0.6:
-                        s_assignee = assignee
-                    else:
-                        s_assignee = random.choice(team_members) if random.random() > 0.3 else None
-                    
-                    s_created = (created_dt + timedelta(days=random.randint(0, 5))).isoformat()
-                    s_created_dt = datetime.fromisoformat(s_created)
-                    s_due = (s_created_dt + timedelta(days=random.randint(3, 30))).date().isoformat()
-                    s_completed = 1 if random.random() < 0.5 else 0
-                    s_completed_at = generate_completed_at(s_created) if s_completed else None
-                    cur.execute(
-                        "INSERT INTO subtasks (gid, parent_task_id, name, assignee_id, created_at, due_date, completed, completed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                        (s_gid, task_id, s_name, s_assignee, s_created, s_due, s_completed, s_completed_at),
-                    )
-
-            # comments
-            if random.random() < 0.6:
-                n_comments = random.randint(1, 5)
-                for _ in range(n_comments):
-                    c_gid = _gid()
-                    author = random.choice(team_members)
-                    text = fake.paragraph(nb_sentences=random.randint(1, 3))
-                    comment_created = (created_dt + timedelta(days=random.randint(0, 20))).isoformat()
-                    cur.execute(
-                        "INSERT INTO comments (gid, task_id, author_id, text, created_at) VALUES (?, ?, ?, ?, ?)",
-                        (c_gid, task_id, author, text, comment_created),
-                    )
-
-            # attach some tags
-            if random.random() < 0.5:
-                n_tag = random.randint(1, 2)
-                chosen = random.sample(tags, n_tag)
-                for tid in chosen:
-                    try:
-                        cur.execute("INSERT INTO task_tags (task_id, tag_id) VALUES (?, ?)", (task_id, tid))
-                    except sqlite3.IntegrityError:
-                        pass  # Duplicate tag, skip
-
-            # attach an attachment occasionally
-            if random.random() < 0.05:
-                a_gid = _gid()
-                filename = f"{fake.word()}.pdf"
-                url = f"https://files.example.com/{filename}"
-                uploaded_by = random.choice(team_members)
-                attach_created = (created_dt + timedelta(days=random.randint(0, 15))).isoformat()
-                cur.execute("INSERT INTO attachments (gid, task_id, filename, url, uploaded_by, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-                          (a_gid, task_id, filename, url, uploaded_by, attach_created))
         
-        if (idx + 1) % 200 == 0:
-            print(f"    Generated tasks for {idx + 1}/{len(projects_info)} projects")
+        # Assign to team member (15% unassigned)
+        assignee = random.choice(team_members) if random.random() > 0.15 else None
+        
+        # Use realistic created_at with weekday clustering
+        created_at = generate_created_at(base_time, days_ago_max=365)
+        created_dt = datetime.fromisoformat(created_at)
+        
+        # Generate due date with weekend avoidance and overdue possibility
+        allow_overdue = random.random() < 0.05  # 5% chance of overdue
+        due_date = generate_due_date(created_dt, p_type, allow_overdue=allow_overdue, now=base_time)
+
+        completed = 0
+        completed_at = None
+        # completion probability varies by project type
+        comp_prob = 0.6 if p_type == "engineering" else (0.5 if p_type == "marketing" else 0.45)
+        if random.random() < comp_prob:
+            completed = 1
+            completed_at = generate_completed_at(created_at, base_time.isoformat())
+
+        section_id = random.choice(sections) if sections else None
+        priority = PRIORITY_TABLE.draw()
+        effort = random.choice([1, 2, 3, 5, 8])
+
+        rows.append((task_id, t_gid, p_id, section_id, name, desc, assignee, created_at,
+                     due_date, completed, completed_at, priority, effort))
+    return rows
+
+
+def project_child_rows(table: str, seed: int, project_id: int, tasks: list, team_members: IdSequence,
+                       tag_ids: list, base_time: datetime) -> list:
+    """Rows of one child table for a project's ``tasks`` [(id, assignee_id, created_at, name)]."""
+    if not tasks:
+        return []
+    rng = entity_rng(seed, table, project_id)
+    task_ids, assignees, created_at, names = zip(*tasks)
+    parents = {
+        "id": np.array(task_ids),
+        "assignee": np.array([a if a is not None else -1 for a in assignees]),
+        "created": to_times(created_at),
+    }
+    rows = _CHILD_BUILDERS[table](rng, parents, np.array(team_members), np.array(tag_ids),
+                                  np.datetime64(base_time, "s"))
+    if table == "comments" and llm_percentage():
+        rows = _llm_comment_rows(seed, project_id, rows, dict(zip(task_ids, names)))
+    return rows
+
+
+def _llm_comment_rows(seed: int, project_id: int, rows: list, task_names: dict) -> list:
+    # An LLM_PERCENTAGE share of comments get backend text, drawn from their own stream
+    seed_entity(seed, "comment_texts", project_id)
+    return [row[:3] + (llm_comment(task_names[row[1]]),) + row[4:] if should_use_llm() else row
+            for row in rows]
+
+
+# Child builders expand the project's tasks into child rows with array draws:
+# per-task counts are flattened with repeat, and child timestamps are offsets
+# from the parent's created_at, clamped so they never precede it.
+
+def _subtask_rows(rng, parents: dict, members: np.ndarray, tag_ids: np.ndarray, now: np.datetime64) -> list:
+    parent = parent_index(child_counts(rng, len(parents["id"]), SUBTASK_RATE, SUBTASKS_PER_TASK))
+    n = len(parent)
+    if not n:
+        return []
+    gids = uuid4_strings(rng, n)
+    names = lorem_sentences(rng, n, nb_words=4)
+    # Subtasks often assigned to same person as parent
+    parent_assignee = parents["assignee"][parent]
+    inherit = (parent_assignee >= 0) & (rng.random(n) < 0.6)
+    other = np.where(rng.random(n) > 0.3, pick(rng, members, n), -1)
+    assignee = np.where(inherit, parent_assignee, other)
+    created = child_times(parents["created"][parent], rng.integers(0, 6, n), now)
+    due = created + rng.integers(3, 31, n) * DAY
+    completed = rng.random(n) < 0.5
+    completed_at = completion_times(rng, created, now)
+    completed_iso = iso_times(completed_at)
+    return [
+        (gid, task_id, name, a, c, d, int(done), done_at if done else None)
+        for gid, task_id, name, a, c, d, done, done_at in zip(
+            gids, parents["id"][parent].tolist(), names, nullable(assignee), iso_times(created),
+            iso_dates(due), completed.tolist(), completed_iso)
+    ]
+
+
+def _comment_rows(rng, parents: dict, members: np.ndarray, tag_ids: np.ndarray, now: np.datetime64) -> list:
+    parent = parent_index(child_counts(rng, len(parents["id"]), COMMENT_RATE, COMMENTS_PER_TASK))
+    n = len(parent)
+    if not n:
+        return []
+    created = child_times(parents["created"][parent], rng.integers(0, 21, n), now)
+    # Each task's thread in chronological order (parents stay in task order)
+    order = np.lexsort((created, parent))
+    parent, created = parent[order], created[order]
+    gids = uuid4_strings(rng, n)
+    authors = pick(rng, members, n)
+    texts = lorem_paragraphs(rng, rng.integers(1, 4, n))
+    return list(zip(gids, parents["id"][parent].tolist(), authors.tolist(), texts, iso_times(created)))
+
+
+def _task_tag_rows(rng, parents: dict, members: np.ndarray, tag_ids: np.ndarray, now: np.datetime64) -> list:
+    counts = child_counts(rng, len(parents["id"]), TAG_RATE, TAGS_PER_TASK)
+    # Distinct tags per task by construction
+    tags = distinct_choices(rng, counts, tag_ids)
+    task_ids = parents["id"][parent_index(np.minimum(counts, len(tag_ids)))]
+    return list(zip(task_ids.tolist(), tags.tolist()))
+
+
+def _attachment_rows(rng, parents: dict, members: np.ndarray, tag_ids: np.ndarray, now: np.datetime64) -> list:
+    parent = parent_index(child_counts(rng, len(parents["id"]), ATTACHMENT_RATE, (1, 1)))
+    n = len(parent)
+    if not n:
+        return []
+    gids = uuid4_strings(rng, n)
+    filenames = [f"{word}.pdf" for word in lorem_words(rng, n)]
+    uploaded_by = pick(rng, members, n)
+    created = child_times(parents["created"][parent], rng.integers(0, 16, n), now)
+    return [
+        (gid, task_id, filename, f"https://files.example.com/{filename}", user, c)
+        for gid, task_id, filename, user, c in zip(
+            gids, parents["id"][parent].tolist(), filenames, uploaded_by.tolist(), iso_times(created))
+    ]
+
+
+_CHILD_BUILDERS = {
+    "subtasks": _subtask_rows,
+    "comments": _comment_rows,
+    "task_tags": _task_tag_rows,
+    "attachments": _attachment_rows,
+}
+
+
+def load_tag_ids(conn: sqlite3.Connection) -> list:
+    return [r[0] for r in conn.execute("SELECT id FROM tags ORDER BY id")]
+
 
-    conn.commit()
-    print(f"  ✓ Created {task_count} tasks with subtasks, comments, and attachments")
+def load_task_ids_by_project(conn: sqlite3.Connection) -> dict:
+    task_ids_by_project = {}
+    for task_id, project_id in conn.execute("SELECT id, project_id FROM tasks ORDER BY id"):
+        task_ids_by_project.setdefault(project_id, []).append(task_id)
+    return task_ids_by_project
 
 
 def _task_name_for_type(project_type: str) -> str:
@@ -181,11 +298,13 @@ def _task_name_for_type(project_type: str) -> str:
     return f"{fake.word().title()} ops task"
 
 
-def _task_description(project_type: str) -> str:
+def _task_description(project_type: str, llm_name: str = None) -> str:
     # Mix lengths: 20% empty, 50% short, 30% long
     r = random.random()
     if r < 0.2:
         return ""
+    if llm_name:
+        return llm_task_description(llm_name, detailed=r >= 0.7, project_type=project_type)
     if r < 0.7:
         return fake.sentence(nb_words=random.randint(6,18))
     # long with bullets
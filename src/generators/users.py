@@ -1,114 +1,158 @@
 # Generate organizations and users for the simulation.
 import sqlite3
 import uuid
-from faker import Faker
 from datetime import datetime, timedelta
+from itertools import repeat
 import random
+import sys
+from pathlib import Path
 
-fake = Faker()
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.generators.params import TEAM_SIZE
+from src.utils.csr import CSR, csr_from_query
+from src.utils.dag import StageResult
+from src.utils.expand import DAY, iso_times, uuid4_strings
+from src.utils.identity import ascii_local, name_vocabulary
+from src.utils.instrumentation import progress
+from src.utils.rng import entity_rng, fake, seed_entity
+from src.utils.sampling import AliasTable
+
+ORGANIZATION_COLUMNS = ("id", "gid", "name", "domain", "created_at")
+USER_COLUMNS = ("id", "gid", "organization_id", "full_name", "email", "role", "created_at")
+TEAM_MEMBERSHIP_COLUMNS = ("team_id", "user_id", "role", "joined_at")
+
+ROLES = ["Engineer", "Product", "Designer", "Marketing", "Sales", "Ops", "HR"]
+ROLE_WEIGHTS = [0.35, 0.12, 0.06, 0.12, 0.08, 0.15, 0.12]
+ROLE_TABLE = AliasTable(ROLES, ROLE_WEIGHTS)
+TEAM_TYPE_TABLE = AliasTable(["engineering", "product", "marketing", "ops"], [0.5, 0.15, 0.2, 0.15])
+USER_BLOCK = 4096  # users drawn per random stream
+JOIN_DAYS = 365
 
 
 def _gid():
-    return str(uuid.uuid4())
+    return str(uuid.UUID(int=random.getrandbits(128), version=4))
 
 
-def generate_organization_and_users(conn: sqlite3.Connection, number_of_users: int = 7000):
-    # Generate organization and all users.
-    cur = conn.cursor()
-    org_gid = _gid()
+def build_organization(base_time: str, seed: int):
+    # Generate the single organization; its id is fixed so other stages can reference it.
+    org_id = 1
+    seed_entity(seed, "organizations", org_id)
     org_name = fake.company() + " Inc"
-    domain = org_name.lower().replace(" ", "") + ".com"
-    created_at = datetime.utcnow().isoformat()
-
-    cur.execute(
-        "INSERT INTO organizations (gid, name, domain, created_at) VALUES (?, ?, ?, ?)",
-        (org_gid, org_name, domain, created_at),
-    )
-    org_id = cur.lastrowid
-
-    # create users
-    roles = ["Engineer", "Product", "Designer", "Marketing", "Sales", "Ops", "HR"]
-    now = datetime.fromisoformat(created_at)
+    domain = ascii_local(org_name) + ".com"
+    created_at = base_time
+    row = (org_id, _gid(), org_name, domain, created_at)
+    organization = {"org_id": org_id, "domain": domain, "created_at": created_at}
+    return StageResult({"organization": organization}, [("organizations", ORGANIZATION_COLUMNS, [row])])
+
+
+def user_rows(seed: int, organization: dict, number_of_users: int, name_locales: dict = None) -> list:
+    """Rows for users 1..number_of_users.
+
+    Each block of USER_BLOCK ids draws names, roles, join dates and gids as
+    arrays from its own stream, always for a full block, so a user's row does
+    not depend on how many users follow. Emails are deduplicated over all
+    users in id order (src/utils/identity.py), so the table is generated whole.
+    """
+    vocab = name_vocabulary(name_locales)
+    # Join dates are up to a year before the organization's creation; format each day once
+    days = np.array(iso_times(np.datetime64(organization["created_at"], "s") - np.arange(JOIN_DAYS + 1) * DAY),
+                    dtype=object)
+    first, last, roles, created, gids = [], [], [], [], []
+    for block, start in enumerate(range(0, number_of_users, USER_BLOCK)):
+        n = min(USER_BLOCK, number_of_users - start)
+        rng = entity_rng(seed, "users", block)
+        block_first, block_last = vocab.sample(rng, USER_BLOCK)
+        first.append(block_first[:n])
+        last.append(block_last[:n])
+        roles.append(ROLE_TABLE.sample(rng, USER_BLOCK)[:n])
+        created.append(rng.integers(0, JOIN_DAYS + 1, USER_BLOCK)[:n])
+        gids += uuid4_strings(rng, USER_BLOCK)[:n]
+        progress("users", start + n, number_of_users)
+    if not number_of_users:
+        return []
+    first, last = np.concatenate(first), np.concatenate(last)
+    return list(zip(range(1, number_of_users + 1), gids, repeat(organization["org_id"]),
+                    vocab.full_names(first, last), vocab.emails(first, last, organization["domain"]),
+                    np.concatenate(roles).tolist(), days[np.concatenate(created)].tolist()))
+
+
+def build_users(organization: dict, seed: int, number_of_users: int = 7000, name_locales: dict = None):
+    # Generate all users of the organization.
     print(f"  Generating {number_of_users} users...")
-    for i in range(number_of_users):
-        u_gid = _gid()
-        name = fake.name()
-        email = f"{name.lower().replace(' ', '.')}.{i}@{domain}"
-        role = random.choices(roles, weights=[0.35, 0.12, 0.06, 0.12, 0.08, 0.15, 0.12])[0]
-        created = (now - timedelta(days=random.randint(0, 365))).isoformat()
-        cur.execute(
-            "INSERT INTO users (gid, organization_id, full_name, email, role, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-            (u_gid, org_id, name, email, role, created),
-        )
-        
-        if (i + 1) % 1000 == 0:
-            print(f"    Created {i + 1}/{number_of_users} users")
-
-    conn.commit()
+    rows = user_rows(seed, organization, number_of_users, name_locales)
+    users_by_role = CSR.from_pairs(np.array([row[5] for row in rows]), np.arange(1, number_of_users + 1))
     print(f"  ✓ Created {number_of_users} users")
-    return org_id
-
-
-def populate_team_memberships(conn: sqlite3.Connection):
-    """Populate team_memberships table by assigning users to teams."""
-    cur = conn.cursor()
-    
-    # Get all teams
-    cur.execute("SELECT id FROM teams")
-    team_ids = [r[0] for r in cur.fetchall()]
-    
-    # Get all users grouped by role
-    cur.execute("SELECT id, role FROM users")
-    users_by_role = {}
-    for user_id, role in cur.fetchall():
-        users_by_role.setdefault(role, []).append(user_id)
-    
+    return StageResult({"users_by_role": users_by_role}, [("users", USER_COLUMNS, rows)])
+
+
+def team_membership_rows(seed: int, team_id: int, users_by_role: CSR, base_time: str) -> list:
+    """Members of one team, drawn from the team's own stream.
+
+    Pools are views over the role -> users CSR (roles in first-seen order), so
+    sampling a team costs O(team size) rather than a copy of every user.
+    """
+    seed_entity(seed, "team_memberships", team_id)
+    now = datetime.fromisoformat(base_time)
+
+    team_size = random.randint(*TEAM_SIZE)
+
+    # Assign members with role affinity (engineering teams get more engineers, etc.)
+    members = []
+
+    # Determine team type based on random selection
+    team_type = TEAM_TYPE_TABLE.draw()
+
+    # Build member list based on team type
+    if team_type == "engineering" and "Engineer" in users_by_role:
+        # 70% engineers, 30% others
+        eng_count = int(team_size * 0.7)
+        engineers = users_by_role.ids("Engineer")
+        members.extend(random.sample(engineers, min(eng_count, len(engineers))))
+        remaining = team_size - len(members)
+        if remaining > 0:
+            other_users = users_by_role.ids(exclude="Engineer")
+            members.extend(random.sample(other_users, min(remaining, len(other_users))))
+    else:
+        # Mix of roles
+        all_users = users_by_role.ids()
+        members = random.sample(all_users, min(team_size, len(all_users)))
+
+    # Engineers and others are drawn from disjoint pools, so members are unique per team
+    rows = []
+    for user_id in members:
+        role_in_team = random.choice(["member", "member", "member", "lead"])
+        joined = (now - timedelta(days=random.randint(30, 730))).isoformat()
+        rows.append((team_id, user_id, role_in_team, joined))
+    return rows
+
+
+def build_team_memberships(team_ids: list, users_by_role: CSR, base_time: str, seed: int):
+    """Assign users to teams; returns team_memberships rows and the team -> members map."""
     print(f"  Assigning users to {len(team_ids)} teams...")
-    membership_count = 0
-    
+    rows = []
+    team_user_map = {}
     for team_id in team_ids:
-        # Each team gets 5-20 members
-        team_size = random.randint(5, 20)
-        
-        # Assign members with role affinity (engineering teams get more engineers, etc.)
-        members = []
-        
-        # Determine team type based on random selection
-        team_type = random.choices(
-            ["engineering", "product", "marketing", "ops"],
-            weights=[0.5, 0.15, 0.2, 0.15]
-        )[0]
-        
-        # Build member list based on team type
-        if team_type == "engineering" and "Engineer" in users_by_role:
-            # 70% engineers, 30% others
-            eng_count = int(team_size * 0.7)
-            members.extend(random.sample(users_by_role["Engineer"], 
-                                       min(eng_count, len(users_by_role["Engineer"]))))
-            remaining = team_size - len(members)
-            if remaining > 0:
-                other_users = [u for role, users in users_by_role.items() 
-                             if role != "Engineer" for u in users]
-                members.extend(random.sample(other_users, min(remaining, len(other_users))))
-        else:
-            # Mix of roles
-            all_users = [u for users in users_by_role.values() for u in users]
-            members = random.sample(all_users, min(team_size, len(all_users)))
-        
-        # Insert memberships
-        for user_id in members:
-            role_in_team = random.choice(["member", "member", "member", "lead"])
-            joined = (datetime.utcnow() - timedelta(days=random.randint(30, 730))).isoformat()
-            try:
-                cur.execute(
-                    "INSERT INTO team_memberships (team_id, user_id, role, joined_at) VALUES (?, ?, ?, ?)",
-                    (team_id, user_id, role_in_team, joined)
-                )
-                membership_count += 1
-            except sqlite3.IntegrityError:
-                # Skip duplicates (unique constraint)
-                pass
-    
-    conn.commit()
-    print(f"  ✓ Created {membership_count} team memberships")
+        team_rows = team_membership_rows(seed, team_id, users_by_role, base_time)
+        rows.extend(team_rows)
+        team_user_map[team_id] = [row[1] for row in team_rows]
+
+    print(f"  ✓ Created {len(rows)} team memberships")
+    return StageResult({"team_user_map": CSR.from_groups(team_user_map)},
+                       [("team_memberships", TEAM_MEMBERSHIP_COLUMNS, rows)])
+
+
+def load_organization(conn: sqlite3.Connection) -> dict:
+    row = conn.execute("SELECT id, domain, created_at FROM organizations ORDER BY id LIMIT 1").fetchone()
+    if row is None:
+        raise RuntimeError("No organization found; generate users first.")
+    return {"org_id": row[0], "domain": row[1], "created_at": row[2]}
+
+
+def load_users_by_role(conn: sqlite3.Connection) -> CSR:
+    return csr_from_query(conn, "SELECT role, id FROM users ORDER BY id")
+
 
+def load_team_user_map(conn: sqlite3.Connection) -> CSR:
+    return csr_from_query(conn, "SELECT team_id, user_id FROM team_memberships ORDER BY id")
@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 """Orchestrator for generating the Asana simulation SQLite DB."""
+import argparse
 import os
 import sqlite3
+from functools import partial
 from pathlib import Path
 from dotenv import load_dotenv
 import random
+import shutil
 import sys
+from datetime import datetime
 
 load_dotenv()
 
@@ -17,17 +21,86 @@ SCHEMA_SQL = BASE_DIR / "schema.sql"
 
 NUMBER_OF_USERS = int(os.getenv("NUMBER_OF_USERS", "7000"))
 SEED = int(os.getenv("SEED", "42"))
+# Reference "now" for all generated timestamps; pinned so reruns and resumes are reproducible
+BASE_TIME = os.getenv("BASE_TIME") or None
+# Faker locales user names are drawn from, e.g. "en_US:0.8,de_DE:0.2"; Faker's en_US when unset
+NAME_LOCALES = os.getenv("NAME_LOCALES") or None
+CHECKPOINT_EVERY = int(os.getenv("CHECKPOINT_EVERY", "50"))  # projects per tasks commit
+PROFILE_STAGES = os.getenv("PROFILE_STAGES") or None  # cprofile | pyinstrument
+TRACE_MEMORY = os.getenv("TRACE_MEMORY", "0") == "1"  # tracemalloc slows generation ~5x
+COMPACT_OUTPUT = os.getenv("COMPACT_OUTPUT", "0") == "1"
+INDEX_PROFILE = os.getenv("INDEX_PROFILE") or None  # e.g. rl-serving
+SEARCH_INDEX = os.getenv("SEARCH_INDEX", "0") == "1"
+SUMMARY_TABLES = os.getenv("SUMMARY_TABLES", "1") == "1"
+ADJACENCY_INDEX = os.getenv("ADJACENCY_INDEX", "0") == "1"
+COLLABORATION_GRAPH = os.getenv("COLLABORATION_GRAPH", "0") == "1"
+PARTITIONS = int(os.getenv("PARTITIONS") or "0")  # team partition files; 0 keeps only the single file
+POSTGRES_EXPORT = os.getenv("POSTGRES_EXPORT", "0") == "1"
+POSTGRES_DSN = os.getenv("POSTGRES_DSN") or None
+POSTGRES_REPLACE = os.getenv("POSTGRES_REPLACE", "0") == "1"
+# Batches pending for the writer thread; 0 writes inline, which is faster on a single core
+WRITER_QUEUE = int(os.getenv("WRITER_QUEUE") or ("4" if (os.cpu_count() or 1) > 1 else "0"))
 
-random.seed(SEED)
-
+from src.access.search import INDEXES as SEARCH_INDEXES, build_search_index
 from src.generators import users as users_gen
 from src.generators import projects as projects_gen
 from src.generators import tasks as tasks_gen
 from src.generators import custom_fields as custom_fields_gen
+from src.plan import CALIBRATION_PATH, check_fits, estimate, print_plan
+from src.storage.adjacency import sidecar_path, write_adjacency
+from src.storage.collaboration import sidecar_path as collaboration_path, write_collaboration
+from src.storage.compact import compact_database
+from src.storage.partitions import layout_path, load_layout, split as split_partitions
+from src.storage.postgres import export as export_postgres
+from src.storage.summaries import SUMMARIES, build_summaries, drop_triggers, has_summaries
+from src.storage.workload import INDEX_PROFILES, apply_index_profile
+from src.utils.checkpoint import Checkpointer
+from src.utils.dag import Stage, default_workers, run_dag, select_stages
+from src.utils.instrumentation import PROFILERS, RunInstrumentation, report_path_for
+from src.utils.identity import name_vocabulary, parse_locales
+from src.utils.llm_enhanced import check_text_config, text_config
+from src.utils.rng import seed_stage
+
 
+def build_stages(number_of_users: int = NUMBER_OF_USERS, checkpoint_every: int = CHECKPOINT_EVERY,
+                 project_type_weights: dict = None, name_locales: dict = None) -> list:
+    """The generation DAG: each stage declares the outputs it consumes and produces."""
+    return [
+        Stage("organization", users_gen.build_organization,
+              inputs=("base_time", "seed"), outputs=("organization",), tables=("organizations",),
+              title="Generating organization..."),
+        Stage("users", partial(users_gen.build_users, number_of_users=number_of_users, name_locales=name_locales),
+              inputs=("organization", "seed"), outputs=("users_by_role",), tables=("users",),
+              title="Generating users..."),
+        Stage("projects", partial(projects_gen.build_teams_and_projects,
+                                  project_type_weights=project_type_weights),
+              inputs=("organization", "base_time", "seed"), outputs=("team_ids", "projects_info"),
+              tables=("teams", "projects", "sections"),
+              title="Generating teams, projects and sections..."),
+        Stage("tags", tasks_gen.build_tags,
+              inputs=("seed",), outputs=("tag_ids",), tables=("tags",),
+              title="Generating tags..."),
+        Stage("memberships", users_gen.build_team_memberships,
+              inputs=("team_ids", "users_by_role", "base_time", "seed"), outputs=("team_user_map",),
+              tables=("team_memberships",),
+              title="Populating team memberships..."),
+        Stage("tasks", tasks_gen.iter_task_chunks,
+              inputs=("projects_info", "users_by_role", "team_user_map", "tag_ids", "base_time", "seed"),
+              outputs=("task_ids_by_project",),
+              tables=("tasks", "subtasks", "comments", "task_tags", "attachments"),
+              title="Generating tasks and related entities...",
+              checkpoint_every=checkpoint_every),
+        Stage("custom_field_defs", custom_fields_gen.build_custom_field_defs,
+              inputs=("projects_info", "seed"), outputs=("field_defs",), tables=("custom_field_defs",),
+              title="Generating custom field definitions..."),
+        Stage("custom_field_values", custom_fields_gen.build_custom_field_values,
+              inputs=("field_defs", "task_ids_by_project", "seed"), tables=("custom_field_values",),
+              title="Generating custom field values..."),
+    ]
 
-def ensure_dirs():
-    out_dir = OUTPUT_DB.parent
+
+def ensure_dirs(output_db: Path = OUTPUT_DB):
+    out_dir = output_db.parent
     out_dir.mkdir(parents=True, exist_ok=True)
 
 
@@ -37,47 +110,308 @@ def run_schema(conn: sqlite3.Connection):
     conn.commit()
 
 
-def main():
+def load_base_time(conn: sqlite3.Connection) -> str:
+    config = Checkpointer(conn).get("config")
+    if config:
+        return config["base_time"]
+    return users_gen.load_organization(conn)["created_at"]
+
+
+def load_seed(conn: sqlite3.Connection) -> int:
+    config = Checkpointer(conn).get("config")
+    return config["seed"] if config else SEED
+
+
+# Rebuild a stage output from an existing DB when only a sub-graph is regenerated
+OUTPUT_LOADERS = {
+    "organization": users_gen.load_organization,
+    "users_by_role": users_gen.load_users_by_role,
+    "team_ids": projects_gen.load_team_ids,
+    "projects_info": projects_gen.load_projects_info,
+    "tag_ids": tasks_gen.load_tag_ids,
+    "team_user_map": users_gen.load_team_user_map,
+    "task_ids_by_project": tasks_gen.load_task_ids_by_project,
+    "field_defs": custom_fields_gen.load_field_defs,
+    "base_time": load_base_time,
+    "seed": load_seed,
+}
+
+
+def clear_stage_tables(conn: sqlite3.Connection, stages: list):
+    # Children first, so regenerated stages never leave dangling references
+    for stage in reversed(stages):
+        for table in reversed(stage.tables):
+            conn.execute(f"DELETE FROM {table}")
+    conn.commit()
+
+
+def load_inputs(conn: sqlite3.Connection, stages: list) -> dict:
+    produced = {out for s in stages for out in s.outputs}
+    needed = {inp for s in stages for inp in s.inputs} - produced
+    return {name: OUTPUT_LOADERS[name](conn) for name in sorted(needed)}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the Asana simulation SQLite DB.")
+    parser.add_argument("--users", type=int, default=NUMBER_OF_USERS,
+                        help="Users to generate (env: NUMBER_OF_USERS)")
+    parser.add_argument("--seed", type=int, default=SEED, help="Generation seed (env: SEED)")
+    parser.add_argument("--base-time", default=BASE_TIME,
+                        help="Reference 'now' for generated timestamps, ISO format (env: BASE_TIME)")
+    parser.add_argument("--output", type=Path, default=OUTPUT_DB, help="DB to write (env: OUTPUT_DB)")
+    parser.add_argument("--name-locales", type=parse_locales, default=NAME_LOCALES,
+                        help="Faker locales for user names with weights, e.g. en_US:0.8,de_DE:0.2 (env: NAME_LOCALES)")
+    parser.add_argument("--profile", choices=PROFILERS, default=PROFILE_STAGES,
+                        help="Capture a per-stage profile next to the DB (env: PROFILE_STAGES)")
+    parser.add_argument("--trace-memory", action="store_true", default=TRACE_MEMORY,
+                        help="Record per-stage tracemalloc peaks (env: TRACE_MEMORY=1)")
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="Processes for independent stages; 1 runs inline (env: WORKERS)")
+    parser.add_argument("--stages", default=None,
+                        help="Comma-separated stages to regenerate in an existing DB, "
+                             "plus everything downstream (e.g. custom_field_defs)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted build from its last checkpoint")
+    parser.add_argument("--writer-queue", type=int, default=WRITER_QUEUE,
+                        help="Batches queued for the SQLite writer thread; 0 writes inline (env: WRITER_QUEUE)")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY,
+                        help="Projects per committed tasks checkpoint (env: CHECKPOINT_EVERY)")
+    parser.add_argument("--compact", action="store_true", default=COMPACT_OUTPUT,
+                        help="Also write the compact schema variant next to the DB (env: COMPACT_OUTPUT=1)")
+    parser.add_argument("--index-profile", choices=sorted(INDEX_PROFILES), default=INDEX_PROFILE,
+                        help="Build an extra index profile after load (env: INDEX_PROFILE)")
+    parser.add_argument("--summaries", action=argparse.BooleanOptionalAction, default=SUMMARY_TABLES,
+                        help="Build project/section/user/team summary tables at the end (env: SUMMARY_TABLES)")
+    parser.add_argument("--search-index", action="store_true", default=SEARCH_INDEX,
+                        help="Build the FTS5 search index after load (env: SEARCH_INDEX=1)")
+    parser.add_argument("--adjacency", action="store_true", default=ADJACENCY_INDEX,
+                        help="Write the CSR adjacency sidecar next to the DB (env: ADJACENCY_INDEX=1)")
+    parser.add_argument("--collaboration", action="store_true", default=COLLABORATION_GRAPH,
+                        help="Build the collaboration graph sidecar and tables (env: COLLABORATION_GRAPH=1)")
+    parser.add_argument("--partitions", type=int, default=PARTITIONS,
+                        help="Also split the DB into this many team partition files; 0 for none (env: PARTITIONS)")
+    parser.add_argument("--postgres", action="store_true", default=POSTGRES_EXPORT,
+                        help="COPY the finished DB into PostgreSQL at --postgres-dsn (env: POSTGRES_EXPORT=1)")
+    parser.add_argument("--postgres-dsn", default=POSTGRES_DSN, help="libpq connection string (env: POSTGRES_DSN)")
+    parser.add_argument("--postgres-replace", action="store_true", default=POSTGRES_REPLACE,
+                        help="Drop existing tables in PostgreSQL before the export, with CASCADE "
+                             "(env: POSTGRES_REPLACE=1); without it existing tables stop the export")
+    parser.add_argument("--plan", action="store_true",
+                        help="Print expected rows, DB size and build time, then exit without generating")
+    args = parser.parse_args(argv)
+    if args.resume and args.stages:
+        parser.error("--resume and --stages are mutually exclusive")
+    if args.checkpoint_every < 1:
+        parser.error("--checkpoint-every must be at least 1")
+    if args.writer_queue < 0:
+        parser.error("--writer-queue must be 0 or more")
+    if args.users < 1:
+        parser.error("--users must be at least 1")
+    if args.name_locales:
+        try:
+            name_vocabulary(args.name_locales)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.partitions < 0:
+        parser.error("--partitions must be 0 or more")
+    if args.postgres and not args.postgres_dsn:
+        parser.error("--postgres needs --postgres-dsn (or POSTGRES_DSN)")
+    return args
+
+
+def resume_stages(checkpoints: Checkpointer, all_stages: list, seed: int = SEED,
+                  number_of_users: int = NUMBER_OF_USERS) -> list:
+    config = checkpoints.get("config")
+    if config is None:
+        raise RuntimeError("DB has no generation config; it cannot be resumed")
+    if (config["seed"], config["number_of_users"]) != (seed, number_of_users):
+        raise RuntimeError(
+            f"DB was started with SEED={config['seed']}, NUMBER_OF_USERS={config['number_of_users']}; "
+            f"resume with the same settings"
+        )
+    check_text_config(config)
+    completed = set(checkpoints.completed_stages())
+    return [s for s in all_stages if s.name not in completed]
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    random.seed(args.seed)
+    build(args, output_db=args.output, number_of_users=args.users, seed=args.seed, base_time=args.base_time,
+          name_locales=args.name_locales)
+
+
+def build(args, output_db: Path = OUTPUT_DB, number_of_users: int = NUMBER_OF_USERS, seed: int = SEED,
+          base_time: str = BASE_TIME, project_type_weights: dict = None, name_locales: dict = None):
+    """Build (or resume / partially regenerate) one workspace DB.
+
+    ``args`` carries the command-line options; the workspace itself is
+    described by the keyword arguments, which default to the environment.
+    """
+    output_db = Path(output_db)
+    only = [s.strip() for s in args.stages.split(",")] if args.stages else None
+    fresh = not (only or args.resume)
+    if not fresh and output_db.exists():
+        # Existing DBs keep the project mix and name locales they were generated with
+        existing = sqlite3.connect(str(output_db))
+        config = Checkpointer(existing).get("config") or {}
+        project_type_weights = config.get("project_type_weights")
+        name_locales = config.get("name_locales")
+        existing.close()
+    all_stages = build_stages(number_of_users, args.checkpoint_every, project_type_weights, name_locales)
+    stages = select_stages(all_stages, only)
+
+    if args.plan or (fresh and CALIBRATION_PATH.exists()):
+        plan = estimate(number_of_users, summaries=args.summaries, index_profile=args.index_profile,
+                        search_index=args.search_index, compact=args.compact,
+                        project_type_weights=project_type_weights)
+        if args.plan:
+            print_plan(plan, output_db)
+            return
+        fits, needed, free = check_fits(plan, output_db)
+        if not fits:
+            raise SystemExit(f"Refusing to build: ~{needed / 1e9:.2f} GB needed at {output_db.parent}, "
+                             f"{free / 1e9:.2f} GB free (see --plan)")
+
     print("=" * 60)
     print("ASANA SIMULATION DATA GENERATOR")
     print("=" * 60)
-    print(f"Target: {NUMBER_OF_USERS} users, SEED={SEED}")
+    print(f"Target: {number_of_users} users, SEED={seed}, workers={args.workers}")
+    if only:
+        print(f"Stages: {', '.join(s.name for s in stages)}")
     print()
-    
-    ensure_dirs()
-    if OUTPUT_DB.exists():
-        print(f"Removing existing DB at {OUTPUT_DB}")
-        OUTPUT_DB.unlink()
 
-    conn = sqlite3.connect(str(OUTPUT_DB))
+    ensure_dirs(output_db)
+    if not fresh:
+        if not output_db.exists():
+            raise FileNotFoundError(f"--stages/--resume need an existing DB at {output_db}")
+    elif output_db.exists():
+        print(f"Removing existing DB at {output_db}")
+        output_db.unlink()
+        shutil.rmtree(sidecar_path(output_db), ignore_errors=True)
+        shutil.rmtree(collaboration_path(output_db), ignore_errors=True)
+        shutil.rmtree(layout_path(output_db), ignore_errors=True)
+
+    # The writer thread of run_dag shares this connection, one thread at a time
+    conn = sqlite3.connect(str(output_db), check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    run = RunInstrumentation(conn, report_path_for(output_db), profiler=args.profile,
+                             trace_memory=args.trace_memory)
+    checkpoints = Checkpointer(conn)
 
-    print("\n[1/6] Applying schema...")
-    run_schema(conn)
-    print("  ✓ Schema applied")
+    if fresh:
+        with run.stage("schema", "Applying schema..."):
+            run_schema(conn)
+            base_time = base_time or datetime.utcnow().isoformat()
+            config = {"seed": seed, "number_of_users": number_of_users, "base_time": base_time}
+            if project_type_weights:
+                config["project_type_weights"] = project_type_weights
+            if name_locales:
+                config["name_locales"] = name_locales
+            config.update(text_config())
+            checkpoints.set("config", config)
+            conn.commit()
+            print("  ✓ Schema applied")
+        available = {"base_time": base_time, "seed": seed}
+    else:
+        conn.execute("PRAGMA foreign_keys = ON")
+        if has_summaries(conn):
+            # Per-row summary triggers would make bulk regeneration crawl; rebuilt below
+            drop_triggers(conn)
+        if args.resume:
+            stages = resume_stages(checkpoints, stages, seed, number_of_users)
+            print(f"Resuming: {', '.join(s.name for s in stages) or 'nothing left to do'}")
+        else:
+            clear_stage_tables(conn, stages)
+            checkpoints.reset_stages([s.name for s in stages])
+            conn.commit()
+        available = load_inputs(conn, stages)
 
-    print("\n[2/6] Generating organizations and users...")
-    org_id = users_gen.generate_organization_and_users(conn, number_of_users=NUMBER_OF_USERS)
+    run_dag(conn, stages, available=available, workers=args.workers,
+            seed=seed, seed_stage=seed_stage, run=run,
+            checkpoints=checkpoints, loaders=OUTPUT_LOADERS, writer_queue=args.writer_queue)
 
-    print("\n[3/6] Generating teams and projects...")
-    projects_info = projects_gen.generate_teams_and_projects(conn, organization_id=org_id)
+    if args.summaries:
+        with run.stage("summaries", "Building summary tables...", tables=[s.table for s in SUMMARIES]):
+            seconds = build_summaries(conn)
+            print(f"  ✓ Summary tables built in {seconds:.2f}s")
 
-    print("\n[4/6] Populating team memberships...")
-    users_gen.populate_team_memberships(conn)
+    if args.index_profile:
+        with run.stage("indexes", f"Building {args.index_profile} index profile..."):
+            seconds = apply_index_profile(conn, args.index_profile)
+            print(f"  ✓ Index profile {args.index_profile} built in {seconds:.2f}s")
 
-    print("\n[5/6] Generating tasks and related entities...")
-    tasks_gen.generate_tasks_for_projects(conn, projects_info=projects_info)
+    if args.search_index:
+        with run.stage("search", "Building full-text search index...",
+                       tables=[fts for fts, _, _ in SEARCH_INDEXES.values()]):
+            seconds = build_search_index(conn)
+            print(f"  ✓ Search index built in {seconds:.2f}s")
 
-    print("\n[6/6] Generating custom fields...")
-    custom_fields_gen.generate_custom_fields_for_projects(conn, projects_info)
+    # An existing sidecar is kept in step with regenerated stages
+    adjacency = args.adjacency or (not fresh and sidecar_path(output_db).exists())
+    if adjacency:
+        with run.stage("adjacency", "Writing CSR adjacency sidecar..."):
+            seconds = write_adjacency(conn, output_db)
+            print(f"  ✓ Adjacency sidecar written to {sidecar_path(output_db)} in {seconds:.2f}s")
+
+    collaboration = args.collaboration or (not fresh and collaboration_path(output_db).exists())
+    if collaboration:
+        with run.stage("collaboration", "Building collaboration graph...",
+                       tables=("user_collaboration", "user_collaborators")):
+            seconds = write_collaboration(conn, output_db)
+            print(f"  ✓ Collaboration graph written to {collaboration_path(output_db)} in {seconds:.2f}s")
+
+    compact_db = None
+    if args.compact:
+        compact_db = output_db.with_name(f"{output_db.stem}.compact{output_db.suffix}")
+        with run.stage("compact", "Writing compact schema variant..."):
+            seconds = compact_database(output_db, compact_db)
+            print(f"  ✓ Compact DB written to {compact_db} in {seconds:.2f}s")
+
+    # An existing layout is split again, into as many files as before
+    partitions = args.partitions
+    if not partitions and not fresh and layout_path(output_db).exists():
+        partitions = len(load_layout(layout_path(output_db))["partitions"])
+    if partitions:
+        conn.commit()
+        with run.stage("partitions", f"Splitting into {partitions} team partitions..."):
+            layout = split_partitions(output_db, partitions)
+            print(f"  ✓ {layout['partitions']} partitions written to {layout['layout']} in {layout['seconds']:.2f}s")
+
+    postgres = None
+    if args.postgres:
+        with run.stage("postgres", "Exporting to PostgreSQL..."):
+            postgres = export_postgres(output_db, args.postgres_dsn, replace=args.postgres_replace)
+            print(f"  ✓ {postgres['rows']:,} rows copied to PostgreSQL in {postgres['seconds']:.2f}s "
+                  f"({postgres['rows_per_s']:,} rows/s)")
+
+    report = run.write_report(
+        output_db=str(output_db),
+        number_of_users=number_of_users,
+        seed=seed,
+        workers=args.workers,
+        writer_queue=args.writer_queue,
+        stages_run=[s.name for s in stages],
+        index_profile=args.index_profile,
+        search_index=args.search_index,
+        summaries=args.summaries,
+        adjacency=str(sidecar_path(output_db)) if adjacency else None,
+        collaboration=str(collaboration_path(output_db)) if collaboration else None,
+        db_size_bytes=output_db.stat().st_size,
+        compact_db=str(compact_db) if compact_db else None,
+        compact_db_size_bytes=compact_db.stat().st_size if compact_db else None,
+        partitions=str(layout_path(output_db)) if partitions else None,
+        postgres=postgres,
+    )
 
     print("\n" + "=" * 60)
     print("✓ GENERATION COMPLETE")
     print("=" * 60)
-    print(f"Database written to: {OUTPUT_DB}")
-    print(f"Size: {OUTPUT_DB.stat().st_size / 1024 / 1024:.2f} MB")
+    print(f"Database written to: {output_db}")
+    print(f"Size: {output_db.stat().st_size / 1024 / 1024:.2f} MB")
+    print(f"Run report: {report}")
     print()
-    
+
     # Quick stats
     cur = conn.cursor()
     cur.execute("SELECT COUNT(*) FROM users")
@@ -95,7 +429,7 @@ def main():
     cur.execute("SELECT COUNT(*) FROM custom_field_values")
     print(f"  Custom Field Values: {cur.fetchone()[0]:,}")
     print()
-    
+
     conn.close()
 
 
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""Dry-run planner: expected rows, DB size and build time without generating anything.
+
+Row counts are derived analytically from the generators' volume parameters
+(projects per team, tasks per project type, child-row rates, ...). Size and
+time come from a calibration measured on finished builds: bytes per row per
+table (from SQLite's dbstat, indexes included) from the largest build, and a
+fixed-plus-per-row cost per stage fitted across the builds' run reports.
+``plan_calibration.json`` ships with measurements from two reference builds;
+recalibrate on the target machine for better numbers.
+
+Usage:
+    python src/main.py --plan                        # plan the build main.py would run
+    python src/plan.py estimate --users 20000 --search-index
+    python src/plan.py calibrate small.sqlite large.sqlite   # two builds of different --users
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sqlite3
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from src.generators import params
+from src.storage.summaries import SUMMARIES
+
+SCHEMA_SQL = BASE_DIR / "schema.sql"
+CALIBRATION_PATH = Path(os.getenv("PLAN_CALIBRATION") or BASE_DIR / "plan_calibration.json")
+HEADROOM = 1.1  # free disk required per estimated byte
+
+GENERATED_TABLES = ("organizations", "users", "teams", "team_memberships", "projects", "sections", "tags",
+                    "tasks", "subtasks", "comments", "task_tags", "attachments",
+                    "custom_field_defs", "custom_field_values")
+# Optional post-load stages (run report names) and the storage they add
+FEATURES = ("summaries", "indexes", "search")
+
+
+def _mean(bounds: tuple) -> float:
+    lo, hi = bounds
+    return (lo + hi) / 2
+
+
+def _mean_capped(bounds: tuple, cap: int) -> float:
+    # E[min(randint(lo, hi), cap)]
+    lo, hi = bounds
+    return sum(min(k, cap) for k in range(lo, hi + 1)) / (hi - lo + 1)
+
+
+def expected_rows(number_of_users: int, num_teams: int = params.NUM_TEAMS,
+                  project_type_weights: dict = None) -> dict:
+    """Expected row count per generated table; only ``users`` scales with the user count."""
+    weights = project_type_weights or params.PROJECT_TYPE_WEIGHTS
+    projects = num_teams * _mean(params.PROJECTS_PER_TEAM)
+    tasks = field_defs = field_values = 0.0
+    for project_type, weight in weights.items():
+        weight /= sum(weights.values())
+        lo, hi = params.FIELDS_PER_PROJECT
+        hi = min(hi, len(params.field_templates(project_type)))
+        values_per_task = sum(_mean_capped(params.VALUES_PER_TASK, n)
+                              for n in range(lo, hi + 1)) / (hi - lo + 1)
+        for is_archived, share in ((1, params.ARCHIVED_RATE), (0, 1 - params.ARCHIVED_RATE)):
+            n_projects = projects * weight * share
+            n_tasks = n_projects * _mean(params.tasks_per_project(project_type, is_archived))
+            tasks += n_tasks
+            field_defs += n_projects * (lo + hi) / 2
+            field_values += n_tasks * params.VALUE_RATE * values_per_task
+    rows = {
+        "organizations": 1,
+        "users": number_of_users,
+        "teams": num_teams,
+        "team_memberships": num_teams * min(_mean(params.TEAM_SIZE), number_of_users),
+        "projects": projects,
+        "sections": projects * len(params.SECTION_NAMES),
+        "tags": len(params.TAG_NAMES),
+        "tasks": tasks,
+        "subtasks": tasks * params.SUBTASK_RATE * _mean(params.SUBTASKS_PER_TASK),
+        "comments": tasks * params.COMMENT_RATE * _mean(params.COMMENTS_PER_TASK),
+        "task_tags": tasks * params.TAG_RATE * _mean(params.TAGS_PER_TASK),
+        "attachments": tasks * params.ATTACHMENT_RATE,
+        "custom_field_defs": field_defs,
+        "custom_field_values": field_values,
+    }
+    return {table: round(n) for table, n in rows.items()}
+
+
+# --- calibration -------------------------------------------------------------
+def _bytes_by_owner(conn: sqlite3.Connection) -> dict:
+    """dbstat page bytes per generated table (with its schema.sql indexes) or per optional feature."""
+    owners = dict(conn.execute("SELECT name, tbl_name FROM sqlite_master"))
+    base_indexes = set(re.findall(r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:IF NOT EXISTS\s+)?(\w+)",
+                                  SCHEMA_SQL.read_text(), re.IGNORECASE))
+    summary_tables = {s.table for s in SUMMARIES} | {"summary_meta"}
+    sizes = {}
+    for name, size in conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"):
+        table = owners.get(name, name)
+        if table in GENERATED_TABLES:
+            own = name == table or name.startswith("sqlite_autoindex") or name in base_indexes
+            owner = table if own else "indexes"
+        elif table in summary_tables:
+            owner = "summaries"
+        elif "_fts" in table:
+            owner = "search"
+        else:
+            owner = "other"
+        sizes[owner] = sizes.get(owner, 0) + size
+    return sizes
+
+
+def _measure(db_path: Path) -> dict:
+    """Rows, bytes and per-stage (rows written, wall seconds) of one finished build."""
+    from src.utils.instrumentation import report_path_for  # only calibration reads run reports
+
+    report_path = report_path_for(db_path)
+    if not report_path.exists():
+        raise FileNotFoundError(f"No run report at {report_path}; calibrate from a DB built by src/main.py")
+    report = json.loads(report_path.read_text())
+    conn = sqlite3.connect(str(db_path))
+    rows = {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in GENERATED_TABLES}
+    sizes = _bytes_by_owner(conn)
+    conn.close()
+    # Free pages come from the FTS merge ('optimize') when the search index was built
+    free = db_path.stat().st_size - sum(sizes.values())
+    owner = "search" if "search" in sizes else "other"
+    sizes[owner] = sizes.get(owner, 0) + free
+    stages = {}
+    for stage in report["stages"]:
+        written = {t: n for t, n in stage.get("rows_written", {}).items() if t in GENERATED_TABLES}
+        stages[stage["name"]] = (written, stage["wall_s"])
+    return {"db": db_path.name, "report": report, "rows": rows, "bytes": sizes, "stages": stages}
+
+
+def _stage_rows(stage_rows: dict, rows: dict) -> float:
+    # A stage's cost driver: the generated rows it writes, or the whole build for post-load stages
+    return sum(rows[t] for t in stage_rows) if stage_rows else sum(rows.values())
+
+
+def _fit(points: list) -> tuple:
+    """Least-squares (fixed_s, per_row_s) through (rows, wall_s) points, both clamped at zero.
+
+    Stages whose row count is the same in every build (everything but the user-driven
+    ones) can't separate the two terms; they keep the proportional per-row cost.
+    """
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    if not var:
+        return 0.0, mean_y / mean_x if mean_x else 0.0
+    slope = max(sum((x - mean_x) * (y - mean_y) for x, y in points) / var, 0.0)
+    fixed = mean_y - slope * mean_x
+    if fixed < 0:
+        fixed, slope = 0.0, sum(x * y for x, y in points) / sum(x * x for x, _ in points)
+    return fixed, slope
+
+
+def calibrate(db_paths) -> dict:
+    """Measure bytes per row and fit per-stage costs from finished builds and their run reports.
+
+    Pass builds of at least two ``--users`` sizes: a single build can't tell a stage's
+    fixed overhead from its per-row cost, so its costs scale purely per row.
+    """
+    measured = sorted((_measure(Path(p)) for p in db_paths), key=lambda m: sum(m["rows"].values()))
+    ref = measured[-1]  # bytes per row from the largest build
+    stages = {}
+    for name, (written, _) in ref["stages"].items():
+        points = [(_stage_rows(written, m["rows"]), m["stages"][name][1])
+                  for m in measured if name in m["stages"]]
+        fixed, per_row = _fit(points)
+        stages[name] = {"fixed_s": round(fixed, 4), "per_row_s": float(f"{per_row:.4g}"), "rows": written}
+    report = ref["report"]
+    file_bytes = sum(ref["bytes"].values())
+    compact = report.get("compact_db_size_bytes")
+    return {
+        "source": {"db": ref["db"],
+                   "number_of_users": report.get("number_of_users"),
+                   "fit_users": [m["report"].get("number_of_users") for m in measured],
+                   "measured_at": report.get("started_at"), "platform": report.get("platform"),
+                   "sqlite": report.get("sqlite")},
+        "rows": ref["rows"],
+        "bytes": ref["bytes"],
+        "compact_ratio": round(compact / file_bytes, 4) if compact else None,
+        "stages": stages,
+    }
+
+
+def load_calibration(path=CALIBRATION_PATH) -> dict:
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"No calibration at {path}; run `python src/plan.py calibrate <db>`")
+    return json.loads(path.read_text())
+
+
+# --- estimate ------------------------------------------------------------------
+def estimate(number_of_users: int, calibration: dict = None, summaries: bool = True, index_profile=None,
+             search_index: bool = False, compact: bool = False, project_type_weights: dict = None) -> dict:
+    """Expected rows, bytes and serial build seconds for one build's options."""
+    cal = calibration or load_calibration()
+    rows = expected_rows(number_of_users, project_type_weights=project_type_weights)
+    ref_rows = cal["rows"]
+    scale = sum(rows.values()) / max(sum(ref_rows.values()), 1)
+    wanted = {"summaries": summaries, "indexes": bool(index_profile), "search": search_index,
+              "compact": compact}
+    uncalibrated = []
+
+    sizes = {t: cal["bytes"].get(t, 0) / max(ref_rows.get(t, 0), 1) * rows[t] for t in GENERATED_TABLES}
+    for feature in FEATURES:
+        if not wanted[feature]:
+            continue
+        if feature in cal["bytes"]:
+            sizes[feature] = cal["bytes"][feature] * scale
+        else:
+            uncalibrated.append(feature)
+    sizes["other"] = cal["bytes"].get("other", 0)
+    db_bytes = sum(sizes.values())
+
+    seconds = {}
+    for name, stage in cal["stages"].items():
+        if name in wanted and not wanted[name]:
+            continue
+        expected = _stage_rows(stage["rows"], rows)
+        if "per_row_s" in stage:
+            seconds[name] = stage["fixed_s"] + stage["per_row_s"] * expected
+        else:  # single-build calibration from before the fixed-cost fit
+            ref = sum(stage["rows"].values())
+            seconds[name] = stage["wall_s"] * (expected / ref if ref else scale)
+    uncalibrated += [f for f in wanted if wanted[f] and f not in cal["stages"] and f not in uncalibrated]
+
+    compact_bytes = None
+    if compact:
+        compact_bytes = db_bytes * cal["compact_ratio"] if cal.get("compact_ratio") else None
+    return {
+        "number_of_users": number_of_users,
+        "rows": rows,
+        "total_rows": sum(rows.values()),
+        "bytes": {k: round(v) for k, v in sizes.items()},
+        "db_bytes": round(db_bytes),
+        "compact_bytes": round(compact_bytes) if compact_bytes else None,
+        "stage_seconds": {k: round(v, 2) for k, v in seconds.items()},
+        "seconds": round(sum(seconds.values()), 1),
+        "uncalibrated": uncalibrated,
+        "calibration": cal.get("source", {}),
+    }
+
+
+def check_fits(plan: dict, db_path) -> tuple:
+    """(fits, bytes needed, bytes free) for writing the planned build at ``db_path``."""
+    db_path = Path(db_path)
+    target = db_path.parent
+    while not target.exists():
+        target = target.parent
+    free = shutil.disk_usage(target).free
+    if db_path.exists():
+        free += db_path.stat().st_size  # a fresh build replaces it
+    needed = round((plan["db_bytes"] + (plan["compact_bytes"] or 0)) * HEADROOM)
+    return needed <= free, needed, free
+
+
+def _mb(n) -> str:
+    return f"{n / 1e6:,.1f} MB"
+
+
+def print_plan(plan: dict, db_path=None):
+    print("=" * 60)
+    print(f"BUILD PLAN ({plan['number_of_users']:,} users)")
+    print("=" * 60)
+    for table, n in plan["rows"].items():
+        size = plan["bytes"].get(table)
+        print(f"  {table:<22} {n:>12,} rows  {_mb(size):>12}")
+    for feature in FEATURES + ("other",):
+        if feature in plan["bytes"]:
+            print(f"  {'(' + feature + ')':<22} {'':>17}  {_mb(plan['bytes'][feature]):>12}")
+    print(f"\n  Total rows: {plan['total_rows']:,}")
+    print(f"  DB size:    ~{_mb(plan['db_bytes'])}")
+    if plan["compact_bytes"]:
+        print(f"  Compact DB: ~{_mb(plan['compact_bytes'])}")
+    slowest = sorted(plan["stage_seconds"].items(), key=lambda kv: -kv[1])[:3]
+    print(f"  Build time: ~{plan['seconds']:,.0f}s serial "
+          f"({', '.join(f'{k} {v:,.0f}s' for k, v in slowest)})")
+    if plan["uncalibrated"]:
+        print(f"  Not calibrated (excluded): {', '.join(plan['uncalibrated'])}")
+    source = plan["calibration"]
+    if source:
+        users = " + ".join(f"{n:,}" for n in source.get("fit_users") or [source.get("number_of_users")])
+        print(f"  Calibrated from {source.get('db')} ({users} users, {source.get('measured_at', '')[:10]})")
+    if db_path is not None:
+        fits, needed, free = check_fits(plan, db_path)
+        print(f"  Disk: needs {_mb(needed)}, {_mb(free)} free at {Path(db_path).parent}"
+              + ("" if fits else "  ✗ WILL NOT FIT"))
+    print("=" * 60)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate rows, size and build time without generating.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    est = sub.add_parser("estimate", help="Plan a build")
+    est.add_argument("--users", type=int, default=int(os.getenv("NUMBER_OF_USERS", "7000")))
+    est.add_argument("--no-summaries", action="store_true")
+    est.add_argument("--index-profile")
+    est.add_argument("--search-index", action="store_true")
+    est.add_argument("--compact", action="store_true")
+    est.add_argument("--calibration", default=str(CALIBRATION_PATH))
+    est.add_argument("--json", action="store_true", help="Print the plan as JSON")
+    cal = sub.add_parser("calibrate", help="Measure finished builds and save them as the calibration")
+    cal.add_argument("db", nargs="+", help="Builds of at least two --users sizes, to separate fixed and per-row cost")
+    cal.add_argument("--out", default=str(CALIBRATION_PATH))
+    args = parser.parse_args(argv)
+
+    if args.command == "calibrate":
+        for db in args.db:
+            if not Path(db).exists():
+                raise FileNotFoundError(f"DB not found at {db}")
+        if len(set(args.db)) < 2:
+            print("  ! One build can't separate fixed from per-row stage cost; pass two --users sizes")
+        Path(args.out).write_text(json.dumps(calibrate(args.db), indent=2) + "\n")
+        print(f"✓ Calibration written to {args.out}")
+        return
+    plan = estimate(args.users, load_calibration(args.calibration), summaries=not args.no_summaries,
+                    index_profile=args.index_profile, search_index=args.search_index, compact=args.compact)
+    if args.json:
+        print(json.dumps(plan, indent=2))
+    else:
+        print_plan(plan)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
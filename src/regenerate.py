@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Regenerate one team, project or table of an existing DB in place.
+
+Every entity draws from its own random stream (src/utils/rng.py), keyed by
+the build's SEED, the table and the owning entity, so regenerated rows are
+identical to what a full build produces. Rows are updated in place on their
+existing ids; autoincrement children reuse their old ids in order, and only
+rows beyond the old count get fresh ones.
+
+Usage:
+    python src/regenerate.py --project 17
+    python src/regenerate.py --team 3
+    python src/regenerate.py --table comments
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.generators import custom_fields as custom_fields_gen
+from src.generators import projects as projects_gen
+from src.generators import tasks as tasks_gen
+from src.generators import users as users_gen
+from src.main import OUTPUT_DB
+from src.storage.adjacency import sidecar_path, write_adjacency
+from src.storage.collaboration import sidecar_path as collaboration_path, write_collaboration
+from src.storage.partitions import layout_path, load_layout, split as split_partitions
+from src.storage.summaries import build_summaries, drop_triggers, has_summaries
+from src.utils.checkpoint import Checkpointer
+from src.utils.llm_enhanced import check_text_config
+
+# Tables generated per project from its tasks -> their task id column
+CHILD_TASK_COLUMN = {"subtasks": "parent_task_id", "comments": "task_id",
+                     "task_tags": "task_id", "attachments": "task_id"}
+TABLES = ("users", "teams", "projects", "sections", "tags", "team_memberships", "tasks",
+          *CHILD_TASK_COLUMN, "custom_field_defs", "custom_field_values")
+
+
+class Regenerator:
+    def __init__(self, conn: sqlite3.Connection):
+        config = Checkpointer(conn).get("config")
+        if not config:
+            raise RuntimeError("DB has no generation config; it predates per-entity streams")
+        check_text_config(config)
+        self.conn = conn
+        self.seed = config["seed"]
+        self.base_time = config["base_time"]
+        self.project_type_weights = config.get("project_type_weights")
+        self.name_locales = config.get("name_locales")
+        self.organization = users_gen.load_organization(conn)
+        self.users_by_role = users_gen.load_users_by_role(conn)
+        self.user_ids = tasks_gen.all_user_ids(self.users_by_role)
+        self.team_user_map = users_gen.load_team_user_map(conn)
+        self.tag_ids = tasks_gen.load_tag_ids(conn)
+        self.counts = {}
+
+    # --- writing ------------------------------------------------------------
+    def _replace(self, table: str, columns: tuple, rows: list, scope: str, params: tuple = ()):
+        """Make ``rows`` the contents of ``table`` within ``scope`` (a WHERE clause)."""
+        old_ids = [r[0] for r in self.conn.execute(f"SELECT id FROM {table} WHERE {scope} ORDER BY id", params)]
+        new_rows = []
+        if "id" not in columns:
+            # Autoincrement rows take the scope's old ids in order; any extra get fresh ones
+            new_rows = rows[len(old_ids):]
+            rows = [(row_id, *row) for row_id, row in zip(old_ids, rows)]
+            columns = ("id", *columns)
+        # UPDATE rather than delete + insert (or an upsert, which would override the
+        # OR REPLACE in summary triggers), so rows keyed by these ids are left alone
+        existing = set(old_ids)
+        keep = {row[0] for row in rows}
+        self.conn.executemany(f"DELETE FROM {table} WHERE id = ?", [(i,) for i in old_ids if i not in keep])
+        self.conn.executemany(
+            f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in columns[1:])} WHERE id = ?",
+            [(*row[1:], row[0]) for row in rows if row[0] in existing])
+        self._insert(table, columns, [row for row in rows if row[0] not in existing])
+        self._insert(table, columns[1:], new_rows)
+        self.counts[table] = self.counts.get(table, 0) + len(rows) + len(new_rows)
+
+    def _insert(self, table: str, columns: tuple, rows: list):
+        self.conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows)
+
+    def _first_id(self, table: str, scope: str, params: tuple, count: int) -> int:
+        """Where a scope's block of explicit ids starts: the old block unless it would overlap another scope."""
+        first = self.conn.execute(f"SELECT MIN(id) FROM {table} WHERE {scope}", params).fetchone()[0]
+        if first is not None:
+            taken = self.conn.execute(f"SELECT 1 FROM {table} WHERE id BETWEEN ? AND ? AND NOT ({scope})",
+                                      (first, first + count - 1, *params)).fetchone()
+            if taken is None:
+                return first
+        return self.conn.execute(f"SELECT IFNULL(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+
+    # --- per-entity regeneration ------------------------------------------
+    def users(self):
+        # Emails are deduplicated across all users, so the table is regenerated whole
+        count = self.conn.execute("SELECT IFNULL(MAX(id), 0) FROM users").fetchone()[0]
+        self._replace("users", users_gen.USER_COLUMNS,
+                      users_gen.user_rows(self.seed, self.organization, count, self.name_locales), "1")
+
+    def tag(self, tag_id: int):
+        # Tags are a fixed list; rebuild it and keep the one asked for
+        rows = tasks_gen.build_tags(self.seed).tables[0][2]
+        self._replace("tags", tasks_gen.TAG_COLUMNS, [r for r in rows if r[0] == tag_id], "id = ?", (tag_id,))
+
+    def team_row(self, team_id: int):
+        self._replace("teams", projects_gen.TEAM_COLUMNS,
+                      [projects_gen.team_row(self.seed, self.organization["org_id"], team_id, self.base_time)],
+                      "id = ?", (team_id,))
+
+    def memberships(self, team_id: int):
+        rows = users_gen.team_membership_rows(self.seed, team_id, self.users_by_role, self.base_time)
+        self._replace("team_memberships", users_gen.TEAM_MEMBERSHIP_COLUMNS, rows, "team_id = ?", (team_id,))
+        self.team_user_map = users_gen.load_team_user_map(self.conn)
+
+    def team_projects(self, team_id: int) -> list:
+        """Rewrite the team's project rows; their count is fixed by the ids that follow them."""
+        first, old = self.conn.execute("SELECT MIN(id), COUNT(*) FROM projects WHERE team_id = ?",
+                                       (team_id,)).fetchone()
+        if first is None:
+            raise RuntimeError(f"Team {team_id} has no projects to regenerate")
+        rows = projects_gen.team_project_rows(self.seed, self.organization["org_id"], team_id, first,
+                                              self.base_time, self.project_type_weights)
+        if len(rows) != old:
+            raise RuntimeError(f"Team {team_id} now generates {len(rows)} projects instead of {old}; "
+                               "project ids would shift, so rebuild with `--stages projects`")
+        self._replace("projects", projects_gen.PROJECT_COLUMNS, rows, "team_id = ?", (team_id,))
+        return [row[0] for row in rows]
+
+    def sections(self, project_id: int):
+        self._replace("sections", projects_gen.SECTION_COLUMNS,
+                      projects_gen.project_section_rows(self.seed, project_id), "project_id = ?", (project_id,))
+
+    def _project_info(self, project_id: int) -> dict:
+        row = self.conn.execute("SELECT * FROM projects WHERE id = ?", (project_id,)).fetchone()
+        if row is None:
+            raise RuntimeError(f"No project {project_id}")
+        section_ids = [r[0] for r in self.conn.execute(
+            "SELECT id FROM sections WHERE project_id = ? ORDER BY id", (project_id,))]
+        return projects_gen.project_info(tuple(row[c] for c in projects_gen.PROJECT_COLUMNS), section_ids)
+
+    def _base_dt(self) -> datetime:
+        return datetime.fromisoformat(self.base_time)
+
+    def tasks(self, project_id: int):
+        project = self._project_info(project_id)
+        members = tasks_gen.team_members_for(project, self.team_user_map, self.user_ids)
+        rows = tasks_gen.project_task_rows(self.seed, project, members, 1, self._base_dt())
+        first = self._first_id("tasks", "project_id = ?", (project_id,), len(rows))
+        if first != 1:
+            rows = tasks_gen.project_task_rows(self.seed, project, members, first, self._base_dt())
+        self._replace("tasks", tasks_gen.TASK_COLUMNS, rows, "project_id = ?", (project_id,))
+
+    def task_children(self, table: str, project_id: int):
+        project = self._project_info(project_id)
+        members = tasks_gen.team_members_for(project, self.team_user_map, self.user_ids)
+        tasks = self.conn.execute("SELECT id, assignee_id, created_at, name FROM tasks WHERE project_id = ? "
+                                  "ORDER BY id",
+                                  (project_id,)).fetchall()
+        rows = tasks_gen.project_child_rows(table, self.seed, project_id, [tuple(t) for t in tasks], members,
+                                            self.tag_ids, self._base_dt())
+        self._replace(table, tasks_gen.PROJECT_TABLES[table], rows,
+                      f"{CHILD_TASK_COLUMN[table]} IN (SELECT id FROM tasks WHERE project_id = ?)", (project_id,))
+
+    def field_defs(self, project_id: int):
+        project = self._project_info(project_id)
+        rows = custom_fields_gen.project_field_def_rows(self.seed, project, 1)
+        first = self._first_id("custom_field_defs", "project_id = ?", (project_id,), len(rows))
+        rows = custom_fields_gen.project_field_def_rows(self.seed, project, first)
+        self._replace("custom_field_defs", custom_fields_gen.CUSTOM_FIELD_DEF_COLUMNS, rows,
+                      "project_id = ?", (project_id,))
+
+    def field_values(self, project_id: int):
+        defs = custom_fields_gen.load_field_defs(self.conn, project_id).get(project_id)
+        if not defs:
+            return
+        task_ids = [r[0] for r in self.conn.execute("SELECT id FROM tasks WHERE project_id = ? ORDER BY id",
+                                                    (project_id,))]
+        rows = custom_fields_gen.project_field_value_rows(self.seed, project_id, defs, task_ids)
+        self._replace("custom_field_values", custom_fields_gen.CUSTOM_FIELD_VALUE_COLUMNS, rows,
+                      "task_id IN (SELECT id FROM tasks WHERE project_id = ?)", (project_id,))
+
+    # --- scopes -------------------------------------------------------------
+    def project(self, project_id: int):
+        """A project's sections, tasks and everything hanging off them."""
+        self.sections(project_id)
+        self.tasks(project_id)
+        for table in CHILD_TASK_COLUMN:
+            self.task_children(table, project_id)
+        self.field_defs(project_id)
+        self.field_values(project_id)
+
+    def team(self, team_id: int):
+        """A team's row, memberships and projects, with everything under them."""
+        self.team_row(team_id)
+        self.memberships(team_id)
+        for project_id in self.team_projects(team_id):
+            self.project(project_id)
+
+    def table(self, table: str):
+        """One table across the whole DB; tables derived from it are left as they are."""
+        ids = lambda sql: [r[0] for r in self.conn.execute(sql)]  # noqa: E731
+        project_ids = ids("SELECT id FROM projects ORDER BY id")
+        team_ids = ids("SELECT id FROM teams ORDER BY id")
+        per_entity = {
+            "users": (lambda _: self.users(), [None]),
+            "tags": (self.tag, self.tag_ids),
+            "teams": (self.team_row, team_ids),
+            "team_memberships": (self.memberships, team_ids),
+            "projects": (self.team_projects, team_ids),
+            "sections": (self.sections, project_ids),
+            "tasks": (self.tasks, project_ids),
+            "custom_field_defs": (self.field_defs, project_ids),
+            "custom_field_values": (self.field_values, project_ids),
+        }
+        if table in CHILD_TASK_COLUMN:
+            regenerate, keys = (lambda pid: self.task_children(table, pid)), project_ids
+        else:
+            regenerate, keys = per_entity[table]
+        for key in keys:
+            regenerate(key)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regenerate part of a DB in place from its per-entity streams.")
+    parser.add_argument("--db", default=str(OUTPUT_DB), help="DB to update (default: OUTPUT_DB)")
+    scope = parser.add_mutually_exclusive_group(required=True)
+    scope.add_argument("--project", type=int, help="Project id: sections, tasks and their children")
+    scope.add_argument("--team", type=int, help="Team id: team row, memberships and all its projects")
+    scope.add_argument("--table", choices=TABLES, help="One table across the whole DB")
+    args = parser.parse_args(argv)
+
+    if not Path(args.db).exists():
+        raise FileNotFoundError(f"DB not found at {args.db}")
+    conn = sqlite3.connect(args.db)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    regen = Regenerator(conn)
+
+    started = time.perf_counter()
+    if args.table:
+        # Table-wide rewrites would crawl through per-row summary triggers; rebuilt below
+        summaries = has_summaries(conn)
+        if summaries:
+            drop_triggers(conn)
+        regen.table(args.table)
+        if summaries:
+            build_summaries(conn)
+    elif args.team is not None:
+        regen.team(args.team)
+    else:
+        regen.project(args.project)
+    conn.commit()
+    refresh_sidecar = sidecar_path(args.db).exists()
+    if refresh_sidecar:
+        write_adjacency(conn, args.db)
+    refresh_graph = collaboration_path(args.db).exists()
+    if refresh_graph:
+        write_collaboration(conn, args.db)
+    conn.close()
+    refresh_layout = layout_path(args.db).exists()
+    if refresh_layout:
+        split_partitions(args.db, len(load_layout(layout_path(args.db))["partitions"]))
+
+    counts = ", ".join(f"{table} {n:,}" for table, n in regen.counts.items())
+    print(f"✓ Regenerated in {time.perf_counter() - started:.2f}s: {counts}")
+    if refresh_sidecar:
+        print(f"  Adjacency sidecar rebuilt at {sidecar_path(args.db)}")
+    if refresh_graph:
+        print(f"  Collaboration graph rebuilt at {collaboration_path(args.db)}")
+    if refresh_layout:
+        print(f"  Partitioned layout split again at {layout_path(args.db)}")
+    if args.table:
+        print("  Tables derived from it were kept; use `src/main.py --stages` to rebuild those too")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Start-up benchmark for the CLI: how long each command takes before doing any work.
+
+Times ``python src/cli.py <command> --help`` (parse arguments, import what the
+command needs, exit) against a bare interpreter. The quick commands are also
+timed doing real work, since ``--help`` exits before any lazy import:
+``plan --users 20000`` and ``validate <db>`` (with --db, or OUTPUT_DB when it
+exists). With ``--importtime`` it lists each run's costliest imports from
+``python -X importtime``, leaving out what the interpreter imports anyway.
+
+Usage:
+    python src/cli.py bench-imports
+    python src/cli.py bench-imports validate plan --importtime --db output/asana_simulation.sqlite
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from src.cli import COMMANDS
+
+CLI = BASE_DIR / "src" / "cli.py"
+
+
+def _help_argv(command: str) -> list:
+    # export is timed through a target, the way it is run
+    return [str(CLI), command, *(["compact"] if command == "export" else []), "--help"]
+
+
+def _run_argv(command: str, db) -> list:
+    """A real invocation of a quick command, or None when it has none (or no DB to run on)."""
+    if command == "plan":
+        return [str(CLI), "plan", "--users", "20000"]
+    if command == "validate" and db:
+        return [str(CLI), "validate", str(db)]
+    return None
+
+
+def _median_ms(cmd: list, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True, cwd=BASE_DIR)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def _imports_ms(cmd: list) -> dict:
+    # -X importtime writes one line per module: self us | cumulative us | name (indented when nested)
+    proc = subprocess.run([sys.executable, "-X", "importtime", *cmd], capture_output=True, text=True, cwd=BASE_DIR)
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            _, cumulative, name = line.split(":", 1)[1].split("|")
+            if not name[1:].startswith(" "):
+                modules[name.strip()] = int(cumulative) / 1000
+    return modules
+
+
+def _import_profile(argv: list, top: int, baseline: set) -> list:
+    """Costliest top-level imports of ``argv`` that a bare interpreter does not make."""
+    modules = _imports_ms(argv)
+    own = [(name, ms) for name, ms in modules.items() if name not in baseline]
+    return sorted(own, key=lambda m: -m[1])[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each cli.py command's start-up.")
+    parser.add_argument("commands", nargs="*", default=[c for c in COMMANDS if c != "bench-imports"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--importtime", action="store_true",
+                        help="Also list each command's costliest top-level imports (python -X importtime)")
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--db", default=os.getenv("OUTPUT_DB", "output/asana_simulation.sqlite"),
+                        help="DB for the real `validate <db>` run; skipped when it does not exist")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    db = Path(args.db) if args.db and (BASE_DIR / args.db).exists() else None
+    runs = {}
+    for command in args.commands:
+        runs[f"{command} --help"] = _help_argv(command)
+        if _run_argv(command, db):
+            runs[" ".join(_run_argv(command, db)[1:])] = _run_argv(command, db)
+    results = {"python": round(_median_ms([sys.executable, "-c", "pass"], args.repeat), 1)}
+    for name, cmd in runs.items():
+        results[name] = round(_median_ms([sys.executable, *cmd], args.repeat), 1)
+    profiles = {}
+    if args.importtime:
+        baseline = set(_imports_ms(["-c", "pass"]))
+        profiles = {name: _import_profile(cmd, args.top, baseline) for name, cmd in runs.items()}
+
+    if args.json:
+        print(json.dumps({"median_ms": results, "imports_ms": profiles}, indent=2))
+        return
+    print(f"Wall time per invocation, median of {args.repeat} runs (python = bare interpreter):")
+    width = max(map(len, results)) + 2
+    for name, ms in results.items():
+        extra = "" if name == "python" else f"  (+{ms - results['python']:.0f} ms)"
+        print(f"  {name:<{width}} {ms:8.1f} ms{extra}")
+        for module, cumulative in profiles.get(name, []):
+            print(f"      {module:<36} {cumulative:7.1f} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
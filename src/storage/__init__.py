@@ -0,0 +1,8 @@
+# Storage layouts, schema variants and index profiles for the generated DB.
+from pathlib import Path
+
+
+def sidecar_dir(db_path, name: str) -> Path:
+    """``<db stem>.<name>/`` next to the DB; kept import-free so callers can check for one cheaply."""
+    db_path = Path(db_path)
+    return db_path.with_name(f"{db_path.stem}.{name}")
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""CSR adjacency sidecar: relationship indexes stored as memory-mappable .npy files.
+
+Each relationship (team -> members, role -> users, project -> sections/tasks,
+section -> tasks, task -> subtasks/comments/tags/attachments) is a CSR pair of
+offsets and values arrays (src/utils/csr.py). The sidecar is a directory next
+to the DB, ``<db stem>.adjacency/``, holding ``<name>.offsets.npy`` and
+``<name>.values.npy`` per relationship plus ``meta.json``; loading maps the
+arrays read-only, so any number of processes (RL env workers, the validator)
+share one copy through the page cache. ``meta.json`` records each source
+table's row count and max id, so a sidecar left behind by a later rewrite of
+the DB is detected as stale.
+
+Usage:
+    python src/storage/adjacency.py build output/asana_simulation.sqlite
+    python src/storage/adjacency.py info output/asana_simulation.sqlite
+    python src/storage/adjacency.py bench output/asana_simulation.sqlite
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.storage import sidecar_dir
+from src.utils.csr import CSR, csr_from_query
+
+# name -> (source table, key column, value column, order of values within a key;
+#          string keys become labels in first-seen order)
+RELATIONS = {
+    "team_members": ("team_memberships", "team_id", "user_id", "id"),
+    "role_users": ("users", "role", "id", "id"),
+    "project_sections": ("sections", "project_id", "id", "position, id"),
+    "project_tasks": ("tasks", "project_id", "id", "id"),
+    "section_tasks": ("tasks", "section_id", "id", "id"),
+    "task_subtasks": ("subtasks", "parent_task_id", "id", "id"),
+    "task_comments": ("comments", "task_id", "id", "created_at, id"),
+    "task_tags": ("task_tags", "task_id", "tag_id", "tag_id"),
+    "task_attachments": ("attachments", "task_id", "id", "id"),
+}
+META = "meta.json"
+
+# Equivalent per-key SQL for the benchmark
+BENCH_QUERIES = {
+    "team_members": "SELECT user_id FROM team_memberships WHERE team_id = ? ORDER BY id",
+    "project_tasks": "SELECT id FROM tasks WHERE project_id = ? ORDER BY id",
+    "task_comments": "SELECT id FROM comments WHERE task_id = ? ORDER BY created_at, id",
+}
+
+
+def sidecar_path(db_path) -> Path:
+    return sidecar_dir(db_path, "adjacency")
+
+
+def fingerprint(conn: sqlite3.Connection, tables=None) -> dict:
+    """Row count and max rowid of every source table; any rewrite that matters changes one of them."""
+    tables = sorted(tables or {table for table, *_ in RELATIONS.values()})
+    # Journaled mutations (src/access/journal.py) move rows in place; the journal's length tracks them
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'mutation_journal'").fetchone():
+        tables.append("mutation_journal")
+    return {t: list(conn.execute(f"SELECT COUNT(*), IFNULL(MAX(rowid), 0) FROM {t}").fetchone())
+            for t in tables}
+
+
+def relation_sql(name: str) -> str:
+    # The CSR groups rows by key stably, so the query only fixes the order within a key
+    table, key, value, order = RELATIONS[name]
+    return f"SELECT {key}, {value} FROM {table} WHERE {key} IS NOT NULL ORDER BY {order}"
+
+
+def build_adjacency(conn: sqlite3.Connection) -> dict:
+    """All relationships as ``{name: CSR}``."""
+    return {name: csr_from_query(conn, relation_sql(name)) for name in RELATIONS}
+
+
+def save_adjacency(index: dict, db_path, conn: sqlite3.Connection) -> Path:
+    """Write the sidecar next to ``db_path``, replacing any previous one whole."""
+    target = sidecar_path(db_path)
+    tmp = target.with_name(target.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, csr in index.items():
+        np.save(tmp / f"{name}.offsets.npy", csr.offsets)
+        np.save(tmp / f"{name}.values.npy", csr.values)
+    meta = {
+        "built_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "fingerprint": fingerprint(conn),
+        "relations": {name: {"rows": len(csr), "values": len(csr.values), "labels": csr.labels}
+                      for name, csr in index.items()},
+    }
+    (tmp / META).write_text(json.dumps(meta, indent=2) + "\n")
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    return target
+
+
+def write_adjacency(conn: sqlite3.Connection, db_path) -> float:
+    """Build and save the sidecar for an open DB; returns seconds taken."""
+    started = time.perf_counter()
+    save_adjacency(build_adjacency(conn), db_path, conn)
+    return time.perf_counter() - started
+
+
+def load_meta(db_path) -> dict:
+    path = sidecar_path(db_path) / META
+    if not path.exists():
+        raise FileNotFoundError(f"No adjacency sidecar at {path.parent} (build it with src/storage/adjacency.py)")
+    return json.loads(path.read_text())
+
+
+def load_adjacency(db_path, mmap_mode: str = "r") -> dict:
+    """``{name: CSR}`` over the memory-mapped sidecar arrays (``mmap_mode=None`` reads them into RAM)."""
+    directory = sidecar_path(db_path)
+
+    def array(path):
+        # Plain ndarray views over the map: slicing an np.memmap is several times slower
+        return np.asarray(np.load(path, mmap_mode=mmap_mode))
+
+    return {name: CSR(array(directory / f"{name}.offsets.npy"), array(directory / f"{name}.values.npy"),
+                      info["labels"])
+            for name, info in load_meta(db_path)["relations"].items()}
+
+
+def is_stale(conn: sqlite3.Connection, db_path) -> bool:
+    """True when the DB's source tables changed since the sidecar was built."""
+    return load_meta(db_path)["fingerprint"] != fingerprint(conn)
+
+
+def _dict_of_lists_bytes(csr: CSR) -> int:
+    # What the same relationship costs as {key: [ints]}: list headers, pointers and int objects
+    n = len(csr.values)
+    keys = int(np.count_nonzero(csr.degrees()))
+    return keys * (sys.getsizeof([]) + 100) + n * (8 + sys.getsizeof(1 << 20))
+
+
+def benchmark(conn: sqlite3.Connection, db_path, lookups: int = 2000, seed: int = 42) -> dict:
+    """Per-lookup microseconds of CSR slices vs the SQL queries they replace, plus memory footprints."""
+    index = load_adjacency(db_path)
+    rng = np.random.default_rng(seed)
+    results = {}
+    for name, query in BENCH_QUERIES.items():
+        csr = index[name]
+        keys = np.flatnonzero(csr.degrees())
+        if not len(keys):
+            continue
+        keys = rng.choice(keys, lookups).tolist()
+
+        def timed(fn):
+            samples = []
+            for key in keys:
+                t0 = time.perf_counter()
+                fn(key)
+                samples.append((time.perf_counter() - t0) * 1e6)
+            return round(statistics.median(samples), 2)
+
+        results[name] = {
+            "rows": len(csr),
+            "values": len(csr.values),
+            "sql_us": timed(lambda k: conn.execute(query, (k,)).fetchall()),
+            "csr_neighbors_us": timed(csr.neighbors),
+            "csr_sample_us": timed(lambda k: csr.sample(rng, k)),
+            "csr_mb": round(csr.nbytes / 1e6, 3),
+            "dict_of_lists_mb_est": round(_dict_of_lists_bytes(csr) / 1e6, 3),
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CSR adjacency sidecar for a generated DB.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for command, help_text in (("build", "Build (or rebuild) the sidecar"),
+                               ("info", "Show the sidecar's relationships and whether it is stale"),
+                               ("bench", "Compare CSR lookups with the equivalent SQL")):
+        cmd = sub.add_parser(command, help=help_text)
+        cmd.add_argument("db")
+        if command == "bench":
+            cmd.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    if not Path(args.db).exists():
+        raise FileNotFoundError(f"DB not found at {args.db}")
+    conn = sqlite3.connect(args.db)
+    if args.command == "build":
+        seconds = write_adjacency(conn, args.db)
+        print(f"✓ Adjacency sidecar written to {sidecar_path(args.db)} in {seconds:.2f}s")
+    elif args.command == "info":
+        meta = load_meta(args.db)
+        index = load_adjacency(args.db)
+        print(f"Sidecar {sidecar_path(args.db)} (built {meta['built_at']}, "
+              f"{'STALE' if is_stale(conn, args.db) else 'fresh'})")
+        for name, csr in index.items():
+            degrees = csr.degrees()
+            nonempty = degrees[degrees > 0]
+            print(f"  {name}: {len(csr):,} rows, {len(csr.values):,} values, "
+                  f"degree median {np.median(nonempty) if len(nonempty) else 0:g} "
+                  f"max {degrees.max() if len(degrees) else 0}, {csr.nbytes / 1e6:.2f} MB")
+    else:
+        print(json.dumps(benchmark(conn, args.db, args.lookups), indent=2))
+    conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
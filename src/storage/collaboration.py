@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""Collaboration graph: sparse user x user and user x project matrices plus per-user features.
+
+Built once after generation from who is assigned what and who talks to whom:
+
+- user_project: tasks and subtasks assigned to a user, per project;
+- user_team: team memberships;
+- co_assignment: projects in which two users both have work assigned;
+- comments: comments on a task assigned to someone else (author -> assignee);
+- delegation: subtasks assigned to someone else under a task the user is
+  assigned (task assignee -> subtask assignee);
+- collaboration: the symmetric sum of those three, weighted by WEIGHTS.
+
+Every matrix is CSR with ids as row and column indexes (row 0 unused) and is
+saved in scipy.sparse.save_npz's layout under ``<db stem>.collaboration/``,
+so ``scipy.sparse.load_npz`` reads the files as they are. SciPy does the
+sparse products when it is installed; otherwise a NumPy path with the same
+output runs, so SciPy stays optional.
+
+Per-user features go to ``features.npz`` and the user_collaboration table:
+distinct collaborators, summed weight (strength), projects, teams, open work
+(open tasks and subtasks), the share of strength spent with users outside
+all of the user's teams, and workload centrality: PageRank over the graph,
+restarting in proportion to open work and scaled to a mean of 1. It is high
+for users who carry open work or work closely with those who do. The top-k
+collaborators per user go to ``top_k.npz`` and the user_collaborators
+table, with the signals behind each weight. ``meta.json`` fingerprints the
+source tables like the adjacency sidecar, so a stale graph is detected.
+
+Usage:
+    python src/storage/collaboration.py build output/asana_simulation.sqlite --top-k 10
+    python src/storage/collaboration.py info output/asana_simulation.sqlite
+    python src/storage/collaboration.py bench output/asana_simulation.sqlite
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.storage import sidecar_dir
+from src.storage.adjacency import fingerprint
+
+SOURCE_TABLES = ("users", "projects", "teams", "team_memberships", "tasks", "subtasks", "comments")
+MATRICES = ("user_project", "user_team", "co_assignment", "comments", "delegation", "collaboration", "top_k")
+FEATURES = ("collaborators", "strength", "projects", "teams", "open_work", "cross_team_share",
+            "workload_centrality")
+META = "meta.json"
+DEFAULT_TOP_K = 10
+# Weight of one shared project, one comment and one delegated subtask (each counted both ways)
+WEIGHTS = {"co_assignment": 1.0, "comments": 0.5, "delegation": 2.0}
+DAMPING = 0.85
+
+COLLABORATION_DDL = """
+CREATE TABLE IF NOT EXISTS user_collaboration (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    collaborators INTEGER NOT NULL,
+    strength REAL NOT NULL,
+    projects INTEGER NOT NULL,
+    teams INTEGER NOT NULL,
+    open_work INTEGER NOT NULL,
+    cross_team_share REAL NOT NULL,
+    workload_centrality REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS user_collaborators (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    rank INTEGER NOT NULL,
+    collaborator_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    weight REAL NOT NULL,
+    shared_projects INTEGER NOT NULL,
+    comments INTEGER NOT NULL,
+    delegations INTEGER NOT NULL,
+    PRIMARY KEY (user_id, rank)
+) WITHOUT ROWID;
+"""
+
+# (row id, column id) pairs behind each counted matrix: one per assignment, membership, comment or subtask
+PAIRS_SQL = {
+    "user_project": """
+        SELECT assignee_id, project_id FROM tasks
+        WHERE assignee_id IS NOT NULL AND project_id IS NOT NULL
+        UNION ALL
+        SELECT s.assignee_id, t.project_id FROM subtasks s JOIN tasks t ON t.id = s.parent_task_id
+        WHERE s.assignee_id IS NOT NULL AND t.project_id IS NOT NULL""",
+    "user_team": "SELECT user_id, team_id FROM team_memberships",
+    "comments": """
+        SELECT c.author_id, t.assignee_id FROM comments c JOIN tasks t ON t.id = c.task_id
+        WHERE c.author_id IS NOT NULL AND t.assignee_id IS NOT NULL AND c.author_id != t.assignee_id""",
+    "delegation": """
+        SELECT t.assignee_id, s.assignee_id FROM subtasks s JOIN tasks t ON t.id = s.parent_task_id
+        WHERE t.assignee_id IS NOT NULL AND s.assignee_id IS NOT NULL AND t.assignee_id != s.assignee_id""",
+}
+OPEN_WORK_SQL = """
+    SELECT assignee_id FROM tasks WHERE assignee_id IS NOT NULL AND completed = 0
+    UNION ALL
+    SELECT assignee_id FROM subtasks WHERE assignee_id IS NOT NULL AND completed = 0"""
+
+# The per-episode self-join the sidecar replaces: a user's top co-assignees by shared projects
+SELF_JOIN_SQL = """
+    SELECT b.assignee_id, COUNT(DISTINCT a.project_id) AS shared
+    FROM tasks a JOIN tasks b ON b.project_id = a.project_id AND b.assignee_id != a.assignee_id
+    WHERE a.assignee_id = ?
+    GROUP BY b.assignee_id ORDER BY shared DESC, b.assignee_id LIMIT ?"""
+
+
+class Sparse(NamedTuple):
+    """A CSR matrix as plain arrays: row i holds ``indices[indptr[i]:indptr[i + 1]]`` (sorted)."""
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+    shape: tuple
+
+    @property
+    def nnz(self) -> int:
+        return len(self.indices)
+
+    def row(self, i: int) -> tuple:
+        """(columns, values) of row ``i``."""
+        lo, hi = self.indptr[i], self.indptr[i + 1]
+        return self.indices[lo:hi], self.data[lo:hi]
+
+    def row_ids(self) -> np.ndarray:
+        """The row of every stored entry."""
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    def get(self, rows, cols) -> np.ndarray:
+        """Values at each (rows[i], cols[i]), 0 where nothing is stored."""
+        want = np.asarray(rows, dtype=np.int64) * self.shape[1] + np.asarray(cols, dtype=np.int64)
+        if not self.nnz:
+            return np.zeros(len(want), dtype=self.data.dtype)
+        # Row-major order with sorted columns makes the flat keys sorted
+        keys = self.row_ids() * self.shape[1] + self.indices
+        pos = np.minimum(np.searchsorted(keys, want), self.nnz - 1)
+        return np.where(keys[pos] == want, self.data[pos], 0)
+
+
+def _scipy_sparse():
+    """scipy.sparse, or None when SciPy is not installed."""
+    try:
+        import scipy.sparse
+    except ImportError:
+        return None
+    return scipy.sparse
+
+
+def _from_pairs(rows, cols, data, shape: tuple, sp=None) -> Sparse:
+    """CSR from (row, column, value) triples, summing duplicates."""
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    data = np.asarray(data)
+    if sp is not None:
+        m = sp.csr_matrix((data, (rows, cols)), shape=shape)
+        m.sort_indices()
+        return Sparse(m.indptr.astype(np.int64), m.indices.astype(np.int32), m.data.astype(data.dtype), shape)
+    keys, inverse = np.unique(rows * shape[1] + cols, return_inverse=True)
+    summed = np.bincount(inverse, weights=data, minlength=len(keys)).astype(data.dtype)
+    indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // shape[1], minlength=shape[0]), out=indptr[1:])
+    return Sparse(indptr, (keys % shape[1]).astype(np.int32), summed, shape)
+
+
+def _expand(m: Sparse, rows: np.ndarray) -> tuple:
+    """Every stored column of each of ``rows``: (position in ``rows``, column) arrays."""
+    counts = np.diff(m.indptr)[rows]
+    which = np.repeat(np.arange(len(rows)), counts)
+    starts = np.repeat(m.indptr[rows] - (np.cumsum(counts) - counts), counts)
+    return which, m.indices[starts + np.arange(len(which))]
+
+
+def _transpose(m: Sparse, sp=None) -> Sparse:
+    return _from_pairs(m.indices, m.row_ids(), m.data, (m.shape[1], m.shape[0]), sp)
+
+
+def co_occurrence(m: Sparse, sp=None) -> Sparse:
+    """Columns each pair of rows shares (B Bᵀ of the 0/1 pattern of ``m``), diagonal dropped."""
+    shape = (m.shape[0], m.shape[0])
+    if sp is not None:
+        b = sp.csr_matrix((np.ones(m.nnz, dtype=np.int64), m.indices, m.indptr), shape=m.shape)
+        g = (b @ b.T).tocoo()
+        keep = g.row != g.col
+        return _from_pairs(g.row[keep], g.col[keep], g.data[keep].astype(np.int64), shape, sp)
+    # Every ordered pair of rows within each column
+    by_column = _transpose(m)
+    which, partners = _expand(by_column, by_column.row_ids())
+    rows = by_column.indices[which]
+    keep = rows != partners
+    return _from_pairs(rows[keep], partners[keep], np.ones(int(keep.sum()), dtype=np.int64), shape)
+
+
+def shares_row(m: Sparse, membership: Sparse) -> np.ndarray:
+    """For each stored entry (u, v) of ``m``: do u and v share a column of ``membership`` (e.g. a team)?"""
+    which, team = _expand(membership, m.row_ids())
+    hit = membership.get(m.indices[which], team) > 0
+    return np.bincount(which[hit], minlength=m.nnz) > 0
+
+
+def top_k(m: Sparse, k: int) -> Sparse:
+    """Each row's ``k`` largest entries, heaviest first (ties to the lower id)."""
+    rows = m.row_ids()
+    order = np.lexsort((m.indices, -m.data, rows))
+    rank = np.arange(m.nnz) - m.indptr[rows]
+    keep = order[rank < k]
+    indptr = np.zeros(len(m.indptr), dtype=np.int64)
+    np.cumsum(np.minimum(np.diff(m.indptr), k), out=indptr[1:])
+    return Sparse(indptr, m.indices[keep], m.data[keep], m.shape)
+
+
+def workload_centrality(graph: Sparse, strength: np.ndarray, open_work: np.ndarray, damping: float = DAMPING,
+                        tol: float = 1e-10, max_iter: int = 200) -> np.ndarray:
+    """PageRank over the symmetric ``graph``, restarting in proportion to open work; mean 1 over user ids."""
+    n = len(strength)
+    total = open_work.sum()
+    restart = open_work / total if total else np.full(n, 1.0 / max(n - 1, 1))
+    restart[0] = 0.0
+    rows = graph.row_ids()
+    dangling = strength == 0
+    x = restart.copy()
+    for _ in range(max_iter):
+        spread = np.divide(x, strength, out=np.zeros(n), where=~dangling)
+        # Symmetric weights: what reaches v is row v of W times each neighbor's share
+        y = damping * np.bincount(rows, weights=graph.data * spread[graph.indices], minlength=n)
+        y += (damping * x[dangling].sum() + 1.0 - damping) * restart
+        converged = np.abs(y - x).sum() < tol
+        x = y
+        if converged:
+            break
+    return x * (n - 1)
+
+
+def _pairs(conn: sqlite3.Connection, sql: str) -> tuple:
+    pairs = np.array(conn.execute(sql).fetchall(), dtype=np.int64).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def _size(conn: sqlite3.Connection, table: str) -> int:
+    # Ids index rows directly, so a matrix needs max(id) + 1 rows
+    return conn.execute(f"SELECT IFNULL(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+
+
+def build_graph(conn: sqlite3.Connection, k: int = DEFAULT_TOP_K, use_scipy: bool = None) -> dict:
+    """Every matrix as a Sparse plus ``features``; SciPy does the products when installed, unless ``use_scipy=False``."""
+    sp = _scipy_sparse() if use_scipy is not False else None
+    if use_scipy and sp is None:
+        raise RuntimeError("SciPy is not installed (pip install scipy)")
+    n_users = _size(conn, "users")
+    shapes = {"user_project": (n_users, _size(conn, "projects")), "user_team": (n_users, _size(conn, "teams")),
+              "comments": (n_users, n_users), "delegation": (n_users, n_users)}
+    pairs = {name: _pairs(conn, sql) for name, sql in PAIRS_SQL.items()}
+    graph = {name: _from_pairs(rows, cols, np.ones(len(rows), dtype=np.int64), shapes[name], sp)
+             for name, (rows, cols) in pairs.items()}
+    co = graph["co_assignment"] = co_occurrence(graph["user_project"], sp)
+
+    # collaboration = w_co * co_assignment + w_c * (C + Cᵀ) + w_d * (D + Dᵀ)
+    (c_from, c_to), (d_from, d_to) = pairs["comments"], pairs["delegation"]
+    collaboration = graph["collaboration"] = _from_pairs(
+        np.concatenate([co.row_ids(), c_from, c_to, d_from, d_to]),
+        np.concatenate([co.indices, c_to, c_from, d_to, d_from]),
+        np.concatenate([WEIGHTS["co_assignment"] * co.data,
+                        np.full(2 * len(c_from), WEIGHTS["comments"]),
+                        np.full(2 * len(d_from), WEIGHTS["delegation"])]).astype(np.float64),
+        (n_users, n_users), sp)
+    graph["top_k"] = top_k(collaboration, k)
+
+    rows = collaboration.row_ids()
+    strength = np.bincount(rows, weights=collaboration.data, minlength=n_users)
+    outside = np.bincount(rows, weights=collaboration.data * ~shares_row(collaboration, graph["user_team"]),
+                          minlength=n_users)
+    open_work = np.bincount(np.array([r[0] for r in conn.execute(OPEN_WORK_SQL)], dtype=np.int64),
+                            minlength=n_users)
+    graph["features"] = {
+        "collaborators": np.diff(collaboration.indptr).astype(np.int32),
+        "strength": strength,
+        "projects": np.diff(graph["user_project"].indptr).astype(np.int32),
+        "teams": np.diff(graph["user_team"].indptr).astype(np.int32),
+        "open_work": open_work.astype(np.int32),
+        "cross_team_share": np.divide(outside, strength, out=np.zeros(n_users), where=strength > 0),
+        "workload_centrality": workload_centrality(collaboration, strength, open_work),
+    }
+    graph["backend"] = "scipy" if sp is not None else "numpy"
+    return graph
+
+
+def write_tables(conn: sqlite3.Connection, graph: dict):
+    """Replace user_collaboration and user_collaborators with the graph's features and top-k lists."""
+    conn.executescript(COLLABORATION_DDL)
+    features = graph["features"]
+    user_ids = np.array([r[0] for r in conn.execute("SELECT id FROM users ORDER BY id")], dtype=np.int64)
+    top = graph["top_k"]
+    rows, cols = top.row_ids(), top.indices
+    both = {name: graph[name].get(rows, cols) + graph[name].get(cols, rows) for name in ("comments", "delegation")}
+    with conn:
+        conn.execute("DELETE FROM user_collaboration")
+        conn.execute("DELETE FROM user_collaborators")
+        conn.executemany("INSERT INTO user_collaboration VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         zip(user_ids.tolist(), *(features[name][user_ids].tolist() for name in FEATURES)))
+        conn.executemany("INSERT INTO user_collaborators VALUES (?, ?, ?, ?, ?, ?, ?)", zip(
+            rows.tolist(), (np.arange(top.nnz) - top.indptr[rows] + 1).tolist(), cols.tolist(),
+            top.data.tolist(), graph["co_assignment"].get(rows, cols).tolist(),
+            both["comments"].tolist(), both["delegation"].tolist()))
+
+
+def has_tables(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'user_collaboration'").fetchone() is not None
+
+
+def sidecar_path(db_path) -> Path:
+    return sidecar_dir(db_path, "collaboration")
+
+
+def save_matrix(path, m: Sparse):
+    """Write ``m`` the way scipy.sparse.save_npz writes a CSR matrix."""
+    np.savez_compressed(path, indices=m.indices, indptr=m.indptr, format=np.array(b"csr"),
+                        shape=np.array(m.shape), data=m.data)
+
+
+def save_graph(graph: dict, db_path, conn: sqlite3.Connection) -> Path:
+    """Write the sidecar next to ``db_path``, replacing any previous one whole."""
+    target = sidecar_path(db_path)
+    tmp = target.with_name(target.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name in MATRICES:
+        save_matrix(tmp / f"{name}.npz", graph[name])
+    np.savez_compressed(tmp / "features.npz", **graph["features"])
+    meta = {
+        "built_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "fingerprint": fingerprint(conn, SOURCE_TABLES),
+        "backend": graph["backend"],
+        "weights": WEIGHTS,
+        "top_k": int(np.diff(graph["top_k"].indptr).max(initial=0)),
+        "matrices": {name: {"shape": list(graph[name].shape), "nnz": graph[name].nnz} for name in MATRICES},
+    }
+    (tmp / META).write_text(json.dumps(meta, indent=2) + "\n")
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    return target
+
+
+def write_collaboration(conn: sqlite3.Connection, db_path, k: int = DEFAULT_TOP_K, use_scipy: bool = None) -> float:
+    """Build the graph for an open DB, save the sidecar and fill the tables; returns seconds taken."""
+    started = time.perf_counter()
+    graph = build_graph(conn, k, use_scipy)
+    save_graph(graph, db_path, conn)
+    write_tables(conn, graph)
+    return time.perf_counter() - started
+
+
+def load_meta(db_path) -> dict:
+    path = sidecar_path(db_path) / META
+    if not path.exists():
+        raise FileNotFoundError(f"No collaboration graph at {path.parent} (build it with src/storage/collaboration.py)")
+    return json.loads(path.read_text())
+
+
+def load_matrix(db_path, name: str) -> Sparse:
+    """One saved matrix; ``to_scipy`` turns it into a scipy.sparse matrix."""
+    with np.load(sidecar_path(db_path) / f"{name}.npz") as f:
+        return Sparse(f["indptr"], f["indices"], f["data"], tuple(int(n) for n in f["shape"]))
+
+
+def load_features(db_path) -> dict:
+    """``{feature: array indexed by user id}``."""
+    with np.load(sidecar_path(db_path) / "features.npz") as f:
+        return {name: f[name] for name in f.files}
+
+
+def to_scipy(m: Sparse):
+    sp = _scipy_sparse()
+    if sp is None:
+        raise RuntimeError("SciPy is not installed (pip install scipy)")
+    return sp.csr_matrix((m.data, m.indices, m.indptr), shape=m.shape)
+
+
+def is_stale(conn: sqlite3.Connection, db_path) -> bool:
+    """True when the DB's source tables changed since the graph was built."""
+    return load_meta(db_path)["fingerprint"] != fingerprint(conn, SOURCE_TABLES)
+
+
+def benchmark(conn: sqlite3.Connection, db_path, lookups: int = 500, seed: int = 42) -> dict:
+    """Build time per backend, and per-user collaborator lookups: SQL self-join vs tables vs sidecar."""
+    results = {"build_s": {}}
+    built = {}
+    for backend in ("numpy", "scipy"):
+        if backend == "scipy" and _scipy_sparse() is None:
+            continue
+        started = time.perf_counter()
+        built[backend] = build_graph(conn, use_scipy=backend == "scipy")
+        results["build_s"][backend] = round(time.perf_counter() - started, 4)
+    if len(built) == 2:
+        a, b = built["numpy"], built["scipy"]
+        results["scipy_matches_numpy"] = all(
+            np.array_equal(a[n].indptr, b[n].indptr) and np.array_equal(a[n].indices, b[n].indices)
+            and np.allclose(a[n].data, b[n].data) for n in MATRICES)
+
+    top = load_matrix(db_path, "top_k")
+    users = np.flatnonzero(np.diff(top.indptr))
+    if not len(users):
+        return results
+    keys = np.random.default_rng(seed).choice(users, lookups).tolist()
+    k = int(np.diff(top.indptr).max())
+
+    def timed(fn):
+        samples = []
+        for key in keys:
+            t0 = time.perf_counter()
+            fn(key)
+            samples.append((time.perf_counter() - t0) * 1e6)
+        return round(statistics.median(samples), 2)
+
+    results["lookup_us"] = {
+        "sql_self_join": timed(lambda u: conn.execute(SELF_JOIN_SQL, (u, k)).fetchall()),
+        "user_collaborators_table": timed(lambda u: conn.execute(
+            "SELECT collaborator_id, weight FROM user_collaborators WHERE user_id = ? ORDER BY rank", (u,)).fetchall()),
+        "sidecar_top_k": timed(top.row),
+    }
+    results["sidecar_mb"] = round(sum(p.stat().st_size for p in sidecar_path(db_path).iterdir()) / 1e6, 3)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collaboration graph and features for a generated DB.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for command, help_text in (("build", "Build (or rebuild) the sidecar and the tables"),
+                               ("info", "Show the matrices, feature ranges and whether the graph is stale"),
+                               ("bench", "Time the build and compare lookups with the SQL self-join")):
+        cmd = sub.add_parser(command, help=help_text)
+        cmd.add_argument("db")
+        if command == "build":
+            cmd.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="Collaborators kept per user")
+            cmd.add_argument("--numpy", action="store_true", help="Use the NumPy path even if SciPy is installed")
+        if command == "bench":
+            cmd.add_argument("--lookups", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    if not Path(args.db).exists():
+        raise FileNotFoundError(f"DB not found at {args.db}")
+    conn = sqlite3.connect(args.db)
+    if args.command == "build":
+        if args.top_k < 1:
+            parser.error("--top-k must be at least 1")
+        seconds = write_collaboration(conn, args.db, args.top_k, use_scipy=False if args.numpy else None)
+        print(f"✓ Collaboration graph ({load_meta(args.db)['backend']}) written to {sidecar_path(args.db)} "
+              f"and tables in {seconds:.2f}s")
+    elif args.command == "info":
+        meta = load_meta(args.db)
+        print(f"Graph {sidecar_path(args.db)} (built {meta['built_at']} with {meta['backend']}, "
+              f"{'STALE' if is_stale(conn, args.db) else 'fresh'})")
+        for name, info in meta["matrices"].items():
+            print(f"  {name}: {info['shape'][0]:,} x {info['shape'][1]:,}, {info['nnz']:,} entries")
+        features = load_features(args.db)
+        active = features["projects"] > 0
+        for name in FEATURES:
+            values = features[name][active] if active.any() else features[name]
+            print(f"  {name}: median {np.median(values):.3g}, max {values.max(initial=0):.3g} "
+                  f"(over {int(active.sum()):,} users with assigned work)")
+    else:
+        print(json.dumps(benchmark(conn, args.db, args.lookups), indent=2))
+    conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Convert a generated DB to the compact schema variant and benchmark both.
+
+The compact variant (schema_compact.sql) stores epoch-microsecond and day
+integers, 16-byte gids and enum codes, with views that keep the original TEXT
+shape. Fractional seconds survive the round trip; no unixepoch() (SQLite
+>= 3.38) is needed.
+
+Usage:
+    python src/storage/compact.py convert output/asana_simulation.sqlite output/asana_simulation.compact.sqlite
+    python src/storage/compact.py bench output/asana_simulation.sqlite output/asana_simulation.compact.sqlite
+"""
+import argparse
+import sqlite3
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+COMPACT_SCHEMA_SQL = BASE_DIR / "schema_compact.sql"
+
+# (lookup table, source table, source column)
+ENUMS = [
+    ("lk_role", "users", "role"),
+    ("lk_membership_role", "team_memberships", "role"),
+    ("lk_project_type", "projects", "project_type"),
+    ("lk_section_name", "sections", "name"),
+    ("lk_priority", "tasks", "priority"),
+    ("lk_field_type", "custom_field_defs", "field_type"),
+]
+
+def _epoch_us(column: str) -> str:
+    """SQL for an ISO timestamp column as INTEGER epoch microseconds, fraction included."""
+    return (f"(CAST(strftime('%s', {column}) AS INTEGER) * 1000000 + CASE WHEN substr({column}, 20, 1) = '.' "
+            f"THEN CAST(substr(substr({column}, 21) || '000000', 1, 6) AS INTEGER) ELSE 0 END)")
+
+
+def _epoch_days(column: str) -> str:
+    """SQL for an ISO date column as INTEGER days since 1970-01-01."""
+    return f"CAST(strftime('%s', {column}) AS INTEGER) / 86400"
+
+
+# Target table -> SELECT over the attached TEXT DB (alias `src`)
+CONVERSIONS = [
+    ("c_organizations", f"""
+        SELECT id, gid_blob(gid), name, domain, {_epoch_us('created_at')} FROM src.organizations"""),
+    ("c_teams", f"""
+        SELECT id, gid_blob(gid), organization_id, name, description, {_epoch_us('created_at')} FROM src.teams"""),
+    ("c_users", f"""
+        SELECT u.id, gid_blob(u.gid), u.organization_id, u.full_name, u.email, r.code,
+               {_epoch_us('u.created_at')}, u.is_active
+        FROM src.users u LEFT JOIN lk_role r ON r.name = u.role"""),
+    ("c_team_memberships", f"""
+        SELECT m.id, m.team_id, m.user_id, r.code, {_epoch_us('m.joined_at')}
+        FROM src.team_memberships m LEFT JOIN lk_membership_role r ON r.name = m.role"""),
+    ("c_projects", f"""
+        SELECT p.id, gid_blob(p.gid), p.team_id, p.organization_id, p.name, p.description,
+               {_epoch_us('p.created_at')}, p.is_archived, pt.code
+        FROM src.projects p LEFT JOIN lk_project_type pt ON pt.name = p.project_type"""),
+    ("c_sections", """
+        SELECT s.id, gid_blob(s.gid), s.project_id, n.code, s.position
+        FROM src.sections s JOIN lk_section_name n ON n.name = s.name"""),
+    ("c_tasks", f"""
+        SELECT t.id, gid_blob(t.gid), t.project_id, t.section_id, t.name, t.description, t.assignee_id,
+               {_epoch_us('t.created_at')}, {_epoch_days('t.due_date')}, t.completed,
+               {_epoch_us('t.completed_at')}, pr.code, t.effort
+        FROM src.tasks t LEFT JOIN lk_priority pr ON pr.name = t.priority"""),
+    ("c_subtasks", f"""
+        SELECT id, gid_blob(gid), parent_task_id, name, assignee_id, {_epoch_us('created_at')},
+               {_epoch_days('due_date')}, completed, {_epoch_us('completed_at')}
+        FROM src.subtasks"""),
+    ("c_comments", f"""
+        SELECT id, gid_blob(gid), task_id, author_id, text, {_epoch_us('created_at')} FROM src.comments"""),
+    ("c_custom_field_defs", """
+        SELECT d.id, gid_blob(d.gid), d.project_id, d.name, ft.code, d.options
+        FROM src.custom_field_defs d JOIN lk_field_type ft ON ft.name = d.field_type"""),
+    ("custom_field_values", """
+        SELECT id, custom_field_def_id, task_id, value FROM src.custom_field_values"""),
+    ("c_tags", """
+        SELECT id, gid_blob(gid), name, color FROM src.tags"""),
+    ("task_tags", """
+        SELECT id, task_id, tag_id FROM src.task_tags"""),
+    ("c_attachments", f"""
+        SELECT id, gid_blob(gid), task_id, filename, url, uploaded_by, {_epoch_us('created_at')}
+        FROM src.attachments"""),
+    ("generation_meta", """
+        SELECT key, value FROM src.generation_meta"""),
+]
+
+# name -> (SQL for schema.sql / compatibility views, SQL against the encoded c_* tables)
+BENCH_QUERIES = {
+    "overdue_open_tasks": (
+        "SELECT COUNT(*) FROM tasks WHERE due_date < date('now') AND completed = 0",
+        "SELECT COUNT(*) FROM c_tasks WHERE due_date < strftime('%s', 'now') / 86400 AND completed = 0",
+    ),
+    "completion_by_project_type": (
+        """SELECT p.project_type, COUNT(t.id), SUM(t.completed)
+           FROM tasks t JOIN projects p ON t.project_id = p.id GROUP BY p.project_type""",
+        """SELECT p.project_type_code, COUNT(t.id), SUM(t.completed)
+           FROM c_tasks t JOIN c_projects p ON t.project_id = p.id GROUP BY p.project_type_code""",
+    ),
+    "created_by_weekday": (
+        "SELECT strftime('%w', created_at) AS dow, COUNT(*) FROM tasks GROUP BY dow",
+        "SELECT (created_at / 86400000000 + 4) % 7 AS dow, COUNT(*) FROM c_tasks GROUP BY dow",
+    ),
+    "tasks_by_priority": (
+        "SELECT priority, COUNT(*) FROM tasks GROUP BY priority",
+        "SELECT priority_code, COUNT(*) FROM c_tasks GROUP BY priority_code",
+    ),
+    "due_in_date_range": (
+        "SELECT COUNT(*) FROM tasks WHERE due_date BETWEEN '2025-01-01' AND '2025-01-31'",
+        """SELECT COUNT(*) FROM c_tasks
+           WHERE due_date BETWEEN strftime('%s', '2025-01-01') / 86400 AND strftime('%s', '2025-01-31') / 86400""",
+    ),
+    "comments_last_30_days": (
+        "SELECT COUNT(*) FROM comments WHERE created_at >= datetime('now', '-30 days')",
+        "SELECT COUNT(*) FROM c_comments WHERE created_at >= strftime('%s', 'now', '-30 days') * 1000000",
+    ),
+    "lookup_task_by_gid": (
+        "SELECT id FROM tasks WHERE gid = (SELECT gid FROM tasks WHERE id = 1000)",
+        "SELECT id FROM c_tasks WHERE gid = (SELECT gid FROM c_tasks WHERE id = 1000)",
+    ),
+}
+
+
+def _gid_blob(gid):
+    return uuid.UUID(gid).bytes if gid else None
+
+
+def compact_database(src_path, dst_path) -> float:
+    """Write the compact variant of ``src_path`` to ``dst_path``; returns seconds taken."""
+    src_path, dst_path = Path(src_path), Path(dst_path)
+    if not src_path.exists():
+        raise FileNotFoundError(f"DB not found at {src_path}")
+    if dst_path.exists():
+        dst_path.unlink()
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(str(dst_path))
+    conn.create_function("gid_blob", 1, _gid_blob, deterministic=True)
+    conn.executescript(COMPACT_SCHEMA_SQL.read_text())
+    conn.execute("ATTACH DATABASE ? AS src", (str(src_path),))
+
+    # Values not in the seeded lookup tables get fresh codes
+    for lookup, table, column in ENUMS:
+        conn.execute(
+            f"INSERT OR IGNORE INTO {lookup} (name) "
+            f"SELECT DISTINCT {column} FROM src.{table} WHERE {column} IS NOT NULL"
+        )
+    src_tables = {r[0] for r in conn.execute("SELECT name FROM src.sqlite_master WHERE type = 'table'")}
+    for target, select in CONVERSIONS:
+        if target == "generation_meta" and target not in src_tables:
+            continue
+        conn.execute(f"INSERT INTO {target} {select}")
+    conn.commit()
+    conn.execute("DETACH DATABASE src")
+    conn.execute("VACUUM")
+    conn.close()
+    return time.perf_counter() - started
+
+
+def _time_query(conn: sqlite3.Connection, sql: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        conn.execute(sql).fetchall()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def benchmark(text_db, compact_db, repeat: int = 5) -> dict:
+    """DB size and median query latency (ms) for the TEXT and compact variants.
+
+    Each query runs against the TEXT DB, against the compact DB through the
+    compatibility views, and natively against the encoded c_* tables.
+    """
+    results = {
+        "size_bytes": {"text": Path(text_db).stat().st_size, "compact": Path(compact_db).stat().st_size},
+        "queries": {},
+    }
+    text_conn = sqlite3.connect(str(text_db))
+    compact_conn = sqlite3.connect(str(compact_db))
+    for name, (text_sql, native_sql) in BENCH_QUERIES.items():
+        results["queries"][name] = {
+            "text_ms": round(_time_query(text_conn, text_sql, repeat), 3),
+            "compact_views_ms": round(_time_query(compact_conn, text_sql, repeat), 3),
+            "compact_native_ms": round(_time_query(compact_conn, native_sql, repeat), 3),
+        }
+    text_conn.close()
+    compact_conn.close()
+    return results
+
+
+def print_benchmark(results: dict):
+    text_size = results["size_bytes"]["text"]
+    compact_size = results["size_bytes"]["compact"]
+    print("=" * 60)
+    print("COMPACT SCHEMA BENCHMARK")
+    print("=" * 60)
+    print(f"  TEXT DB:    {text_size / 1024 / 1024:.2f} MB")
+    print(f"  Compact DB: {compact_size / 1024 / 1024:.2f} MB ({compact_size / text_size * 100:.1f}%)")
+    print(f"\n  {'query':<28}{'text':>10}{'views':>10}{'native':>10}  (ms)")
+    for name, r in results["queries"].items():
+        print(f"  {name:<28}{r['text_ms']:>10.2f}{r['compact_views_ms']:>10.2f}{r['compact_native_ms']:>10.2f}")
+    print("=" * 60)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compact schema conversion and benchmark.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="Write the compact variant of a generated DB")
+    conv.add_argument("src")
+    conv.add_argument("dst")
+    bench = sub.add_parser("bench", help="Compare size and query latency of both variants")
+    bench.add_argument("text_db")
+    bench.add_argument("compact_db")
+    bench.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        seconds = compact_database(args.src, args.dst)
+        print(f"✓ Compact DB written to {args.dst} in {seconds:.2f}s")
+    else:
+        print_benchmark(benchmark(args.text_db, args.compact_db, args.repeat))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
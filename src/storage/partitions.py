@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""Partitioned layout: team-scoped tables split into per-team-group DB files around a shared core file.
+
+A generated DB is split into a directory next to it, ``<db stem>.parts/``:
+
+- ``core.sqlite``: organizations, users, teams, tags and generation_meta,
+  which every worker reads and none writes at run time;
+- ``part-NNN.sqlite``: all team-scoped rows of one group of teams, meaning
+  memberships, projects and everything that hangs off them. Teams are dealt
+  out largest first by task count, so the files come out about the same
+  size. Rows whose routing column is NULL go to the first partition;
+- ``routes/``: the partition of every team, project and task id (-1 for
+  none), plus user -> partitions as CSR, all memory-mappable ``.npy``;
+- ``layout.json``: the team groups, row counts per table and file, and a
+  fingerprint of the source DB.
+
+Ids are kept, so a row has the same id in its partition as in the source.
+Partitions keep their foreign keys among themselves. References into core
+tables are dropped from their DDL because SQLite cannot enforce them across
+files; the validator checks them instead. src/access/router.py opens a
+partition with core ATTACHed, and it then answers the same unqualified SQL
+as the single-file DB for its teams. A worker that owns some teams writes
+only to their partitions and never waits on another team's write lock.
+Partition files use WAL, so readers do not block the writer either. Each
+file is written by its own thread.
+
+Usage:
+    python src/storage/partitions.py split output/asana_simulation.sqlite --partitions 8
+    python src/storage/partitions.py info output/asana_simulation.parts
+"""
+import argparse
+import heapq
+import json
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR))
+
+from src.storage import sidecar_dir
+from src.storage.adjacency import fingerprint
+from src.utils.csr import CSR
+
+SCHEMA_SQL = BASE_DIR / "schema.sql"
+CORE = "core.sqlite"
+LAYOUT = "layout.json"
+ROUTES = "routes"
+CORE_TABLES = ("organizations", "users", "teams", "tags", "generation_meta")
+# Team-scoped table -> (routing column, parent table it points into, or None for team ids);
+# copied in this order, so every parent is in the partition before its children
+TEAM_SCOPED = {
+    "team_memberships": ("team_id", None),
+    "projects": ("team_id", None),
+    "sections": ("project_id", "projects"),
+    "custom_field_defs": ("project_id", "projects"),
+    "tasks": ("project_id", "projects"),
+    "subtasks": ("parent_task_id", "tasks"),
+    "comments": ("task_id", "tasks"),
+    "task_tags": ("task_id", "tasks"),
+    "attachments": ("task_id", "tasks"),
+    "custom_field_values": ("task_id", "tasks"),
+}
+_CORE_FOREIGN_KEY = re.compile(
+    r",\s*FOREIGN KEY\s*\([^)]*\)\s*REFERENCES\s+(?:" + "|".join(CORE_TABLES) + r")\s*\([^)]*\)"
+    r"(?:\s+ON\s+(?:DELETE|UPDATE)\s+(?:SET\s+NULL|SET\s+DEFAULT|CASCADE|RESTRICT|NO\s+ACTION))*",
+    re.IGNORECASE)
+
+
+def layout_path(db_path) -> Path:
+    return sidecar_dir(db_path, "parts")
+
+
+def partition_file(index: int) -> str:
+    return f"part-{index:03d}.sqlite"
+
+
+def schema_ddl(tables, strip_core_references: bool = False) -> tuple:
+    """(CREATE TABLE statements, CREATE INDEX statements) from schema.sql for ``tables``."""
+    mem = sqlite3.connect(":memory:")
+    mem.executescript(SCHEMA_SQL.read_text())
+    known = {name for (name,) in mem.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    unplaced = known - set(CORE_TABLES) - set(TEAM_SCOPED)
+    if unplaced:
+        raise RuntimeError(f"schema.sql tables with no place in the partitioned layout: {sorted(unplaced)}")
+    tables_sql, index_sql = [], []
+    for table in tables:
+        (sql,) = mem.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+        tables_sql.append(_CORE_FOREIGN_KEY.sub("", sql) if strip_core_references else sql)
+        index_sql += [sql for (sql,) in mem.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL ORDER BY name",
+            (table,))]
+    mem.close()
+    return tables_sql, index_sql
+
+
+def assign_teams(conn: sqlite3.Connection, partitions: int) -> list:
+    """Team ids per partition: heaviest team (by tasks) first, each to the lightest partition so far."""
+    weights = conn.execute("""
+        SELECT tm.id, COUNT(t.id) FROM teams tm
+        LEFT JOIN projects p ON p.team_id = tm.id
+        LEFT JOIN tasks t ON t.project_id = p.id
+        GROUP BY tm.id ORDER BY COUNT(t.id) DESC, tm.id""").fetchall()
+    partitions = max(1, min(partitions, len(weights)))
+    heap = [(0, i) for i in range(partitions)]
+    groups = [[] for _ in range(partitions)]
+    for team_id, tasks in weights:
+        load, i = heapq.heappop(heap)
+        groups[i].append(team_id)
+        heapq.heappush(heap, (load + tasks + 1, i))
+    return [sorted(group) for group in groups]
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> str:
+    return ", ".join(r[1] for r in conn.execute(f"PRAGMA main.table_info({table})"))
+
+
+def _copy(source, path: Path, tables: dict, ddl: tuple, team_ids: list = None) -> dict:
+    """Write ``path`` with ``tables`` ({table: WHERE clause}) copied from ``source``; returns row counts."""
+    conn = sqlite3.connect(str(path))
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    tables_sql, index_sql = ddl
+    for sql in tables_sql:
+        conn.execute(sql)
+    conn.execute("ATTACH DATABASE ? AS src", (str(source),))
+    if team_ids is not None:
+        conn.execute("CREATE TEMP TABLE partition_teams (id INTEGER PRIMARY KEY)")
+        conn.executemany("INSERT INTO partition_teams VALUES (?)", [(t,) for t in team_ids])
+    counts = {}
+    with conn:
+        for table, where in tables.items():
+            columns = _columns(conn, table)
+            # Scanning the source in rowid order keeps every insert an append
+            cur = conn.execute(f"INSERT INTO main.{table} ({columns}) SELECT {columns} FROM src.{table} s "
+                               f"{where} ORDER BY s.rowid")
+            counts[table] = cur.rowcount
+    for sql in index_sql:
+        conn.execute(sql)
+    conn.commit()
+    conn.execute("DETACH DATABASE src")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.close()
+    return counts
+
+
+def _partition_filters(first: bool) -> dict:
+    filters = {}
+    for table, (column, parent) in TEAM_SCOPED.items():
+        keys = "SELECT id FROM temp.partition_teams" if parent is None else f"SELECT id FROM main.{parent}"
+        orphans = f" OR s.{column} IS NULL" if first else ""
+        filters[table] = f"WHERE s.{column} IN ({keys}){orphans}"
+    return filters
+
+
+def _routes(conn: sqlite3.Connection, groups: list) -> dict:
+    """Partition per team/project/task id (-1 for none) and user -> partitions CSR."""
+    def by_id(pairs: list, size: int) -> np.ndarray:
+        route = np.full(size, -1, dtype=np.int16)
+        if pairs:
+            ids, parts = np.array(pairs, dtype=np.int64).T
+            route[ids] = parts
+        return route
+
+    def size(table: str) -> int:
+        return conn.execute(f"SELECT IFNULL(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+
+    team = by_id([(t, i) for i, group in enumerate(groups) for t in group], size("teams"))
+    projects = conn.execute("SELECT id, team_id FROM projects").fetchall()
+    project = by_id([(p, team[t] if t is not None else 0) for p, t in projects], size("projects"))
+    tasks = conn.execute("SELECT id, project_id FROM tasks").fetchall()
+    task = by_id([(k, project[p] if p is not None else 0) for k, p in tasks], size("tasks"))
+
+    # A user's partitions: their teams' plus wherever they are assigned work
+    pairs = {(u, int(team[t])) for u, t in conn.execute("SELECT user_id, team_id FROM team_memberships")}
+    pairs |= {(u, int(task[k])) for u, k in conn.execute(
+        "SELECT assignee_id, id FROM tasks WHERE assignee_id IS NOT NULL "
+        "UNION SELECT assignee_id, parent_task_id FROM subtasks WHERE assignee_id IS NOT NULL")}
+    pairs = sorted(pairs)
+    user = CSR.from_rows([u for u, _ in pairs], [p for _, p in pairs], n_rows=size("users"))
+    return {"team": team, "project": project, "task": task, "user.offsets": user.offsets,
+            "user.values": user.values}
+
+
+def split(db_path, partitions: int, jobs: int = None) -> dict:
+    """Write ``<db stem>.parts/`` for ``db_path``, replacing any previous layout whole; returns a report."""
+    db_path = Path(db_path)
+    if not db_path.exists():
+        raise FileNotFoundError(f"DB not found at {db_path}")
+    if partitions < 1:
+        raise ValueError("partitions must be at least 1")
+    started = time.perf_counter()
+    conn = sqlite3.connect(str(db_path))
+    groups = assign_teams(conn, partitions)
+    target = layout_path(db_path)
+    tmp = target.with_name(target.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    (tmp / ROUTES).mkdir(parents=True)
+
+    core_ddl = schema_ddl(CORE_TABLES)
+    part_ddl = schema_ddl(TEAM_SCOPED, strip_core_references=True)
+    jobs = jobs or min(len(groups) + 1, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        core = pool.submit(_copy, db_path, tmp / CORE, {t: "" for t in CORE_TABLES}, core_ddl)
+        parts = [pool.submit(_copy, db_path, tmp / partition_file(i), _partition_filters(i == 0), part_ddl, group)
+                 for i, group in enumerate(groups)]
+        core_rows = core.result()
+        part_rows = [p.result() for p in parts]
+    for name, array in _routes(conn, groups).items():
+        np.save(tmp / ROUTES / f"{name}.npy", array)
+
+    totals = {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in (*CORE_TABLES, *TEAM_SCOPED)}
+    layout = {
+        "built_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "source": db_path.name,
+        "fingerprint": fingerprint(conn, (*CORE_TABLES, *TEAM_SCOPED)),
+        "core": {"file": CORE, "rows": core_rows},
+        "partitions": [{"file": partition_file(i), "teams": group, "rows": rows}
+                       for i, (group, rows) in enumerate(zip(groups, part_rows))],
+        "rows": totals,
+    }
+    (tmp / LAYOUT).write_text(json.dumps(layout, indent=2) + "\n")
+    conn.close()
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    return {"layout": str(target), "partitions": len(groups), "jobs": jobs,
+            "seconds": round(time.perf_counter() - started, 3)}
+
+
+def load_layout(layout_dir) -> dict:
+    path = Path(layout_dir) / LAYOUT
+    if not path.exists():
+        raise FileNotFoundError(f"No partitioned layout at {layout_dir} (split a DB with src/storage/partitions.py)")
+    return json.loads(path.read_text())
+
+
+def load_routes(layout_dir, mmap_mode: str = "r") -> dict:
+    """``{"team"|"project"|"task": partition per id}`` plus ``"user"``: a CSR of each user's partitions."""
+    directory = Path(layout_dir) / ROUTES
+
+    def array(name):
+        return np.asarray(np.load(directory / f"{name}.npy", mmap_mode=mmap_mode))
+
+    routes = {name: array(name) for name in ("team", "project", "task")}
+    routes["user"] = CSR(array("user.offsets"), array("user.values"))
+    return routes
+
+
+def is_stale(conn: sqlite3.Connection, db_path) -> bool:
+    """True when the source DB changed since it was split."""
+    return load_layout(layout_path(db_path))["fingerprint"] != fingerprint(conn, (*CORE_TABLES, *TEAM_SCOPED))
+
+
+def check_rows(layout: dict) -> list:
+    """Tables whose rows across core and partitions differ from the source's: (table, source, layout)."""
+    counted = dict(layout["core"]["rows"])
+    for part in layout["partitions"]:
+        for table, n in part["rows"].items():
+            counted[table] = counted.get(table, 0) + n
+    return [(t, n, counted.get(t, 0)) for t, n in layout["rows"].items() if counted.get(t, 0) != n]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split a generated DB into team partitions around a shared core.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sp = sub.add_parser("split", help="Write <db stem>.parts/ next to the DB")
+    sp.add_argument("db")
+    sp.add_argument("--partitions", type=int, default=int(os.getenv("PARTITIONS") or "0") or 8,
+                    help="Number of partition files (env: PARTITIONS; 8 when unset or 0)")
+    sp.add_argument("--jobs", type=int, help="Files written concurrently (default: CPU count)")
+    info = sub.add_parser("info", help="Show a layout's partitions and row counts")
+    info.add_argument("layout")
+    args = parser.parse_args(argv)
+
+    if args.command == "split":
+        report = split(args.db, args.partitions, args.jobs)
+        print(f"✓ Split into {report['partitions']} partitions at {report['layout']} in {report['seconds']:.2f}s")
+        return
+    layout = load_layout(args.layout)
+    print(f"Layout {args.layout} (from {layout['source']}, built {layout['built_at']})")
+    print(f"  core: {sum(layout['core']['rows'].values()):,} rows")
+    for part in layout["partitions"]:
+        print(f"  {part['file']}: {len(part['teams'])} teams, {part['rows']['projects']:,} projects, "
+              f"{part['rows']['tasks']:,} tasks, {sum(part['rows'].values()):,} rows")
+    for table, expected, actual in check_rows(layout):
+        print(f"  ✗ {table}: {expected:,} rows in the source, {actual:,} in the layout")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
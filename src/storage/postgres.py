@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""Bulk export of a generated DB to PostgreSQL with COPY.
+
+schema.sql is translated table by table. The translation reads SQLite's own
+parse of the schema (PRAGMA table_info / index_list / foreign_key_list), not
+the text:
+
+- ids and ``*_id`` columns become BIGINT, other INTEGERs INTEGER;
+- ``*_at`` columns become TIMESTAMP and ``*_date`` columns DATE;
+- integer primary keys are identity columns, so later inserts get fresh ids.
+
+Tables are created bare and streamed in parallel, one COPY per table, in
+CSV or binary format. Constraints come after the load: primary keys, unique
+indexes and the schema's indexes first, then the foreign keys, which then
+never see a child row before its parent. Identity sequences are moved past
+the loaded ids and every table is analyzed.
+
+CSV rows are formatted by SQLite itself, with NULL as an unquoted empty field
+and every string quoted. Binary rows are encoded by psycopg, which needs
+timestamps as Python datetimes. psycopg 3 is optional
+(``pip install "psycopg[binary]"``) and only this module needs it.
+
+``scratch`` starts a throwaway cluster in a temporary directory (initdb and
+pg_ctl from --pg-bin, PG_BIN or PATH; not as root), exports and verifies in
+each format with --replace, and removes the cluster again.
+
+Usage:
+    python src/storage/postgres.py ddl
+    python src/storage/postgres.py export output/asana_simulation.sqlite --dsn postgresql://localhost/asana --replace
+    python src/storage/postgres.py export output/asana_simulation.sqlite --dsn ... --format binary --jobs 4
+    python src/storage/postgres.py scratch output/asana_simulation.sqlite --pg-bin /usr/lib/postgresql/16/bin
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import NamedTuple
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+SCHEMA_SQL = BASE_DIR / "schema.sql"
+FORMATS = ("csv", "binary")
+BATCH_ROWS = 5000
+
+
+class Column(NamedTuple):
+    name: str
+    pg_type: str
+    not_null: bool
+    default: str
+
+
+class Table(NamedTuple):
+    name: str
+    columns: list
+    primary_key: list
+    identity: bool
+    unique: list        # column lists
+    indexes: list       # CREATE INDEX statements
+    foreign_keys: list  # (columns, parent table, parent columns, on delete)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _pg_type(name: str, declared: str) -> str:
+    declared = declared.upper()
+    if name.endswith("_at"):
+        return "TIMESTAMP"
+    if name.endswith("_date"):
+        return "DATE"
+    if "INT" in declared:
+        return "BIGINT" if name == "id" or name.endswith("_id") else "INTEGER"
+    if "REAL" in declared or "FLOA" in declared or "DOUB" in declared:
+        return "DOUBLE PRECISION"
+    if "BLOB" in declared:
+        return "BYTEA"
+    return "TEXT"
+
+
+def read_schema(schema_sql=SCHEMA_SQL) -> list:
+    """The tables of ``schema_sql``, parents before children."""
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(Path(schema_sql).read_text())
+    names = [r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY rowid")]
+    tables = {}
+    for name in names:
+        info = conn.execute(f"PRAGMA table_info({_quote(name)})").fetchall()
+        columns = [Column(col, _pg_type(col, declared or ""), bool(notnull), default)
+                   for _, col, declared, notnull, default, _ in info]
+        primary_key = [col for _, col, *_, pk in sorted(info, key=lambda r: r[5]) if pk]
+        declared = {col: (decl or "").upper() for _, col, decl, *_ in info}
+        # INTEGER PRIMARY KEY is the rowid alias, which assigns ids on insert; identity columns do the same
+        identity = len(primary_key) == 1 and declared[primary_key[0]] == "INTEGER"
+        unique, indexes = [], []
+        for _, index, _, origin, _ in conn.execute(f"PRAGMA index_list({_quote(name)})"):
+            if origin == "u":
+                unique.append([r[2] for r in conn.execute(f"PRAGMA index_info({_quote(index)})")])
+            elif origin == "c":
+                sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (index,)).fetchone()[0]
+                indexes.append(sql)
+        foreign_keys = {}
+        for fk_id, _, parent, child_col, parent_col, _, on_delete, _ in conn.execute(
+                f"PRAGMA foreign_key_list({_quote(name)})"):
+            cols, parent_cols = foreign_keys.setdefault(fk_id, ([], [], parent, on_delete))[:2]
+            cols.append(child_col)
+            parent_cols.append(parent_col)
+        tables[name] = Table(name, columns, primary_key, identity, unique, indexes,
+                             [(cols, parent, parent_cols, on_delete)
+                              for cols, parent_cols, parent, on_delete in foreign_keys.values()])
+    conn.close()
+    return _parents_first(tables)
+
+
+def _parents_first(tables: dict) -> list:
+    ordered, seen = [], set()
+
+    def visit(name, path=()):
+        if name in seen:
+            return
+        if name in path:
+            raise ValueError(f"Foreign key cycle through {name}")
+        for _, parent, _, _ in tables[name].foreign_keys:
+            if parent != name and parent in tables:
+                visit(parent, path + (name,))
+        seen.add(name)
+        ordered.append(tables[name])
+
+    for name in tables:
+        visit(name)
+    return ordered
+
+
+def create_sql(table: Table, schema: str) -> str:
+    """CREATE TABLE without constraints other than NOT NULL and defaults."""
+    columns = []
+    for col in table.columns:
+        sql = f"{_quote(col.name)} {col.pg_type}"
+        if table.identity and col.name == table.primary_key[0]:
+            sql += " GENERATED BY DEFAULT AS IDENTITY"
+        elif col.default is not None:
+            sql += f" DEFAULT {col.default}"
+        if col.not_null or col.name in table.primary_key:
+            sql += " NOT NULL"
+        columns.append(sql)
+    return f"CREATE TABLE {_quote(schema)}.{_quote(table.name)} (\n    " + ",\n    ".join(columns) + "\n)"
+
+
+def constraint_sql(table: Table, schema: str) -> list:
+    """Primary key, unique constraints and indexes of one table, built after its load."""
+    target = f"{_quote(schema)}.{_quote(table.name)}"
+    statements = []
+    if table.primary_key:
+        statements.append(f"ALTER TABLE {target} ADD PRIMARY KEY ({', '.join(map(_quote, table.primary_key))})")
+    for i, cols in enumerate(table.unique, 1):
+        statements.append(f"ALTER TABLE {target} ADD CONSTRAINT {_quote(f'{table.name}_unique_{i}')} "
+                          f"UNIQUE ({', '.join(map(_quote, cols))})")
+    for sql in table.indexes:
+        # SQLite and PostgreSQL share CREATE [UNIQUE] INDEX [IF NOT EXISTS] name ON table(cols) [WHERE ...];
+        # only the table needs its schema
+        head, rest = sql.split(" ON ", 1)
+        statements.append(f"{head} ON {_quote(schema)}.{rest.strip()}")
+    return statements
+
+
+def foreign_key_sql(table: Table, schema: str) -> list:
+    statements = []
+    for cols, parent, parent_cols, on_delete in table.foreign_keys:
+        action = "" if on_delete in (None, "NO ACTION") else f" ON DELETE {on_delete}"
+        statements.append(
+            f"ALTER TABLE {_quote(schema)}.{_quote(table.name)} ADD FOREIGN KEY ({', '.join(map(_quote, cols))}) "
+            f"REFERENCES {_quote(schema)}.{_quote(parent)} ({', '.join(map(_quote, parent_cols))}){action}")
+    return statements
+
+
+def ddl(tables: list, schema: str = "public") -> str:
+    """The whole translated schema, in the order the export runs it."""
+    statements = [create_sql(t, schema) for t in tables]
+    statements += [s for t in tables for s in constraint_sql(t, schema)]
+    statements += [s for t in tables for s in foreign_key_sql(t, schema)]
+    return ";\n\n".join(statements) + ";\n"
+
+
+# --- streaming ---------------------------------------------------------------
+
+def _psycopg():
+    try:
+        import psycopg
+    except ImportError:
+        raise RuntimeError('PostgreSQL export needs psycopg 3: pip install "psycopg[binary]"') from None
+    return psycopg
+
+
+def _csv_select(table: Table) -> str:
+    # One CSV line per row, built by SQLite: NULL is an unquoted empty field, strings are always
+    # quoted (so "" stays an empty string), numbers go through as they are
+    fields = []
+    for col in table.columns:
+        ref = _quote(col.name)
+        if col.pg_type in ("BIGINT", "INTEGER", "DOUBLE PRECISION"):
+            fields.append(f"IFNULL({ref}, '')")
+        else:
+            fields.append(f"""IFNULL('"' || replace({ref}, '"', '""') || '"', '')""")
+    line = " || ',' || ".join(fields)
+    return f"SELECT {line} || char(10) FROM {_quote(table.name)} ORDER BY rowid"
+
+
+_BINARY_PARSERS = {"TIMESTAMP": datetime.fromisoformat, "DATE": date.fromisoformat}
+
+
+def copy_table(sqlite_path, dsn: str, table: Table, schema: str, fmt: str = "csv") -> dict:
+    """Stream one table from SQLite into PostgreSQL with COPY; returns rows and seconds."""
+    psycopg = _psycopg()
+    started = time.perf_counter()
+    source = sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True)
+    columns = ", ".join(_quote(c.name) for c in table.columns)
+    target = f"{_quote(schema)}.{_quote(table.name)}"
+    rows = 0
+    with psycopg.connect(dsn) as conn, conn.cursor() as cur:
+        if fmt == "csv":
+            with cur.copy(f"COPY {target} ({columns}) FROM STDIN (FORMAT CSV)") as copy:
+                cursor = source.execute(_csv_select(table))
+                while batch := cursor.fetchmany(BATCH_ROWS):
+                    copy.write("".join(line for line, in batch))
+                    rows += len(batch)
+        else:
+            parsers = [_BINARY_PARSERS.get(c.pg_type) for c in table.columns]
+            convert = [(i, parse) for i, parse in enumerate(parsers) if parse]
+            with cur.copy(f"COPY {target} ({columns}) FROM STDIN (FORMAT BINARY)") as copy:
+                copy.set_types([c.pg_type.lower() for c in table.columns])
+                cursor = source.execute(f"SELECT {columns} FROM {_quote(table.name)} ORDER BY rowid")
+                while batch := cursor.fetchmany(BATCH_ROWS):
+                    for row in batch:
+                        if convert:
+                            row = list(row)
+                            for i, parse in convert:
+                                if row[i] is not None:
+                                    row[i] = parse(row[i])
+                        copy.write_row(row)
+                    rows += len(batch)
+    source.close()
+    seconds = time.perf_counter() - started
+    return {"rows": rows, "seconds": round(seconds, 3), "rows_per_s": round(rows / seconds) if seconds else 0}
+
+
+def _run_all(dsn: str, statements: list):
+    psycopg = _psycopg()
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        for sql in statements:
+            conn.execute(sql)
+
+
+def export(sqlite_path, dsn: str, schema: str = "public", fmt: str = "csv", jobs: int = None,
+           replace: bool = False, tables: list = None) -> dict:
+    """Create the schema in ``dsn``, COPY every table in parallel, then build constraints; returns a report."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+    sqlite_path = Path(sqlite_path)
+    if not sqlite_path.exists():
+        raise FileNotFoundError(f"DB not found at {sqlite_path}")
+    tables = tables or read_schema()
+    source = sqlite3.connect(str(sqlite_path))
+    present = {r[0] for r in source.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    # Largest first, so the longest COPY starts straight away
+    sizes = {t.name: source.execute(f"SELECT COUNT(*) FROM {_quote(t.name)}").fetchone()[0]
+             for t in tables if t.name in present}
+    source.close()
+    tables = [t for t in tables if t.name in sizes]
+    jobs = jobs or min(len(tables), os.cpu_count() or 1)
+
+    if not replace:
+        with _psycopg().connect(dsn) as conn:
+            existing = [t.name for t in tables if conn.execute(
+                "SELECT to_regclass(%s)", (f"{_quote(schema)}.{_quote(t.name)}",)).fetchone()[0]]
+        if existing:
+            raise RuntimeError(f"Tables already exist in schema {schema}: {', '.join(existing)}; "
+                               "replace them with --replace (drops them with CASCADE)")
+
+    started = time.perf_counter()
+    setup = [f"CREATE SCHEMA IF NOT EXISTS {_quote(schema)}"]
+    if replace:
+        setup += [f"DROP TABLE IF EXISTS {_quote(schema)}.{_quote(t.name)} CASCADE" for t in reversed(tables)]
+    _run_all(dsn, setup + [create_sql(t, schema) for t in tables])
+
+    report = {"format": fmt, "jobs": jobs, "tables": {}}
+    load_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {t.name: pool.submit(copy_table, sqlite_path, dsn, t, schema, fmt)
+                   for t in sorted(tables, key=lambda t: -sizes[t.name])}
+        for t in tables:
+            report["tables"][t.name] = futures[t.name].result()
+    report["load_s"] = round(time.perf_counter() - load_started, 3)
+
+    # Keys and indexes per table in parallel; foreign keys need every parent's key in place first
+    index_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        list(pool.map(lambda t: _run_all(dsn, constraint_sql(t, schema)), tables))
+    report["indexes_s"] = round(time.perf_counter() - index_started, 3)
+    fk_started = time.perf_counter()
+    finish = [s for t in tables for s in foreign_key_sql(t, schema)]
+    for t in tables:
+        if t.identity:
+            target = f"{_quote(schema)}.{_quote(t.name)}"
+            finish.append(f"SELECT setval(pg_get_serial_sequence('{target}', '{t.primary_key[0]}'), "
+                          f"COALESCE(MAX({_quote(t.primary_key[0])}), 0) + 1, false) FROM {target}")
+    finish += [f"ANALYZE {_quote(schema)}.{_quote(t.name)}" for t in tables]
+    _run_all(dsn, finish)
+    report["foreign_keys_s"] = round(time.perf_counter() - fk_started, 3)
+
+    rows = sum(t["rows"] for t in report["tables"].values())
+    report["rows"] = rows
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    report["rows_per_s"] = round(rows / report["seconds"]) if report["seconds"] else 0
+    return report
+
+
+def verify(sqlite_path, dsn: str, schema: str = "public") -> list:
+    """Tables whose row count differs between the SQLite DB and PostgreSQL."""
+    psycopg = _psycopg()
+    source = sqlite3.connect(str(sqlite_path))
+    mismatches = []
+    with psycopg.connect(dsn) as conn:
+        for table in read_schema():
+            expected = source.execute(f"SELECT COUNT(*) FROM {_quote(table.name)}").fetchone()[0]
+            actual = conn.execute(f"SELECT COUNT(*) FROM {_quote(schema)}.{_quote(table.name)}").fetchone()[0]
+            if expected != actual:
+                mismatches.append((table.name, expected, actual))
+    source.close()
+    return mismatches
+
+
+@contextmanager
+def scratch_cluster(pg_bin: str = None):
+    """A throwaway PostgreSQL cluster on a Unix socket in a temporary directory; yields its DSN."""
+    initdb = shutil.which("initdb", path=pg_bin)
+    pg_ctl = shutil.which("pg_ctl", path=pg_bin)
+    if not initdb or not pg_ctl:
+        raise RuntimeError("initdb and pg_ctl not found; pass --pg-bin (or PG_BIN) with PostgreSQL's bin directory")
+    with tempfile.TemporaryDirectory(prefix="pg") as tmp:
+        data = Path(tmp) / "data"
+        subprocess.run([initdb, "-D", str(data), "-U", "postgres", "-A", "trust", "-E", "UTF8", "--no-sync"],
+                       check=True, capture_output=True)
+        # No TCP listener; the socket lives in the temporary directory, so the port never clashes
+        subprocess.run([pg_ctl, "-D", str(data), "-l", str(Path(tmp) / "server.log"), "-w", "start",
+                        "-o", f"-k {tmp} -p 5432 -c listen_addresses='' -c fsync=off"],
+                       check=True, capture_output=True)
+        try:
+            yield f"host={tmp} port=5432 user=postgres dbname=postgres"
+        finally:
+            subprocess.run([pg_ctl, "-D", str(data), "-m", "immediate", "stop"], capture_output=True)
+
+
+def print_report(report: dict):
+    print(f"  {'table':<22} {'rows':>10} {'seconds':>9} {'rows/s':>10}")
+    for name, stats in report["tables"].items():
+        print(f"  {name:<22} {stats['rows']:>10,} {stats['seconds']:>9.3f} {stats['rows_per_s']:>10,}")
+    print(f"  load {report['load_s']:.2f}s ({report['jobs']} jobs, {report['format']}), "
+          f"keys + indexes {report['indexes_s']:.2f}s, foreign keys + analyze {report['foreign_keys_s']:.2f}s")
+    print(f"✓ Exported {report['rows']:,} rows in {report['seconds']:.2f}s ({report['rows_per_s']:,} rows/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a generated DB to PostgreSQL with COPY.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("ddl", help="Print the PostgreSQL translation of schema.sql")
+    show.add_argument("--schema", default="public")
+    exp = sub.add_parser("export", help="Create the tables in PostgreSQL and COPY every row")
+    exp.add_argument("db")
+    exp.add_argument("--dsn", default=os.getenv("POSTGRES_DSN"), help="libpq connection string (env: POSTGRES_DSN)")
+    exp.add_argument("--schema", default="public")
+    exp.add_argument("--format", choices=FORMATS, default="csv")
+    exp.add_argument("--jobs", type=int, help="Tables copied concurrently (default: CPU count)")
+    exp.add_argument("--replace", action="store_true", help="Drop the tables first if they exist")
+    exp.add_argument("--json", action="store_true", help="Print the report as JSON")
+    scratch = sub.add_parser("scratch", help="Export and verify in every format on a throwaway local cluster")
+    scratch.add_argument("db")
+    scratch.add_argument("--pg-bin", default=os.getenv("PG_BIN"),
+                         help="Directory with initdb and pg_ctl (env: PG_BIN; default: PATH)")
+    scratch.add_argument("--jobs", type=int, help="Tables copied concurrently (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if args.command == "ddl":
+        print(ddl(read_schema(), args.schema))
+        return
+    if args.command == "scratch":
+        failed = 0
+        with scratch_cluster(args.pg_bin) as dsn:
+            print(f"✓ Scratch cluster at {dsn}")
+            for fmt in FORMATS:
+                print_report(export(args.db, dsn, fmt=fmt, jobs=args.jobs, replace=True))
+                mismatches = verify(args.db, dsn)
+                for name, expected, actual in mismatches:
+                    print(f"  ✗ {name}: {expected:,} rows in SQLite, {actual:,} in PostgreSQL")
+                if not mismatches:
+                    print(f"  ✓ Row counts match ({fmt})")
+                failed += len(mismatches)
+        return 1 if failed else 0
+    if not args.dsn:
+        parser.error("--dsn (or POSTGRES_DSN) is required")
+    report = export(args.db, args.dsn, args.schema, args.format, args.jobs, args.replace)
+    mismatches = verify(args.db, args.dsn, args.schema)
+    report["row_count_mismatches"] = mismatches
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+        for name, expected, actual in mismatches:
+            print(f"  ✗ {name}: {expected:,} rows in SQLite, {actual:,} in PostgreSQL")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""Materialized summary tables for RL observation and reward features.
+
+project_stats, section_stats, user_workload and team_stats are filled with one
+GROUP BY each at the end of a build. Triggers on tasks and projects then
+recompute only the rows keyed by the old and new project/section/assignee/team
+of a changed task. Time-dependent columns (overdue, completed in the last 7
+days) are relative to ``summary_meta.as_of``, which defaults to the build's
+base_time; ``set_as_of`` moves it and refreshes everything.
+
+Usage:
+    python src/storage/summaries.py build output/asana_simulation.sqlite
+    python src/storage/summaries.py refresh output/asana_simulation.sqlite --as-of 2025-02-01T09:00:00
+    python src/storage/summaries.py bench output/asana_simulation.sqlite
+"""
+import argparse
+import json
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional
+
+_AS_OF = "(SELECT as_of FROM summary_meta WHERE id = 1)"
+_OPEN = "t.id IS NOT NULL AND t.completed = 0"
+_OVERDUE = f"{_OPEN} AND t.due_date < date({_AS_OF})"
+
+SUMMARY_DDL = """
+CREATE TABLE IF NOT EXISTS summary_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    as_of TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS project_stats (
+    project_id INTEGER PRIMARY KEY REFERENCES projects(id) ON DELETE CASCADE,
+    task_count INTEGER NOT NULL,
+    completed_count INTEGER NOT NULL,
+    open_count INTEGER NOT NULL,
+    overdue_count INTEGER NOT NULL,
+    open_effort INTEGER NOT NULL,
+    completion_rate REAL GENERATED ALWAYS AS
+        (CASE WHEN task_count > 0 THEN 1.0 * completed_count / task_count ELSE 0.0 END) VIRTUAL
+);
+
+CREATE TABLE IF NOT EXISTS section_stats (
+    section_id INTEGER PRIMARY KEY REFERENCES sections(id) ON DELETE CASCADE,
+    project_id INTEGER NOT NULL,
+    task_count INTEGER NOT NULL,
+    open_count INTEGER NOT NULL,
+    overdue_count INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS user_workload (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    open_count INTEGER NOT NULL,
+    overdue_count INTEGER NOT NULL,
+    completed_count INTEGER NOT NULL,
+    open_effort INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS team_stats (
+    team_id INTEGER PRIMARY KEY REFERENCES teams(id) ON DELETE CASCADE,
+    active_project_count INTEGER NOT NULL,
+    task_count INTEGER NOT NULL,
+    completed_count INTEGER NOT NULL,
+    open_count INTEGER NOT NULL,
+    completed_last_7d INTEGER NOT NULL,
+    completion_rate REAL GENERATED ALWAYS AS
+        (CASE WHEN task_count > 0 THEN 1.0 * completed_count / task_count ELSE 0.0 END) VIRTUAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_section_stats_project ON section_stats(project_id);
+"""
+
+
+class Summary(NamedTuple):
+    table: str
+    key: str          # key column, the id of a row of `entity`
+    entity: str
+    source: str       # FROM clause; `e` is the keyed entity, `t` its tasks
+    columns: str      # aggregate expressions after the key
+    # task-row expression giving this summary's key, used by the triggers
+    task_key: str
+
+
+SUMMARIES = [
+    Summary("project_stats", "project_id", "projects", "projects e LEFT JOIN tasks t ON t.project_id = e.id", f"""
+        COUNT(t.id), COALESCE(SUM(t.completed), 0),
+        COUNT(CASE WHEN {_OPEN} THEN 1 END), COUNT(CASE WHEN {_OVERDUE} THEN 1 END),
+        COALESCE(SUM(CASE WHEN {_OPEN} THEN t.effort END), 0)""",
+            "{row}.project_id"),
+    Summary("section_stats", "section_id", "sections", "sections e LEFT JOIN tasks t ON t.section_id = e.id", f"""
+        e.project_id, COUNT(t.id),
+        COUNT(CASE WHEN {_OPEN} THEN 1 END), COUNT(CASE WHEN {_OVERDUE} THEN 1 END)""",
+            "{row}.section_id"),
+    Summary("user_workload", "user_id", "users", "users e LEFT JOIN tasks t ON t.assignee_id = e.id", f"""
+        COUNT(CASE WHEN {_OPEN} THEN 1 END), COUNT(CASE WHEN {_OVERDUE} THEN 1 END),
+        COALESCE(SUM(t.completed), 0), COALESCE(SUM(CASE WHEN {_OPEN} THEN t.effort END), 0)""",
+            "{row}.assignee_id"),
+    Summary("team_stats", "team_id", "teams", """teams e LEFT JOIN projects p ON p.team_id = e.id
+                             LEFT JOIN tasks t ON t.project_id = p.id""", f"""
+        COUNT(DISTINCT CASE WHEN p.is_archived = 0 THEN p.id END), COUNT(t.id),
+        COALESCE(SUM(t.completed), 0), COUNT(CASE WHEN {_OPEN} THEN 1 END),
+        COUNT(CASE WHEN t.completed = 1 AND t.completed_at >= datetime({_AS_OF}, '-7 days') THEN 1 END)""",
+            "(SELECT team_id FROM projects WHERE id = {row}.project_id)"),
+]
+
+# Task columns whose change can move a row between keys or change an aggregate
+TASK_COLUMNS = ("project_id", "section_id", "assignee_id", "completed", "completed_at", "due_date", "effort")
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> list:
+    # table_xinfo flags generated columns (hidden = 2/3); they are never inserted
+    return [r[1] for r in conn.execute(f"PRAGMA table_xinfo({table})") if r[6] == 0]
+
+
+def _recompute_sql(summary: Summary, key_filter: str) -> str:
+    return (f"INSERT OR REPLACE INTO {summary.table} "
+            f"SELECT e.id, {summary.columns} FROM {summary.source} WHERE {key_filter} GROUP BY e.id")
+
+
+def _trigger_recompute(summary: Summary, key: str, guard: str = "") -> str:
+    """Delete-then-insert recompute of one key, for use inside a trigger.
+
+    A trigger fired by a foreign-key action (a project delete setting
+    tasks.project_id to NULL) runs under the action's ABORT policy, which
+    overrides INSERT OR REPLACE. Deleting first also skips a key whose entity
+    is already gone: the SELECT finds nothing to put back.
+    """
+    return (f"DELETE FROM {summary.table} WHERE {summary.key} = {key}{guard};\n    "
+            f"INSERT INTO {summary.table} SELECT e.id, {summary.columns} "
+            f"FROM {summary.source} WHERE e.id = {key}{guard} GROUP BY e.id;")
+
+
+def trigger_statements() -> list:
+    """One CREATE TRIGGER per statement, for running inside an open transaction."""
+    def recompute(events: Iterable[str]) -> str:
+        statements = []
+        for summary in SUMMARIES:
+            for row in events:
+                key = summary.task_key.format(row=row)
+                guard = ""
+                if row == "old" and "new" in events:
+                    # Only when the key actually moved; the new key is recomputed anyway
+                    guard = f" AND {key} IS NOT {summary.task_key.format(row='new')}"
+                statements.append(_trigger_recompute(summary, key, guard))
+        return "\n    ".join(statements)
+
+    team = next(s for s in SUMMARIES if s.table == "team_stats")
+    statements = [
+        f"""CREATE TRIGGER IF NOT EXISTS summary_tasks_ai AFTER INSERT ON tasks BEGIN
+    {recompute(["new"])}
+END;""",
+        f"""CREATE TRIGGER IF NOT EXISTS summary_tasks_ad AFTER DELETE ON tasks BEGIN
+    {recompute(["old"])}
+END;""",
+        f"""CREATE TRIGGER IF NOT EXISTS summary_tasks_au AFTER UPDATE OF {', '.join(TASK_COLUMNS)} ON tasks BEGIN
+    {recompute(["new", "old"])}
+END;""",
+        f"""CREATE TRIGGER IF NOT EXISTS summary_projects_au AFTER UPDATE OF team_id, is_archived ON projects BEGIN
+    {_trigger_recompute(team, "new.team_id")}
+    {_trigger_recompute(team, "old.team_id", " AND old.team_id IS NOT new.team_id")}
+END;""",
+    ]
+    # An entity added after the build gets its own row and a removed one loses
+    # it (also with foreign keys off); a project also counts towards its team
+    for summary in SUMMARIES:
+        on_team = "\n    {}" if summary.entity == "projects" else ""
+        statements += [
+            f"""CREATE TRIGGER IF NOT EXISTS summary_{summary.entity}_ai AFTER INSERT ON {summary.entity} BEGIN
+    {_trigger_recompute(summary, "new.id")}{on_team.format(_trigger_recompute(team, "new.team_id"))}
+END;""",
+            f"""CREATE TRIGGER IF NOT EXISTS summary_{summary.entity}_ad AFTER DELETE ON {summary.entity} BEGIN
+    DELETE FROM {summary.table} WHERE {summary.key} = old.id;{on_team.format(_trigger_recompute(team, "old.team_id"))}
+END;""",
+        ]
+    return statements
+
+
+def trigger_sql() -> str:
+    """Triggers that recompute only the summary rows a task, project, section, user or team change touches."""
+    return "\n" + "\n".join(trigger_statements()) + "\n"
+
+
+def drop_triggers(conn: sqlite3.Connection, commit: bool = True):
+    for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'summary\\_%' ESCAPE '\\'").fetchall():
+        conn.execute(f"DROP TRIGGER {name}")
+    if commit:
+        conn.commit()
+
+
+def create_triggers(conn: sqlite3.Connection):
+    """Recreate the triggers without committing, unlike ``executescript(trigger_sql())``."""
+    for statement in trigger_statements():
+        conn.execute(statement)
+
+
+def has_summaries(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'summary_meta'").fetchone() is not None
+
+
+def default_as_of(conn: sqlite3.Connection) -> str:
+    """The build's pinned base_time, so summaries match the generated data's "now"."""
+    row = conn.execute("SELECT value FROM generation_meta WHERE key = 'config'").fetchone() \
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'generation_meta'").fetchone() else None
+    if row:
+        return json.loads(row[0])["base_time"]
+    return conn.execute("SELECT datetime('now')").fetchone()[0]
+
+
+def build_summaries(conn: sqlite3.Connection, as_of: Optional[str] = None) -> float:
+    """Create and fully fill the summary tables and triggers; returns seconds taken."""
+    started = time.perf_counter()
+    conn.executescript(SUMMARY_DDL)
+    current = conn.execute("SELECT as_of FROM summary_meta WHERE id = 1").fetchone()
+    as_of = as_of or (current[0] if current else default_as_of(conn))
+    conn.execute("INSERT OR REPLACE INTO summary_meta (id, as_of) VALUES (1, ?)", (as_of,))
+    for summary in SUMMARIES:
+        conn.execute(f"DELETE FROM {summary.table}")
+        conn.execute(_recompute_sql(summary, "1 = 1"))
+    # Replace triggers left by an older build rather than keeping them
+    drop_triggers(conn, commit=False)
+    conn.executescript(trigger_sql())
+    conn.commit()
+    return time.perf_counter() - started
+
+
+def refresh_summaries(conn: sqlite3.Connection, project_ids: Iterable[int] = (), section_ids: Iterable[int] = (),
+                      user_ids: Iterable[int] = (), team_ids: Iterable[int] = (), commit: bool = True):
+    """Recompute the given keys, e.g. after writes made with the triggers dropped."""
+    keys = {"project_stats": project_ids, "section_stats": section_ids,
+            "user_workload": user_ids, "team_stats": team_ids}
+    for summary in SUMMARIES:
+        ids = sorted(set(keys[summary.table]))
+        if ids:
+            conn.execute(_recompute_sql(summary, f"e.id IN ({','.join('?' * len(ids))})"), ids)
+    if commit:
+        conn.commit()
+
+
+def summary_keys(conn: sqlite3.Connection, task_ids: Iterable[int]) -> dict:
+    """The project, section, user and team ids the given tasks currently count towards."""
+    ids = sorted(set(task_ids))
+    keys = {"project_ids": set(), "section_ids": set(), "user_ids": set(), "team_ids": set()}
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        for project_id, section_id, assignee_id, team_id in conn.execute(
+                "SELECT t.project_id, t.section_id, t.assignee_id, p.team_id FROM tasks t "
+                f"LEFT JOIN projects p ON p.id = t.project_id WHERE t.id IN ({','.join('?' * len(chunk))})", chunk):
+            for name, value in zip(keys, (project_id, section_id, assignee_id, team_id)):
+                if value is not None:
+                    keys[name].add(value)
+    return keys
+
+
+def set_as_of(conn: sqlite3.Connection, as_of: str) -> float:
+    """Move the reference time; every time-dependent column changes, so rebuild."""
+    return build_summaries(conn, as_of)
+
+
+def verify(conn: sqlite3.Connection) -> list:
+    """Tables whose stored rows differ from a fresh recomputation (empty when consistent).
+
+    Counts stale or extra stored rows plus fresh rows that are missing.
+    """
+    stale = []
+    for summary in SUMMARIES:
+        stored = f"SELECT {', '.join(_columns(conn, summary.table))} FROM {summary.table}"
+        fresh = f"SELECT e.id, {summary.columns} FROM {summary.source} GROUP BY e.id"
+        diff = conn.execute(
+            f"SELECT (SELECT COUNT(*) FROM ({stored} EXCEPT {fresh})) "
+            f"+ (SELECT COUNT(*) FROM ({fresh} EXCEPT {stored}))").fetchone()[0]
+        if diff:
+            stale.append((summary.table, diff))
+    return stale
+
+
+# Raw aggregate vs summary lookup for the same observation feature
+BENCH_QUERIES = {
+    "project_completion": (
+        "SELECT COUNT(*), SUM(completed) FROM tasks WHERE project_id = ?",
+        "SELECT task_count, completed_count, completion_rate FROM project_stats WHERE project_id = ?",
+        "projects"),
+    "section_open_overdue": (
+        f"""SELECT COUNT(CASE WHEN completed = 0 THEN 1 END),
+                   COUNT(CASE WHEN completed = 0 AND due_date < date({_AS_OF}) THEN 1 END)
+            FROM tasks WHERE section_id = ?""",
+        "SELECT open_count, overdue_count FROM section_stats WHERE section_id = ?",
+        "sections"),
+    "user_workload": (
+        "SELECT COUNT(*), SUM(effort) FROM tasks WHERE assignee_id = ? AND completed = 0",
+        "SELECT open_count, open_effort FROM user_workload WHERE user_id = ?",
+        "users"),
+    "team_throughput": (
+        f"""SELECT COUNT(*) FROM tasks t JOIN projects p ON p.id = t.project_id
+            WHERE p.team_id = ? AND t.completed = 1 AND t.completed_at >= datetime({_AS_OF}, '-7 days')""",
+        "SELECT completed_last_7d FROM team_stats WHERE team_id = ?",
+        "teams"),
+    "all_users_workload": (
+        "SELECT assignee_id, COUNT(*), SUM(effort) FROM tasks WHERE completed = 0 GROUP BY assignee_id",
+        "SELECT user_id, open_count, open_effort FROM user_workload",
+        None),
+}
+
+
+def benchmark(conn: sqlite3.Connection, iterations: int = 200, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    results = {}
+    for name, (raw_sql, lookup_sql, entity) in BENCH_QUERIES.items():
+        if entity:
+            ids = [r[0] for r in conn.execute(f"SELECT id FROM {entity}")]
+            params = [(rng.choice(ids),) for _ in range(iterations)]
+        else:
+            params = [()] * max(1, iterations // 20)
+        timings = {}
+        for label, sql in (("aggregate", raw_sql), ("lookup", lookup_sql)):
+            samples = []
+            for args in params:
+                t0 = time.perf_counter()
+                conn.execute(sql, args).fetchall()
+                samples.append((time.perf_counter() - t0) * 1000)
+            timings[f"{label}_p50_ms"] = round(statistics.median(samples), 4)
+        results[name] = timings
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Materialized summary tables.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("build", "Create and fill summary tables and triggers"),
+                            ("refresh", "Rebuild summaries, optionally at a new as_of"),
+                            ("verify", "Check summaries against a fresh recomputation"),
+                            ("bench", "Compare raw aggregates with summary lookups")):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("db")
+        if name in ("build", "refresh"):
+            cmd.add_argument("--as-of", help="Reference time for overdue / last-7-days columns")
+        if name == "bench":
+            cmd.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if not Path(args.db).exists():
+        raise FileNotFoundError(f"DB not found at {args.db}")
+    conn = sqlite3.connect(args.db)
+    if args.command in ("build", "refresh"):
+        seconds = build_summaries(conn, args.as_of)
+        as_of = conn.execute("SELECT as_of FROM summary_meta").fetchone()[0]
+        print(f"✓ Summary tables built in {seconds:.2f}s (as of {as_of})")
+    elif not has_summaries(conn):
+        raise SystemExit(f"No summary tables in {args.db}; run `build` first")
+    elif args.command == "verify":
+        stale = verify(conn)
+        for table, rows in stale:
+            print(f"  ✗ {table}: {rows} stale or missing rows")
+        if not stale:
+            print("✓ Summary tables are consistent")
+    else:
+        print("=" * 60)
+        print("SUMMARY TABLE BENCHMARK (median ms)")
+        print("=" * 60)
+        print(f"  {'feature':<24}{'aggregate':>12}{'lookup':>12}")
+        for name, r in benchmark(conn, args.iterations).items():
+            print(f"  {name:<24}{r['aggregate_p50_ms']:>12.4f}{r['lookup_p50_ms']:>12.4f}")
+        print("=" * 60)
+    conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""Time-travel snapshots: the workspace as it was at any timestamp.
+
+Tasks, subtasks, comments and attachments exist from their ``created_at``;
+tasks and subtasks count as completed once ``completed_at`` has passed. Tags
+and custom field values follow their task. The workspace's structure
+(organization, teams, users, memberships, projects, sections, tags, field
+definitions) is kept whole at every timestamp: the generator dates it
+independently of the task timeline, so filtering it would orphan tasks.
+
+Indexes on the timestamp columns keep every as-of read a range scan:
+
+- ``create_views`` adds TEMP views (``tasks_as_of``, ...) that filter against
+  a clock row; ``set_clock`` moves it.
+- ``materialize`` writes a standalone snapshot DB at one timestamp, reading
+  only the rows that exist then.
+- ``Snapshot.step_to`` moves a snapshot forwards or backwards, touching only
+  the rows created or completed in between, so curriculum-style episodes can
+  walk through time without re-materializing.
+
+Usage:
+    python src/storage/temporal.py index output/asana_simulation.sqlite
+    python src/storage/temporal.py snapshot output/asana_simulation.sqlite output/2024-10-01.sqlite --as-of 2024-10-01
+    python src/storage/temporal.py step output/2024-10-01.sqlite --days 7
+    python src/storage/temporal.py bench output/asana_simulation.sqlite
+"""
+import argparse
+import json
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR))
+
+from src.storage import summaries
+
+SCHEMA_SQL = BASE_DIR / "schema.sql"
+
+# Tables whose rows appear at created_at, parents first
+TIMED = ("tasks", "subtasks", "comments", "attachments")
+# Tables that can be completed: state is (completed_at <= as_of)
+COMPLETABLE = ("tasks", "subtasks")
+# Tables whose rows exist with their task
+TASK_CHILDREN = ("task_tags", "custom_field_values")
+STATIC = ("organizations", "teams", "users", "team_memberships", "projects", "sections", "tags",
+          "custom_field_defs")
+
+TEMPORAL_INDEX_DDL = """
+CREATE INDEX IF NOT EXISTS idx_time_tasks_created ON tasks(created_at);
+CREATE INDEX IF NOT EXISTS idx_time_tasks_completed ON tasks(completed_at) WHERE completed_at IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_time_subtasks_created ON subtasks(created_at);
+CREATE INDEX IF NOT EXISTS idx_time_subtasks_completed ON subtasks(completed_at) WHERE completed_at IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_time_comments_created ON comments(created_at);
+CREATE INDEX IF NOT EXISTS idx_time_attachments_created ON attachments(created_at);
+"""
+_CLOCK = "(SELECT as_of FROM temp.as_of_clock)"
+
+
+def timestamp(value) -> str:
+    """``value`` (date, datetime or ISO string) in the DB's ``YYYY-MM-DDTHH:MM:SS`` form."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    return value.replace(microsecond=0, tzinfo=None).isoformat()
+
+
+def build_indexes(conn: sqlite3.Connection) -> float:
+    """Create the time-ordered indexes; returns seconds taken."""
+    started = time.perf_counter()
+    conn.executescript(TEMPORAL_INDEX_DDL)
+    conn.commit()
+    return time.perf_counter() - started
+
+
+def has_indexes(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_time_tasks_created'").fetchone() is not None
+
+
+def _columns(conn: sqlite3.Connection, table: str, schema: str = "main") -> list:
+    return [r[1] for r in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def _select(conn: sqlite3.Connection, table: str, as_of: str, alias: str = "s") -> str:
+    """Column list of ``table`` with completion state rewound to ``as_of`` (an SQL expression)."""
+    columns = []
+    for column in _columns(conn, table):
+        if table in COMPLETABLE and column == "completed":
+            columns.append(f"CASE WHEN {alias}.completed_at <= {as_of} THEN 1 ELSE 0 END AS completed")
+        elif table in COMPLETABLE and column == "completed_at":
+            columns.append(f"CASE WHEN {alias}.completed_at <= {as_of} THEN {alias}.completed_at END AS completed_at")
+        else:
+            columns.append(f"{alias}.{column}")
+    return ", ".join(columns)
+
+
+# --- as-of views ---------------------------------------------------------
+
+def create_views(conn: sqlite3.Connection, as_of) -> None:
+    """TEMP views ``<table>_as_of`` over the connection's DB at ``as_of``; see ``set_clock``."""
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS as_of_clock (id INTEGER PRIMARY KEY CHECK (id = 1), as_of TEXT)")
+    set_clock(conn, as_of)
+    for table in TIMED:
+        conn.execute(f"DROP VIEW IF EXISTS temp.{table}_as_of")
+        conn.execute(f"CREATE TEMP VIEW {table}_as_of AS SELECT {_select(conn, table, _CLOCK)} "
+                     f"FROM main.{table} s WHERE s.created_at <= {_CLOCK}")
+    for table in TASK_CHILDREN:
+        conn.execute(f"DROP VIEW IF EXISTS temp.{table}_as_of")
+        conn.execute(f"CREATE TEMP VIEW {table}_as_of AS SELECT {_select(conn, table, _CLOCK)} "
+                     f"FROM main.{table} s JOIN main.tasks t ON t.id = s.task_id WHERE t.created_at <= {_CLOCK}")
+    conn.commit()
+
+
+def set_clock(conn: sqlite3.Connection, as_of) -> str:
+    """Point the ``*_as_of`` views at another time; returns the normalized timestamp."""
+    as_of = timestamp(as_of)
+    conn.execute("INSERT OR REPLACE INTO temp.as_of_clock (id, as_of) VALUES (1, ?)", (as_of,))
+    return as_of
+
+
+# --- materialized snapshots ------------------------------------------------
+
+def materialize(source_db, out_db, as_of, with_summaries: bool = False) -> float:
+    """Write ``source_db`` as of ``as_of`` to ``out_db``; returns seconds taken.
+
+    Builds the time-ordered indexes on the source first if it lacks them.
+    """
+    source_db, out_db = Path(source_db), Path(out_db)
+    if not source_db.exists():
+        raise FileNotFoundError(f"DB not found at {source_db}")
+    as_of = timestamp(as_of)
+    started = time.perf_counter()
+    source = sqlite3.connect(str(source_db))
+    if not has_indexes(source):
+        build_indexes(source)
+    source.close()
+
+    out_db.unlink(missing_ok=True)
+    conn = sqlite3.connect(str(out_db))
+    conn.executescript(SCHEMA_SQL.read_text())
+    conn.executescript(TEMPORAL_INDEX_DDL)
+    # Rows come from a consistent DB; checking every reference again costs a fifth of the copy
+    conn.execute("PRAGMA foreign_keys = OFF")
+    conn.execute("ATTACH DATABASE ? AS src", (str(source_db),))
+    for table in STATIC + ("generation_meta",):
+        columns = ", ".join(_columns(conn, table))
+        conn.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM src.{table}")
+    _copy_range(conn, None, as_of, as_of)
+    conn.execute("INSERT OR REPLACE INTO generation_meta (key, value) VALUES ('snapshot', ?)",
+                 (json.dumps({"source": str(source_db.resolve()), "as_of": as_of}),))
+    conn.commit()
+    conn.execute("DETACH DATABASE src")
+    if with_summaries:
+        summaries.build_summaries(conn, as_of)
+    conn.close()
+    return time.perf_counter() - started
+
+
+def _copy_range(conn: sqlite3.Connection, after, upto: str, as_of: str) -> int:
+    """Insert the source rows created in (``after``, ``upto``] as of ``as_of``; returns how many."""
+    window, bounds = ("s.created_at <= ?", (upto,)) if after is None else \
+        ("s.created_at > ? AND s.created_at <= ?", (after, upto))
+    # The time index finds the rows; sorting them by id appends to the snapshot's
+    # B-trees instead of inserting at random, which halves the copy
+    copied = 0
+    for table in TIMED:
+        # The completion CASEs take as_of twice
+        params = ((as_of, as_of) if table in COMPLETABLE else ()) + bounds
+        copied += conn.execute(f"INSERT INTO main.{table} SELECT {_select(conn, table, '?')} "
+                               f"FROM src.{table} s WHERE {window} ORDER BY s.id", params).rowcount
+    for table in TASK_CHILDREN:
+        copied += conn.execute(f"INSERT INTO main.{table} SELECT {_select(conn, table, '?', 'c')} "
+                               f"FROM src.tasks s JOIN src.{table} c ON c.task_id = s.id WHERE {window} "
+                               "ORDER BY c.id",
+                               bounds).rowcount
+    return copied
+
+
+class Snapshot:
+    """A materialized snapshot that can be moved through time in place."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Snapshot not found at {self.path}")
+        self.conn = sqlite3.connect(str(self.path))
+        row = self.conn.execute("SELECT value FROM generation_meta WHERE key = 'snapshot'").fetchone()
+        if row is None:
+            raise ValueError(f"{self.path} is not a snapshot (build one with materialize)")
+        meta = json.loads(row[0])
+        self.source, self.as_of = meta["source"], meta["as_of"]
+        if not Path(self.source).exists():
+            raise FileNotFoundError(f"Snapshot source DB not found at {self.source}")
+        self.conn.execute("ATTACH DATABASE ? AS src", (self.source,))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def step(self, delta: timedelta) -> dict:
+        return self.step_to(datetime.fromisoformat(self.as_of) + delta)
+
+    def step_to(self, as_of) -> dict:
+        """Move the snapshot to ``as_of``; returns rows added, removed, completed and reopened."""
+        as_of = timestamp(as_of)
+        old = self.as_of
+        counts = {"added": 0, "removed": 0, "completed": 0, "reopened": 0}
+        if as_of == old:
+            return counts
+        conn = self.conn
+        has_summaries = summaries.has_summaries(conn)
+        if has_summaries:
+            # Per-row triggers would re-aggregate on every step row; rebuilt once below
+            conn.execute("BEGIN")
+            summaries.drop_triggers(conn, commit=False)
+        if as_of > old:
+            counts["added"] = _copy_range(conn, old, as_of, as_of)
+            for table in COMPLETABLE:
+                counts["completed"] += conn.execute(
+                    f"UPDATE main.{table} SET completed = 1, completed_at = s.completed_at "
+                    f"FROM (SELECT id, completed_at FROM src.{table} WHERE completed_at > ? AND completed_at <= ?) s "
+                    f"WHERE main.{table}.id = s.id", (old, as_of)).rowcount
+        else:
+            # Children before parents, rows created after the new time first
+            for table in TASK_CHILDREN:
+                counts["removed"] += conn.execute(
+                    f"DELETE FROM main.{table} WHERE task_id IN (SELECT id FROM main.tasks WHERE created_at > ?)",
+                    (as_of,)).rowcount
+            for table in reversed(TIMED):
+                counts["removed"] += conn.execute(f"DELETE FROM main.{table} WHERE created_at > ?",
+                                                  (as_of,)).rowcount
+            for table in COMPLETABLE:
+                counts["reopened"] += conn.execute(
+                    f"UPDATE main.{table} SET completed = 0, completed_at = NULL WHERE completed_at > ?",
+                    (as_of,)).rowcount
+        meta = {"source": self.source, "as_of": as_of}
+        conn.execute("UPDATE generation_meta SET value = ? WHERE key = 'snapshot'", (json.dumps(meta),))
+        conn.commit()
+        self.as_of = as_of
+        if has_summaries:
+            summaries.build_summaries(conn, as_of)
+        return counts
+
+    def counts(self) -> dict:
+        return {table: self.conn.execute(f"SELECT COUNT(*) FROM main.{table}").fetchone()[0]
+                for table in TIMED + TASK_CHILDREN}
+
+
+# --- benchmark -----------------------------------------------------------
+
+def _time_range(conn: sqlite3.Connection):
+    first, last = conn.execute("SELECT MIN(created_at), MAX(created_at) FROM tasks").fetchone()
+    return datetime.fromisoformat(first), datetime.fromisoformat(last)
+
+
+def benchmark(db_path, step_days: int = 7) -> dict:
+    """Materialization time against snapshot size, and weekly stepping against re-materializing."""
+    results = {"materialize": [], "step": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "source.sqlite"
+        shutil.copy(db_path, source)
+        conn = sqlite3.connect(str(source))
+        results["index_s"] = round(build_indexes(conn), 3)
+        first, last = _time_range(conn)
+        conn.close()
+
+        out = Path(tmp) / "snapshot.sqlite"
+        for fraction in (0.25, 0.5, 0.75, 1.0):
+            as_of = first + (last - first) * fraction
+            seconds = materialize(source, out, as_of)
+            with Snapshot(out) as snapshot:
+                rows = sum(snapshot.counts().values())
+            results["materialize"].append({"as_of": timestamp(as_of), "rows": rows, "seconds": round(seconds, 3)})
+
+        materialize(source, out, first)
+        step_s, rows = [], []
+        with Snapshot(out) as snapshot:
+            while datetime.fromisoformat(snapshot.as_of) < last:
+                started = time.perf_counter()
+                counts = snapshot.step(timedelta(days=step_days))
+                step_s.append(time.perf_counter() - started)
+                rows.append(counts["added"] + counts["completed"])
+            started = time.perf_counter()
+            rewind = snapshot.step_to(first + (last - first) / 2)
+            rewind_s = time.perf_counter() - started
+        results["step"] = {
+            "days": step_days,
+            "steps": len(step_s),
+            "rows_mean": round(statistics.mean(rows)),
+            "ms_mean": round(1000 * statistics.mean(step_s), 2),
+            "ms_max": round(1000 * max(step_s), 2),
+            "rewind_rows": rewind["removed"] + rewind["reopened"],
+            "rewind_ms": round(1000 * rewind_s, 2),
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time-travel snapshots of a generated DB.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    index = sub.add_parser("index", help="Build the time-ordered indexes")
+    index.add_argument("db")
+    snap = sub.add_parser("snapshot", help="Materialize the DB as of a timestamp")
+    snap.add_argument("db")
+    snap.add_argument("out")
+    snap.add_argument("--as-of", required=True, help="ISO date or timestamp")
+    snap.add_argument("--summaries", action="store_true", help="Build summary tables relative to --as-of")
+    step = sub.add_parser("step", help="Move a snapshot through time in place")
+    step.add_argument("db")
+    target = step.add_mutually_exclusive_group(required=True)
+    target.add_argument("--to", help="ISO date or timestamp")
+    target.add_argument("--days", type=float, help="Days to move (negative rewinds)")
+    bench = sub.add_parser("bench", help="Materialization and stepping times, on a scratch copy")
+    bench.add_argument("db")
+    bench.add_argument("--step-days", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    if not Path(args.db).exists():
+        raise FileNotFoundError(f"DB not found at {args.db}")
+    if args.command == "index":
+        conn = sqlite3.connect(args.db)
+        seconds = build_indexes(conn)
+        conn.close()
+        print(f"✓ Time-ordered indexes built in {seconds:.2f}s")
+    elif args.command == "snapshot":
+        seconds = materialize(args.db, args.out, args.as_of, args.summaries)
+        with Snapshot(args.out) as snapshot:
+            counts = snapshot.counts()
+        print(f"✓ Snapshot as of {timestamp(args.as_of)} written to {args.out} in {seconds:.2f}s")
+        for table, count in counts.items():
+            print(f"  {table}: {count:,}")
+    elif args.command == "step":
+        with Snapshot(args.db) as snapshot:
+            old = snapshot.as_of
+            started = time.perf_counter()
+            counts = snapshot.step_to(args.to) if args.to else snapshot.step(timedelta(days=args.days))
+            print(f"✓ Moved {args.db} from {old} to {snapshot.as_of} in {time.perf_counter() - started:.3f}s "
+                  f"({', '.join(f'{k} {v:,}' for k, v in counts.items())})")
+    else:
+        print(json.dumps(benchmark(args.db, args.step_days), indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
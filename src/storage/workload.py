@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Representative RL query workload, index profiles and a benchmark harness.
+
+The benchmark runs every workload query with sampled parameters, records
+EXPLAIN QUERY PLAN and latency percentiles, then (on a copy of the DB unless
+--in-place) builds an index profile and measures again.
+
+Usage:
+    python src/storage/workload.py bench output/asana_simulation.sqlite --profile rl-serving
+    python src/storage/workload.py apply output/asana_simulation.sqlite --profile rl-serving
+"""
+import argparse
+import json
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+INDEX_PROFILES = {
+    "rl-serving": BASE_DIR / "indexes_rl_serving.sql",
+}
+
+# name -> (query, SQL returning candidate parameter tuples)
+WORKLOAD = {
+    "open_tasks_for_assignee": (
+        """SELECT id, name, due_date FROM tasks
+           WHERE assignee_id = ? AND completed = 0 ORDER BY due_date LIMIT 50""",
+        "SELECT DISTINCT assignee_id FROM tasks WHERE assignee_id IS NOT NULL",
+    ),
+    "overdue_tasks_in_project": (
+        """SELECT id, name, due_date FROM tasks
+           WHERE project_id = ? AND completed = 0 AND due_date < date('now') ORDER BY due_date""",
+        "SELECT id FROM projects",
+    ),
+    "open_counts_by_section": (
+        """SELECT section_id, COUNT(*) FROM tasks
+           WHERE project_id = ? AND completed = 0 GROUP BY section_id""",
+        "SELECT id FROM projects",
+    ),
+    "section_tasks_by_created": (
+        """SELECT id, name, created_at FROM tasks
+           WHERE section_id = ? ORDER BY created_at DESC LIMIT 50""",
+        "SELECT id FROM sections",
+    ),
+    "latest_comments_on_task": (
+        """SELECT id, author_id, text, created_at FROM comments
+           WHERE task_id = ? ORDER BY created_at DESC LIMIT 10""",
+        "SELECT DISTINCT task_id FROM comments",
+    ),
+    "open_subtasks_for_assignee": (
+        """SELECT id, name, due_date FROM subtasks
+           WHERE assignee_id = ? AND completed = 0 ORDER BY due_date LIMIT 50""",
+        "SELECT DISTINCT assignee_id FROM subtasks WHERE assignee_id IS NOT NULL",
+    ),
+    "active_projects_for_user": (
+        """SELECT p.id, p.name FROM team_memberships tm
+           JOIN projects p ON p.team_id = tm.team_id
+           WHERE tm.user_id = ? AND p.is_archived = 0""",
+        "SELECT DISTINCT user_id FROM team_memberships",
+    ),
+    "tagged_tasks_in_project": (
+        """SELECT t.id, t.name FROM task_tags tt JOIN tasks t ON t.id = tt.task_id
+           WHERE tt.tag_id = ? AND t.project_id = ?""",
+        "SELECT t.id, p.id FROM tags t CROSS JOIN (SELECT id FROM projects LIMIT 200) p",
+    ),
+}
+
+
+def apply_index_profile(conn: sqlite3.Connection, profile: str) -> float:
+    """Build an index profile on a loaded DB; returns seconds taken."""
+    if profile not in INDEX_PROFILES:
+        raise ValueError(f"Unknown index profile {profile!r}; expected one of {sorted(INDEX_PROFILES)}")
+    started = time.perf_counter()
+    conn.executescript(INDEX_PROFILES[profile].read_text())
+    conn.commit()
+    return time.perf_counter() - started
+
+
+def _db_size(conn: sqlite3.Connection) -> int:
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
+
+
+def sample_params(conn: sqlite3.Connection, iterations: int, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    params = {}
+    for name, (_, param_sql) in WORKLOAD.items():
+        candidates = conn.execute(param_sql).fetchall()
+        params[name] = [rng.choice(candidates) for _ in range(iterations)] if candidates else []
+    return params
+
+
+def run_workload(conn: sqlite3.Connection, params: dict) -> dict:
+    """Query plan and latency percentiles (ms) for every workload query."""
+    results = {}
+    for name, (sql, _) in WORKLOAD.items():
+        runs = params[name]
+        if not runs:
+            continue
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", runs[0])]
+        samples = []
+        for args in runs:
+            t0 = time.perf_counter()
+            conn.execute(sql, args).fetchall()
+            samples.append((time.perf_counter() - t0) * 1000)
+        samples.sort()
+        results[name] = {
+            "plan": plan,
+            "temp_btree": any("TEMP B-TREE" in step for step in plan),
+            "p50_ms": round(statistics.median(samples), 4),
+            "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 4),
+            "mean_ms": round(statistics.fmean(samples), 4),
+        }
+    return results
+
+
+def benchmark(db_path, profile: str = None, iterations: int = 200, in_place: bool = False) -> dict:
+    db_path = Path(db_path)
+    if not db_path.exists():
+        raise FileNotFoundError(f"DB not found at {db_path}")
+
+    tmp_dir = None
+    if profile and not in_place:
+        tmp_dir = tempfile.TemporaryDirectory()
+        target = Path(tmp_dir.name) / db_path.name
+        shutil.copyfile(db_path, target)
+    else:
+        target = db_path
+
+    conn = sqlite3.connect(str(target))
+    try:
+        params = sample_params(conn, iterations)
+        report = {"db": str(db_path), "iterations": iterations,
+                  "baseline": {"size_bytes": _db_size(conn), "queries": run_workload(conn, params)}}
+        if profile:
+            build_s = apply_index_profile(conn, profile)
+            report[profile] = {
+                "build_s": round(build_s, 4),
+                "size_bytes": _db_size(conn),
+                "queries": run_workload(conn, params),
+            }
+    finally:
+        conn.close()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+    return report
+
+
+def print_report(report: dict, profile: str = None):
+    base = report["baseline"]
+    print("=" * 60)
+    print("RL QUERY WORKLOAD BENCHMARK")
+    print("=" * 60)
+    print(f"  DB: {report['db']} ({report['iterations']} runs per query)")
+    if profile:
+        prof = report[profile]
+        growth = prof["size_bytes"] - base["size_bytes"]
+        print(f"  Profile {profile}: built in {prof['build_s']:.2f}s, "
+              f"+{growth / 1024 / 1024:.2f} MB ({growth / base['size_bytes'] * 100:.1f}%)")
+    print(f"\n  {'query':<28}{'base p50':>10}{'base p95':>10}", end="")
+    print(f"{'prof p50':>10}{'prof p95':>10}" if profile else "", end="")
+    print("  (ms)")
+    for name, r in base["queries"].items():
+        line = f"  {name:<28}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}"
+        if profile:
+            p = report[profile]["queries"][name]
+            line += f"{p['p50_ms']:>10.3f}{p['p95_ms']:>10.3f}"
+        print(line)
+
+    print("\n  Query plans:")
+    for name, r in base["queries"].items():
+        print(f"    {name}")
+        print(f"      baseline: {' | '.join(r['plan'])}")
+        if profile:
+            print(f"      {profile}: {' | '.join(report[profile]['queries'][name]['plan'])}")
+    print("=" * 60)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RL query workload benchmark and index profiles.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench = sub.add_parser("bench", help="Measure the workload, optionally before/after an index profile")
+    bench.add_argument("db")
+    bench.add_argument("--profile", choices=sorted(INDEX_PROFILES))
+    bench.add_argument("--iterations", type=int, default=200)
+    bench.add_argument("--in-place", action="store_true", help="Build the profile on the DB itself")
+    bench.add_argument("--json", help="Also write the report to this path")
+    apply = sub.add_parser("apply", help="Build an index profile on a generated DB")
+    apply.add_argument("db")
+    apply.add_argument("--profile", choices=sorted(INDEX_PROFILES), required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == "apply":
+        conn = sqlite3.connect(args.db)
+        seconds = apply_index_profile(conn, args.profile)
+        conn.close()
+        print(f"✓ Index profile {args.profile} built in {seconds:.2f}s")
+        return
+
+    report = benchmark(args.db, args.profile, args.iterations, args.in_place)
+    print_report(report, args.profile)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
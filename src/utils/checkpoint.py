@@ -0,0 +1,46 @@
+# Checkpoint bookkeeping in the generation_meta table, used by --resume.
+import json
+import sqlite3
+
+
+class Checkpointer:
+    """Reads and writes run state stored next to the data it describes.
+
+    Values are JSON. Callers write checkpoints inside the same transaction as
+    the rows they cover, so a crash never leaves a marker ahead of the data.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def get(self, key: str, default=None):
+        row = self.conn.execute("SELECT value FROM generation_meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key: str, value):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO generation_meta (key, value) VALUES (?, ?)",
+            (key, json.dumps(value)),
+        )
+
+    def completed_stages(self) -> list:
+        return self.get("completed_stages", [])
+
+    def stage_done(self, name: str):
+        completed = self.completed_stages()
+        if name not in completed:
+            completed.append(name)
+        self.set("completed_stages", completed)
+        self.conn.execute("DELETE FROM generation_meta WHERE key = ?", (f"progress:{name}",))
+
+    def reset_stages(self, names: list):
+        self.set("completed_stages", [s for s in self.completed_stages() if s not in names])
+        for name in names:
+            self.conn.execute("DELETE FROM generation_meta WHERE key = ?", (f"progress:{name}",))
+
+    def stage_progress(self, name: str):
+        """Last committed ``{"marker": ..., "rng": ...}`` of a chunked stage, or None."""
+        return self.get(f"progress:{name}")
+
+    def save_progress(self, name: str, marker: dict, rng_state: dict):
+        self.set(f"progress:{name}", {"marker": marker, "rng": rng_state})
@@ -0,0 +1,164 @@
+# Compressed sparse row (CSR) adjacency: one offsets array and one values array.
+#
+# The neighbors of row r are values[offsets[r]:offsets[r + 1]], so lookups and
+# uniform sampling are O(1) array slices, and a relationship with n edges costs
+# n values (int32 when ids fit) plus one int64 offset per row, instead of a
+# dict of Python lists. Rows are either integer keys used directly as indexes
+# (team id -> members) or string labels in first-seen order (role -> users).
+from collections.abc import Sequence
+
+import numpy as np
+
+INT32_MAX = np.iinfo(np.int32).max
+
+
+def _compact(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values, dtype=np.int64)
+    if len(values) and 0 <= values.min() and values.max() <= INT32_MAX:
+        return values.astype(np.int32)
+    return values
+
+
+class IdSequence(Sequence):
+    """Read-only sequence of Python ints over one or more id array slices.
+
+    Lets ``random.choice``/``random.sample`` draw from CSR rows (or several rows
+    back to back) exactly as from the equivalent list, without materializing it.
+    """
+
+    def __init__(self, *chunks: np.ndarray):
+        self.chunks = [c for c in chunks if len(c)]
+        self.ends = np.cumsum([len(c) for c in self.chunks]).tolist()
+
+    def __len__(self) -> int:
+        return self.ends[-1] if self.ends else 0
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return np.asarray(self)[i].tolist()
+        if i < 0:
+            i += len(self)
+        start = 0
+        for chunk, end in zip(self.chunks, self.ends):
+            if i < end:
+                return int(chunk[i - start])
+            start = end
+        raise IndexError("IdSequence index out of range")
+
+    def __array__(self, dtype=None, copy=None):
+        joined = np.concatenate(self.chunks) if self.chunks else np.empty(0, dtype=np.int64)
+        return joined.astype(dtype) if dtype is not None else joined
+
+
+class CSR:
+    """Rows of ids: ``neighbors(key)`` is ``values[offsets[row]:offsets[row + 1]]``."""
+
+    __slots__ = ("offsets", "values", "labels", "_rows")
+
+    def __init__(self, offsets: np.ndarray, values: np.ndarray, labels=None):
+        self.offsets = offsets
+        self.values = values
+        self.labels = list(labels) if labels is not None else None
+        self._rows = {label: i for i, label in enumerate(self.labels)} if self.labels is not None else None
+
+    @classmethod
+    def from_rows(cls, rows: np.ndarray, values: np.ndarray, n_rows: int = None, labels=None) -> "CSR":
+        """Build from parallel (row index, value) arrays; values keep their order within a row."""
+        rows = np.asarray(rows, dtype=np.int64)
+        values = _compact(values)
+        if len(rows) and np.any(rows[1:] < rows[:-1]):
+            order = np.argsort(rows, kind="stable")
+            rows, values = rows[order], values[order]
+        if n_rows is None:
+            n_rows = len(labels) if labels is not None else (int(rows.max()) + 1 if len(rows) else 0)
+        offsets = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=offsets[1:])
+        return cls(offsets, values, labels)
+
+    @classmethod
+    def from_pairs(cls, keys, values) -> "CSR":
+        """Build from (key, value) pairs; string keys become labels in first-seen order."""
+        keys = np.asarray(keys)
+        if keys.dtype.kind in "iu" or len(keys) == 0:
+            return cls.from_rows(keys.astype(np.int64), values)
+        labels, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        order = np.argsort(first)
+        rank = np.empty(len(labels), dtype=np.int64)
+        rank[order] = np.arange(len(labels))
+        return cls.from_rows(rank[inverse], values, labels=labels[order].tolist())
+
+    @classmethod
+    def from_groups(cls, groups: dict) -> "CSR":
+        """Build from a ``{key: [ids]}`` dict (insertion order kept for string keys)."""
+        keys = [k for k, ids in groups.items() for _ in ids]
+        values = [i for ids in groups.values() for i in ids]
+        if groups and all(isinstance(k, str) for k in groups):
+            rows = [i for i, ids in enumerate(groups.values()) for _ in ids]
+            return cls.from_rows(rows, values, n_rows=len(groups), labels=list(groups))
+        return cls.from_pairs(keys, values)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __contains__(self, key) -> bool:
+        if self._rows is not None:
+            return key in self._rows
+        return isinstance(key, (int, np.integer)) and 0 <= key < len(self)
+
+    def __repr__(self) -> str:
+        return f"CSR(rows={len(self):,}, values={len(self.values):,}, {self.nbytes / 1e6:.1f} MB)"
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.values.nbytes
+
+    def row(self, key) -> int:
+        if self._rows is not None:
+            return self._rows[key]
+        if not 0 <= key < len(self):
+            raise KeyError(key)
+        return key
+
+    def neighbors(self, key) -> np.ndarray:
+        r = self.row(key)
+        return self.values[self.offsets[r]:self.offsets[r + 1]]
+
+    def degree(self, key) -> int:
+        r = self.row(key)
+        return int(self.offsets[r + 1] - self.offsets[r])
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def sample(self, rng: np.random.Generator, key, size=None):
+        """Uniform draw(s), with replacement, from ``key``'s neighbors."""
+        r = self.row(key)
+        lo, hi = int(self.offsets[r]), int(self.offsets[r + 1])
+        if lo == hi:
+            raise ValueError(f"{key!r} has no neighbors to sample")
+        return self.values[rng.integers(lo, hi, size)]
+
+    def ids(self, key=None, exclude=None) -> IdSequence:
+        """``key``'s neighbors as Python ints; without ``key``, every row except ``exclude`` back to back."""
+        if key is not None:
+            return IdSequence(self.neighbors(key))
+        if exclude is None or exclude not in self:
+            return IdSequence(self.values)
+        r = self.row(exclude)
+        return IdSequence(self.values[:self.offsets[r]], self.values[self.offsets[r + 1]:])
+
+
+def csr_from_query(conn, sql: str, params: tuple = (), batch_size: int = 100_000) -> CSR:
+    """CSR from a ``SELECT key, value`` query; row order within a key follows the query."""
+    keys, values = [], []
+    cur = conn.execute(sql, params)
+    while True:
+        batch = cur.fetchmany(batch_size)
+        if not batch:
+            break
+        k, v = zip(*batch)
+        keys.append(np.array(k))
+        values.append(np.array(v, dtype=np.int64))
+    if not keys:
+        return CSR(np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32))
+    return CSR.from_pairs(np.concatenate(keys), np.concatenate(values))
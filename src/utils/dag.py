@@ -0,0 +1,302 @@
+# Stage DAG scheduler: runs independent generation stages concurrently.
+import os
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, NamedTuple
+
+from src.utils.checkpoint import Checkpointer
+from src.utils.db_utils import insert_rows
+from src.utils.instrumentation import RunInstrumentation, probe
+from src.utils.rng import capture_rng_state, restore_rng_state
+from src.utils.writer import PipelinedWriter
+
+
+class StageResult(NamedTuple):
+    """What a stage's compute step hands back to the writer.
+
+    ``outputs`` maps declared output names to values for downstream stages;
+    ``tables`` is an ordered list of ``(table, columns, rows)`` to insert.
+    """
+    outputs: dict
+    tables: list
+
+
+@dataclass
+class Stage:
+    """A generation stage with declared data dependencies.
+
+    ``compute`` is called with one keyword argument per declared input and
+    must not touch the DB: it may run in a worker process. All writes are
+    funneled to the single writer that owns the connection.
+
+    A stage with ``checkpoint_every`` set is chunked: ``compute`` additionally
+    takes ``chunk_size`` and ``resume`` and yields ``(marker, StageResult)``
+    pairs. Chunked stages run in the writer process, which commits each chunk
+    together with its marker and RNG state; their outputs are then read back
+    with ``loaders``.
+    """
+    name: str
+    compute: Callable
+    inputs: tuple = ()
+    outputs: tuple = ()
+    tables: tuple = ()
+    title: str = ""
+    checkpoint_every: int = 0
+
+
+def _producers(stages: list) -> dict:
+    producers = {}
+    for stage in stages:
+        for out in stage.outputs:
+            if out in producers:
+                raise ValueError(f"Output {out!r} produced by both {producers[out]} and {stage.name}")
+            producers[out] = stage.name
+    return producers
+
+
+def topological_order(stages: list) -> list:
+    """Return stages sorted so every stage follows the producers of its inputs."""
+    producers = _producers(stages)
+    by_name = {s.name: s for s in stages}
+    ordered, state = [], {}
+
+    def visit(stage):
+        mark = state.get(stage.name)
+        if mark == "done":
+            return
+        if mark == "visiting":
+            raise ValueError(f"Stage dependency cycle through {stage.name!r}")
+        state[stage.name] = "visiting"
+        for inp in stage.inputs:
+            if inp in producers:
+                visit(by_name[producers[inp]])
+        state[stage.name] = "done"
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+
+def select_stages(stages: list, only: list = None) -> list:
+    """Pick the sub-graph for ``only`` plus every stage downstream of it.
+
+    Re-running a stage invalidates the tables of everything that consumed its
+    outputs, so dependents are always regenerated with it.
+    """
+    ordered = topological_order(stages)
+    if not only:
+        return ordered
+    known = {s.name for s in stages}
+    unknown = set(only) - known
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+
+    producers = _producers(stages)
+    selected = set(only)
+    for stage in ordered:
+        if any(producers.get(inp) in selected for inp in stage.inputs):
+            selected.add(stage.name)
+    return [s for s in ordered if s.name in selected]
+
+
+def critical_path(stages: list, durations: dict) -> tuple:
+    """Longest dependency chain by measured duration: (seconds, [stage names])."""
+    producers = _producers(stages)
+    best = {}
+    for stage in topological_order(stages):
+        preds = [best[producers[i]] for i in stage.inputs if producers.get(i) in best]
+        length, path = max(preds, default=(0.0, []))
+        best[stage.name] = (length + durations.get(stage.name, 0.0), path + [stage.name])
+    return max(best.values(), default=(0.0, []))
+
+
+def _execute(stage_name: str, compute: Callable, kwargs: dict, seed: int, seed_stage: Callable,
+             probe_settings: dict = None):
+    if seed_stage is not None:
+        seed_stage(seed, stage_name)
+    with probe(probe_settings) as metrics:
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        result = compute(**kwargs)
+        wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+    return result, wall, cpu, metrics
+
+
+def _write(conn: sqlite3.Connection, result: StageResult):
+    for table, columns, rows in result.tables:
+        insert_rows(conn, table, columns, rows)
+
+
+def _row_count(result: StageResult) -> int:
+    return sum(len(rows) for _, _, rows in result.tables)
+
+
+def _write_job(result: StageResult, checkpoint: Callable = None) -> Callable:
+    """Writer job: ``result``'s rows, then ``checkpoint``, committed as one transaction."""
+    def job(conn: sqlite3.Connection):
+        _write(conn, result)
+        if checkpoint is not None:
+            checkpoint()
+        conn.commit()
+    return job
+
+
+def run_dag(conn: sqlite3.Connection, stages: list, available: dict = None, workers: int = 1,
+            seed: int = 0, seed_stage: Callable = None, run: RunInstrumentation = None,
+            checkpoints: Checkpointer = None, loaders: dict = None, writer_queue: int = 0) -> dict:
+    """Run ``stages`` in dependency order and return all produced outputs.
+
+    With ``workers > 1`` every ready stage's compute step is submitted to a
+    process pool as soon as its inputs exist, while this process stays the
+    only writer. ``available`` supplies inputs produced outside the selected
+    sub-graph (loaded from an existing DB). Each stage is seeded on its own,
+    so the result is identical for any worker count.
+
+    With ``checkpoints``, each stage's rows are committed together with its
+    completion marker, and chunked stages resume from their last checkpoint.
+
+    With ``writer_queue > 0`` inserts and commits run on a writer thread
+    (src/utils/writer.py) holding up to that many pending batches, so a
+    chunked stage generates its next chunk while the previous one is written;
+    ``conn`` must then be opened with ``check_same_thread=False``. Every stage
+    waits for its writes before it ends, so stage metrics stay per stage.
+
+    A stage computed in a worker records its compute CPU, memory peak and
+    profile from that worker (``compute_*``); its own ``cpu_s``,
+    ``tracemalloc_peak_bytes`` and profile cover only the write step here.
+    """
+    values = dict(available or {})
+    pending = list(topological_order(stages))
+    total = len(pending)
+    timings = {}
+
+    missing = {i for s in pending for i in s.inputs} - set(values) - {o for s in pending for o in s.outputs}
+    if missing:
+        raise ValueError(f"No stage or loader provides: {', '.join(sorted(missing))}")
+    writer = PipelinedWriter(conn, writer_queue)
+
+    def ready():
+        return [s for s in pending if all(i in values for i in s.inputs)]
+
+    started = []
+
+    def banner(stage):
+        started.append(stage.name)
+        return f"[{len(started)}/{total}] {stage.title or stage.name}"
+
+    def finish(stage, result, compute_wall, compute_cpu, record):
+        record["compute_wall_s"] = round(compute_wall, 4)
+        record["compute_cpu_s"] = round(compute_cpu, 4)
+        write0 = time.perf_counter()
+        checkpoint = partial(checkpoints.stage_done, stage.name) if checkpoints is not None else None
+        writer.submit(_write_job(result, checkpoint), _row_count(result))
+        writer.flush()
+        values.update(result.outputs)
+        timings[stage.name] = compute_wall + time.perf_counter() - write0
+
+    def run_chunked(stage, record):
+        saved = checkpoints.stage_progress(stage.name) if checkpoints is not None else None
+        if seed_stage is not None:
+            seed_stage(seed, stage.name)
+        if saved:
+            restore_rng_state(saved["rng"])
+            if run is not None:
+                run.emit("resume", stage=stage.name, marker=saved["marker"])
+        kwargs = {i: values[i] for i in stage.inputs}
+        wall0, cpu0, before = time.perf_counter(), time.process_time(), writer.snapshot()
+        chunks = stage.compute(**kwargs, chunk_size=stage.checkpoint_every,
+                               resume=saved["marker"] if saved else None)
+        for marker, chunk in chunks:
+            checkpoint = None
+            if checkpoints is not None:
+                # RNG state as of this chunk's end, captured before the next chunk draws
+                checkpoint = partial(checkpoints.save_progress, stage.name, marker, capture_rng_state())
+            writer.submit(_write_job(chunk, checkpoint), _row_count(chunk))
+        writer.flush()
+        if checkpoints is not None:
+            checkpoints.stage_done(stage.name)
+        conn.commit()
+        wall = time.perf_counter() - wall0
+        stats = writer.stats(since=before)
+        # With a writer thread, generation only stops for a full queue or the final flush
+        record["compute_wall_s"] = round(wall - (stats["producer_wait_s"] if writer_queue else stats["busy_s"]), 4)
+        record["compute_cpu_s"] = round(time.process_time() - cpu0, 4)
+        record["write_s"] = stats["busy_s"]
+        record["writer"] = stats
+        values.update({out: loaders[out](conn) for out in stage.outputs})
+        timings[stage.name] = wall
+
+    def stage_ctx(stage, title=None, write_only=False):
+        if run is None:
+            if title:
+                print(f"\n{title}")
+            return _NullStage()
+        return run.stage(stage.name, title, tables=stage.tables, write_only=write_only)
+
+    with writer:
+        if workers <= 1:
+            while pending:
+                stage = ready()[0]
+                pending.remove(stage)
+                with stage_ctx(stage, banner(stage)) as record:
+                    if stage.checkpoint_every:
+                        run_chunked(stage, record)
+                        continue
+                    kwargs = {i: values[i] for i in stage.inputs}
+                    result, wall, cpu, _ = _execute(stage.name, stage.compute, kwargs, seed, seed_stage)
+                    finish(stage, result, wall, cpu, record)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                running = {}
+                while pending or running:
+                    for stage in ready():
+                        if stage.name in {s.name for s in running.values()}:
+                            continue
+                        if stage.checkpoint_every:
+                            # Runs in the writer process; results of finished workers wait meanwhile
+                            pending.remove(stage)
+                            with stage_ctx(stage, banner(stage)) as record:
+                                run_chunked(stage, record)
+                            continue
+                        kwargs = {i: values[i] for i in stage.inputs}
+                        settings = run.worker_probe(stage.name) if run is not None else None
+                        fut = pool.submit(_execute, stage.name, stage.compute, kwargs, seed, seed_stage, settings)
+                        running[fut] = stage
+                        if run is not None:
+                            run.emit("stage_submit", stage=stage.name, banner=banner(stage))
+                        else:
+                            print(f"\n{banner(stage)}")
+                    if not running:
+                        continue
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        stage = running.pop(fut)
+                        result, wall, cpu, metrics = fut.result()
+                        pending.remove(stage)
+                        # CPU, memory and profile of this context cover the write; the compute's come from the worker
+                        with stage_ctx(stage, write_only=True) as record:
+                            if run is not None:
+                                run.record_worker(record, metrics)
+                            finish(stage, result, wall, cpu, record)
+
+    if run is not None:
+        length, path = critical_path(stages, timings)
+        run.emit("critical_path", seconds=round(length, 4), stages=path,
+                 sum_of_stages=round(sum(timings.values()), 4))
+        run.emit("writer", **writer.stats())
+    return values
+
+
+class _NullStage:
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, *exc):
+        return False
+
+
+def default_workers() -> int:
+    return int(os.getenv("WORKERS", str(min(4, os.cpu_count() or 1))))
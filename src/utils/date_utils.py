@@ -2,6 +2,13 @@
 import random
 from datetime import datetime, timedelta
 
+from src.utils.sampling import AliasTable
+
+# Log-normal approximation of days to complete: most tasks 1-14 days, some longer
+COMPLETION_DAYS = [1, 2, 3, 5, 7, 10, 14, 21, 30]
+COMPLETION_WEIGHTS = [0.05, 0.15, 0.20, 0.20, 0.15, 0.10, 0.08, 0.05, 0.02]
+COMPLETION_TABLE = AliasTable(COMPLETION_DAYS, COMPLETION_WEIGHTS)
+
 
 def snap_to_weekday(date):
     #Snap a date to the nearest weekday (Mon-Fri).
@@ -13,7 +20,7 @@ def snap_to_weekday(date):
     return date
 
 
-def generate_due_date(created_at_dt, project_type="engineering", allow_overdue=False):
+def generate_due_date(created_at_dt, project_type="engineering", allow_overdue=False, now=None):
     """Generate realistic due date with distributions and weekend avoidance.
     
     Distribution:
@@ -22,13 +29,15 @@ def generate_due_date(created_at_dt, project_type="engineering", allow_overdue=F
     - 20% 30-90 days (backlog)
     - 10% no due date
     - 5% overdue (if allow_overdue=True)
+
+    Offsets are relative to `now` (defaults to the current UTC time).
     """
     roll = random.random()
     
     if roll < 0.10:
         return None  # No due date
     
-    now = datetime.utcnow()
+    now = now or datetime.utcnow()
     
     if allow_overdue and roll < 0.20:  # Higher chance for overdue: 5-10%
         days_overdue = random.randint(1, 60)
@@ -82,11 +91,7 @@ def generate_completed_at(created_at_str, now_str=None):
     created_dt = datetime.fromisoformat(created_at_str)
     now_dt = datetime.fromisoformat(now_str) if now_str else datetime.utcnow()
     
-    # Log-normal approximation: most tasks 1-14 days, some longer
-    completion_days = random.choices(
-        [1, 2, 3, 5, 7, 10, 14, 21, 30],
-        weights=[0.05, 0.15, 0.20, 0.20, 0.15, 0.10, 0.08, 0.05, 0.02]
-    )[0]
+    completion_days = COMPLETION_TABLE.draw()
     
     completed_dt = created_dt + timedelta(days=completion_days, hours=random.randint(1, 23))
     
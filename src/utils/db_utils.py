@@ -0,0 +1,14 @@
+# Small SQLite helpers shared by the orchestrator and generators.
+import sqlite3
+
+
+def insert_rows(conn: sqlite3.Connection, table: str, columns: tuple, rows: list):
+    """Bulk insert pre-built row tuples into ``table``."""
+    if not rows:
+        return 0
+    placeholders = ", ".join("?" for _ in columns)
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+        rows,
+    )
+    return len(rows)
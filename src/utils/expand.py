@@ -0,0 +1,123 @@
+# Vectorized expansion of parent rows into child rows with NumPy.
+#
+# Child counts are drawn per parent as arrays and flattened with repeat, so a
+# child table is built from a handful of array operations instead of nested
+# per-parent loops. Timestamps are datetime64[s] arrays; helpers convert back
+# to the ISO strings stored in SQLite.
+import numpy as np
+from faker.providers.lorem.en_US import Provider as LoremProvider
+
+from src.utils.date_utils import COMPLETION_TABLE
+
+DAY = np.timedelta64(1, "D")
+HOUR = np.timedelta64(1, "h")
+LOREM_WORDS = np.array(LoremProvider.word_list)
+# UUID hex digit groups (start, end) and the dashes before each
+_UUID_GROUPS = ((0, 8, 0), (8, 12, 1), (12, 16, 2), (16, 20, 3), (20, 32, 4))
+
+
+def child_counts(rng: np.random.Generator, n: int, rate: float, bounds: tuple) -> np.ndarray:
+    """Children per parent: ``randint(*bounds)`` for a ``rate`` share of parents, else 0."""
+    lo, hi = bounds
+    gate = rng.random(n) < rate
+    return np.where(gate, rng.integers(lo, hi + 1, n), 0)
+
+
+def parent_index(counts: np.ndarray) -> np.ndarray:
+    """Index of each child's parent, children of a parent contiguous and in parent order."""
+    return np.repeat(np.arange(len(counts)), counts)
+
+
+def to_times(isoformats: list) -> np.ndarray:
+    return np.array(isoformats, dtype="datetime64[s]")
+
+
+def iso_times(times: np.ndarray) -> list:
+    return np.datetime_as_string(times, unit="s").tolist()
+
+
+def iso_dates(times: np.ndarray) -> list:
+    return np.datetime_as_string(times.astype("datetime64[D]")).tolist()
+
+
+def child_times(parent_times: np.ndarray, offset_days: np.ndarray, now: np.datetime64) -> np.ndarray:
+    """Parent time plus a day offset, never before the parent nor after ``now`` (unless the parent is)."""
+    return np.minimum(parent_times + offset_days * DAY, np.maximum(parent_times, now))
+
+
+def completion_times(rng: np.random.Generator, created: np.ndarray, now: np.datetime64) -> np.ndarray:
+    """Vectorized ``generate_completed_at``: always at least an hour after ``created``."""
+    days = COMPLETION_TABLE.sample(rng, len(created))
+    hours = rng.integers(1, 24, len(created)) * HOUR
+    completed = created + days * DAY + hours
+    # Past "now": complete sometime between creation and now
+    room = np.maximum(1, (now - created) // DAY)
+    capped = created + np.minimum(days, room) * DAY + hours
+    return np.where(completed > now, capped, completed)
+
+
+def distinct_choices(rng: np.random.Generator, counts: np.ndarray, pool: np.ndarray) -> np.ndarray:
+    """``counts[i]`` distinct values of ``pool`` per parent, flattened in parent order."""
+    counts = np.minimum(counts, len(pool))
+    # Rank a random key per (parent, value) and keep each parent's first counts[i] ranks
+    order = np.argsort(rng.random((len(counts), len(pool))), axis=1)
+    keep = np.arange(len(pool))[None, :] < counts[:, None]
+    return pool[order[keep]]
+
+
+def pick(rng: np.random.Generator, values: np.ndarray, n: int) -> np.ndarray:
+    return values[rng.integers(0, len(values), n)]
+
+
+def uuid4_strings(rng: np.random.Generator, n: int) -> list:
+    """``n`` random version-4 UUID strings."""
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    # Lay the hex digits out with dashes as one ASCII buffer, then slice it
+    digits = np.frombuffer(raw.tobytes().hex().encode(), dtype=np.uint8).reshape(n, 32)
+    chars = np.full((n, 36), ord("-"), dtype=np.uint8)
+    for start, end, offset in _UUID_GROUPS:
+        chars[:, start + offset:end + offset] = digits[:, start:end]
+    text = chars.tobytes().decode("ascii")
+    return [text[i:i + 36] for i in range(0, 36 * n, 36)]
+
+
+def _variable(rng: np.random.Generator, nb, n: int) -> np.ndarray:
+    # Faker's variable lengths: 60%-140% of the nominal count, at least 1
+    nb = np.broadcast_to(np.asarray(nb), (n,))
+    lo = np.maximum(1, (nb * 0.6).astype(int))
+    hi = np.maximum(lo, (nb * 1.4).astype(int))
+    return rng.integers(lo, hi + 1)
+
+
+def lorem_words(rng: np.random.Generator, n: int) -> list:
+    return pick(rng, LOREM_WORDS, n).tolist()
+
+
+def lorem_sentences(rng: np.random.Generator, n: int, nb_words: int = 6) -> list:
+    """Faker-style lorem sentences (``fake.sentence``) from Faker's word list."""
+    counts = _variable(rng, nb_words, n).tolist()
+    words = lorem_words(rng, sum(counts))
+    sentences, pos = [], 0
+    for count in counts:
+        text = " ".join(words[pos:pos + count])
+        sentences.append(text[:1].upper() + text[1:] + ".")
+        pos += count
+    return sentences
+
+
+def lorem_paragraphs(rng: np.random.Generator, nb_sentences: np.ndarray) -> list:
+    """Faker-style paragraphs (``fake.paragraph``) with ``nb_sentences[i]`` nominal sentences each."""
+    counts = _variable(rng, nb_sentences, len(nb_sentences)).tolist()
+    sentences = lorem_sentences(rng, sum(counts))
+    paragraphs, pos = [], 0
+    for count in counts:
+        paragraphs.append(" ".join(sentences[pos:pos + count]))
+        pos += count
+    return paragraphs
+
+
+def nullable(ids: np.ndarray) -> list:
+    """Id array with -1 for NULL -> list of ints/None."""
+    return [i if i >= 0 else None for i in ids.tolist()]
@@ -0,0 +1,176 @@
+# Bulk person identities: names drawn by index from Faker's vocabularies, and unique emails.
+#
+# ``fake.name()`` runs Faker's formatting machinery once per person. Here each
+# locale's first- and last-name lists are loaded once. Names without a
+# Latin-script email form are dropped. Each list becomes an AliasTable over
+# vocabulary indexes, weighted by Faker's name frequencies where the locale
+# has them. A batch of people then takes a few array draws: a locale per
+# person (when several are mixed), then a first- and a last-name index
+# within that locale.
+#
+# Emails are ``first.last@domain``, from the ASCII-folded names. In id order,
+# the k-th person with the same first.last gets ``first.last{k}`` from the
+# second one on. Local parts otherwise hold only letters and the one dot, so
+# a suffixed address never equals a plain one. The scheme is therefore
+# collision-free over a batch, and the only bookkeeping is one sort of the
+# batch's name keys.
+#
+#     vocab = name_vocabulary({"en_US": 0.8, "de_DE": 0.2})
+#     first, last = vocab.sample(entity_rng(...), n)   # index arrays
+#     names = vocab.full_names(first, last)
+#     emails = vocab.emails(first, last, "acme.com")
+#
+# `python src/utils/identity.py` times a million identities.
+import importlib
+import json
+import sys
+import time
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.utils.sampling import AliasTable
+
+DEFAULT_LOCALES = {"en_US": 1.0}
+
+
+def ascii_local(name: str) -> str:
+    """The email form of a name: lower-case ASCII letters only ("O'Brien" -> "obrien", "Jürgen" -> "jurgen")."""
+    return "".join(c for c in unicodedata.normalize("NFKD", name).lower() if "a" <= c <= "z")
+
+
+def parse_locales(text: str) -> dict:
+    """``"en_US:0.8,de_DE:0.2"`` (weights optional, default 1) -> ``{"en_US": 0.8, "de_DE": 0.2}``."""
+    locales = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        locale, _, weight = item.partition(":")
+        locales[locale.strip()] = float(weight) if weight else 1.0
+    return locales
+
+
+def _provider_names(locale: str) -> tuple:
+    """(first names, last names) of a Faker locale, each as (values, weights)."""
+    try:
+        provider = importlib.import_module(f"faker.providers.person.{locale}").Provider
+    except ModuleNotFoundError:
+        raise ValueError(f"Faker has no person names for locale {locale!r}") from None
+    first = getattr(provider, "first_names", None) or {
+        **dict.fromkeys(provider.first_names_male, 1.0), **dict.fromkeys(provider.first_names_female, 1.0)}
+
+    def weighted(names):
+        if isinstance(names, dict):
+            return list(names), [float(w) for w in names.values()]
+        return list(names), [1.0] * len(names)
+
+    return weighted(first), weighted(provider.last_names)
+
+
+class NameVocabulary:
+    """First and last names of one or more locales, drawn as index arrays."""
+
+    def __init__(self, locales: dict):
+        if not locales or any(w < 0 for w in locales.values()) or not sum(locales.values()) > 0:
+            raise ValueError("locales must map locale names to non-negative weights with a positive sum")
+        self.locales = tuple(locales)
+        self._locale_table = AliasTable(np.arange(len(locales)), list(locales.values()))
+        names = {"first": [], "last": []}
+        self._tables = {"first": [], "last": []}
+        for locale in self.locales:
+            for part, (values, weights) in zip(("first", "last"), _provider_names(locale)):
+                keep = [i for i, value in enumerate(values) if ascii_local(value)]
+                if not keep:
+                    raise ValueError(f"Locale {locale} has no {part} names with a Latin-script email form")
+                offset = len(names[part])
+                names[part] += [values[i] for i in keep]
+                self._tables[part].append(AliasTable(np.arange(offset, offset + len(keep)),
+                                                     [weights[i] for i in keep]))
+        self.first = np.array(names["first"], dtype=object)
+        self.last = np.array(names["last"], dtype=object)
+        # Equal codes <=> equal email local parts, across locales too ("Müller" and "Muller")
+        self._first_local, self._first_code = np.unique([ascii_local(n) for n in self.first], return_inverse=True)
+        self._last_local, self._last_code = np.unique([ascii_local(n) for n in self.last], return_inverse=True)
+        self._first_local = self._first_local.astype(object)
+        self._last_local = self._last_local.astype(object)
+
+    def __repr__(self) -> str:
+        return f"NameVocabulary({', '.join(self.locales)}: {len(self.first)} first, {len(self.last)} last names)"
+
+    def sample(self, rng: np.random.Generator, size: int) -> tuple:
+        """(first, last) index arrays for ``size`` people."""
+        if len(self.locales) == 1:
+            return self._tables["first"][0].sample(rng, size), self._tables["last"][0].sample(rng, size)
+        locale = self._locale_table.sample(rng, size)
+        first = np.empty(size, dtype=np.int64)
+        last = np.empty(size, dtype=np.int64)
+        for i in range(len(self.locales)):
+            chosen = locale == i
+            count = int(np.count_nonzero(chosen))
+            first[chosen] = self._tables["first"][i].sample(rng, count)
+            last[chosen] = self._tables["last"][i].sample(rng, count)
+        return first, last
+
+    def full_names(self, first: np.ndarray, last: np.ndarray) -> list:
+        return [f"{a} {b}" for a, b in zip(self.first[first].tolist(), self.last[last].tolist())]
+
+    def emails(self, first: np.ndarray, last: np.ndarray, domain: str) -> list:
+        """One address per person, unique across the batch; earlier people get the unsuffixed form."""
+        first_code, last_code = self._first_code[first], self._last_code[last]
+        key = first_code * len(self._last_local) + last_code
+        # Rank of each person among those with the same local part, in batch order
+        order = np.argsort(key, kind="stable")
+        ordered = key[order]
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        run = np.arange(len(key)) - np.repeat(starts, np.diff(np.r_[starts, len(key)]))
+        rank = np.empty(len(key), dtype=np.int64)
+        rank[order] = run
+        return [f"{a}.{b}{k + 1 if k else ''}@{domain}"
+                for a, b, k in zip(self._first_local[first_code].tolist(), self._last_local[last_code].tolist(),
+                                   rank.tolist())]
+
+
+@lru_cache(maxsize=16)
+def _vocabulary(items: tuple) -> NameVocabulary:
+    return NameVocabulary(dict(items))
+
+
+def name_vocabulary(locales: dict = None) -> NameVocabulary:
+    """The (cached) vocabulary for a ``{locale: weight}`` mix; Faker's default en_US when not given."""
+    return _vocabulary(tuple((locales or DEFAULT_LOCALES).items()))
+
+
+def benchmark(people: int = 1_000_000, seed: int = 42) -> dict:
+    """People per second for ``fake.name()`` plus index-suffixed emails against bulk draws."""
+    from faker import Faker
+
+    fake = Faker()
+    Faker.seed(seed)
+    results = {}
+    started = time.perf_counter()
+    sample = 20_000
+    for i in range(sample):
+        name = fake.name()
+        f"{name.lower().replace(' ', '.')}.{i}@example.com"
+    results["fake.name"] = round(sample / (time.perf_counter() - started))
+    for locales in (DEFAULT_LOCALES, {"en_US": 0.6, "de_DE": 0.15, "fr_FR": 0.15, "es_ES": 0.1}):
+        started = time.perf_counter()
+        vocab = name_vocabulary(locales)
+        loaded = time.perf_counter() - started
+        rng = np.random.default_rng(seed)
+        started = time.perf_counter()
+        first, last = vocab.sample(rng, people)
+        names = vocab.full_names(first, last)
+        emails = vocab.emails(first, last, "example.com")
+        seconds = time.perf_counter() - started
+        label = ",".join(locales)
+        results[f"bulk[{label}]"] = round(people / seconds)
+        results[f"load_s[{label}]"] = round(loaded, 3)
+        results[f"unique_emails[{label}]"] = len(set(emails)) == len(emails) == len(names)
+        results[f"suffixed_share[{label}]"] = round(sum(not e.split("@")[0][-1].isalpha() for e in emails) / people, 3)
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(benchmark(), indent=2))
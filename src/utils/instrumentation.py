@@ -0,0 +1,283 @@
+# Run instrumentation: per-stage timings, SQL tracing, memory peaks and profiling hooks.
+import json
+import os
+import platform
+import re
+import sqlite3
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+# First keyword plus target table of a traced statement, e.g. ("INSERT", "tasks")
+_STATEMENT_RE = re.compile(
+    r"^\s*(INSERT(?:\s+OR\s+\w+)?\s+INTO|UPDATE|DELETE\s+FROM|SELECT|CREATE|DROP|PRAGMA|BEGIN|COMMIT|ROLLBACK)\s*([\w\"]*)",
+    re.IGNORECASE,
+)
+
+_active = None
+
+
+def active():
+    """Return the instrumentation of the run in progress, if any."""
+    return _active
+
+
+def progress(label: str, done: int, total: int):
+    """Report generator progress through the active run's event stream.
+
+    Generators call this from their inner loops; printing is throttled by the
+    run so a tight loop does not flood the terminal.
+    """
+    if _active is not None:
+        _active.progress(label, done, total)
+    elif done == total:
+        print(f"    {label}: {done:,}/{total:,}")
+
+
+class RunInstrumentation:
+    """Collects stage metrics for one generator run and writes a JSON report.
+
+    Every stage records wall and CPU time, rows written to its declared
+    tables, SQLite statements executed (via ``set_trace_callback``) and the
+    tracemalloc peak. Optionally each stage is profiled with cProfile or
+    pyinstrument.
+
+    A stage computed in a worker process is only written here: its CPU time,
+    memory peak and profile cover the write step (``"scope": "write"``), and
+    the worker's own measurements come back through ``worker_probe``.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, report_path: Path, profiler: str = None,
+                 trace_memory: bool = False, progress_interval: float = 2.0, quiet: bool = False):
+        if profiler and profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler {profiler!r}; expected one of {PROFILERS}")
+        self.conn = conn
+        self.report_path = Path(report_path)
+        self.profiler = profiler
+        self.trace_memory = trace_memory
+        self.progress_interval = progress_interval
+        self.quiet = quiet
+        self.stages = []
+        self.events = []
+        self.started = time.perf_counter()
+        self.started_at = datetime.utcnow().isoformat()
+        self._stage = None
+        self._last_progress = 0.0
+
+    # -- event stream -------------------------------------------------
+
+    def emit(self, event: str, **fields):
+        record = {"t": round(time.perf_counter() - self.started, 4), "event": event, **fields}
+        if event != "progress":
+            self.events.append(record)
+        if not self.quiet:
+            self._print(record)
+
+    def _print(self, record: dict):
+        event = record["event"]
+        if event in ("stage_start", "stage_submit") and record.get("banner"):
+            print(f"\n{record['banner']}")
+        elif event == "stage_end":
+            print(f"  ⏱ {record['stage']}: {record['wall_s']:.2f}s wall, "
+                  f"{record['statements']:,} statements" + (" (write step)" if record.get("scope") else ""))
+        elif event == "progress":
+            print(f"    {record['label']}: {record['done']:,}/{record['total']:,}")
+        elif event == "critical_path":
+            print(f"\n  Critical path {record['seconds']:.2f}s ({' -> '.join(record['stages'])}), "
+                  f"sum of stages {record['sum_of_stages']:.2f}s")
+        elif event == "writer":
+            print(f"  Writer: {record['jobs']:,} batches, {record['rows']:,} rows, busy {record['busy_pct']:.0f}% "
+                  f"of the run ({record['cpu_s']:.2f}s CPU), queue depth mean {record['queue_depth_mean']:g} max {record['queue_depth_max']}, "
+                  f"producer waited {record['producer_wait_s']:.2f}s")
+        elif event == "profile":
+            print(f"  Profile for {record['stage']} written to {record['path']}")
+
+    def progress(self, label: str, done: int, total: int):
+        now = time.perf_counter()
+        if done < total and now - self._last_progress < self.progress_interval:
+            return
+        self._last_progress = now
+        self.emit("progress", stage=self._stage["name"] if self._stage else None,
+                  label=label, done=done, total=total)
+
+    # -- SQL tracing ----------------------------------------------------
+
+    def _on_statement(self, sql: str):
+        stage = self._stage
+        if stage is None:
+            return
+        stage["statements"] += 1
+        m = _STATEMENT_RE.match(sql)
+        key = f"{m.group(1).split()[0].upper()} {m.group(2).strip(chr(34))}".strip() if m else "OTHER"
+        by_kind = stage["statements_by_kind"]
+        by_kind[key] = by_kind.get(key, 0) + 1
+
+    def _table_counts(self, tables) -> dict:
+        # Only the stage's declared tables: a COUNT(*) is a full scan of each
+        if not tables:
+            return {}
+        cur = self.conn.cursor()
+        placeholders = ", ".join("?" * len(tables))
+        cur.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name IN ({placeholders})",
+                    tuple(tables))
+        counts = {}
+        for (name,) in cur.fetchall():
+            cur.execute(f'SELECT COUNT(*) FROM "{name}"')
+            counts[name] = cur.fetchone()[0]
+        return counts
+
+    # -- stages -----------------------------------------------------------
+
+    @contextmanager
+    def stage(self, name: str, banner: str = None, tables=(), write_only: bool = False):
+        """Instrument one stage; ``banner`` is printed when it starts, if given.
+
+        ``tables`` are the stage's outputs, counted for ``rows_written``.
+        ``write_only`` marks a stage whose compute ran in a worker process.
+        """
+        global _active
+        before = self._table_counts(tables)
+        stage = {"name": name, "statements": 0, "statements_by_kind": {}}
+        if write_only:
+            stage["scope"] = "write"
+        self._stage = stage
+        _active = self
+        self.emit("stage_start", stage=name, banner=banner)
+
+        if self.trace_memory:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+        profiler = _start_profiler(self.profiler)
+        self.conn.set_trace_callback(self._on_statement)
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        error = None
+        try:
+            yield stage
+        except BaseException as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            stage["wall_s"] = round(time.perf_counter() - wall0, 4)
+            stage["cpu_s"] = round(time.process_time() - cpu0, 4)
+            self.conn.set_trace_callback(None)
+            if profiler is not None:
+                path = _stop_profiler(profiler, self.profiler,
+                                      self._profile_base(name + (".write" if write_only else "")))
+                self.emit("profile", stage=name, path=str(path))
+            if self.trace_memory:
+                stage["tracemalloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            after = self._table_counts(tables)
+            stage["rows_written"] = {
+                t: after[t] - before.get(t, 0) for t in after if after[t] != before.get(t, 0)
+            }
+            if error:
+                stage["error"] = error
+            self.stages.append(stage)
+            self._stage = None
+            _active = None
+            self.emit("stage_end", stage=name, wall_s=stage["wall_s"], cpu_s=stage["cpu_s"],
+                      statements=stage["statements"], rows_written=stage["rows_written"],
+                      **({"scope": stage["scope"]} if write_only else {}))
+
+    def _profile_base(self, stage_name: str) -> Path:
+        return self.report_path.with_name(f"{self.report_path.name.split('.')[0]}.{stage_name}")
+
+    def worker_probe(self, stage_name: str) -> dict:
+        """Picklable settings for measuring ``stage_name``'s compute inside a worker (see ``probe``)."""
+        return {"profiler": self.profiler, "trace_memory": self.trace_memory,
+                "profile_base": str(self._profile_base(stage_name))}
+
+    def record_worker(self, stage: dict, metrics: dict):
+        """Merge what ``probe`` measured in a worker into ``stage``'s record."""
+        if "tracemalloc_peak_bytes" in metrics:
+            stage["compute_tracemalloc_peak_bytes"] = metrics["tracemalloc_peak_bytes"]
+        if "profile" in metrics:
+            stage["compute_profile"] = metrics["profile"]
+            self.emit("profile", stage=stage["name"], path=metrics["profile"])
+
+    # -- report -----------------------------------------------------------
+
+    def write_report(self, **run_info) -> Path:
+        report = {
+            "started_at": self.started_at,
+            "total_wall_s": round(time.perf_counter() - self.started, 4),
+            "python": sys.version.split()[0],
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "pid": os.getpid(),
+            "profiler": self.profiler,
+            **run_info,
+            "stages": self.stages,
+            "events": self.events,
+        }
+        self.report_path.parent.mkdir(parents=True, exist_ok=True)
+        self.report_path.write_text(json.dumps(report, indent=2, default=str))
+        return self.report_path
+
+
+def _start_profiler(profiler: str):
+    if profiler == "cprofile":
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+        return prof
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("  Warning: pyinstrument not installed, skipping stage profile")
+            return None
+        prof = Profiler()
+        prof.start()
+        return prof
+    return None
+
+
+def _stop_profiler(prof, profiler: str, base: Path) -> Path:
+    """Stop ``prof`` and write it next to the run report; returns the file written."""
+    if profiler == "cprofile":
+        prof.disable()
+        path = base.with_name(f"{base.name}.prof")
+        prof.dump_stats(str(path))
+    else:
+        prof.stop()
+        path = base.with_name(f"{base.name}.html")
+        path.write_text(prof.output_html())
+    return path
+
+
+@contextmanager
+def probe(settings: dict = None):
+    """Measure a stage's compute in a worker process per ``RunInstrumentation.worker_probe``.
+
+    Yields a dict that holds the tracemalloc peak and the profile path once the
+    block exits; it is returned to the parent with the stage's result.
+    """
+    metrics = {}
+    if not settings:
+        yield metrics
+        return
+    if settings["trace_memory"]:
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+    profiler = _start_profiler(settings["profiler"])
+    try:
+        yield metrics
+    finally:
+        if profiler is not None:
+            metrics["profile"] = str(_stop_profiler(profiler, settings["profiler"], Path(settings["profile_base"])))
+        if settings["trace_memory"]:
+            metrics["tracemalloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+
+def report_path_for(db_path: Path) -> Path:
+    """Run reports live next to the DB: output/asana_simulation.run.json."""
+    db_path = Path(db_path)
+    return db_path.with_name(f"{db_path.stem}.run.json")
@@ -1,13 +1,51 @@
 # LLM-enhanced content generation with fallback to templates.
+#
+# The generate_*_llm functions decide per item (LLM_PERCENTAGE) between the
+# LLM and templates; the llm_* functions always ask the text backend, which is
+# OpenRouter or the offline n-gram model (see llm_stub.text_backend).
 import os
 import random
-from src.utils.llm_stub import generate_text
+from faker import Faker
+from src.utils.llm_stub import generate_text, text_backend
+from src.utils.rng import fake
 from src.utils.task_naming import generate_task_name as template_task_name
 
+TEMPLATE_COMMENTS = [
+    "Looks good, approved!",
+    "Can you provide more details on this?",
+    "Working on this now.",
+    "This is blocked by another task.",
+    "Ready for review.",
+    "LGTM, merging.",
+    "Let's discuss this in the standup.",
+    "Added some notes in the description.",
+    "Can we prioritize this?",
+    "Moving to next sprint."
+]
+
+
+def llm_percentage() -> int:
+    return int(os.getenv("LLM_PERCENTAGE", "0").strip() or 0)
+
+
 def should_use_llm() -> bool:
     # Determine if LLM should be used based on configuration.
-    llm_percentage = int(os.getenv("LLM_PERCENTAGE", "0"))
-    return random.random() * 100 < llm_percentage
+    return random.random() * 100 < llm_percentage()
+
+
+def text_config() -> dict:
+    """LLM settings that shape generated text, as recorded in a DB's generation config."""
+    if not llm_percentage():
+        return {}
+    return {"llm_percentage": llm_percentage(), "llm_backend": text_backend()}
+
+
+def check_text_config(config: dict):
+    """Refuse to add text to a DB generated under different LLM settings."""
+    stored = {k: config[k] for k in ("llm_percentage", "llm_backend") if k in config}
+    if stored != text_config():
+        raise RuntimeError(f"DB text was generated with {stored or 'LLM_PERCENTAGE=0'}, "
+                           f"current settings are {text_config() or 'LLM_PERCENTAGE=0'}; use the same")
 
 def generate_task_name_llm(project_type: str, project_name: str = "", component: str = "") -> str:
     """
@@ -24,8 +62,11 @@ def generate_task_name_llm(project_type: str, project_name: str = "", component:
     if not should_use_llm():
         # Use template-based generation (fast, deterministic)
         return template_task_name(project_type)
-    
-    # Use LLM generation
+    return llm_task_name(project_type, project_name, component)
+
+
+def llm_task_name(project_type: str, project_name: str = "", component: str = "") -> str:
+    """Task name from the text backend, falling back to templates on unusable output."""
     if project_type == "engineering":
         prompt = f"""Generate a concise Asana-style task title for an engineering team.
 Project: {project_name or 'Platform Development'}
@@ -97,8 +138,6 @@ def generate_task_description_llm(task_name: str, project_type: str) -> str:
     
     if not should_use_llm():
         # Template-based fallback
-        from faker import Faker
-        fake = Faker()
         Faker.seed(random.randint(0, 10000))
         
         if rand < 0.7:  # Short description
@@ -108,15 +147,19 @@ def generate_task_description_llm(task_name: str, project_type: str) -> str:
             desc += "\n\nAcceptance Criteria:\n"
             desc += "\n".join([f"- {fake.sentence()}" for _ in range(random.randint(2, 4))])
             return desc
-    
-    # LLM-based generation
-    if rand < 0.7:  # Short description
-        prompt = f"""Write a brief 1-2 sentence task description for: "{task_name}"
+    return llm_task_description(task_name, detailed=rand >= 0.7, project_type=project_type)
+
+
+def llm_task_description(task_name: str, detailed: bool = False, project_type: str = None) -> str:
+    """Short (1-2 sentences) or detailed (with acceptance criteria) description from the text backend."""
+    context = f"\nProject type: {project_type}" if project_type else ""
+    if not detailed:
+        prompt = f"""Write a brief 1-2 sentence task description for: "{task_name}"{context}
 Keep it concise and professional.
 Description:"""
         max_tokens = 100
     else:  # Detailed description
-        prompt = f"""Write a detailed task description for: "{task_name}"
+        prompt = f"""Write a detailed task description for: "{task_name}"{context}
 
 Include:
 1. Brief overview (1-2 sentences)
@@ -151,20 +194,12 @@ def generate_comment_llm(task_name: str) -> str:
     """
     if not should_use_llm():
         # Template-based fallback
-        comments = [
-            "Looks good, approved!",
-            "Can you provide more details on this?",
-            "Working on this now.",
-            "This is blocked by another task.",
-            "Ready for review.",
-            "LGTM, merging.",
-            "Let's discuss this in the standup.",
-            "Added some notes in the description.",
-            "Can we prioritize this?",
-            "Moving to next sprint."
-        ]
-        return random.choice(comments)
-    
+        return random.choice(TEMPLATE_COMMENTS)
+    return llm_comment(task_name)
+
+
+def llm_comment(task_name: str) -> str:
+    """Comment on ``task_name`` from the text backend."""
     prompt = f"""Write a brief realistic comment a team member might leave on task: "{task_name}"
 
 Examples:
@@ -1,17 +1,36 @@
-#LLM integration via OpenRouter API.
+#LLM integration via OpenRouter API, with an offline n-gram backend.
+import json
 import os
-import requests
 from typing import Optional
 import random
 
+from src.utils import ngram_text
+
+# auto: OpenRouter when OPENROUTER_API_KEY is set, else the local n-gram model
+# openrouter | ngram | template (the fixed keyword fallback)
+LLM_BACKENDS = ("auto", "openrouter", "ngram", "template")
+
+
+def text_backend() -> str:
+    backend = os.getenv("LLM_BACKEND", "auto").strip() or "auto"
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"LLM_BACKEND must be one of {', '.join(LLM_BACKENDS)}, not {backend!r}")
+    if backend == "auto":
+        return "openrouter" if (os.getenv("OPENROUTER_API_KEY") or "").strip() else "ngram"
+    return backend
+
+
 def generate_text(prompt: str, temperature: float = 0.7, max_tokens: int = 200, model: str = "openai/gpt-3.5-turbo") -> str:
     
-    api_key = os.getenv("OPENROUTER_API_KEY")
+    api_key = (os.getenv("OPENROUTER_API_KEY") or "").strip()
+    backend = text_backend()
     
-    # If no API key, return fallback (template-based)
-    if not api_key:
-        return _fallback_generation(prompt, max_tokens)
+    # Offline backends: n-gram model (seeded by the caller's random stream) or fixed templates
+    if backend != "openrouter" or not api_key:
+        return _offline_generation(prompt, max_tokens, backend)
     
+    # requests is only needed on the network path; offline builds never pay for its import
+    import requests
     try:
         response = requests.post(
             url="https://openrouter.ai/api/v1/chat/completions",
@@ -33,14 +52,32 @@ def generate_text(prompt: str, temperature: float = 0.7, max_tokens: int = 200,
         
         if response.status_code == 200:
             result = response.json()
-            return result["choices"][0]["message"]["content"].strip()
+            text = result["choices"][0]["message"]["content"].strip()
+            _cache_response(prompt, text)
+            return text
         else:
             print(f"Warning: OpenRouter API error {response.status_code}, using fallback generation")
-            return _fallback_generation(prompt, max_tokens)
+            return _offline_generation(prompt, max_tokens)
             
     except Exception as e:
         print(f"Warning: LLM call failed ({str(e)}), using fallback generation")
-        return _fallback_generation(prompt, max_tokens)
+        return _offline_generation(prompt, max_tokens)
+
+
+def _cache_response(prompt: str, text: str):
+    # Real responses become training text for the n-gram backend (LLM_CACHE)
+    kind = ngram_text.prompt_kind(prompt)
+    if ngram_text.LLM_CACHE and kind and text:
+        with open(ngram_text.LLM_CACHE, "a") as f:
+            f.write(json.dumps({"kind": kind, "text": text}) + "\n")
+
+
+def _offline_generation(prompt: str, max_tokens: int, backend: str = "ngram") -> str:
+    if backend != "template":
+        text = ngram_text.generate(prompt, max_tokens)
+        if text:
+            return text
+    return _fallback_generation(prompt, max_tokens)
 
 
 def _fallback_generation(prompt: str, max_tokens: int) -> str:
@@ -0,0 +1,316 @@
+# Offline n-gram text backend: a CPU-only stand-in for the LLM.
+#
+# Word-level Markov models (order 3, backing off to shorter contexts) are
+# trained per kind of text from the task_naming vocabularies, the example
+# bullets in prompts/llm_prompts.txt and, when LLM_CACHE points at one, a
+# JSONL cache of past LLM responses. Titles, descriptions and acceptance
+# criteria have one model per project type. Each model stores, per context,
+# the possible next words and their cumulative counts, so a word costs a dict
+# lookup and a bisect. Draws come from the global ``random`` module (or a given
+# ``random.Random``), so text is reproducible under the per-entity streams.
+#
+# Examples may hold slots such as ``{component}`` or ``{person}``. The model
+# treats them as words. After generation each slot is filled from the task
+# title when the title names one (its component, campaign, deliverable or ops
+# category), else drawn from SLOT_VALUES once per text; quantities from
+# SLOT_NUMBERS at each occurrence.
+import json
+import os
+import random
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import product
+from pathlib import Path
+
+from src.utils import task_naming
+from src.utils.identity import name_vocabulary
+
+PROMPTS_FILE = Path(__file__).resolve().parents[2] / "prompts" / "llm_prompts.txt"
+LLM_CACHE = os.getenv("LLM_CACHE") or None  # JSONL of {"kind", "text"} from past LLM responses
+ORDER = 3
+START, END = "<s>", "</s>"
+MAX_WORDS = 40
+
+PROJECT_TYPES = ("engineering", "marketing", "ops")
+# Section headers of prompts/llm_prompts.txt -> model kind
+PROMPT_SECTIONS = {
+    **{f"Task name prompt ({t})": f"title:{t}" for t in PROJECT_TYPES},
+    **{f"Task description prompt ({t})": f"description:{t}" for t in PROJECT_TYPES},
+    **{f"Acceptance criteria prompt ({t})": f"criteria:{t}" for t in PROJECT_TYPES},
+    "Task description prompt": "description",
+    "Acceptance criteria prompt": "criteria",
+    "Comment prompt": "comment",
+}
+
+SLOT = re.compile(r"\{(\w+)\}")
+SLOT_VALUES = {
+    "component": task_naming.ENGINEERING_COMPONENTS,
+    "campaign": task_naming.MARKETING_CAMPAIGNS,
+    "deliverable": task_naming.MARKETING_DELIVERABLES,
+    "category": [c.lower() for c in task_naming.OPS_CATEGORIES],
+    "team": ["design", "legal", "data", "platform", "support", "finance", "security", "sales", "product",
+             "QA", "analytics", "brand", "growth", "infrastructure"],
+    "channel": ["email", "LinkedIn", "the blog", "paid search", "Instagram", "YouTube", "the newsletter",
+                "partner sites", "podcast ads", "the community forum"],
+    "vendor": ["Northwind", "Globex", "Initech", "Contoso", "Hooli", "Vandelay Industries", "Tyrell Systems",
+               "Aperture Supplies", "Umbrella Logistics", "Wonka Catering", "Stark Office", "Dunder Mifflin"],
+    "weekday": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
+    "when": ["today", "tomorrow", "this afternoon", "later today", "after lunch", "this week", "next week",
+             "by end of day", "on Monday", "on Tuesday", "on Wednesday", "on Thursday", "on Friday",
+             "before the standup", "after the planning meeting"],
+    "person": lambda rng: rng.choice(_first_names()),
+    "person2": lambda rng: rng.choice(_first_names()),
+}
+# What a comment or description talks about when the title names nothing
+SLOT_VALUES["subject"] = SLOT_VALUES["component"] + SLOT_VALUES["deliverable"] + SLOT_VALUES["category"]
+# Quantities are drawn afresh at every occurrence
+SLOT_NUMBERS = {
+    "number": lambda rng: str(rng.randint(2, 30)),
+    "percent": lambda rng: str(rng.randint(3, 60)),
+    "ms": lambda rng: str(rng.choice((100, 150, 200, 250, 300, 400, 500, 800))),
+    "version": lambda rng: f"{rng.randint(1, 6)}.{rng.randint(0, 24)}",
+}
+
+# Comments are short, so a share of them is addressed to someone or signed off with a follow-up
+COMMENT_OPENERS = ["{person}: ", "Hey {person}! ", "Thanks {person}. ", "@{person} ", "Update: ",
+                   "Quick update on the {subject}: ", "Following up on {weekday}'s sync: ", "FYI {person}: "]
+COMMENT_CLOSERS = [" cc {person}", " cc @{person2}", " I'll check back {when}.", " Happy to pair on it {when}.",
+                   " Thanks {person}!", " ETA {when}.", " More details in the {subject} doc.",
+                   " Ping me if {person} needs anything."]
+COMMENT_OPENER_SHARE, COMMENT_CLOSER_SHARE = 0.4, 0.35
+
+
+class NgramModel:
+    """Markov chain over words with backoff from ``order - 1`` context words down to none."""
+
+    def __init__(self, sentences, order: int = ORDER):
+        self.order = order
+        counts = {}
+        for sentence in sentences:
+            words = [START] * (order - 1) + sentence.split() + [END]
+            for i in range(order - 1, len(words)):
+                for n in range(order):
+                    context = tuple(words[i - n:i])
+                    nxt = counts.setdefault(context, {})
+                    nxt[words[i]] = nxt.get(words[i], 0) + 1
+        # context -> (next words, cumulative counts)
+        self.table = {}
+        for context, nxt in counts.items():
+            total, cum = 0, []
+            for count in nxt.values():
+                total += count
+                cum.append(total)
+            self.table[context] = (tuple(nxt), tuple(cum))
+
+    def _next(self, context: tuple, rng) -> str:
+        for n in range(len(context), -1, -1):
+            entry = self.table.get(context[len(context) - n:])
+            if entry:
+                words, cum = entry
+                return words[bisect_right(cum, rng.random() * cum[-1])]
+        return END
+
+    def sentence(self, rng=random, max_words: int = MAX_WORDS) -> str:
+        context = (START,) * (self.order - 1)
+        words = []
+        while len(words) < max_words:
+            word = self._next(context, rng)
+            if word == END:
+                break
+            words.append(word)
+            context = context[1:] + (word,)
+        return " ".join(words)
+
+
+def template_titles(project_type: str) -> list:
+    """Every title the task_naming templates can produce for ``project_type``."""
+    if project_type == "engineering":
+        return [f"{component} - {action} {detail}"
+                for component, (action, details) in product(task_naming.ENGINEERING_COMPONENTS,
+                                                            task_naming.ENGINEERING_ACTIONS)
+                for detail in details]
+    if project_type == "marketing":
+        return [f"{campaign} - Create {deliverable}"
+                for campaign, deliverable in product(task_naming.MARKETING_CAMPAIGNS,
+                                                     task_naming.MARKETING_DELIVERABLES)]
+    return [f"{action} {category.lower()} process"
+            for action, category in product(task_naming.OPS_ACTIONS, task_naming.OPS_CATEGORIES)]
+
+
+def prompt_examples(path: Path = PROMPTS_FILE) -> dict:
+    """``{kind: [example, ...]}`` from the ``- `` bullets under each prompt section."""
+    examples, kind = {}, None
+    if not path.exists():
+        return examples
+    for line in path.read_text().splitlines():
+        if line.startswith("### "):
+            kind = PROMPT_SECTIONS.get(line[4:].strip())
+        elif kind and line.startswith("- "):
+            examples.setdefault(kind, []).append(line[2:].strip())
+    return examples
+
+
+def cached_responses(path=LLM_CACHE) -> dict:
+    responses = {}
+    if path and Path(path).exists():
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    responses.setdefault(record["kind"], []).append(record["text"])
+    return responses
+
+
+def _sentences(texts: list) -> list:
+    # Descriptions and comments are modelled sentence by sentence
+    return [s for text in texts for s in re.split(r"(?<=[.!?])\s+", text.strip()) if s]
+
+
+def _texts(kind: str) -> list:
+    # A typed kind also learns from untyped examples ("description:ops" from "description");
+    # an untyped one learns from every type
+    base, _, project_type = kind.partition(":")
+    return [text for source in (prompt_examples(), cached_responses()) for key, texts in source.items()
+            if key == kind or (project_type and key == base) or (not project_type and key.startswith(base + ":"))
+            for text in texts]
+
+
+@lru_cache(maxsize=None)
+def model(kind: str) -> NgramModel:
+    texts = _texts(kind)
+    if kind.startswith("title:"):
+        texts += template_titles(kind.split(":", 1)[1])
+    else:
+        texts = _sentences(texts)
+    return NgramModel(texts)
+
+
+@lru_cache(maxsize=None)
+def _first_names() -> list:
+    return name_vocabulary().first.tolist()
+
+
+def _project_type(project_type: str) -> str:
+    return project_type if project_type in ("engineering", "marketing") else "ops"
+
+
+def title_slots(title: str, project_type: str = None) -> dict:
+    """Slot values a task title names: "Summer Sale - Create blog posts" -> campaign and deliverable.
+
+    Without ``project_type`` it is guessed from the title's shape.
+    """
+    slots = {}
+    head, sep, rest = title.partition(" - ")
+    if project_type is None:
+        project_type = ("marketing" if rest.startswith("Create ") else "engineering") if sep else "ops"
+    if sep and head:
+        slots["component" if project_type == "engineering" else "campaign"] = head
+        if rest.startswith("Create "):
+            slots["deliverable"] = rest[len("Create "):]
+    lower = title.lower()
+    for category in SLOT_VALUES["category"]:
+        if category in lower:
+            slots["category"] = category
+    subject = slots.get("deliverable") or slots.get("component") or slots.get("category")
+    if subject:
+        slots["subject"] = subject
+    return slots
+
+
+def fill_slots(text: str, slots: dict, rng=random) -> str:
+    """``text`` with each ``{slot}`` replaced; ``slots`` keeps the values, so a name or team repeats."""
+    def value(match):
+        name = match.group(1)
+        if name in SLOT_NUMBERS:
+            return SLOT_NUMBERS[name](rng)
+        if name not in SLOT_VALUES:
+            return match.group(0)
+        if name not in slots:
+            values = SLOT_VALUES[name]
+            slots[name] = values(rng) if callable(values) else rng.choice(values)
+        return slots[name]
+    return SLOT.sub(value, text)
+
+
+def _capitalize(text: str) -> str:
+    return text[:1].upper() + text[1:]
+
+
+def _sentence(kind: str, slots: dict, rng) -> str:
+    text = _capitalize(fill_slots(model(kind).sentence(rng), slots, rng))
+    return text if text.endswith((".", "!", "?")) else text + "."
+
+
+def _sentences_of(kind: str, count: int, slots: dict, rng) -> list:
+    # Repeats are dropped rather than redrawn, so the stream advances by exactly ``count`` sentences
+    sentences = []
+    for _ in range(count):
+        sentence = _sentence(kind, slots, rng)
+        if sentence not in sentences:
+            sentences.append(sentence)
+    return sentences
+
+
+def title(project_type: str, rng=random) -> str:
+    return model(f"title:{_project_type(project_type)}").sentence(rng)
+
+
+def description(rng=random, detailed: bool = False, project_type: str = None, task_title: str = "") -> str:
+    """Overview sentences (plus acceptance criteria when ``detailed``) for a task of ``project_type``."""
+    suffix = f":{_project_type(project_type)}" if project_type else ""
+    slots = title_slots(task_title, _project_type(project_type)) if task_title else {}
+    overview = " ".join(_sentences_of("description" + suffix, rng.randint(1, 2), slots, rng))
+    if not detailed:
+        return overview
+    criteria = "\n".join(f"- {c}" for c in _sentences_of("criteria" + suffix, rng.randint(2, 4), slots, rng))
+    return f"{overview}\n\nAcceptance Criteria:\n{criteria}"
+
+
+def comment(rng=random, task_title: str = "") -> str:
+    slots = title_slots(task_title) if task_title else {}
+    text = " ".join(_sentences_of("comment", 1 if rng.random() < 0.8 else 2, slots, rng))
+    if rng.random() < COMMENT_OPENER_SHARE:
+        text = fill_slots(rng.choice(COMMENT_OPENERS), slots, rng) + text
+    if rng.random() < COMMENT_CLOSER_SHARE:
+        text += fill_slots(rng.choice(COMMENT_CLOSERS), slots, rng)
+    return text
+
+
+PROMPT_TASK = re.compile(r'(?:for|on task): "(.*)"')
+PROMPT_PROJECT_TYPE = re.compile(r"^project type: (\w+)", re.MULTILINE)
+
+
+def prompt_kind(prompt: str):
+    """What an LLM prompt asks for: ``title:<type>``, ``description[:<type>]``, ``comment`` or None."""
+    text = prompt.lower()
+    # Prompts end with the field to fill ("Task title:"), which embedded names cannot mislead
+    lines = text.strip().splitlines()
+    cue = lines[-1] if lines and lines[-1].endswith(":") else text
+    if "title" in cue or "task name" in cue:
+        if "engineering" in text:
+            return "title:engineering"
+        return "title:marketing" if "marketing" in text else "title:ops"
+    if "description" in cue:
+        project_type = PROMPT_PROJECT_TYPE.search(text)
+        return f"description:{_project_type(project_type.group(1))}" if project_type else "description"
+    if "comment" in cue:
+        return "comment"
+    return None
+
+
+def generate(prompt: str, max_tokens: int = 200, rng=random):
+    """Text answering ``prompt``, or None for prompts the model has no kind for."""
+    kind = prompt_kind(prompt)
+    if kind is None:
+        return None
+    task = PROMPT_TASK.search(prompt)
+    task_title = task.group(1) if task else ""
+    if kind.startswith("title:"):
+        text = title(kind.split(":", 1)[1], rng)
+    elif kind.startswith("description"):
+        text = description(rng, "acceptance criteria" in prompt.lower(), kind.partition(":")[2] or None, task_title)
+    else:
+        text = comment(rng, task_title)
+    # Roughly four characters per token
+    return text[:max_tokens * 4]
@@ -0,0 +1,71 @@
+# Random seeding helpers so every generation stage is reproducible on its own.
+import random
+import zlib
+
+import faker.generator
+import numpy as np
+from faker import Faker
+
+# The one Faker the generators share; instances all draw from faker.generator.random,
+# so sharing changes no output and saves building a Faker per module at import
+fake = Faker()
+
+
+def stage_seed(seed: int, stage: str) -> str:
+    return f"{seed}:{stage}"
+
+
+def seed_stage(seed: int, stage: str):
+    """Seed `random` and Faker for one stage.
+
+    Each stage draws from its own seed, so its output does not depend on which
+    stages ran before it or whether it ran in a worker process.
+    """
+    key = stage_seed(seed, stage)
+    random.seed(key)
+    Faker.seed(key)
+
+
+def entity_seeds(seed: int, kind: str, index: int) -> tuple:
+    """Independent (random, Faker) seeds for one entity's stream.
+
+    Derived with NumPy's SeedSequence from (seed, kind, index) alone, so an
+    entity's values never depend on how many draws other entities made.
+    """
+    state = np.random.SeedSequence(seed, spawn_key=(zlib.crc32(kind.encode()), index)).generate_state(8)
+    return int.from_bytes(state[:4].tobytes(), "little"), int.from_bytes(state[4:].tobytes(), "little")
+
+
+def entity_rng(seed: int, kind: str, index: int) -> np.random.Generator:
+    """NumPy generator for the stream of ``kind`` of entity ``index`` (vectorized generators)."""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(zlib.crc32(kind.encode()), index)))
+
+
+def seed_entity(seed: int, kind: str, index: int):
+    """Point `random` and Faker at the stream for ``kind`` (usually a table) of entity ``index``."""
+    py_seed, faker_seed = entity_seeds(seed, kind, index)
+    random.seed(py_seed)
+    Faker.seed(faker_seed)
+
+
+def capture_rng_state() -> dict:
+    """JSON-serializable state of `random` and Faker's shared generator."""
+    return {
+        "random": _state_to_json(random.getstate()),
+        "faker": _state_to_json(faker.generator.random.getstate()),
+    }
+
+
+def restore_rng_state(state: dict):
+    random.setstate(_state_from_json(state["random"]))
+    faker.generator.random.setstate(_state_from_json(state["faker"]))
+
+
+def _state_to_json(state):
+    version, internal, gauss_next = state
+    return [version, list(internal), gauss_next]
+
+
+def _state_from_json(state):
+    version, internal, gauss_next = state
+    return version, tuple(internal), gauss_next
@@ -0,0 +1,124 @@
+# Weighted sampling from fixed discrete distributions through Walker/Vose alias tables.
+#
+# ``random.choices(values, weights)[0]`` re-accumulates the weights and builds
+# a list on every call. An AliasTable is built once per distribution (at
+# import for the generators' fixed ones) and then costs O(1) per draw: one
+# uniform picks a column and, from its fractional part, either the column's
+# own value or its alias. Scalar draws take one ``random()`` from the given
+# stream (the ``random`` module, which seed_entity points at the entity's
+# stream, or a ``random.Random``), so they advance it exactly like the
+# ``random.choices`` calls they replace. Bulk draws take a NumPy Generator,
+# such as src.utils.rng.entity_rng's.
+#
+#     PRIORITY = AliasTable(["low", "medium", "high", "urgent"], [0.4, 0.4, 0.15, 0.05])
+#     PRIORITY.draw()                      # one value from `random`
+#     PRIORITY.sample(entity_rng(...), n)  # n values as a NumPy array
+#
+# `python src/utils/sampling.py` times a draw against random.choices and
+# NumPy's choice.
+import json
+import random
+import time
+from functools import lru_cache
+from typing import Sequence
+
+import numpy as np
+
+
+class AliasTable:
+    """O(1) draws from ``values`` with probabilities proportional to ``weights``."""
+
+    def __init__(self, values: Sequence, weights: Sequence[float]):
+        if len(values) != len(weights) or not len(values):
+            raise ValueError("values and weights must be non-empty and of equal length")
+        if any(w < 0 for w in weights) or not sum(weights) > 0:
+            raise ValueError("weights must be non-negative with a positive sum")
+        n = len(values)
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights]
+        prob, alias = [1.0] * n, list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        # Vose: pair each under-full column with an over-full one that tops it up
+        while small and large:
+            s, g = small.pop(), large.pop()
+            prob[s], alias[s] = scaled[s], g
+            scaled[g] -= 1.0 - scaled[s]
+            (small if scaled[g] < 1.0 else large).append(g)
+        # Whatever is left is full up to rounding
+        self.values = tuple(values)
+        self.prob = tuple(prob)
+        self.alias = tuple(alias)
+        self.n = n
+        self._values = np.asarray(values)
+        self._prob = np.asarray(prob)
+        self._alias = np.asarray(alias, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __repr__(self) -> str:
+        return f"AliasTable({dict(zip(self.values, self.probabilities().round(4).tolist()))})"
+
+    def draw(self, rng=random):
+        """One value, using a single ``rng.random()``."""
+        u = rng.random() * self.n
+        i = int(u)
+        return self.values[i] if u - i < self.prob[i] else self.values[self.alias[i]]
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        """``size`` values as an array, using ``size`` uniforms from ``rng``."""
+        u = rng.random(size) * self.n
+        i = u.astype(np.int64)
+        return self._values[np.where(u - i < self._prob[i], i, self._alias[i])]
+
+    def probabilities(self) -> np.ndarray:
+        """The distribution the table encodes, per value (for checks)."""
+        p = self._prob / self.n
+        out = p.copy()
+        np.add.at(out, self._alias, (1.0 - self._prob) / self.n)
+        return out
+
+
+@lru_cache(maxsize=64)
+def _table(items: tuple) -> AliasTable:
+    return AliasTable([value for value, _ in items], [weight for _, weight in items])
+
+
+def alias_table(weights: dict) -> AliasTable:
+    """The (cached) table for a ``{value: weight}`` mapping, for distributions given at run time."""
+    return _table(tuple(weights.items()))
+
+
+def benchmark(draws: int = 200_000, seed: int = 42) -> dict:
+    """Nanoseconds per draw: ``random.choices`` against ``draw``, NumPy's ``choice`` against ``sample``."""
+    values = ["low", "medium", "high", "urgent"]
+    weights = [0.4, 0.4, 0.15, 0.05]
+    table = AliasTable(values, weights)
+    rng = random.Random(seed)
+    p = np.asarray(weights) / sum(weights)
+
+    def per_draw(fn, n) -> float:
+        started = time.perf_counter()
+        fn()
+        return round(1e9 * (time.perf_counter() - started) / n, 1)
+
+    results = {
+        "random.choices": per_draw(lambda: [rng.choices(values, weights)[0] for _ in range(draws)], draws),
+        "AliasTable.draw": per_draw(lambda: [table.draw(rng) for _ in range(draws)], draws),
+    }
+    for size in (1, 1000, 100_000):
+        calls = max(1, draws // size)
+        np_rng = np.random.default_rng(seed)
+        results[f"np.choice[{size}]"] = per_draw(
+            lambda: [np_rng.choice(values, size=size, p=p) for _ in range(calls)], calls * size)
+        results[f"AliasTable.sample[{size}]"] = per_draw(
+            lambda: [table.sample(np_rng, size) for _ in range(calls)], calls * size)
+    # Empirical frequencies of the draws, as a check on the table
+    sample = table.sample(np.random.default_rng(seed), 1_000_000)
+    results["max_frequency_error"] = round(float(max(abs((sample == v).mean() - w) for v, w in zip(values, p))), 5)
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(benchmark(), indent=2))
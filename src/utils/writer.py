@@ -0,0 +1,140 @@
+# Pipelined SQLite writer: one thread owns the connection's writes, fed through a bounded queue.
+#
+# Generation code submits jobs (callables taking the connection), usually a
+# batch of row inserts plus the checkpoint and commit that go with it. The
+# writer thread runs them in submission order while the producer goes on
+# generating, so CPU work and page writes overlap; sqlite3 releases the GIL
+# while SQLite steps. The queue holds at most ``max_pending`` jobs, so a
+# producer that outruns the disk blocks instead of buffering the whole build
+# in memory. A failed job rolls back its transaction, stops the writer and is
+# re-raised in the producer as WriterError on its next submit or flush.
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable
+
+_STOP = object()
+
+
+class WriterError(RuntimeError):
+    """A queued write failed; the original exception is the ``__cause__``."""
+
+
+class PipelinedWriter:
+    """Runs write jobs on a dedicated thread (``max_pending=0`` runs them inline instead).
+
+    The connection must allow use from another thread (``check_same_thread=False``)
+    and the producer must not touch it between ``submit`` and ``flush``.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, max_pending: int = 4):
+        self.conn = conn
+        self.max_pending = max_pending
+        self.started = time.perf_counter()
+        self._counters = {"jobs": 0, "rows": 0, "busy_s": 0.0, "cpu_s": 0.0, "wait_s": 0.0,
+                          "depth_sum": 0, "depth_max": 0}
+        self._error = None
+        self._thread = None
+        if max_pending > 0:
+            self._queue = queue.Queue(maxsize=max_pending)
+            self._thread = threading.Thread(target=self._loop, name="sqlite-writer", daemon=True)
+            self._thread.start()
+
+    # -- producer side ------------------------------------------------------
+
+    def submit(self, job: Callable, rows: int = 0):
+        """Queue ``job(conn)``; blocks while ``max_pending`` jobs are already waiting."""
+        self._raise_error()
+        if self._thread is None:
+            self._run(job, rows)
+            self._raise_error()
+            return
+        depth = self._queue.qsize()
+        self._counters["depth_sum"] += depth
+        self._counters["depth_max"] = max(self._counters["depth_max"], depth)
+        wait0 = time.perf_counter()
+        self._queue.put((job, rows))
+        self._counters["wait_s"] += time.perf_counter() - wait0
+
+    def flush(self):
+        """Block until every submitted job has run; raises WriterError if one failed."""
+        if self._thread is not None:
+            wait0 = time.perf_counter()
+            self._queue.join()
+            self._counters["wait_s"] += time.perf_counter() - wait0
+        self._raise_error()
+
+    def close(self):
+        """Finish queued jobs and stop the thread; raises WriterError if one failed."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put((_STOP, 0))
+            self._thread.join()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.close()
+        except WriterError:
+            if exc_type is None:
+                raise
+        return False
+
+    def snapshot(self) -> dict:
+        return {**self._counters, "t": time.perf_counter()}
+
+    def stats(self, since: dict = None) -> dict:
+        """Jobs, rows, writer busy share and queue depth, overall or since a ``snapshot()``."""
+        now = self.snapshot()
+        base = since or {"jobs": 0, "rows": 0, "busy_s": 0.0, "cpu_s": 0.0, "wait_s": 0.0, "depth_sum": 0,
+                         "t": self.started}
+        jobs = now["jobs"] - base["jobs"]
+        wall = now["t"] - base["t"]
+        busy = now["busy_s"] - base["busy_s"]
+        return {
+            "jobs": jobs,
+            "rows": now["rows"] - base["rows"],
+            "busy_s": round(busy, 4),
+            "busy_pct": round(100 * busy / wall, 1) if wall > 0 else 0.0,
+            # CPU the writer itself used; busy time beyond it is disk waits and GIL hand-offs
+            "cpu_s": round(now["cpu_s"] - base["cpu_s"], 4),
+            # Time the producer spent blocked on a full queue or waiting for a flush
+            "producer_wait_s": round(now["wait_s"] - base["wait_s"], 4),
+            "queue_depth_mean": round((now["depth_sum"] - base["depth_sum"]) / jobs, 2) if jobs else 0.0,
+            "queue_depth_max": now["depth_max"],
+            "max_pending": self.max_pending,
+        }
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise WriterError(f"SQLite writer failed: {self._error!r}") from self._error
+
+    # -- writer side ----------------------------------------------------------
+
+    def _run(self, job: Callable, rows: int):
+        busy0, cpu0 = time.perf_counter(), time.thread_time()
+        try:
+            job(self.conn)
+        except BaseException as exc:
+            self._error = exc
+            self.conn.rollback()
+        finally:
+            self._counters["busy_s"] += time.perf_counter() - busy0
+            self._counters["cpu_s"] += time.thread_time() - cpu0
+            self._counters["jobs"] += 1
+            self._counters["rows"] += rows
+
+    def _loop(self):
+        while True:
+            job, rows = self._queue.get()
+            try:
+                if job is _STOP:
+                    return
+                # After a failure, queued jobs are dropped so blocked producers wake up
+                if self._error is None:
+                    self._run(job, rows)
+            finally:
+                self._queue.task_done()
@@ -5,17 +5,112 @@ Checks:
 - Referential integrity via simple FK checks
 - Basic distribution stats (unassigned tasks %, completion rate by project_type)
 - Edge cases (overdue tasks, weekend dates, archived projects)
+- The CSR adjacency sidecar, when one exists: freshness, edge counts and degrees
+- The collaboration graph, when one exists: freshness and agreement with its tables
+
+Given a partitioned layout directory (src/storage/partitions.py) instead, it
+checks the layout as a whole and runs the checks above on every partition,
+with core attached, in parallel processes (--jobs). It prints one line per
+partition; --verbose prints each partition's full report.
 """
+import argparse
+import io
 import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from pathlib import Path
 import os
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.generators.params import TEAM_SIZE
+from src.storage import sidecar_dir
+
+
+def check_adjacency(conn: sqlite3.Connection, db_path: str) -> list:
+    """Check the adjacency sidecar against the DB; returns issues found."""
+    print("\n🧭 ADJACENCY SIDECAR:")
+    if not sidecar_dir(db_path, "adjacency").exists():
+        print("  - None (build with: python src/storage/adjacency.py build <db>)")
+        return []
+    # Imported only when there is a sidecar: NumPy is most of the validator's start-up time
+    import numpy as np
+    from src.storage.adjacency import RELATIONS, is_stale, load_adjacency
+
+    if is_stale(conn, db_path):
+        print("  ✗ Sidecar is stale: the DB changed after it was built")
+        return ["❌ Adjacency sidecar is stale (rebuild with src/storage/adjacency.py build)"]
+    index = load_adjacency(db_path)
+    issues = []
+    for name, (table, key, _, _) in RELATIONS.items():
+        expected = conn.execute(f"SELECT COUNT({key}) FROM {table}").fetchone()[0]
+        edges = len(index[name].values)
+        if edges != expected:
+            issues.append(f"❌ Adjacency {name} has {edges:,} edges, DB has {expected:,}")
+        print(f"  {'✓' if edges == expected else '✗'} {name}: {edges:,} edges")
+
+    # Degree checks are whole-array operations on the mapped offsets
+    team_ids = np.array([r[0] for r in conn.execute("SELECT id FROM teams")], dtype=np.int64)
+    project_ids = np.array([r[0] for r in conn.execute("SELECT id FROM projects")], dtype=np.int64)
+    sizes = index["team_members"].degrees()[team_ids[team_ids < len(index["team_members"])]]
+    lo, hi = TEAM_SIZE
+    off = int(np.count_nonzero((sizes < lo) | (sizes > hi))) + int(len(team_ids) - len(sizes))
+    print(f"  {'✓' if off == 0 else '✗'} Teams outside {lo}-{hi} members: {off}")
+    for name, label in (("project_sections", "sections"), ("project_tasks", "tasks")):
+        csr = index[name]
+        known = project_ids[project_ids < len(csr)]
+        empty = int(np.count_nonzero(csr.degrees()[known] == 0)) + int(len(project_ids) - len(known))
+        print(f"  {'✓' if empty == 0 else '⚠'} Projects without {label}: {empty}")
+    return issues
+
+
+def check_collaboration(conn: sqlite3.Connection, db_path: str) -> list:
+    """Check the collaboration graph sidecar against the DB and its tables; returns issues found."""
+    print("\n🤝 COLLABORATION GRAPH:")
+    if not sidecar_dir(db_path, "collaboration").exists():
+        print("  - None (build with: python src/storage/collaboration.py build <db>)")
+        return []
+    import numpy as np
+    from src.storage.collaboration import has_tables, is_stale, load_features, load_matrix
+
+    if is_stale(conn, db_path):
+        print("  ✗ Graph is stale: the DB changed after it was built")
+        return ["❌ Collaboration graph is stale (rebuild with src/storage/collaboration.py build)"]
+    if not has_tables(conn):
+        print("  ✗ Sidecar without user_collaboration / user_collaborators tables")
+        return ["❌ Collaboration tables are missing (rebuild with src/storage/collaboration.py build)"]
+    issues = []
+    features = load_features(db_path)
+    users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    rows = conn.execute("SELECT COUNT(*) FROM user_collaboration").fetchone()[0]
+    pairs = conn.execute("SELECT COUNT(*) FROM user_collaborators").fetchone()[0]
+    top_k = load_matrix(db_path, "top_k")
+    print(f"  {'✓' if rows == users else '✗'} user_collaboration: {rows:,} rows for {users:,} users")
+    print(f"  {'✓' if pairs == top_k.nnz else '✗'} user_collaborators: {pairs:,} pairs")
+    if rows != users:
+        issues.append(f"❌ user_collaboration has {rows:,} rows, DB has {users:,} users")
+    if pairs != top_k.nnz:
+        issues.append(f"❌ user_collaborators has {pairs:,} pairs, sidecar has {top_k.nnz:,}")
+    # Every weight counts both directions, so the matrix must equal its transpose
+    graph = load_matrix(db_path, "collaboration")
+    one_way = int(np.count_nonzero(graph.get(graph.indices, graph.row_ids()) != graph.data))
+    print(f"  {'✓' if one_way == 0 else '✗'} Collaboration weights without a matching reverse weight: {one_way:,}")
+    if one_way:
+        issues.append(f"❌ Collaboration matrix is not symmetric ({one_way:,} entries)")
+    degrees = features["collaborators"][features["collaborators"] > 0]
+    print(f"  ✓ Users with collaborators: {len(degrees):,}, median {np.median(degrees) if len(degrees) else 0:g}")
+    return issues
+
 
-def run_checks(db_path: str):
+def run_checks(db_path: str, core: str = None) -> list:
+    """Print the report for one DB and return its issues; ``core`` is attached for a partition."""
     if not Path(db_path).exists():
         raise FileNotFoundError(f"DB not found at {db_path}")
 
     conn = sqlite3.connect(db_path)
+    if core:
+        from src.access.pool import readonly_uri
+        conn.execute("ATTACH DATABASE ? AS core", (readonly_uri(core),))
     cur = conn.cursor()
 
     print("=" * 60)
@@ -46,6 +141,11 @@ def run_checks(db_path: str):
     bad_proj = cur.fetchone()[0]
     print(f"  {'✓' if bad_proj == 0 else '✗'} Tasks with missing project references: {bad_proj}")
 
+    # Emails identify users
+    cur.execute("SELECT COUNT(*) - COUNT(DISTINCT email) FROM users")
+    dup_emails = cur.fetchone()[0]
+    print(f"  {'✓' if dup_emails == 0 else '✗'} Duplicate user emails: {dup_emails}")
+
     # Team memberships integrity
     cur.execute("SELECT COUNT(*) FROM team_memberships WHERE team_id NOT IN (SELECT id FROM teams)")
     bad_team = cur.fetchone()[0]
@@ -135,6 +235,10 @@ def run_checks(db_path: str):
         pct = (cnt / total_tasks * 100) if total_tasks else 0
         print(f"    {day_name}: {cnt:,} ({pct:.1f}%)")
 
+    # Sidecars belong to the single-file DB; partitions have none
+    adjacency_issues = [] if core else check_adjacency(conn, db_path)
+    collaboration_issues = [] if core else check_collaboration(conn, db_path)
+
     print("\n" + "=" * 60)
     
     # Overall assessment
@@ -150,8 +254,12 @@ def run_checks(db_path: str):
         issues.append("❌ custom_field_defs table is empty")
     if overdue == 0:
         issues.append("❌ No overdue tasks found")
+    if dup_emails:
+        issues.append(f"❌ {dup_emails} duplicate user emails")
     if weekend_pct > 20:
         issues.append(f"❌ Too many weekend due dates ({weekend_pct:.1f}%)")
+    issues.extend(adjacency_issues)
+    issues.extend(collaboration_issues)
     
     if issues:
         print("ISSUES FOUND:")
@@ -165,8 +273,99 @@ def run_checks(db_path: str):
     print("=" * 60)
 
     conn.close()
+    return issues
+
+
+def _check_partition(path: str, core: str, rows: dict) -> tuple:
+    """One partition's issues and captured report; runs in a worker process."""
+    output = io.StringIO()
+    with redirect_stdout(output):
+        issues = run_checks(path, core)
+    conn = sqlite3.connect(path)
+    for table, expected in rows.items():
+        n = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        if n != expected:
+            issues.append(f"❌ {table} has {n:,} rows, layout.json records {expected:,}")
+    broken = conn.execute("PRAGMA foreign_key_check").fetchall()
+    conn.close()
+    if broken:
+        tables = sorted({table for table, *_ in broken})
+        issues.append(f"❌ {len(broken):,} rows break foreign keys within the partition ({', '.join(tables)})")
+    return issues, output.getvalue()
+
+
+def run_layout_checks(layout_dir: str, jobs: int = None, verbose: bool = False) -> list:
+    """Check a partitioned layout and each of its partitions; returns all issues."""
+    from src.storage.partitions import check_rows, is_stale, load_layout
+
+    layout_dir = Path(layout_dir)
+    layout = load_layout(layout_dir)
+    core = layout_dir / layout["core"]["file"]
+
+    print("=" * 60)
+    print("PARTITIONED LAYOUT VALIDATION")
+    print("=" * 60)
+
+    issues = []
+    print("\n🗂  LAYOUT:")
+    source = layout_dir.parent / layout["source"]
+    if source.exists():
+        conn = sqlite3.connect(source)
+        stale = is_stale(conn, source)
+        conn.close()
+        print(f"  {'✗' if stale else '✓'} Source {layout['source']} {'changed since the split' if stale else 'matches the split'}")
+        if stale:
+            issues.append("❌ Layout is stale (split again with src/storage/partitions.py)")
+    else:
+        print(f"  - Source {layout['source']} not found; freshness not checked")
+    mismatched = check_rows(layout)
+    print(f"  {'✓' if not mismatched else '✗'} Tables whose rows differ from the source: {len(mismatched)}")
+    for table, expected, counted in mismatched:
+        issues.append(f"❌ {table} has {counted:,} rows across the layout, source had {expected:,}")
+    conn = sqlite3.connect(core)
+    team_ids = [r[0] for r in conn.execute("SELECT id FROM teams ORDER BY id")]
+    conn.close()
+    placed = [team for part in layout["partitions"] for team in part["teams"]]
+    coverage = sorted(placed) == team_ids
+    print(f"  {'✓' if coverage else '✗'} Teams placed in exactly one partition: {len(set(placed)):,} / {len(team_ids):,}")
+    if not coverage:
+        issues.append("❌ Teams are missing from the layout or placed twice")
+
+    print(f"\n🧩 PARTITIONS ({len(layout['partitions'])}):")
+    paths = [str(layout_dir / part["file"]) for part in layout["partitions"]]
+    with ProcessPoolExecutor(jobs) as pool:
+        results = list(pool.map(_check_partition, paths, [str(core)] * len(paths),
+                                [part["rows"] for part in layout["partitions"]]))
+    for part, (part_issues, report) in zip(layout["partitions"], results):
+        print(f"  {'✓' if not part_issues else '✗'} {part['file']}: {len(part['teams'])} teams, "
+              f"{sum(part['rows'].values()):,} rows, {len(part_issues)} issues")
+        for issue in part_issues:
+            print(f"      {issue}")
+        issues.extend(f"{part['file']}: {issue}" for issue in part_issues)
+        if verbose:
+            print(report)
+
+    print("\n" + "=" * 60)
+    if issues:
+        print(f"⚠️  Layout has {len(issues)} issues that need fixing")
+    else:
+        print("✅ ALL CHECKS PASSED")
+    print("=" * 60)
+    return issues
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate a generated Asana simulation DB.")
+    parser.add_argument("db", nargs="?", default=os.getenv("OUTPUT_DB", "output/asana_simulation.sqlite"),
+                        help="DB or partitioned layout directory to check (env: OUTPUT_DB)")
+    parser.add_argument("--jobs", type=int, help="Partitions checked in parallel (default: CPU count)")
+    parser.add_argument("--verbose", action="store_true", help="Print each partition's full report")
+    args = parser.parse_args(argv)
+    if Path(args.db).is_dir():
+        run_layout_checks(args.db, args.jobs, args.verbose)
+    else:
+        run_checks(args.db)
 
 
 if __name__ == '__main__':
-    db = os.getenv('OUTPUT_DB', 'output/asana_simulation.sqlite')
-    run_checks(db)
+    main()